@@ -0,0 +1,669 @@
+#!/usr/bin/env python3
+# 离线数据分析
+# DataAnalyticsSystem 的报表（用户行为、销售业绩、NPS、12个月收入预测）原来在浏览器里用示例数据现算。
+# 这里改成批处理：流式读取埋点事件、交易记录和CRM导出（CSV 或 JSONL，可以是 .gz），
+# 按天汇总到 analytics/ 下的分区文件，再由分区算出各个时间段的指标，写成一个紧凑的
+# data/analytics.json，模块加载这个文件后直接使用，不再自己计算。
+#
+# 导出文件按表头（JSONL 按第一条记录的字段）识别:
+#     事件  userId, timestamp[, action, duration]      duration 为秒
+#     交易  transactionId, customerId, amount, date[, type]   type 为 expense 或金额为负时记为支出
+#     CRM   customerId, signupDate[, npsScore]         同一客户以最后一条为准
+# 时间使用 ISO 格式（2024-01-29 或 2024-01-29T10:00:00Z），只取日期部分。
+#
+# 一个用户一天内的事件算一次会话，只有一个事件的会话算跳出。每天的分区记录每个用户的事件数，
+# 所以任意时间段的活跃用户、新用户都是精确值，补传的旧数据也能直接合并。
+# 增量追加：已经处理过的文件（按路径）会跳过，每天只需要传入新的导出文件。
+# 交易按 transactionId 去重（每天的分区记录当天的交易ID），重叠或换了路径重新导出的交易不会重复计数。
+# 分区和 state.json 一起提交：新分区先写成 .pending，state.json 记录待替换的日期后再逐个替换，
+# 中途中断时下次启动继续完成替换，不会把同一批文件处理两次。
+#
+# 用法:
+#     python analytics_pipeline.py ingest exports/2024-01-29/*.csv      # 追加数据并重新生成 data/analytics.json
+#     python analytics_pipeline.py build                                 # 只重新生成
+#     python analytics_pipeline.py sample exports --events 1000000 --days 30
+#     python analytics_pipeline.py bench --events 10000000
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sitecache import CACHE_DIR
+
+STATE_DIR = 'analytics'
+DASHBOARD = os.path.join('data', 'analytics.json')
+BENCH_DIR = os.path.join(CACHE_DIR, 'analytics-bench')
+DASHBOARD_VERSION = 1
+WINDOWS = {'last7': 7, 'last30': 30, 'last90': 90}
+HISTORY_MONTHS = 12     # 输出的月度时间段，也是收入预测使用的历史长度
+FORECAST_MONTHS = 12
+SERIES_DAYS = 90        # 按天的曲线保留的天数
+PROMOTER_SCORE = 9      # NPS: 9~10 为推荐者，0~6 为贬损者
+DETRACTOR_SCORE = 6
+
+EVENT_FIELDS = ('userId', 'timestamp')
+TRANSACTION_FIELDS = ('transactionId', 'customerId', 'amount', 'date')
+CRM_FIELDS = ('customerId', 'signupDate')
+
+
+def _write_json(path, value):
+    """原子写入紧凑JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _valid_day(key):
+    try:
+        return len(key) == 10 and date.fromisoformat(key) is not None
+    except ValueError:
+        return False
+
+
+class DayAggregate:
+    """一天的汇总：每个用户的事件数、停留时间合计和交易"""
+
+    def __init__(self):
+        self.users = {}        # 用户 -> 事件数
+        self.duration = 0.0    # 秒
+        self.income = 0.0
+        self.expenses = 0.0
+        self.transactions = 0
+        self.transaction_ids = set()
+        self.buyers = {}       # 客户 -> 消费金额
+
+    @property
+    def events(self):
+        return sum(self.users.values())
+
+    @property
+    def bounces(self):
+        return sum(1 for count in self.users.values() if count == 1)
+
+    def merge(self, other):
+        users = self.users
+        for user, count in other.users.items():
+            users[user] = users.get(user, 0) + count
+        for customer, amount in other.buyers.items():
+            self.buyers[customer] = self.buyers.get(customer, 0.0) + amount
+        self.duration += other.duration
+        self.income += other.income
+        self.expenses += other.expenses
+        self.transactions += other.transactions
+        self.transaction_ids |= other.transaction_ids
+        return self
+
+    def to_dict(self):
+        return {'users': self.users, 'duration': self.duration, 'income': self.income,
+                'expenses': self.expenses, 'transactions': self.transactions,
+                'transactionIds': sorted(self.transaction_ids), 'buyers': self.buyers}
+
+    @classmethod
+    def from_dict(cls, data):
+        day = cls()
+        day.users = data['users']
+        day.duration = data['duration']
+        day.income = data['income']
+        day.expenses = data['expenses']
+        day.transactions = data['transactions']
+        day.transaction_ids = set(data.get('transactionIds', ()))
+        day.buyers = data['buyers']
+        return day
+
+
+def _open_rows(path):
+    """返回 (字段 -> 下标或键, 行迭代器, 文件对象)"""
+    f = gzip.open(path, 'rt', encoding='utf-8', newline='') if path.endswith('.gz') else \
+        open(path, 'r', encoding='utf-8', newline='')
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.ndjson')):
+        first = f.readline()
+        if not first.strip():
+            return {}, iter(()), f
+        record = json.loads(first)
+        rows = (json.loads(line) for line in f if line.strip())
+        return {key: key for key in record}, _chain(record, rows), f
+    reader = csv.reader(f)
+    header = next(reader, [])
+    return {key.strip(): i for i, key in enumerate(header)}, reader, f
+
+
+def _chain(first, rows):
+    yield first
+    yield from rows
+
+
+def export_kind(columns):
+    if all(field in columns for field in EVENT_FIELDS):
+        return 'events'
+    if all(field in columns for field in TRANSACTION_FIELDS):
+        return 'transactions'
+    if all(field in columns for field in CRM_FIELDS):
+        return 'crm'
+    return None
+
+
+def read_events(rows, columns, days):
+    """把事件累加进 days（日期 -> DayAggregate），返回 (事件数, 无效行数)
+
+    这是整个流程中最热的循环：同一天的事件通常连续出现，日期不变时只更新局部变量。
+    """
+    iu, it, idur = columns['userId'], columns['timestamp'], columns.get('duration')
+    accepted = rejected = 0
+    key = day = counts = None
+    duration = 0.0
+    for row in rows:
+        try:
+            user = row[iu]
+            stamp = row[it][:10]
+            seconds = float(row[idur] or 0) if idur is not None else 0.0
+        except (IndexError, KeyError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if stamp != key:
+            if day is not None:
+                day.duration += duration
+            key = stamp
+            day = days.get(key)
+            if day is None:
+                day = days[key] = DayAggregate()
+            counts = day.users
+            duration = 0.0
+        counts[user] = counts.get(user, 0) + 1
+        duration += seconds
+        accepted += 1
+    if day is not None:
+        day.duration += duration
+    return accepted, rejected
+
+
+def read_transactions(rows, columns, days, known=None):
+    """把交易累加进 days，返回 (交易数, 无效行数, 重复的交易数)
+
+    known(日期) 返回之前已经记入该日期的交易ID；同一个 transactionId 只计一次。
+    """
+    itx, ic, ia, idate = columns['transactionId'], columns['customerId'], columns['amount'], columns['date']
+    itype = columns.get('type')
+    accepted = rejected = duplicates = 0
+    for row in rows:
+        try:
+            transaction = row[itx]
+            customer = row[ic]
+            amount = float(row[ia])
+            key = row[idate][:10]
+            kind = row[itype] if itype is not None else ''
+        except (IndexError, KeyError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if transaction in (None, ''):
+            rejected += 1
+            continue
+        transaction = str(transaction)
+        day = days.get(key)
+        if day is None:
+            day = days[key] = DayAggregate()
+        if transaction in day.transaction_ids or (known is not None and transaction in known(key)):
+            duplicates += 1
+            continue
+        day.transaction_ids.add(transaction)
+        day.transactions += 1
+        if kind == 'expense' or amount < 0:
+            day.expenses += abs(amount)
+        else:
+            day.income += amount
+            day.buyers[customer] = day.buyers.get(customer, 0.0) + amount
+        accepted += 1
+    return accepted, rejected, duplicates
+
+
+def read_crm(rows, columns, crm):
+    """客户的注册日期和 NPS 评分记入 crm（客户 -> [注册日期, 评分]）；返回 (记录数, 无效行数)"""
+    ic, isignup, iscore = columns['customerId'], columns['signupDate'], columns.get('npsScore')
+    accepted = rejected = 0
+    for row in rows:
+        try:
+            customer = row[ic]
+            signup = row[isignup][:10]
+            raw = row[iscore] if iscore is not None else None
+            score = int(float(raw)) if raw not in (None, '') else None
+        except (IndexError, KeyError, TypeError, ValueError):
+            rejected += 1
+            continue
+        if score is not None and not 0 <= score <= 10:
+            rejected += 1
+            continue
+        previous = crm.get(customer)
+        if score is None and previous:
+            score = previous[1]
+        crm[customer] = [signup, score]
+        accepted += 1
+    return accepted, rejected
+
+
+class AnalyticsState:
+    """analytics/ 下的分区：days/<日期>.json 每天一个，state.json 记录已处理的文件和首次出现日期"""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = state_dir
+        self.days_dir = os.path.join(state_dir, 'days')
+        path = os.path.join(state_dir, 'state.json')
+        data = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        self.ingested = data.get('ingested', {})    # 路径 -> [大小, 修改时间]
+        self.first_seen = data.get('firstSeen', {})  # 用户 -> 第一次出现的日期
+        self.customers = data.get('customers', {})   # 客户 -> 第一次出现的日期（注册或首次消费）
+        self.crm = data.get('crm', {})
+        self._days = {}
+        if data.get('pending'):
+            self._replace_pending(data['pending'])
+
+    def _day_path(self, key):
+        return os.path.join(self.days_dir, key + '.json')
+
+    def _replace_pending(self, keys):
+        """把已经提交（记入 state.json）的 .pending 分区换成正式分区"""
+        for key in keys:
+            staged = self._day_path(key) + '.pending'
+            if os.path.exists(staged):
+                os.replace(staged, self._day_path(key))
+        self.save()
+
+    def day_keys(self):
+        if not os.path.isdir(self.days_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.days_dir) if name.endswith('.json'))
+
+    def day(self, key):
+        """读取一天的分区（缓存在内存中），没有数据时返回空汇总"""
+        if key not in self._days:
+            path = self._day_path(key)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._days[key] = DayAggregate.from_dict(json.load(f))
+            else:
+                self._days[key] = DayAggregate()
+        return self._days[key]
+
+    def save(self, pending=()):
+        """写入 state.json；pending 为已经写成 .pending、尚待替换的日期"""
+        _write_json(os.path.join(self.state_dir, 'state.json'), {
+            'ingested': self.ingested, 'firstSeen': self.first_seen,
+            'customers': self.customers, 'crm': self.crm, 'pending': list(pending)})
+
+    def ingest(self, paths):
+        """处理还没处理过的导出文件，合并进日期分区；返回报告"""
+        started = time.perf_counter()
+        report = {'files': [], 'skipped': [], 'changed': [], 'unknown': [],
+                  'events': 0, 'transactions': 0, 'duplicates': 0, 'customers': 0, 'rejected': 0}
+        batch = {}
+
+        def known(day):
+            return self.day(day).transaction_ids if _valid_day(day) else ()
+
+        for path in paths:
+            key = os.path.abspath(path)
+            st = os.stat(path)
+            if key in self.ingested:
+                # 追加式导出文件处理过后不应再变化，重新处理会重复计数
+                if self.ingested[key] != [st.st_size, st.st_mtime_ns]:
+                    report['changed'].append(path)
+                else:
+                    report['skipped'].append(path)
+                continue
+            columns, rows, f = _open_rows(path)
+            with f:
+                kind = export_kind(columns)
+                if kind == 'events':
+                    accepted, rejected = read_events(rows, columns, batch)
+                    report['events'] += accepted
+                elif kind == 'transactions':
+                    accepted, rejected, duplicates = read_transactions(rows, columns, batch, known)
+                    report['transactions'] += accepted
+                    report['duplicates'] += duplicates
+                elif kind == 'crm':
+                    accepted, rejected = read_crm(rows, columns, self.crm)
+                    report['customers'] += accepted
+                else:
+                    report['unknown'].append(path)
+                    continue
+            report['rejected'] += rejected
+            self.ingested[key] = [st.st_size, st.st_mtime_ns]
+            report['files'].append(path)
+        parsed = time.perf_counter()
+
+        for customer, (signup, _) in self.crm.items():
+            if _valid_day(signup) and (customer not in self.customers or signup < self.customers[customer]):
+                self.customers[customer] = signup
+        days = []
+        for key in sorted(batch):
+            aggregate = batch[key]
+            if not _valid_day(key):
+                report['rejected'] += aggregate.events + aggregate.transactions
+                continue
+            for seen, ids in ((self.first_seen, aggregate.users), (self.customers, aggregate.buyers)):
+                for item in ids:
+                    if item not in seen or key < seen[item]:
+                        seen[item] = key
+            merged = self.day(key).merge(aggregate)
+            _write_json(self._day_path(key) + '.pending', merged.to_dict())
+            days.append(key)
+        # state.json 是提交点：之前中断时什么都没有记录，之后中断时下次启动完成替换
+        self.save(days)
+        self._replace_pending(days)
+        report['days'] = days
+        report['seconds'] = {'parse': parsed - started, 'total': time.perf_counter() - started}
+        return report
+
+
+def _growth(current, previous):
+    if current is None or not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def _days_between(start, end):
+    day = date.fromisoformat(start)
+    last = date.fromisoformat(end)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def _summarize(state, start, end):
+    """一个时间段的原始合计"""
+    active = set()
+    buyers = set()
+    sessions = bounces = 0
+    duration = income = expenses = 0.0
+    for key in _days_between(start, end):
+        day = state.day(key)
+        active.update(day.users)
+        buyers.update(day.buyers)
+        sessions += len(day.users)
+        bounces += day.bounces
+        duration += day.duration
+        income += day.income
+        expenses += day.expenses
+    return {'active': active, 'buyers': buyers, 'sessions': sessions, 'bounces': bounces,
+            'duration': duration, 'income': income, 'expenses': expenses}
+
+
+def nps(crm):
+    """NPS 与回答人数；没有评分时为 (None, 0)"""
+    scores = [score for _, score in crm.values() if score is not None]
+    if not scores:
+        return None, 0
+    promoters = sum(1 for score in scores if score >= PROMOTER_SCORE)
+    detractors = sum(1 for score in scores if score <= DETRACTOR_SCORE)
+    return round((promoters - detractors) / len(scores) * 100), len(scores)
+
+
+def period_report(state, start, end, nps_score):
+    """与 analyzeUserBehavior / analyzeSalesPerformance 结构相同的指标，趋势与前一个等长时间段比较"""
+    length = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+    prev_end = (date.fromisoformat(start) - timedelta(days=1)).isoformat()
+    prev_start = (date.fromisoformat(start) - timedelta(days=length)).isoformat()
+    cur = _summarize(state, start, end)
+    prev = _summarize(state, prev_start, prev_end)
+
+    def avg_minutes(s):
+        return round(s['duration'] / s['sessions'] / 60, 1) if s['sessions'] else None
+
+    new_users = sum(1 for seen in state.first_seen.values() if start <= seen <= end)
+    behavior = {
+        'totalUsers': sum(1 for seen in state.first_seen.values() if seen <= end),
+        'activeUsers': len(cur['active']),
+        'newUsers': new_users,
+        'returningUsers': len(cur['active']) - new_users,
+        'avgSessionDuration': avg_minutes(cur),
+        'bounceRate': round(cur['bounces'] / cur['sessions'] * 100, 1) if cur['sessions'] else None,
+    }
+    trends = {
+        'userGrowth': _growth(len(cur['active']), len(prev['active'])),
+        'engagementGrowth': _growth(avg_minutes(cur), avg_minutes(prev)),
+        'revenueGrowth': _growth(cur['income'], prev['income']),
+    }
+    behavior['engagementGrowth'] = trends['engagementGrowth']
+    behavior['revenueGrowth'] = trends['revenueGrowth']
+
+    total_customers = sum(1 for seen in state.customers.values() if seen <= end)
+    retained = len(cur['buyers'] & prev['buyers'])
+    retention = round(retained / len(prev['buyers']) * 100, 1) if prev['buyers'] else None
+    income, expenses = round(cur['income'], 2), round(cur['expenses'], 2)
+    sales = {
+        'financial': {'income': income, 'expenses': expenses, 'netIncome': round(income - expenses, 2)},
+        'customer': {'totalCustomers': total_customers, 'customerRetentionRate': retention},
+        # 公式与 DataAnalyticsSystem.calculateSalesKPIs 相同
+        'kpis': {
+            'customerAcquisitionCost': round(expenses / total_customers, 2) if total_customers else 0,
+            'customerLifetimeValue': round(income / total_customers, 2) if total_customers else 0,
+            'monthlyRecurringRevenue': income,
+            'churnRate': round(100 - retention, 1) if retention is not None else None,
+            'netPromoterScore': nps_score,
+        },
+    }
+    return {'startDate': start, 'endDate': end, 'metrics': behavior, 'trends': trends, 'sales': sales}
+
+
+def _month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def forecast(monthly, months=FORECAST_MONTHS):
+    """按月净收入的对数线性最小二乘拟合（有非正值时改用线性拟合），预测之后 months 个月
+
+    置信度沿用模块原来的约定（85% 起每月递减 2%）。
+    """
+    values = [value for _, value in monthly]
+    n = len(values)
+    if n == 0:
+        return []
+    log_fit = n >= 2 and all(value > 0 for value in values)
+    ys = [math.log(value) for value in values] if log_fit else values
+    if n >= 2:
+        mean_x = (n - 1) / 2
+        mean_y = sum(ys) / n
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(ys)) / sum((x - mean_x) ** 2 for x in range(n))
+        intercept = mean_y - slope * mean_x
+    else:
+        slope, intercept = 0.0, ys[0]
+    result = []
+    for i in range(months):
+        y = intercept + slope * (n + i)
+        predicted = math.exp(y) if log_fit else max(y, 0.0)
+        result.append({'month': i + 1, 'predictedRevenue': round(predicted, 2), 'confidence': 85 - i * 2})
+    return result
+
+
+def build_dashboard(state, out_path=DASHBOARD):
+    """由分区算出各时间段的指标、按天曲线和收入预测，写到 out_path；返回写出的内容"""
+    started = time.perf_counter()
+    keys = [key for key in state.day_keys() if _valid_day(key)]
+    nps_score, responses = nps(state.crm)
+    dashboard = {'version': DASHBOARD_VERSION,
+                 'generatedAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                 'firstDay': keys[0] if keys else None, 'lastDay': keys[-1] if keys else None,
+                 'nps': {'score': nps_score, 'responses': responses},
+                 'periods': {}, 'months': {}, 'series': {}, 'forecast': []}
+    if keys:
+        last = date.fromisoformat(keys[-1])
+        for name, length in WINDOWS.items():
+            start = (last - timedelta(days=length - 1)).isoformat()
+            dashboard['periods'][name] = period_report(state, start, keys[-1], nps_score)
+
+        # 只用完整的月份做历史和预测
+        year, month = last.year, last.month
+        if _month_bounds(year, month)[1] != keys[-1]:
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        monthly = []
+        for _ in range(HISTORY_MONTHS):
+            start, end = _month_bounds(year, month)
+            if end < keys[0]:
+                break
+            report = period_report(state, start, end, nps_score)
+            dashboard['months'][start[:7]] = report
+            monthly.append((start[:7], report['sales']['financial']['netIncome']))
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        dashboard['forecast'] = forecast(list(reversed(monthly)))
+
+        # 按天曲线：列式存储，比对象数组小得多
+        series = {'date': [], 'activeUsers': [], 'avgSessionDuration': [], 'bounceRate': [], 'income': [], 'expenses': []}
+        first_series = max(date.fromisoformat(keys[0]), last - timedelta(days=SERIES_DAYS - 1)).isoformat()
+        for key in _days_between(first_series, keys[-1]):
+            day = state.day(key)
+            series['date'].append(key)
+            series['activeUsers'].append(len(day.users))
+            series['avgSessionDuration'].append(round(day.duration / len(day.users) / 60, 1) if day.users else None)
+            series['bounceRate'].append(round(day.bounces / len(day.users) * 100, 1) if day.users else None)
+            series['income'].append(round(day.income, 2))
+            series['expenses'].append(round(day.expenses, 2))
+        dashboard['series'] = series
+    _write_json(out_path, dashboard)
+    dashboard['seconds'] = time.perf_counter() - started
+    return dashboard
+
+
+def write_sample(directory, events, days=30, users=None, seed=42, start=date(2024, 1, 1)):
+    """生成示例导出：每天一个事件文件和交易文件，外加一个CRM文件；返回写出的文件"""
+    rng = random.Random(seed)
+    users = users or max(events // 100, 10)
+    customers = max(users // 10, 1)
+    actions = ('view', 'click', 'search', 'download', 'share')
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    per_day = events // days
+    for d in range(days):
+        key = (start + timedelta(days=d)).isoformat()
+        # 用户编号越小越活跃，交易金额随日期增长
+        count = per_day + (events - per_day * days if d == days - 1 else 0)
+        path = os.path.join(directory, f'events-{key}.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('userId,action,timestamp,duration\n')
+            buf = io.StringIO()
+            for i in range(count):
+                second = i * 86400 // count
+                user = int(users * rng.random() ** 2)
+                buf.write(f'u{user},{actions[i % 5]},{key}T{second // 3600:02d}:{second // 60 % 60:02d}:'
+                          f'{second % 60:02d}Z,{int(rng.expovariate(1 / 60))}\n')
+                if buf.tell() > 1 << 20:
+                    f.write(buf.getvalue())
+                    buf = io.StringIO()
+            f.write(buf.getvalue())
+        paths.append(path)
+        path = os.path.join(directory, f'transactions-{key}.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['transactionId', 'customerId', 'amount', 'date', 'type'])
+            for i in range(max(count // 200, 1)):
+                customer = int(customers * rng.random() ** 2)
+                writer.writerow([f't{d}-{i}', f'c{customer}', round(rng.uniform(10, 500) * (1 + d / days), 2), key,
+                                 'sale'])
+            writer.writerow([f't{d}-ads', '', round(rng.uniform(200, 400), 2), key, 'expense'])
+        paths.append(path)
+    path = os.path.join(directory, 'crm.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['customerId', 'signupDate', 'npsScore'])
+        for i in range(customers):
+            signup = start + timedelta(days=rng.randrange(days))
+            writer.writerow([f'c{i}', signup.isoformat(), rng.choice(range(11)) if rng.random() < 0.3 else ''])
+    paths.append(path)
+    return paths
+
+
+def print_report(report, dashboard):
+    if report:
+        print(f'处理 {len(report["files"])} 个文件（跳过已处理的 {len(report["skipped"])} 个）: '
+              f'事件 {report["events"]}，交易 {report["transactions"]}（重复 {report["duplicates"]}），'
+              f'客户 {report["customers"]}，无效行 {report["rejected"]}')
+        seconds = report['seconds']
+        if report['events']:
+            print(f'读取 {seconds["parse"]:.2f} s（{report["events"] / max(seconds["parse"], 1e-9) / 1e6:.2f} M 事件/秒），'
+                  f'合并分区 {seconds["total"] - seconds["parse"]:.2f} s')
+        for path in report['changed']:
+            print(f'警告: {path} 处理后又被修改，没有重新处理（重新处理会重复计数）')
+        for path in report['unknown']:
+            print(f'警告: 无法识别 {path} 的字段，跳过')
+    print(f'数据范围 {dashboard["firstDay"]} ~ {dashboard["lastDay"]}，NPS {dashboard["nps"]["score"]}'
+          f'（{dashboard["nps"]["responses"]} 份评分），生成报表 {dashboard["seconds"]:.2f} s')
+    for name, period in dashboard['periods'].items():
+        m, f = period['metrics'], period['sales']['financial']
+        print(f'{name:<8}活跃 {m["activeUsers"]:>8}  新用户 {m["newUsers"]:>7}  平均会话 {m["avgSessionDuration"]} 分钟  '
+              f'跳出率 {m["bounceRate"]}%  收入 {f["income"]:.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='离线计算数据分析报表')
+    parser.add_argument('--state', default=STATE_DIR, help='分区目录')
+    parser.add_argument('--out', default=DASHBOARD, help='报表文件')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help='追加导出文件并重新生成报表')
+    ingest.add_argument('paths', nargs='+', help='CSV/JSONL 导出文件（可以是 .gz）')
+    sub.add_parser('build', help='只重新生成报表')
+    sample = sub.add_parser('sample', help='生成示例导出文件')
+    sample.add_argument('directory')
+    sample.add_argument('--events', type=int, default=1000000)
+    sample.add_argument('--days', type=int, default=30)
+    sample.add_argument('--seed', type=int, default=42)
+    bench = sub.add_parser('bench', help='用示例数据测量完整流程')
+    bench.add_argument('--events', type=int, default=10000000)
+    bench.add_argument('--days', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    if args.command == 'sample':
+        paths = write_sample(args.directory, args.events, args.days, seed=args.seed)
+        print(f'写出 {len(paths)} 个文件到 {args.directory}/')
+        return 0
+    report = None
+    try:
+        if args.command == 'bench':
+            # 示例数据按参数缓存，重复测量时不用重新生成
+            data_dir = os.path.join(BENCH_DIR, f'{args.events}-{args.days}')
+            if not os.path.isdir(data_dir):
+                write_sample(data_dir + '.tmp', args.events, args.days)
+                os.replace(data_dir + '.tmp', data_dir)
+            state_dir = tempfile.mkdtemp(prefix='analytics-')
+            try:
+                started = time.perf_counter()
+                state = AnalyticsState(state_dir)
+                report = state.ingest(sorted(os.path.join(data_dir, name) for name in os.listdir(data_dir)))
+                dashboard = build_dashboard(state, os.path.join(state_dir, 'analytics.json'))
+                report['seconds']['pipeline'] = time.perf_counter() - started
+            finally:
+                shutil.rmtree(state_dir, ignore_errors=True)
+        else:
+            state = AnalyticsState(args.state)
+            if args.command == 'ingest':
+                report = state.ingest(args.paths)
+            dashboard = build_dashboard(state, args.out)
+    except (OSError, ValueError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps({'ingest': report, 'dashboard': dashboard}, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, dashboard)
+        if args.command == 'bench':
+            print(f'完整流程 {report["seconds"]["pipeline"]:.2f} s（{args.events} 个事件）')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,73 +1,75 @@
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+import sys
 
-# 配置Chrome选项
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # 无头模式运行
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
+import devserver
+from browser_harness import BrowserPool, run_page, session_factory
 
-# 启动浏览器
-driver = webdriver.Chrome(options=chrome_options)
+PAGE = "test_crossdomain_fix.html"
+TIMEOUT = 15
 
-try:
-    # 访问测试页面
-    print("正在访问测试页面...")
-    driver.get("http://localhost:8080/test_crossdomain_fix.html")
-    
-    # 等待页面加载
-    time.sleep(3)
-    
-    # 检查控制台日志
-    print("正在检查控制台日志...")
-    logs = driver.get_log("browser")
-    
-    # 分析日志
-    crossdomain_errors = []
-    for log in logs:
-        if log['level'] == 'SEVERE' and 'cross-origin' in log['message'].lower():
-            crossdomain_errors.append(log)
-    
-    # 打印结果
-    print("\n=== 跨域错误修复测试结果 ===")
-    if crossdomain_errors:
-        print("❌ 测试失败：发现跨域错误！")
-        for error in crossdomain_errors:
-            print(f"   错误：{error['message']}")
-    else:
-        print("✅ 测试通过：没有发现跨域错误！")
-    
-    # 打印所有日志（用于调试）
-    print("\n=== 所有控制台日志 ===")
-    for log in logs:
-        level = log['level']
-        message = log['message']
-        if level in ['SEVERE', 'WARNING']:
-            print(f"{level}: {message}")
-    
-    # 尝试重新加载iframe
-    print("\n正在尝试重新加载iframe...")
-    reload_button = driver.find_element(By.XPATH, "//button[text()='重新加载iframe']")
-    reload_button.click()
-    time.sleep(2)
-    
-    # 再次检查日志
-    new_logs = driver.get_log("browser")
-    new_crossdomain_errors = []
-    for log in new_logs:
-        if log['level'] == 'SEVERE' and 'cross-origin' in log['message'].lower():
-            new_crossdomain_errors.append(log)
-    
-    if new_crossdomain_errors:
-        print("❌ 重新加载iframe后发现跨域错误！")
-        for error in new_crossdomain_errors:
-            print(f"   错误：{error['message']}")
-    else:
-        print("✅ 重新加载iframe后没有发现跨域错误！")
-        
-finally:
-    # 关闭浏览器
-    driver.quit()
-    print("\n测试完成，浏览器已关闭。")
+
+def crossdomain_errors(logs):
+    return [log for log in logs if log['level'] == 'error' and 'cross-origin' in log['message'].lower()]
+
+
+def main():
+    # 跨域错误只有执行页面脚本才会出现；没有安装 selenium 时的替身不执行JS，无法测试
+    driver, factory = session_factory('auto')
+    print(f"使用驱动: {driver}")
+    if driver == 'local':
+        print("⚠️ 测试跳过：未安装 selenium/Chrome，替身浏览器不执行JS，无法检查跨域错误", file=sys.stderr)
+        return 2
+
+    # 启动本地服务器和浏览器
+    server, base_url = devserver.start_in_thread('.')
+
+    failed = False
+    try:
+        with BrowserPool(factory, size=1) as pool, pool.session() as session:
+            # 访问测试页面，等待页面就绪而不是固定等待
+            print("正在访问测试页面...")
+            result = run_page(session, base_url + PAGE, TIMEOUT)
+
+            # 分析日志
+            print("正在检查控制台日志...")
+            errors = crossdomain_errors(result['console'])
+
+            # 打印结果
+            print("\n=== 跨域错误修复测试结果 ===")
+            if errors:
+                failed = True
+                print("❌ 测试失败：发现跨域错误！")
+                for error in errors:
+                    print(f"   错误：{error['message']}")
+            else:
+                print("✅ 测试通过：没有发现跨域错误！")
+
+            # 打印所有日志（用于调试）
+            print("\n=== 所有控制台日志 ===")
+            for log in result['console']:
+                if log['level'] in ('error', 'warning'):
+                    print(f"{log['level']}: {log['message']}")
+
+            # 尝试重新加载iframe
+            print("\n正在尝试重新加载iframe...")
+            if not session.click('重新加载iframe'):
+                print("⚠️ 没有找到“重新加载iframe”按钮")
+            session.wait_ready(TIMEOUT)
+
+            # 再次检查日志
+            new_errors = crossdomain_errors(session.console())
+            if new_errors:
+                failed = True
+                print("❌ 重新加载iframe后发现跨域错误！")
+                for error in new_errors:
+                    print(f"   错误：{error['message']}")
+            else:
+                print("✅ 重新加载iframe后没有发现跨域错误！")
+    finally:
+        server.shutdown()
+        server.server_close()
+        print("\n测试完成，浏览器已关闭。")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
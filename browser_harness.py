@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# 无头浏览器测试工具
+# 维护一组预热好的无头浏览器会话，并行打开多个页面；
+# 用 document.readyState、资源数量稳定和页面自己的就绪标记（window.__testReady）判断加载完成，
+# 不再固定 sleep。每个页面收集控制台错误、导航计时和资源计时，汇总成一份报告。
+#
+# 没有安装 Chrome/selenium 时可以用 --driver local：
+# 这个替身只用HTTP抓取页面和它引用的本地资源，不执行JS，
+# 资源加载失败会像浏览器一样记成控制台错误。
+#
+# 用法:
+#     python browser_harness.py                          # 测试所有 test_*.html
+#     python browser_harness.py index.html --jobs 2 --json
+#     python browser_harness.py --driver local --ready-selector "#app"
+
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import unquote, urljoin, urlsplit
+
+import devserver
+from html_tokenizer import STARTTAG, attr, tokenize_string
+from performance_test import failed, fetch, local_asset_urls, percentile
+
+DEFAULT_PATTERN = 'test_*.html'
+DEFAULT_TIMEOUT = 15.0
+POLL_INTERVAL = 0.05
+# 资源数量连续这么多次轮询不变才算网络空闲
+QUIET_POLLS = 3
+
+READY_JS = """
+return [document.readyState,
+        window.__testReady === undefined ? null : !!window.__testReady,
+        performance.getEntriesByType('resource').length,
+        arguments[0] ? !!document.querySelector(arguments[0]) : true];
+"""
+
+TIMING_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+return {
+    navigation: nav ? {
+        ttfb: nav.responseStart - nav.requestStart,
+        response_end: nav.responseEnd,
+        dom_interactive: nav.domInteractive,
+        dom_content_loaded: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        transfer_size: nav.transferSize
+    } : null,
+    resources: performance.getEntriesByType('resource').map(function(r) {
+        return {name: r.name, type: r.initiatorType, start: r.startTime,
+                duration: r.duration, size: r.transferSize};
+    })
+};
+"""
+
+_CHROME_LEVELS = {'SEVERE': 'error', 'WARNING': 'warning'}
+
+
+class ChromeSession:
+    """一个 selenium 控制的无头 Chrome"""
+
+    def __init__(self, headless=True):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        if headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+        self.driver = webdriver.Chrome(options=options)
+
+    def open(self, url, timeout):
+        self.driver.set_page_load_timeout(timeout)
+        self.driver.get(url)
+
+    def evaluate(self, script, *args):
+        return self.driver.execute_script(script, *args)
+
+    def wait_ready(self, timeout, selector=None):
+        """轮询直到页面加载完成、资源数量稳定、就绪标记和选择器都满足"""
+        deadline = time.monotonic() + timeout
+        last_count = None
+        stable = 0
+        while time.monotonic() < deadline:
+            state, flag, count, found = self.evaluate(READY_JS, selector)
+            stable = stable + 1 if count == last_count else 0
+            last_count = count
+            if state == 'complete' and flag is not False and found and (flag or stable >= QUIET_POLLS):
+                return True
+            time.sleep(POLL_INTERVAL)
+        return False
+
+    def timing(self):
+        return self.evaluate(TIMING_JS)
+
+    def console(self):
+        """取出（并清空）浏览器控制台日志"""
+        entries = []
+        for log in self.driver.get_log('browser'):
+            entries.append({
+                'level': _CHROME_LEVELS.get(log['level'], 'info'),
+                'message': log['message'],
+                'source': log.get('source', ''),
+            })
+        return entries
+
+    def click(self, text):
+        from selenium.webdriver.common.by import By
+
+        buttons = self.driver.find_elements(By.XPATH, f"//button[normalize-space()='{text}']")
+        if not buttons:
+            return False
+        buttons[0].click()
+        return True
+
+    def reset(self):
+        self.driver.get('about:blank')
+        self.console()
+
+    def close(self):
+        self.driver.quit()
+
+
+class LocalSession:
+    """不需要浏览器的替身会话
+
+    抓取页面和它引用的本地资源并计时，不执行JS。
+    加载失败的资源记为 error 级别的控制台日志，格式与 Chrome 相同；
+    导航计时里 dom_content_loaded 取页面和同步脚本都下载完的时间，load 取全部资源下载完的时间。
+    """
+
+    def __init__(self, root='.'):
+        self.root = root
+        self.html = ''
+        self.logs = []
+        self.navigation = None
+        self.resources = []
+
+    def _path(self, url):
+        path = unquote(urlsplit(url).path).lstrip('/') or 'index.html'
+        return os.path.join(self.root, path)
+
+    def open(self, url, timeout):
+        started = time.perf_counter()
+        page = fetch(url)
+        if failed(page):
+            raise RuntimeError(f'{url} 返回 {page["error"] or page["status"]}')
+        path = self._path(url)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.html = f.read()
+
+        blocking = {urljoin(url, attr(token, 'src')) for token in tokenize_string(self.html)
+                    if token.kind == STARTTAG and token.name == 'script' and attr(token, 'src')
+                    and not any(name in ('defer', 'async') for name, _ in token.attrs)}
+        dom_ready = page['total']
+        self.resources = []
+        for asset in local_asset_urls(url, path):
+            offset = time.perf_counter() - started
+            result = fetch(asset)
+            self.resources.append({
+                'name': asset,
+                'type': _resource_type(asset),
+                'start': offset * 1000,
+                'duration': result['total'] * 1000,
+                'size': result['wire_bytes'],
+            })
+            if failed(result):
+                reason = result['error'] or f'the server responded with a status of {result["status"]}'
+                self.logs.append({
+                    'level': 'error',
+                    'message': f'{asset} - Failed to load resource: {reason}',
+                    'source': 'network',
+                })
+            if asset in blocking:
+                dom_ready = time.perf_counter() - started
+        loaded = time.perf_counter() - started
+        self.navigation = {
+            'ttfb': page['ttfb'] * 1000,
+            'response_end': page['total'] * 1000,
+            'dom_interactive': page['total'] * 1000,
+            'dom_content_loaded': dom_ready * 1000,
+            'load': loaded * 1000,
+            'transfer_size': page['wire_bytes'],
+        }
+
+    def wait_ready(self, timeout, selector=None):
+        """替身不执行JS，页面抓完就算就绪；选择器只支持 #id、.class 和标签名"""
+        return selector is None or _has_selector(self.html, selector)
+
+    def timing(self):
+        return {'navigation': self.navigation, 'resources': list(self.resources)}
+
+    def console(self):
+        logs, self.logs = self.logs, []
+        return logs
+
+    def click(self, text):
+        return f'>{text}<' in self.html.replace('> ', '>').replace(' <', '<')
+
+    def reset(self):
+        self.html = ''
+        self.logs = []
+        self.navigation = None
+        self.resources = []
+
+    def close(self):
+        pass
+
+
+def _resource_type(url):
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if ext == '.js':
+        return 'script'
+    if ext == '.css':
+        return 'link'
+    if ext in ('.woff', '.woff2', '.ttf', '.otf'):
+        return 'font'
+    return 'img'
+
+
+def _has_selector(html, selector):
+    for token in tokenize_string(html):
+        if token.kind != STARTTAG:
+            continue
+        if selector.startswith('#') and attr(token, 'id') == selector[1:]:
+            return True
+        if selector.startswith('.') and selector[1:] in (attr(token, 'class') or '').split():
+            return True
+        if token.name == selector.lower():
+            return True
+    return False
+
+
+def session_factory(driver, root='.'):
+    """按名称返回 (实际驱动名, 创建会话的函数)；auto 在能导入 selenium 时用 Chrome，否则用替身"""
+    if driver == 'auto':
+        try:
+            import selenium  # noqa: F401
+            driver = 'chrome'
+        except ImportError:
+            driver = 'local'
+    if driver == 'chrome':
+        return driver, ChromeSession
+    if driver == 'local':
+        return driver, lambda: LocalSession(root)
+    raise ValueError(f'未知的驱动: {driver}')
+
+
+class BrowserPool:
+    """浏览器会话池
+
+    最多同时存在 size 个会话，用完放回池中复用；
+    使用中抛出异常的会话会被关闭并在下次需要时重新创建。
+    """
+
+    def __init__(self, factory, size=2):
+        self.factory = factory
+        self.size = size
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.sessions = []
+
+    def _create(self):
+        session = self.factory()
+        with self.lock:
+            self.sessions.append(session)
+        return session
+
+    def warm(self, count=None):
+        """预先并行启动浏览器，浏览器启动的开销不计入第一个页面"""
+        count = min(count or self.size, self.size)
+        with self.lock:
+            count = max(0, count - self.created)
+            self.created += count
+        if not count:
+            return
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            for session in executor.map(lambda _: self._create(), range(count)):
+                self.idle.put(session)
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            can_create = self.created < self.size
+            if can_create:
+                self.created += 1
+        if can_create:
+            try:
+                return self._create()
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+        return self.idle.get()
+
+    def _discard(self, session):
+        with self.lock:
+            self.created -= 1
+            if session in self.sessions:
+                self.sessions.remove(session)
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def session(self):
+        session = self._acquire()
+        try:
+            yield session
+        except Exception:
+            self._discard(session)
+            raise
+        else:
+            try:
+                session.reset()
+            except Exception:
+                self._discard(session)
+            else:
+                self.idle.put(session)
+
+    def close(self):
+        with self.lock:
+            sessions, self.sessions = self.sessions, []
+            self.created = 0
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_page(session, url, timeout=DEFAULT_TIMEOUT, selector=None, actions=None):
+    """在一个会话里打开页面，等待就绪并收集日志和计时
+
+    actions(session) 在页面就绪后调用，可以点击按钮等，之后会再次等待就绪。
+    """
+    started = time.perf_counter()
+    result = {'url': url, 'ok': False, 'ready': False, 'console': [],
+              'navigation': None, 'resources': [], 'error': None}
+    try:
+        session.open(url, timeout)
+        result['ready'] = session.wait_ready(timeout, selector)
+        if result['ready'] and actions:
+            actions(session)
+            result['ready'] = session.wait_ready(timeout, selector)
+        timing = session.timing() or {}
+        result['navigation'] = timing.get('navigation')
+        result['resources'] = timing.get('resources', [])
+        result['console'] = session.console()
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+        raise _PageError(result) from e
+    finally:
+        result['seconds'] = time.perf_counter() - started
+    result['errors'] = sum(1 for entry in result['console'] if entry['level'] == 'error')
+    result['ok'] = result['ready'] and not result['errors']
+    return result
+
+
+class _PageError(Exception):
+    def __init__(self, result):
+        super().__init__(result['error'])
+        self.result = result
+
+
+def run_pages(pages, pool, base_url, timeout=DEFAULT_TIMEOUT, selector=None, actions=None):
+    """并行测试多个页面，结果按传入顺序返回"""
+
+    def task(page):
+        url = urljoin(base_url, page.replace(os.sep, '/'))
+        try:
+            with pool.session() as session:
+                result = run_page(session, url, timeout, selector, actions)
+        except _PageError as e:
+            result = e.result
+            result['errors'] = sum(1 for entry in result['console'] if entry['level'] == 'error')
+        except Exception as e:
+            result = {'url': url, 'ok': False, 'ready': False, 'console': [], 'navigation': None,
+                      'resources': [], 'errors': 0, 'seconds': 0.0, 'error': f'{type(e).__name__}: {e}'}
+        result['page'] = page
+        return result
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        return list(executor.map(task, pages))
+
+
+def build_report(results, jobs, elapsed, driver):
+    loads = [r['navigation']['load'] for r in results if r['navigation'] and r['navigation'].get('load')]
+    return {
+        'pages': results,
+        'page_count': len(results),
+        'passed': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok']),
+        'console_errors': sum(r['errors'] for r in results),
+        'load_ms': {f'p{pct}': percentile(loads, pct) for pct in (50, 95)} if loads else {},
+        'driver': driver,
+        'jobs': jobs,
+        'elapsed': elapsed,
+        'page_seconds': sum(r['seconds'] for r in results),
+    }
+
+
+def format_text(report):
+    lines = []
+    for result in report['pages']:
+        nav = result['navigation'] or {}
+        status = '通过' if result['ok'] else '失败'
+        timing = ''
+        if nav:
+            timing = (f' TTFB {nav["ttfb"]:.1f} ms, DOMContentLoaded {nav["dom_content_loaded"]:.1f} ms, '
+                      f'load {nav["load"]:.1f} ms, {len(result["resources"])} 个资源')
+        lines.append(f'[{status}] {result["page"]}:{timing}')
+        if result['error']:
+            lines.append(f'  {result["error"]}')
+        elif not result['ready']:
+            lines.append('  等待页面就绪超时')
+        for entry in result['console']:
+            if entry['level'] in ('error', 'warning'):
+                lines.append(f'  {entry["level"]}: {entry["message"]}')
+    lines.append('')
+    lines.append(f'测试了 {report["page_count"]} 个页面: {report["passed"]} 个通过, '
+                 f'{report["failed"]} 个失败, 控制台错误 {report["console_errors"]} 条')
+    if report['load_ms']:
+        lines.append(f'load: p50 {report["load_ms"]["p50"]:.1f} ms, p95 {report["load_ms"]["p95"]:.1f} ms')
+    lines.append(f'驱动 {report["driver"]}, 并发 {report["jobs"]}, 耗时 {report["elapsed"]:.2f} 秒 '
+                 f'(各页面合计 {report["page_seconds"]:.2f} 秒)')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用无头浏览器并行测试页面')
+    parser.add_argument('pages', nargs='*', help=f'要测试的页面，默认是根目录下的 {DEFAULT_PATTERN}')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--url', help='已有服务器的地址，不指定时在临时端口启动 devserver')
+    parser.add_argument('--driver', choices=('auto', 'chrome', 'local'), default='auto', help='浏览器驱动')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='并行的浏览器数')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='每个页面的超时秒数')
+    parser.add_argument('--ready-selector', help='页面中出现该元素才算就绪')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    pages = args.pages or sorted(os.path.relpath(p, args.root)
+                                 for p in glob.glob(os.path.join(args.root, DEFAULT_PATTERN)))
+    driver, factory = session_factory(args.driver, args.root)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = devserver.start_in_thread(args.root)
+    started = time.perf_counter()
+    try:
+        with BrowserPool(factory, max(1, args.jobs)) as pool:
+            pool.warm()
+            results = run_pages(pages, pool, base_url, args.timeout, args.ready_selector)
+    finally:
+        if server:
+            server.shutdown()
+    report = build_report(results, args.jobs, time.perf_counter() - started, driver)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_text(report))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
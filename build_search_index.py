@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# 站内搜索索引构建
+# 从 index.html 的标题/段落/列表项和各模块内置的目录（工具、资源、应用）中提取文本，
+# 生成倒排索引 JSON，供 SearchSystem.js 直接查询，不再在每次搜索时遍历整个DOM。
+#
+# 分词：英文和数字按单词，中文按相邻两字（二元组）切分，单独一个汉字保留原样。
+# 查询时所有词都要命中；最后一个英文词按前缀匹配，单个汉字匹配包含它的二元组。
+#
+# 索引格式:
+#     {"version": 1,
+#      "docs": [[类型, 标题, 摘要, 目标], ...],
+#      "terms": [按字典序排列的词, ...],
+#      "postings": ["文档号差值(36进制)[.权重],...", ...]}   与 terms 一一对应
+#
+# 用法:
+#     python build_search_index.py                     # 输出 data/search-index.json 并打印基准
+#     python build_search_index.py --out dist/data/search-index.json --queries 计算器 json
+
+import argparse
+import gzip
+import html
+import json
+import math
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+
+from html_tokenizer import ENDTAG, STARTTAG, TEXT, VOID_TAGS, attr, tokenize_file
+from js_catalog import load_catalogues
+from performance_test import percentile
+
+INDEX_VERSION = 1
+OUT_PATH = os.path.join('data', 'search-index.json')
+TEXT_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li'}
+HEADINGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+SNIPPET_CHARS = 100
+TITLE_WEIGHT = 3
+DEFAULT_QUERIES = ['计算器', '编程', '密码', '转换', 'javascript', 'AI工具', '语音', '设计规范', '会员', 'py']
+
+# 与 SearchSystem.js 中的 TOKEN_PATTERN 保持一致
+_TOKEN = re.compile(r'[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+')
+_SPACE = re.compile(r'\s+')
+
+
+def tokenize_text(text):
+    """英文数字按词，中文按二元组"""
+    terms = []
+    for m in _TOKEN.finditer(text.lower()):
+        run = m.group()
+        if run[0] < '\u0080' or len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _clean(text):
+    return _SPACE.sub(' ', html.unescape(text)).strip()
+
+
+def page_documents(html_path):
+    """页面中的 h1-h6/p/li，每个元素一条；目标是最近的带 id 的祖先元素"""
+    docs = []
+    seen = set()
+    stack = []              # (标签, id)
+    capture = None          # [标签, 文本片段, 目标]
+    heading = ''
+    heading_depth = 0       # 标题所在父元素的深度，父元素结束后标题失效
+    for token in tokenize_file(html_path):
+        if token.kind == STARTTAG:
+            if capture is None and token.name in TEXT_TAGS:
+                target = next((element_id for _, element_id in reversed(stack) if element_id), '')
+                element_id = attr(token, 'id')
+                capture = [token.name, [], f'#{element_id}' if element_id else (f'#{target}' if target else '')]
+            if token.name not in VOID_TAGS and not token.selfclosing:
+                stack.append((token.name, attr(token, 'id')))
+        elif token.kind == ENDTAG:
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0] == token.name:
+                    del stack[depth:]
+                    break
+            if len(stack) < heading_depth:
+                heading = ''
+            if capture is not None and token.name == capture[0]:
+                text = _clean(''.join(capture[1]))
+                if capture[0] in HEADINGS and text:
+                    heading = text
+                    heading_depth = len(stack)
+                    doc = ('page', text, '', capture[2], text)
+                else:
+                    doc = ('page', heading or text[:30], text[:SNIPPET_CHARS], capture[2], text)
+                # 同一区块里重复的文字（如轮播图的副本）只保留一条
+                if len(text) >= 2 and doc[1:4] not in seen:
+                    seen.add(doc[1:4])
+                    docs.append(doc)
+                capture = None
+        elif token.kind == TEXT and capture is not None:
+            capture[1].append(token.data)
+    return docs
+
+
+def catalogue_documents(catalogues):
+    """工具、资源、应用目录中的条目"""
+    docs = []
+    for item in catalogues.get('tools', []):
+        body = ' '.join([item.get('description') or '', *(item.get('features') or []), item.get('category') or ''])
+        docs.append(('tool', item['name'], item.get('description') or '', f'tool:{item["id"]}', body))
+    for item in catalogues.get('resources', []):
+        body = ' '.join([item.get('description') or '', *(item.get('tags') or []),
+                         item.get('category') or '', item.get('type') or '', item.get('author') or ''])
+        docs.append(('resource', item['title'], item.get('description') or '', f'resource:{item["id"]}', body))
+    for item in catalogues.get('apps', []):
+        body = ' '.join([item.get('description') or '', item.get('category') or '', item.get('author') or ''])
+        docs.append(('app', item['name'], item.get('description') or '', f'app:{item["id"]}', body))
+    return docs
+
+
+def _base36(n):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    out = ''
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if not n:
+            return out
+
+
+def build_index(docs):
+    """docs: [(类型, 标题, 摘要, 目标, 正文)]，返回可直接序列化的索引"""
+    postings = {}
+    for doc_id, (_, title, _, _, body) in enumerate(docs):
+        weights = {}
+        for term in tokenize_text(title):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        if body != title:
+            for term in tokenize_text(body):
+                weights[term] = weights.get(term, 0) + 1
+        for term, weight in weights.items():
+            postings.setdefault(term, []).append((doc_id, weight))
+
+    terms = sorted(postings)
+    encoded = []
+    for term in terms:
+        parts = []
+        previous = 0
+        for doc_id, weight in postings[term]:
+            part = _base36(doc_id - previous)
+            if weight > 1:
+                part += '.' + _base36(weight)
+            parts.append(part)
+            previous = doc_id
+        encoded.append(','.join(parts))
+    return {
+        'version': INDEX_VERSION,
+        'docs': [[kind, title, snippet, target] for kind, title, snippet, target, _ in docs],
+        'terms': terms,
+        'postings': encoded,
+    }
+
+
+class SearchIndex:
+    """索引查询，与 SearchSystem.js 的 searchIndex 使用相同的规则"""
+
+    def __init__(self, index):
+        self.docs = index['docs']
+        self.terms = index['terms']
+        self.postings = index['postings']
+        self._decoded = {}
+
+    def _posting(self, position):
+        if position not in self._decoded:
+            result = {}
+            doc_id = 0
+            for part in self.postings[position].split(','):
+                delta, _, weight = part.partition('.')
+                doc_id += int(delta, 36)
+                result[doc_id] = int(weight, 36) if weight else 1
+            self._decoded[position] = result
+        return self._decoded[position]
+
+    def _positions(self, term, prefix):
+        """term 命中的词在 terms 中的下标"""
+        if len(term) == 1 and term >= '\u0080':
+            # 单个汉字：匹配所有包含它的二元组
+            return [i for i, t in enumerate(self.terms) if term in t]
+        start = bisect_left(self.terms, term)
+        if prefix and term < '\u0080':
+            end = start
+            while end < len(self.terms) and self.terms[end].startswith(term):
+                end += 1
+            return list(range(start, end))
+        return [start] if start < len(self.terms) and self.terms[start] == term else []
+
+    def search(self, query, limit=10):
+        terms = tokenize_text(query)
+        if not terms:
+            return []
+        scores = None
+        for n, term in enumerate(terms):
+            matched = {}
+            for position in self._positions(term, prefix=n == len(terms) - 1):
+                posting = self._posting(position)
+                idf = math.log(1 + len(self.docs) / len(posting))
+                for doc_id, weight in posting.items():
+                    matched[doc_id] = matched.get(doc_id, 0) + weight * idf
+            if scores is None:
+                scores = matched
+            else:
+                scores = {doc_id: score + matched[doc_id] for doc_id, score in scores.items() if doc_id in matched}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.docs[doc_id], score) for doc_id, score in ranked]
+
+
+def linear_search(docs, query, limit=10):
+    """旧做法：逐条检查文本是否包含查询串，作为对照"""
+    query = query.lower()
+    results = []
+    for doc in docs:
+        text = (doc[1] + ' ' + doc[4]).lower()
+        count = text.count(query)
+        if count:
+            results.append((doc, count))
+    results.sort(key=lambda item: -item[1])
+    return results[:limit]
+
+
+def _timed(func, queries, rounds):
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            func(query)
+            samples.append((time.perf_counter() - started) * 1e6)
+    return {'p50': percentile(samples, 50), 'p99': percentile(samples, 99)}
+
+
+def benchmark(index, docs, queries, rounds=200):
+    """查询延迟（微秒），与线性扫描对比"""
+    searcher = SearchIndex(index)
+    cold = _timed(lambda q: SearchIndex(index).search(q), queries, 1)
+    return {
+        'queries': len(queries),
+        'index': _timed(searcher.search, queries, rounds),
+        'index_cold': cold,
+        'linear': _timed(lambda q: linear_search(docs, q), queries, rounds),
+        'hits': {q: len(searcher.search(q)) for q in queries},
+    }
+
+
+def write_index(index, out_path):
+    data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, out_path)
+    return {'bytes': len(data), 'gzip': len(gzip.compress(data, 9))}
+
+
+def print_report(report):
+    size = report['size']
+    print(f'索引: {report["out"]}')
+    print(f'  文档 {report["docs"]} 条（页面 {report["page_docs"]}，目录 {report["catalogue_docs"]}），'
+          f'词 {report["terms"]} 个，倒排项 {report["postings"]} 个')
+    print(f'  大小 {size["bytes"] / 1024:.1f} KB，gzip {size["gzip"] / 1024:.1f} KB'
+          f'（被索引的原文 {report["text_bytes"] / 1024:.1f} KB），构建耗时 {report["build_seconds"] * 1000:.1f} ms')
+    bench = report['benchmark']
+    print(f'查询延迟（{bench["queries"]} 个查询）:')
+    for label, key in (('倒排索引', 'index'), ('倒排索引（首次解码）', 'index_cold'), ('线性扫描', 'linear')):
+        print(f'  {label}: p50 {bench[key]["p50"]:.1f} µs, p99 {bench[key]["p99"]:.1f} µs')
+    print('  命中数: ' + ', '.join(f'{q}={n}' for q, n in bench['hits'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成 SearchSystem 使用的搜索索引')
+    parser.add_argument('--page', default='index.html', help='要索引的页面')
+    parser.add_argument('--out', default=OUT_PATH, help='索引输出路径')
+    parser.add_argument('--queries', nargs='*', default=DEFAULT_QUERIES, help='基准测试用的查询')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    page_docs = page_documents(args.page)
+    catalogue_docs = catalogue_documents(load_catalogues())
+    docs = page_docs + catalogue_docs
+    index = build_index(docs)
+    size = write_index(index, args.out)
+    build_seconds = time.perf_counter() - started
+
+    report = {
+        'out': args.out,
+        'docs': len(docs),
+        'page_docs': len(page_docs),
+        'catalogue_docs': len(catalogue_docs),
+        'terms': len(index['terms']),
+        'postings': sum(p.count(',') + 1 for p in index['postings']),
+        'size': size,
+        'text_bytes': sum(len((doc[1] + doc[4]).encode('utf-8')) for doc in docs),
+        'build_seconds': build_seconds,
+        'benchmark': benchmark(index, docs, args.queries),
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# JS打包压缩
+# 按 index.html 中 <script src> 的顺序，把相邻且加载方式相同（同步/defer）的本地脚本
+# 合并、压缩成带内容哈希的 bundle，并生成 source map，然后输出改写后的HTML。
+#
+# 用法:
+#     python bundle_assets.py                    # 处理 index.html，输出到 dist/
+#     python bundle_assets.py --out-dir build test_modal.html
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+import subprocess
+import sys
+
+from html_tokenizer import COMMENT, ENDTAG, SCRIPT, STARTTAG, TEXT, attr, tokenize_file
+from js_minify import encode_mappings, minify
+
+OUT_DIR = 'dist'
+BUNDLE_DIR = 'js'
+
+
+def is_local(src):
+    return bool(src) and not src.startswith(('http:', 'https:', '//', 'data:'))
+
+
+def script_mode(token):
+    """脚本的加载方式"""
+    if attr(token, 'type', '').lower() == 'module':
+        return 'module'
+    names = {name for name, _ in token.attrs}
+    if 'async' in names:
+        return 'async'
+    if 'defer' in names:
+        return 'defer'
+    return 'sync'
+
+
+def read_script_manifest(html_path):
+    """按文档顺序列出页面中的script标签
+
+    每项包含 src、加载方式、是否内联，以及整个标签（含结束标签）的字节范围。
+    gap 表示与上一个script之间是否隔着空白和注释以外的内容。
+    """
+    entries = []
+    current = None
+    gap = False
+    for token in tokenize_file(html_path):
+        if token.kind == STARTTAG and token.name == 'script':
+            src = attr(token, 'src')
+            current = {
+                'src': src,
+                'mode': script_mode(token),
+                'inline': src is None,
+                'start': token.offset,
+                'end': token.end,
+                'line': token.line,
+                'gap': gap or not entries,
+            }
+            entries.append(current)
+            gap = False
+        elif current is not None and token.kind == SCRIPT:
+            if token.data.strip():
+                current['inline'] = True
+        elif current is not None and token.kind == ENDTAG and token.name == 'script':
+            current['end'] = token.end
+            current = None
+        elif token.kind == TEXT and not token.data.strip():
+            continue
+        elif token.kind != COMMENT:
+            gap = True
+    return entries
+
+
+def render_script_tags(entries, indent=''):
+    """把清单中的外部脚本重新渲染成 <script src> 标签"""
+    lines = []
+    for entry in entries:
+        if entry['inline'] or not entry['src']:
+            continue
+        extra = f' {entry["mode"]}' if entry['mode'] in ('defer', 'async') else ''
+        if entry['mode'] == 'module':
+            extra = ' type="module"'
+        lines.append(f'{indent}<script src="{entry["src"]}"{extra}></script>')
+    return '\n'.join(lines) + '\n'
+
+
+def plan_bundles(entries):
+    """把相邻、本地、加载方式相同的同步/defer脚本分成一组"""
+    groups = []
+    current = None
+    for entry in entries:
+        bundleable = (not entry['inline'] and is_local(entry['src'])
+                      and entry['mode'] in ('sync', 'defer'))
+        if not bundleable:
+            current = None
+            continue
+        if current is None or entry['gap'] or current[-1]['mode'] != entry['mode']:
+            current = []
+            groups.append(current)
+        current.append(entry)
+    # 只有一个脚本的组没有合并的意义，但仍然会被压缩
+    return groups
+
+
+def _site_path(page_dir, src):
+    """页面中的 src（相对页面目录或以 / 开头）-> 站点根目录下的相对路径"""
+    path = src.split('?')[0].split('#')[0]
+    return posixpath.normpath(path.lstrip('/') if path.startswith('/') else posixpath.join(page_dir, path))
+
+
+def build_bundle(group, site_root, out_dir, index, page_dir=''):
+    """合并压缩一组脚本，写出 bundle 和 source map，返回 bundle 信息
+
+    page_dir 是页面所在目录（相对站点根目录），页面中的相对 src 以它为基准，
+    返回的 src 同样相对页面目录。
+    """
+    sources = []
+    contents = []
+    code_parts = []
+    line_map = []
+    raw_bytes = 0
+    for source_index, entry in enumerate(group):
+        source = _site_path(page_dir, entry['src'])
+        with open(os.path.join(site_root, *source.split('/')), 'r', encoding='utf-8') as f:
+            content = f.read()
+        raw_bytes += len(content.encode('utf-8'))
+        sources.append(source)
+        contents.append(content)
+        code, lines = minify(content)
+        if not code.strip():
+            continue
+        # 分号防止上一个文件末尾缺少分号时与下一个文件粘连
+        code_parts.append(code + ';')
+        line_map.extend((source_index, line, col) for line, col in lines)
+
+    code = '\n'.join(code_parts)
+    digest = hashlib.sha256(code.encode('utf-8')).hexdigest()[:10]
+    name = f'bundle{index}.{digest}.js'
+    bundle_dir = os.path.join(out_dir, BUNDLE_DIR)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    source_map = {
+        'version': 3,
+        'file': name,
+        'sources': [posixpath.relpath(src, BUNDLE_DIR) for src in sources],
+        'sourcesContent': contents,
+        'names': [],
+        'mappings': encode_mappings(line_map),
+    }
+    with open(os.path.join(bundle_dir, name), 'w', encoding='utf-8') as f:
+        f.write(code)
+        f.write(f'\n//# sourceMappingURL={name}.map\n')
+    with open(os.path.join(bundle_dir, name + '.map'), 'w', encoding='utf-8') as f:
+        json.dump(source_map, f, ensure_ascii=False, separators=(',', ':'))
+
+    bundle_bytes = os.path.getsize(os.path.join(bundle_dir, name))
+    return {
+        'src': posixpath.relpath(f'{BUNDLE_DIR}/{name}', page_dir or '.'),
+        'path': os.path.join(bundle_dir, name),
+        'mode': group[0]['mode'],
+        'sources': sources,
+        'raw_bytes': raw_bytes,
+        'bytes': bundle_bytes,
+        'raw_gzip': sum(_gzip_size(os.path.join(site_root, *s.split('/'))) for s in sources),
+        'gzip': _gzip_size(os.path.join(bundle_dir, name)),
+    }
+
+
+def _gzip_size(path):
+    with open(path, 'rb') as f:
+        return len(gzip.compress(f.read(), 9))
+
+
+def rewrite_html(html_path, groups, bundles, out_path):
+    """把每组script标签替换成对应的 bundle 标签"""
+    with open(html_path, 'rb') as f:
+        content = f.read()
+    pieces = []
+    pos = 0
+    for group, bundle in zip(groups, bundles):
+        start, end = group[0]['start'], group[-1]['end']
+        extra = ' defer' if bundle['mode'] == 'defer' else ''
+        pieces.append(content[pos:start])
+        pieces.append(f'<script src="{bundle["src"]}"{extra}></script>'.encode('utf-8'))
+        pos = end
+    pieces.append(content[pos:])
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'wb') as f:
+        f.write(b''.join(pieces))
+
+
+def verify_bundles(bundles):
+    """有 node 时用 node --check 检查 bundle 语法"""
+    node = shutil.which('node')
+    if not node:
+        return None
+    failed = []
+    for bundle in bundles:
+        result = subprocess.run([node, '--check', bundle['path']], capture_output=True, text=True)
+        if result.returncode != 0:
+            failed.append((bundle['src'], result.stderr.strip()))
+    return failed
+
+
+def bundle_page(html_path, out_dir=OUT_DIR, site_root='.'):
+    """处理一个页面，返回报告"""
+    entries = read_script_manifest(html_path)
+    groups = plan_bundles(entries)
+    rel = os.path.relpath(html_path, site_root).replace(os.sep, '/')
+    page_dir = posixpath.dirname(rel)
+    bundles = [build_bundle(group, site_root, out_dir, i + 1, page_dir) for i, group in enumerate(groups)]
+    out_path = os.path.join(out_dir, *rel.split('/'))
+    rewrite_html(html_path, groups, bundles, out_path)
+
+    local_before = sum(1 for e in entries if not e['inline'] and is_local(e['src']))
+    bundled = sum(len(g) for g in groups)
+    return {
+        'page': html_path,
+        'output': out_path,
+        'bundles': bundles,
+        'requests_before': local_before,
+        'requests_after': local_before - bundled + len(bundles),
+        'bytes_before': sum(b['raw_bytes'] for b in bundles),
+        'bytes_after': sum(b['bytes'] for b in bundles),
+        'gzip_before': sum(b['raw_gzip'] for b in bundles),
+        'gzip_after': sum(b['gzip'] for b in bundles),
+    }
+
+
+def print_report(report):
+    print(f'{report["page"]} -> {report["output"]}')
+    for bundle in report['bundles']:
+        print(f'  {bundle["src"]} ({bundle["mode"]}, {len(bundle["sources"])} 个文件): '
+              f'{bundle["raw_bytes"] / 1024:.1f} KB -> {bundle["bytes"] / 1024:.1f} KB, '
+              f'gzip {bundle["raw_gzip"] / 1024:.1f} KB -> {bundle["gzip"] / 1024:.1f} KB')
+    saved = report['bytes_before'] - report['bytes_after']
+    gzip_saved = report['gzip_before'] - report['gzip_after']
+    print(f'  本地脚本请求数: {report["requests_before"]} -> {report["requests_after"]}')
+    if report['bytes_before']:
+        print(f'  节省 {saved / 1024:.1f} KB ({saved / report["bytes_before"] * 100:.1f}%), '
+              f'gzip后节省 {gzip_saved / 1024:.1f} KB')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='合并压缩页面中的本地脚本')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要处理的HTML页面')
+    parser.add_argument('--out-dir', default=OUT_DIR, help='输出目录')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    reports = [bundle_page(page, args.out_dir) for page in args.pages]
+    failed = verify_bundles([b for r in reports for b in r['bundles']])
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+        if failed is None:
+            print('未找到 node，跳过 bundle 语法检查')
+    for src, error in failed or ():
+        print(f'错误: {src} 语法检查失败\n{error}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# 数据目录分片
+# ToolManager、ResourceCenter、AppCenter 把工具/资源/应用列表直接写在脚本里，每次打开页面都要下载和解析，
+# 没打开资源中心、应用中心的访客也不例外。部署前用 js_catalog.py 把这些列表从模块中取出：
+#   - 每个目录按分类拆成带内容哈希的JSON分片，另有一个完整列表文件，
+#     data/catalog/manifest.json 只记录分片文件名和条目数；
+#   - 模块副本中的列表替换为空数组，运行时由 js/modules/CatalogStore.js 按当前视图加载需要的分片；
+#   - 首页第一个区域（#toolsGrid 的工具卡片）直接渲染进静态HTML，脚本和数据加载前就能看到内容。
+# 结果写到暂存目录，deploy_prep.py --catalog 会优先读取其中的文件。源码中的列表保持不变，仍在原处编辑。
+#
+# 用法:
+#     python catalog_shards.py                 # 处理 index.html，输出节省的脚本体积和解析时间
+#     python catalog_shards.py --json
+
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+from deploy_prep import HASH_CHARS, _splice, _write_if_changed
+from html_tokenizer import ENDTAG, STARTTAG, VOID_TAGS, attr, tokenize_string
+from js_catalog import CATALOGUES, LiteralError, catalog_span, parse_literal
+from js_minify import minify, tokenize
+from sitecache import CACHE_DIR
+
+CATALOG_DIR = 'data/catalog'
+STAGE_DIR = os.path.join(CACHE_DIR, 'catalog-stage')
+MANIFEST_VERSION = 1
+PARSE_RUNS = 200
+TOOLS_GRID = 'toolsGrid'
+PRERENDERED = 'data-prerendered'
+TOOL_NAMES_ANCHOR = 'const categoryNames ='
+
+# 测量 V8 编译（顶层解析和函数预解析）时间，每次加一行不同的注释避免命中编译缓存
+PARSE_BENCH = r"""
+const vm = require('vm');
+const fs = require('fs');
+const runs = Number(process.argv[1]);
+const result = {};
+for (const file of process.argv.slice(2)) {
+    const source = fs.readFileSync(file, 'utf8');
+    const times = [];
+    for (let i = 0; i < runs; i++) {
+        const started = process.hrtime.bigint();
+        new vm.Script(source + '\n//' + i, { filename: file });
+        times.push(Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    times.sort((a, b) => a - b);
+    result[file] = times[times.length >> 1];
+}
+console.log(JSON.stringify(result));
+"""
+
+
+def _json_bytes(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def shard_catalogue(name, items):
+    """按分类拆分一个目录，返回 (清单条目, {data/catalog 下的相对路径: 内容})"""
+    files = {}
+
+    def add(label, subset):
+        data = _json_bytes(subset)
+        rel = f'{name}/{label}.{hashlib.sha256(data).hexdigest()[:HASH_CHARS]}.json'
+        files[rel] = data
+        return {'file': rel, 'count': len(subset), 'bytes': len(data)}
+
+    groups = {}
+    for item in items:
+        groups.setdefault(str(item.get('category', '')), []).append(item)
+    shards = {}
+    for n, (category, subset) in enumerate(groups.items(), 1):
+        # 分类名多是中文，文件名只用ASCII，对应关系记在清单里
+        label = category if re.fullmatch(r'[A-Za-z0-9_-]+', category) else f'c{n}'
+        shards[category] = add(label, subset)
+    return {'count': len(items), 'all': add('all', items), 'shards': shards}, files
+
+
+def _count_nulls(value):
+    if isinstance(value, dict):
+        return sum(_count_nulls(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(_count_nulls(v) for v in value)
+    return value is None
+
+
+def _number(value):
+    """与JS模板字符串中的数字写法一致（4.0 显示为 4）"""
+    return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+
+
+def render_tool_card(tool, category_names):
+    """与 ToolManager.createToolCard 相同的结构，按未登录用户渲染"""
+    e = html.escape
+    level = tool.get('requiredLevel') or 1
+    features = tool.get('features') or []
+    locked = level > 1
+    lines = [
+        f'<div class="tool-card{" tool-locked" if locked else ""}" data-tool-id="{e(tool["id"])}">',
+        '    <div class="tool-card-header">',
+        f'        <div class="tool-icon"><i class="fas {e(tool.get("icon", ""))}"></i></div>',
+        '        <div class="tool-meta">',
+        f'            <span class="tool-rating"><i class="fas fa-star"></i> {_number(tool.get("rating"))}</span>',
+        f'            <span class="tool-usage"><i class="fas fa-eye"></i> {_number(tool.get("usageCount"))}</span>',
+        '        </div>',
+        '    </div>',
+        f'    <h3 class="tool-name">{e(tool.get("name", ""))}</h3>',
+        f'    <p class="tool-description">{e(tool.get("description", ""))}</p>',
+        '    <div class="tool-category">',
+        f'        <span class="category-badge">{e(category_names.get(tool.get("category"), tool.get("category", "")))}</span>',
+    ]
+    if locked:
+        lines.append(f'        <span class="member-level">需要会员等级 {level}</span>')
+    lines.append('    </div>')
+    lines.append('    <div class="tool-features">')
+    lines.extend(f'        <span class="feature-tag">{e(feature)}</span>' for feature in features[:2])
+    if len(features) > 2:
+        lines.append(f'        <span class="feature-more">+{len(features) - 2}</span>')
+    lines.append('    </div>')
+    lines.append('</div>')
+    return lines
+
+
+def is_prerendered(token):
+    """容器是否带 data-prerendered 标记（没有值的属性）"""
+    return any(name == PRERENDERED for name, _ in token.attrs)
+
+
+def prerender_tools(data, tools, category_names):
+    """把工具卡片渲染进 #toolsGrid（默认视图：全部分类、按使用次数排序），没有这个元素时返回 None
+
+    容器加上 data-prerendered 标记，ToolManager 据此沿用已有的卡片而不是重新渲染。
+    """
+    tokens = list(tokenize_string(data))
+    for i, token in enumerate(tokens):
+        if token.kind == STARTTAG and attr(token, 'id') == TOOLS_GRID:
+            break
+    else:
+        return None
+    depth = 0
+    for close in tokens[i:]:
+        if close.kind == STARTTAG and close.name not in VOID_TAGS and not close.selfclosing:
+            depth += 1
+        elif close.kind == ENDTAG:
+            depth -= 1
+            if depth == 0:
+                break
+    line_start = data.rfind(b'\n', 0, token.offset) + 1
+    indent = data[line_start:token.offset].decode('utf-8')
+    ordered = sorted(tools, key=lambda tool: -(tool.get('usageCount') or 0))
+    lines = [line for tool in ordered for line in render_tool_card(tool, category_names)]
+    inner = ''.join(f'\n{indent}    {line}' for line in lines) + f'\n{indent}'
+    replacements = [((token.end, close.offset), inner.encode('utf-8'))]
+    if not is_prerendered(token):
+        end = token.end - (2 if token.selfclosing else 1)
+        replacements.append(((end, end), f' {PRERENDERED}'.encode('ascii')))
+    return _splice(data, replacements)
+
+
+def _sizes(source):
+    code = minify(source)[0].encode('utf-8')
+    return {'bytes': len(source.encode('utf-8')), 'minified': len(code), 'gzip': len(gzip.compress(code, 9))}
+
+
+def measure_parse(paths, runs=PARSE_RUNS):
+    """用 node 测量每个文件的编译时间中位数（毫秒）；没有 node 时返回 None"""
+    node = shutil.which('node')
+    if not node or not paths:
+        return None
+    result = subprocess.run([node, '-e', PARSE_BENCH, str(runs)] + list(paths), capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout)
+
+
+def _sync_dir(root, outputs):
+    """写出 outputs（相对路径 -> 内容），删除目录中其他旧文件"""
+    for rel, data in outputs.items():
+        _write_if_changed(os.path.join(root, *rel.split('/')), data)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.relpath(path, root).replace(os.sep, '/') not in outputs:
+                os.remove(path)
+
+
+def stage(pages, site_root='.', stage_dir=STAGE_DIR, sources=(), catalogues=CATALOGUES, parse_runs=PARSE_RUNS):
+    """生成分片、去掉列表的模块副本和预渲染的页面，写到 stage_dir，返回报告
+
+    sources 是优先读取页面的目录（例如 optimize_media 的暂存目录）。
+    """
+    started = time.perf_counter()
+    outputs = {}
+    manifest = {'version': MANIFEST_VERSION, 'catalogues': {}}
+    report = {'catalogues': {}, 'modules': {}, 'prerendered': {}}
+    loaded = {}
+    for name, (path, anchor, key) in catalogues.items():
+        with open(os.path.join(site_root, *path.split('/')), 'r', encoding='utf-8') as f:
+            source = f.read()
+        start, end = catalog_span(source, anchor, key)
+        items = parse_literal(source[start:end])
+        # parse_literal 把无法求值的表达式记为 None，这样的列表移到JSON后含义会变
+        literal_nulls = sum(1 for kind, text, _ in tokenize(source[start:end]) if text in ('null', 'undefined'))
+        if _count_nulls(items) != literal_nulls:
+            raise LiteralError(f'{path} 的列表中有构建时无法求值的表达式')
+        loaded[name] = (source, items)
+        entry, files = shard_catalogue(name, items)
+        entry['module'] = path
+        manifest['catalogues'][name] = entry
+        for rel, data in files.items():
+            outputs[f'{CATALOG_DIR}/{rel}'] = data
+        stripped = source[:start] + '[]' + source[end:]
+        outputs[path] = stripped.encode('utf-8')
+        report['modules'][path] = {'before': _sizes(source), 'after': _sizes(stripped)}
+        report['catalogues'][name] = {
+            'module': path, 'items': len(items), 'shards': len(entry['shards']),
+            'bytes': entry['all']['bytes'], 'largest_shard': max((s['bytes'] for s in entry['shards'].values()), default=0),
+        }
+    manifest_data = json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8')
+    outputs[f'{CATALOG_DIR}/manifest.json'] = manifest_data
+    report['manifest_bytes'] = len(manifest_data)
+
+    if 'tools' in loaded:
+        tool_source, tools = loaded['tools']
+        names_at = tool_source.find(TOOL_NAMES_ANCHOR)
+        if names_at < 0:
+            raise LiteralError(f'{catalogues["tools"][0]} 中没有找到 {TOOL_NAMES_ANCHOR}')
+        category_names = parse_literal(tool_source, names_at + len(TOOL_NAMES_ANCHOR))
+        for page in pages:
+            rel = posixpath.normpath(os.path.relpath(page, site_root).replace(os.sep, '/'))
+            source_path = next((p for p in (os.path.join(d, *rel.split('/')) for d in sources) if os.path.exists(p)),
+                               os.path.join(site_root, *rel.split('/')))
+            with open(source_path, 'rb') as f:
+                rendered = prerender_tools(f.read(), tools, category_names)
+            if rendered is not None:
+                outputs[rel] = rendered
+                report['prerendered'][rel] = len(tools)
+
+    _sync_dir(stage_dir, outputs)
+    report['files'] = sorted(rel for rel in outputs if rel.startswith(CATALOG_DIR + '/'))
+    paths = {module: (os.path.join(site_root, *module.split('/')), os.path.join(stage_dir, *module.split('/')))
+             for module in report['modules']}
+    timings = measure_parse([path for pair in paths.values() for path in pair], parse_runs)
+    if timings:
+        for module, (before, after) in paths.items():
+            report['modules'][module]['parse_ms'] = {'before': timings[before], 'after': timings[after]}
+    report['total'] = {
+        when: {k: sum(m[when][k] for m in report['modules'].values()) for k in ('bytes', 'minified', 'gzip')}
+        for when in ('before', 'after')}
+    report['stage_dir'] = stage_dir
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def print_report(report):
+    print(f'{"目录":<10}{"条目":>6}{"分片":>6}{"完整列表":>12}{"最大分片":>12}')
+    for name, item in report['catalogues'].items():
+        print(f'{name:<10}{item["items"]:>6}{item["shards"]:>6}{item["bytes"] / 1024:>10.1f} KB'
+              f'{item["largest_shard"] / 1024:>10.1f} KB')
+    print(f'清单 {report["manifest_bytes"] / 1024:.1f} KB')
+    print()
+    print(f'{"模块":<34}{"压缩后":>18}{"gzip":>18}{"编译":>20}')
+    for module, item in report['modules'].items():
+        before, after = item['before'], item['after']
+        parse = item.get('parse_ms')
+        timing = f'{parse["before"]:.3f} -> {parse["after"]:.3f} ms' if parse else '-'
+        print(f'{module:<34}{before["minified"]:>8} -> {after["minified"]:<7}'
+              f'{before["gzip"]:>8} -> {after["gzip"]:<7}{timing:>20}')
+    before, after = report['total']['before'], report['total']['after']
+    print(f'\n主包脚本减少 {(before["minified"] - after["minified"]) / 1024:.1f} KB（压缩后），'
+          f'gzip 后减少 {(before["gzip"] - after["gzip"]) / 1024:.1f} KB')
+    timed = [item['parse_ms'] for item in report['modules'].values() if 'parse_ms' in item]
+    if timed:
+        saved = sum(t['before'] - t['after'] for t in timed)
+        print(f'编译时间减少 {saved:.3f} ms（node 上的中位数，移动设备通常慢 3~5 倍）')
+    else:
+        print('未找到 node，跳过编译时间测量')
+    for page, count in report['prerendered'].items():
+        print(f'{page}: 预渲染 {count} 张工具卡片')
+    print(f'输出到 {report["stage_dir"]}/，耗时 {report["seconds"] * 1000:.0f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把模块中的数据目录拆成按分类加载的JSON分片')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要预渲染的页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--stage', default=STAGE_DIR, help='输出（暂存）目录')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        report = stage(args.pages, args.root, args.stage)
+    except (OSError, LiteralError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
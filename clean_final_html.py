@@ -1,6 +1,11 @@
 # 创建一个全新的、干净的HTML文件
 
-new_html_content = '''<!DOCTYPE html>
+from bundle_assets import read_script_manifest, render_script_tags
+
+# 脚本清单按 index.html 中的顺序和加载方式生成，不再手写
+external_scripts = render_script_tags(read_script_manifest('index.html'), indent='    ')
+
+new_html_content = f'''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -31,15 +36,7 @@ new_html_content = '''<!DOCTYPE html>
     </div>
     
     <!-- 外部JavaScript文件引用 -->
-    <script src="js/config.js"></script>
-    <script src="js/modules/ProjectManagement.js"></script>
-    <script src="js/modules/CRMService.js"></script>
-    <script src="js/modules/FinancialManagement.js"></script>
-    <script src="js/modules/CollaborationSystem.js"></script>
-    <script src="js/modules/DataAnalyticsSystem.js"></script>
-    <script src="js/modules/APIIntegrationSystem.js"></script>
-    <script src="js/app.js"></script>
-</body>
+{external_scripts}</body>
 </html>'''
 
 # 将新内容写入文件
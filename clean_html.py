@@ -1,5 +1,7 @@
 import re
 
+from bundle_assets import read_script_manifest, render_script_tags
+
 # 读取原始HTML文件
 with open('index.html', 'r', encoding='utf-8') as f:
     content = f.read()
@@ -19,16 +21,8 @@ while re.search(r'<script[^>]*>[^<]*<[^/][^>]*[^<]*</script>', content, flags=re
     content = re.sub(r'<script[^>]*>(.*?)</script>', '', content, flags=re.DOTALL | re.IGNORECASE)
 
 # 在</body>标签前添加外部JavaScript文件引用
-external_scripts = '''
-<script src="js/config.js"></script>
-<script src="js/modules/ProjectManagement.js"></script>
-<script src="js/modules/CRMService.js"></script>
-<script src="js/modules/FinancialManagement.js"></script>
-<script src="js/modules/CollaborationSystem.js"></script>
-<script src="js/modules/DataAnalyticsSystem.js"></script>
-<script src="js/modules/APIIntegrationSystem.js"></script>
-<script src="js/app.js"></script>
-'''
+# 脚本清单按 index.html 中的顺序和加载方式生成，不再手写
+external_scripts = '\n' + render_script_tags(read_script_manifest('index.html'))
 content = re.sub(r'</body>', f'{external_scripts}</body>', content)
 
 # 保存修改后的文件
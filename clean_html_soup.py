@@ -1,5 +1,7 @@
 from bs4 import BeautifulSoup
 
+from bundle_assets import read_script_manifest, render_script_tags
+
 # 读取原始HTML文件
 with open('index.html', 'r', encoding='utf-8') as f:
     content = f.read()
@@ -16,16 +18,8 @@ for script_tag in soup.find_all('script'):
     script_tag.extract()
 
 # 在</body>标签前添加外部JavaScript文件引用
-external_scripts = '''
-<script src="js/config.js"></script>
-<script src="js/modules/ProjectManagement.js"></script>
-<script src="js/modules/CRMService.js"></script>
-<script src="js/modules/FinancialManagement.js"></script>
-<script src="js/modules/CollaborationSystem.js"></script>
-<script src="js/modules/DataAnalyticsSystem.js"></script>
-<script src="js/modules/APIIntegrationSystem.js"></script>
-<script src="js/app.js"></script>
-'''
+# 脚本清单按 index.html 中的顺序和加载方式生成，不再手写
+external_scripts = '\n' + render_script_tags(read_script_manifest('index.html'))
 
 # 查找body标签并在其内部末尾添加脚本
 body_tag = soup.find('body')
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# 评论和评分的测试数据与资源列表渲染基准
+# 生成旧格式的 localStorage 快照（resourceComments / resourceRatings 两个完整对象，
+# 即 CommentSystem 改为分页存储之前的数据），再用 node 加载 js/modules/CommentSystem.js
+# （最小的 document/localStorage 替身）测量:
+#   - 启动：构造 CommentSystem；第一次启动会把旧格式转换成分页格式，之后只读取汇总索引；
+#   - 列表渲染：ResourceCenter 为每张卡片取平均评分、评分人数和评论数；
+#   - 打开评论：读取一个资源最新的一页评论；
+#   - 发表一条评论需要写入 localStorage 的字节数。
+# 对比项是原来的做法：启动时解析两个完整对象，每张卡片遍历该资源的全部评分，每次写入整个对象。
+# 评论量增加时，新做法的列表渲染时间应保持不变。
+#
+# 用法:
+#     python comment_fixtures.py generate --resources 200 --comments 100 --out comments-fixture.json
+#     python comment_fixtures.py bench --resources 200 --volumes 10 100 1000
+#     python comment_fixtures.py bench --json
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+SOURCE = os.path.join('js', 'modules', 'CommentSystem.js')
+RUNS = 20
+WORDS = ['资源', '很好', '下载', '速度', '清晰', '感谢', '分享', '教程', '实用', '推荐', '文档', '版本',
+         '更新', '不错', '问题', '解决', '学习', '收藏', '质量', '一般']
+
+BENCH_JS = r"""
+const fs = require('fs');
+const [sourcePath, fixturePath, runs] = [process.argv[1], process.argv[2], Number(process.argv[3])];
+const source = fs.readFileSync(sourcePath, 'utf8').split('// 创建全局实例')[0];
+const fixture = JSON.parse(fs.readFileSync(fixturePath, 'utf8'));
+
+function makeStorage(data) {
+    const map = new Map(Object.entries(data));
+    const storage = {
+        written: 0,
+        getItem: key => map.has(key) ? map.get(key) : null,
+        setItem: (key, value) => { value = String(value); storage.written += value.length; map.set(key, value); },
+        removeItem: key => { map.delete(key); }
+    };
+    return storage;
+}
+function now() { return Number(process.hrtime.bigint()) / 1e6; }
+function median(fn) {
+    const times = [];
+    for (let i = 0; i < runs; i++) {
+        const started = now();
+        fn();
+        times.push(now() - started);
+    }
+    times.sort((a, b) => a - b);
+    return times[times.length >> 1];
+}
+
+global.document = { readyState: 'complete', addEventListener() {}, querySelector() { return null; } };
+global.window = { userManagement: { getCurrentUser: () => ({ id: 'bench-user', username: 'bench' }) } };
+const load = new Function('localStorage', source + '\nreturn CommentSystem;');
+const ids = Object.keys(JSON.parse(fixture.resourceComments));
+const comment = { id: 'bench', userId: 'bench-user', userName: 'bench', content: '新的评论',
+                  timestamp: new Date().toISOString(), likes: 0, likedBy: [] };
+
+// 原来的做法
+const legacyStorage = makeStorage(fixture);
+let comments, ratings;
+const legacy = {
+    startup: median(() => {
+        comments = JSON.parse(legacyStorage.getItem('resourceComments')) || {};
+        ratings = JSON.parse(legacyStorage.getItem('resourceRatings')) || {};
+    }),
+    listRender: median(() => ids.map(id => {
+        const list = ratings[id] || [];
+        const average = list.length ? list.reduce((acc, r) => acc + r.rating, 0) / list.length : 0;
+        return [average, list.length, (comments[id] || []).length];
+    })),
+    openComments: median(() => (comments[ids[0]] || []).slice()),
+    writeBytes: JSON.stringify(Object.assign({}, comments, { [ids[0]]: [comment].concat(comments[ids[0]]) })).length
+};
+
+// 分页存储和增量汇总
+const storage = makeStorage(fixture);
+const CommentSystem = load(storage);
+let started = now();
+new CommentSystem();
+const migration = now() - started;
+let system;
+const paged = {
+    migration,
+    startup: median(() => { system = new CommentSystem(); }),
+    listRender: median(() => ids.map(id => [system.getAverageRating(id), system.getRatingCount(id),
+                                              system.getCommentCount(id)])),
+    pagesLoaded: system.store.pages.size
+};
+// 每次都用新的实例，测量的是第一次读取分页
+const fresh = Array.from({ length: runs }, () => new CommentSystem());
+paged.openComments = median(() => { fresh.pop().getComments(ids[0]); });
+storage.written = 0;
+system.store.addComment(ids[0], comment);
+paged.writeBytes = storage.written;
+
+const consistent = ids.every(id => {
+    const list = ratings[id] || [];
+    const average = list.length ? list.reduce((acc, r) => acc + r.rating, 0) / list.length : 0;
+    return Math.abs(system.getAverageRating(id) - average) < 1e-9 && system.getRatingCount(id) === list.length
+        && system.getCommentCount(id) === (comments[id] || []).length + (id === ids[0] ? 1 : 0);
+}) && system.getComments(ids[0])[0].id === 'bench';
+console.log(JSON.stringify({ legacy, paged, consistent }));
+"""
+
+
+def generate_fixture(resources, comments, ratings=None, seed=1):
+    """生成旧格式的 localStorage 快照：{键: 字符串值}，每个资源 comments 条评论、ratings 个评分"""
+    rng = random.Random(seed)
+    ratings = comments if ratings is None else ratings
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    all_comments = {}
+    all_ratings = {}
+    for r in range(resources):
+        resource_id = str(r + 1)
+        items = []
+        for c in range(comments):
+            user = f'user{rng.randrange(comments * 4 + 1)}'
+            liked = [f'user{rng.randrange(1000)}' for _ in range(rng.randrange(4))]
+            items.append({
+                'id': f'{resource_id}-{c}',
+                'userId': user,
+                'userName': user,
+                'content': ''.join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))),
+                'timestamp': (start + timedelta(minutes=c * 7 + r)).isoformat().replace('+00:00', 'Z'),
+                'likes': len(liked),
+                'likedBy': liked,
+            })
+        items.reverse()  # 旧格式最新的评论在前
+        all_comments[resource_id] = items
+        all_ratings[resource_id] = [{'userId': f'user{u}', 'rating': rng.randint(1, 5),
+                                     'timestamp': (start + timedelta(minutes=u)).isoformat().replace('+00:00', 'Z')}
+                                    for u in range(ratings)]
+    return {'resourceComments': json.dumps(all_comments, ensure_ascii=False, separators=(',', ':')),
+            'resourceRatings': json.dumps(all_ratings, ensure_ascii=False, separators=(',', ':'))}
+
+
+def run_bench(fixture, source=SOURCE, runs=RUNS):
+    """用 node 测量一份快照；没有 node 时返回 None"""
+    node = shutil.which('node')
+    if not node:
+        return None
+    with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    try:
+        result = subprocess.run([node, '-e', BENCH_JS, source, f.name, str(runs)],
+                                capture_output=True, text=True)
+    finally:
+        os.remove(f.name)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout)
+
+
+def bench(resources=200, volumes=(10, 100, 1000), runs=RUNS, source=SOURCE):
+    """每个资源的评论/评分数量为 volumes 中的值时分别测量，返回 {数量: 结果}"""
+    report = {}
+    for volume in volumes:
+        result = run_bench(generate_fixture(resources, volume), source, runs)
+        if result is None:
+            return None
+        report[volume] = result
+    return report
+
+
+def print_report(report, resources):
+    print(f'{resources} 个资源，时间为 node 上的中位数（毫秒）；旧 = 完整对象逐条计算，新 = 分页存储和增量汇总')
+    print(f'{"每资源评论":>10} {"列表渲染 旧/新":>16} {"启动 旧/新":>16} {"首次转换":>8} '
+          f'{"打开评论 旧/新":>16} {"发表评论写入字节 旧/新":>22}')
+    for volume, result in report.items():
+        legacy, paged = result['legacy'], result['paged']
+        print(f'{volume:>10} {legacy["listRender"]:>8.3f}/{paged["listRender"]:<7.3f} '
+              f'{legacy["startup"]:>8.2f}/{paged["startup"]:<7.2f} {paged["migration"]:>8.1f} '
+              f'{legacy["openComments"]:>8.3f}/{paged["openComments"]:<7.3f} '
+              f'{legacy["writeBytes"]:>12}/{paged["writeBytes"]:<9}'
+              f'{"" if result["consistent"] else "  汇总与逐条计算不一致!"}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='评论和评分的测试数据与列表渲染基准')
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate', help='生成旧格式的 localStorage 快照')
+    gen.add_argument('--resources', type=int, default=200)
+    gen.add_argument('--comments', type=int, default=100, help='每个资源的评论数')
+    gen.add_argument('--ratings', type=int, help='每个资源的评分数（默认与评论数相同）')
+    gen.add_argument('--seed', type=int, default=1)
+    gen.add_argument('--out', default='comments-fixture.json')
+    run = sub.add_parser('bench', help='对比不同评论量下的列表渲染和启动时间')
+    run.add_argument('--resources', type=int, default=200)
+    run.add_argument('--volumes', type=int, nargs='+', default=[10, 100, 1000], help='每个资源的评论/评分数')
+    run.add_argument('--runs', type=int, default=RUNS)
+    run.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        fixture = generate_fixture(args.resources, args.comments, args.ratings, args.seed)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, ensure_ascii=False)
+        print(f'已写入 {args.out}（{os.path.getsize(args.out) / 1024 / 1024:.1f} MB），'
+              '在浏览器控制台中逐项 localStorage.setItem 即可加载')
+        return 0
+
+    report = bench(args.resources, args.volumes, args.runs)
+    if report is None:
+        print('未找到 node，无法运行基准测试', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, args.resources)
+    return 0 if all(result['consistent'] for result in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+-- Supabase数据库迁移脚本
+-- 版本: 002
+-- 描述: 过期会话清理、下载历史按月分区、数据保留策略
+-- 清理由 db_maintenance.py 定期执行（按 data_retention_policies 中的配置）
+
+-- 按过期时间分批删除会话需要 expires_at 索引
+CREATE INDEX IF NOT EXISTS idx_user_sessions_expires_at ON user_sessions(expires_at);
+
+-- session_token 的 UNIQUE 约束本身就带索引，这个索引是重复的，只会拖慢写入
+DROP INDEX IF EXISTS idx_user_sessions_session_token;
+
+-- 数据保留策略
+CREATE TABLE IF NOT EXISTS data_retention_policies (
+    table_name VARCHAR(63) PRIMARY KEY,
+    retain_days INTEGER NOT NULL CHECK (retain_days > 0),
+    batch_size INTEGER NOT NULL DEFAULT 1000 CHECK (batch_size > 0),
+    enabled BOOLEAN NOT NULL DEFAULT true,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO data_retention_policies (table_name, retain_days, batch_size)
+VALUES
+    ('user_sessions', 7, 1000),             -- 过期 7 天后删除
+    ('user_download_history', 365, 5000)    -- 下载记录保留一年
+ON CONFLICT (table_name) DO NOTHING;
+
+-- 下载历史改为按 download_date 按月分区，过期数据整月删除分区，不再逐行 DELETE
+DROP INDEX IF EXISTS idx_user_download_history_user_id;
+DROP INDEX IF EXISTS idx_user_download_history_download_date;
+ALTER TABLE user_download_history RENAME TO user_download_history_unpartitioned;
+ALTER TABLE user_download_history_unpartitioned
+    RENAME CONSTRAINT user_download_history_pkey TO user_download_history_unpartitioned_pkey;
+
+CREATE TABLE user_download_history (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    resource_id VARCHAR(50) NOT NULL,
+    resource_title VARCHAR(255) NOT NULL,
+    download_date TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, download_date)
+) PARTITION BY RANGE (download_date);
+
+-- 最近下载记录按用户倒序分页读取，不再需要额外排序
+CREATE INDEX IF NOT EXISTS idx_user_download_history_user_date
+    ON user_download_history(user_id, download_date DESC);
+
+-- 没有对应月分区的数据落到默认分区，由维护任务按批清理
+CREATE TABLE IF NOT EXISTS user_download_history_default PARTITION OF user_download_history DEFAULT;
+
+-- 创建 from_month 到 to_month 之间缺少的月分区，返回新建的分区数
+CREATE OR REPLACE FUNCTION ensure_download_history_partitions(from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::date;
+    created INTEGER := 0;
+    partition_name TEXT;
+BEGIN
+    WHILE month <= to_month LOOP
+        partition_name := 'user_download_history_' || to_char(month, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF user_download_history FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month, (month + INTERVAL '1 month')::date);
+            created := created + 1;
+        END IF;
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 删除整月都早于 cutoff 的分区，返回删除的分区名
+CREATE OR REPLACE FUNCTION drop_download_history_partitions(cutoff DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    partition_name TEXT;
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'user_download_history'::regclass
+          AND c.relname ~ '^user_download_history_[0-9]{4}_[0-9]{2}$'
+    LOOP
+        IF to_date(right(partition_name, 7), 'YYYY_MM') + INTERVAL '1 month' <= cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 先建好已有数据覆盖的月份和未来三个月的分区，再迁移数据
+SELECT ensure_download_history_partitions(
+    COALESCE((SELECT MIN(download_date) FROM user_download_history_unpartitioned), NOW())::date,
+    (NOW() + INTERVAL '3 months')::date
+);
+
+INSERT INTO user_download_history (id, user_id, resource_id, resource_title, download_date)
+SELECT id, user_id, resource_id, resource_title, COALESCE(download_date, NOW())
+FROM user_download_history_unpartitioned;
+
+DROP TABLE user_download_history_unpartitioned;
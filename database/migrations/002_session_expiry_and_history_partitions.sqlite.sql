@@ -0,0 +1,25 @@
+-- 002 在 sqlite 本地替身上的等价脚本（db_migrate.py 使用）
+-- sqlite 不支持分区，下载历史保持单表，过期数据由 db_maintenance.py 按批删除
+
+CREATE INDEX IF NOT EXISTS idx_user_sessions_expires_at ON user_sessions(expires_at);
+DROP INDEX IF EXISTS idx_user_sessions_session_token;
+
+CREATE TABLE IF NOT EXISTS data_retention_policies (
+    table_name VARCHAR(63) PRIMARY KEY,
+    retain_days INTEGER NOT NULL CHECK (retain_days > 0),
+    batch_size INTEGER NOT NULL DEFAULT 1000 CHECK (batch_size > 0),
+    enabled BOOLEAN NOT NULL DEFAULT true,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO data_retention_policies (table_name, retain_days, batch_size)
+VALUES
+    ('user_sessions', 7, 1000),
+    ('user_download_history', 365, 5000)
+ON CONFLICT (table_name) DO NOTHING;
+
+-- 索引与 PostgreSQL 版本保持一致（那边分区后不再有单独的 download_date 索引），负载测试才能反映部署的结构
+DROP INDEX IF EXISTS idx_user_download_history_user_id;
+DROP INDEX IF EXISTS idx_user_download_history_download_date;
+CREATE INDEX IF NOT EXISTS idx_user_download_history_user_date
+    ON user_download_history(user_id, download_date DESC);
@@ -0,0 +1,40 @@
+-- Supabase数据库迁移脚本
+-- 版本: 003
+-- 描述: 只追加的积分流水，物化的余额和按日/按月汇总
+-- 由 points_ledger.py 写入：每批流水在一个事务中追加，同时更新余额和汇总，
+-- 查询余额、今日/本月已获得积分都是按主键读取一行，与流水条数无关。
+-- user_id 不加外键：积分用户可能只存在于 Supabase Auth 中，批量写入也不必逐行检查 users。
+
+-- 积分流水（只追加，不更新、不删除）；idempotency_key 由客户端生成，重试同一批时不会重复记账
+CREATE TABLE IF NOT EXISTS points_ledger (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    idempotency_key VARCHAR(100) NOT NULL UNIQUE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('earn', 'spend')),
+    sub_type VARCHAR(30) NOT NULL,
+    amount INTEGER NOT NULL CHECK (amount > 0),
+    balance_after INTEGER NOT NULL,
+    description VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- 按用户分页读取流水（最新的在前）
+CREATE INDEX IF NOT EXISTS idx_points_ledger_user_id ON points_ledger(user_id, id);
+
+-- 每个用户的当前余额
+CREATE TABLE IF NOT EXISTS points_balances (
+    user_id UUID PRIMARY KEY,
+    balance INTEGER NOT NULL DEFAULT 0 CHECK (balance >= 0),
+    earned_total BIGINT NOT NULL DEFAULT 0,
+    spent_total BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 按日（2024-01-29）和按月（2024-01）的获得/消费合计，用于每日、每月积分上限
+CREATE TABLE IF NOT EXISTS points_rollups (
+    user_id UUID NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    earned INTEGER NOT NULL DEFAULT 0,
+    spent INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, period)
+);
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# 数据库负载测试
+# 按目标速率回放应用中的几类操作，报告每类操作的吞吐量和 p50/p95/p99 延迟：
+#     login           按用户名查邮箱 -> 按邮箱取资料 -> 更新 last_login -> 写入新会话（UserManagement.login）
+#     session_lookup  按 session_token 查未过期的会话
+#     points_update   给会员加积分（PointSystem）
+#     download_page   分页读取下载历史（ResourceCenter.loadDownloadHistory，每页 20 条）
+#
+# 数据来自 synthetic_data.py，参数由同样的种子重新推算，不需要预先读取数据。
+# 操作按固定间隔排好时间（开环），延迟从计划开始时间算起，数据库变慢时排队的时间也计算在内；
+# --rate 0 表示不限速，测量最大吞吐量。
+#
+# 用法:
+#     python synthetic_data.py --users 100000 --format sqlite --out loadtest.sqlite3
+#     python db_loadtest.py --db loadtest.sqlite3 --rate 2000 --duration 30 --workers 4
+#     python db_loadtest.py --dsn postgresql://localhost/app --rate 500 --mix login=1,session_lookup=10
+
+import argparse
+import itertools
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from performance_test import percentile
+from synthetic_data import SyntheticData, timestamp
+
+DEFAULT_MIX = {'login': 1, 'session_lookup': 6, 'points_update': 2, 'download_page': 3}
+WRITE_OPERATIONS = {'login', 'points_update'}
+PAGE_SIZE = 20
+
+
+class Operations:
+    """各类操作的 SQL，参数占位符统一用 ?，PostgreSQL 连接时换成 %s"""
+
+    def __init__(self, data, placeholder='?'):
+        self.data = data
+        self.placeholder = placeholder
+
+    def _sql(self, sql):
+        return sql if self.placeholder == '?' else sql.replace('?', self.placeholder)
+
+    def _now(self):
+        return timestamp(datetime.now(timezone.utc))
+
+    def login(self, cur, rng):
+        i = rng.randrange(self.data.users)
+        cur.execute(self._sql('SELECT email FROM users WHERE username = ?'), (self.data.username(i),))
+        email = cur.fetchone()[0]
+        cur.execute(self._sql('SELECT * FROM users WHERE email = ?'), (email,))
+        user = cur.fetchone()
+        now = self._now()
+        cur.execute(self._sql('UPDATE users SET last_login = ? WHERE id = ?'), (now, user[0]))
+        token = uuid.uuid4().hex
+        expires = timestamp(datetime.now(timezone.utc) + timedelta(days=30))
+        cur.execute(self._sql('INSERT INTO user_sessions (id, user_id, session_token, expires_at, created_at) '
+                              'VALUES (?, ?, ?, ?, ?)'), (str(uuid.uuid4()), user[0], token, expires, now))
+
+    def session_lookup(self, cur, rng):
+        # 在有会话的用户里挑一个；大约一半用户没有会话，最多试几次
+        for _ in range(8):
+            tokens = self.data.session_tokens(rng.randrange(self.data.users))
+            if tokens:
+                break
+        token = rng.choice(tokens) if tokens else 'missing'
+        cur.execute(self._sql('SELECT user_id, expires_at FROM user_sessions '
+                              'WHERE session_token = ? AND expires_at > ?'), (token, timestamp(self.data.now)))
+        cur.fetchall()
+
+    def points_update(self, cur, rng):
+        i = rng.randrange(self.data.users)
+        cur.execute(self._sql('UPDATE user_membership SET points = points + ?, updated_at = ? WHERE user_id = ?'),
+                    (rng.randint(1, 50), self._now(), self.data.user_id(i)))
+
+    def download_page(self, cur, rng):
+        i = rng.randrange(self.data.users)
+        page = min(int(rng.expovariate(1.5)), 4)
+        cur.execute(self._sql('SELECT resource_id, resource_title, download_date FROM user_download_history '
+                              'WHERE user_id = ? ORDER BY download_date DESC LIMIT ? OFFSET ?'),
+                    (self.data.user_id(i), PAGE_SIZE, page * PAGE_SIZE))
+        cur.fetchall()
+
+
+def sqlite_connect(path):
+    def connect():
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+    return connect
+
+
+def postgres_connect(dsn):
+    import psycopg2
+
+    return lambda: psycopg2.connect(dsn)
+
+
+def count_users(conn, placeholder='?'):
+    """合成用户数（迁移脚本自带的默认用户不算在内）
+
+    synthetic_data.py 生成序号 0..n-1 的用户，用户名由 SyntheticData.username 算出；
+    在用户名唯一索引上二分查找第一个不存在的序号，只需要 O(log n) 次点查询。
+    """
+    username = SyntheticData(0).username
+    cur = conn.cursor()
+
+    def exists(i):
+        cur.execute(f'SELECT 1 FROM users WHERE username = {placeholder}', (username(i),))
+        return cur.fetchone() is not None
+
+    if not exists(0):
+        return 0
+    low, high = 0, 1
+    while exists(high):
+        low, high = high, high * 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if exists(middle):
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'未知的操作: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_load(connect, data, mix=None, rate=1000.0, duration=10.0, workers=4, placeholder='?', seed=1):
+    """按目标速率执行操作，返回 {操作: {latencies, service, errors}} 和实际耗时"""
+    mix = mix or DEFAULT_MIX
+    ops = Operations(data, placeholder)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    ticket = itertools.count()
+    lock = threading.Lock()
+    results = {name: {'latencies': [], 'service': [], 'errors': 0, 'last_error': None} for name in names}
+    started = time.perf_counter() + 0.05
+    deadline = started + duration
+
+    def worker(n):
+        conn = connect()
+        rng = random.Random(seed * 1000 + n)
+        local = {name: ([], [], 0, None) for name in names}
+        try:
+            while True:
+                k = next(ticket)
+                scheduled = started + k / rate if rate else time.perf_counter()
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = rng.choices(names, weights)[0]
+                began = time.perf_counter()
+                try:
+                    cur = conn.cursor()
+                    if placeholder == '?':
+                        # sqlite 写操作一开始就拿写锁，避免读锁升级时出现 SQLITE_BUSY
+                        cur.execute('BEGIN IMMEDIATE' if name in WRITE_OPERATIONS else 'BEGIN')
+                    getattr(ops, name)(cur, rng)
+                    conn.commit()
+                except Exception as e:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                    latencies, service, errors, _ = local[name]
+                    local[name] = (latencies, service, errors + 1, f'{type(e).__name__}: {e}')
+                    continue
+                finished = time.perf_counter()
+                local[name][0].append((finished - scheduled) * 1000)
+                local[name][1].append((finished - began) * 1000)
+        finally:
+            conn.close()
+            with lock:
+                for name, (latencies, service, errors, last_error) in local.items():
+                    results[name]['latencies'].extend(latencies)
+                    results[name]['service'].extend(service)
+                    results[name]['errors'] += errors
+                    results[name]['last_error'] = last_error or results[name]['last_error']
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def build_report(results, elapsed, rate, workers, backend):
+    operations = {}
+    for name, result in results.items():
+        latencies = result['latencies']
+        operations[name] = {
+            'count': len(latencies),
+            'errors': result['errors'],
+            'last_error': result['last_error'],
+            'throughput': len(latencies) / elapsed,
+            'latency_ms': {f'p{p}': percentile(latencies, p) for p in (50, 95, 99)},
+            'service_ms': {f'p{p}': percentile(result['service'], p) for p in (50, 95, 99)},
+        }
+    total = sum(op['count'] for op in operations.values())
+    return {
+        'backend': backend,
+        'target_rate': rate,
+        'achieved_rate': total / elapsed,
+        'seconds': elapsed,
+        'workers': workers,
+        'operations': operations,
+    }
+
+
+def print_report(report):
+    target = f'{report["target_rate"]:.0f}/s' if report['target_rate'] else '不限速'
+    print(f'后端: {report["backend"]}，{report["workers"]} 个连接，目标 {target}，'
+          f'实际 {report["achieved_rate"]:.0f}/s，持续 {report["seconds"]:.1f} 秒')
+    print(f'{"操作":<16}{"次数":>8}{"错误":>6}{"吞吐/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"服务p99":>9}')
+    for name, op in report['operations'].items():
+        lat = op['latency_ms']
+        print(f'{name:<18}{op["count"]:>8}{op["errors"]:>8}{op["throughput"]:>10.1f}'
+              f'{lat["p50"]:>10.2f}{lat["p95"]:>10.2f}{lat["p99"]:>10.2f}{op["service_ms"]["p99"]:>10.2f}')
+        if op['last_error']:
+            print(f'    最后一个错误: {op["last_error"]}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='按目标速率回放登录、会话查询、积分更新和下载历史分页')
+    parser.add_argument('--db', default='loadtest.sqlite3', help='sqlite 数据库（synthetic_data.py --format sqlite 生成）')
+    parser.add_argument('--dsn', help='PostgreSQL 连接串（需要 psycopg2）')
+    parser.add_argument('--seed', type=int, default=42, help='生成数据时使用的种子')
+    parser.add_argument('--sessions', type=float, default=2.0, help='生成数据时的平均会话数')
+    parser.add_argument('--rate', type=float, default=1000, help='目标操作数/秒，0 为不限速')
+    parser.add_argument('--duration', type=float, default=10, help='持续秒数')
+    parser.add_argument('--workers', type=int, default=4, help='并发连接数')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='操作比例，如 login=1,session_lookup=6,points_update=2,download_page=3')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    if args.dsn:
+        connect, placeholder, backend = postgres_connect(args.dsn), '%s', 'postgresql'
+    else:
+        connect, placeholder, backend = sqlite_connect(args.db), '?', f'sqlite {sqlite3.sqlite_version}'
+    conn = connect()
+    try:
+        users = count_users(conn, placeholder)
+    except Exception as e:
+        print(f'错误: 无法读取 users 表（先用 synthetic_data.py 生成数据）: {e}', file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+    if not users:
+        print('错误: users 表为空', file=sys.stderr)
+        return 2
+
+    data = SyntheticData(users, args.seed, args.sessions)
+    results, elapsed = run_load(connect, data, args.mix, args.rate, args.duration, args.workers, placeholder)
+    report = build_report(results, elapsed, args.rate, args.workers, backend)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if any(op['errors'] for op in report['operations'].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
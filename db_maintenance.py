@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# 数据库维护任务
+# 按 data_retention_policies（002 迁移创建）清理数据，建议每天定时执行一次：
+#     user_sessions          删除过期超过 retain_days 天的会话
+#     user_download_history  PostgreSQL 上整月删除早于保留期的分区（DROP TABLE，不逐行删除），
+#                            并提前建好未来几个月的分区；默认分区和 sqlite 上按批删除
+#
+# 逐行删除每批最多 batch_size 行，每批一个短事务（PostgreSQL 上 FOR UPDATE SKIP LOCKED），
+# 批之间可以暂停，不会长时间锁表，也不会和正在使用的会话抢锁。
+#
+# bench 子命令在内存 sqlite 中按几种数据规模对比 001 的表结构（数据只增不减）和 002 + 定期清理后的
+# 会话查询、下载历史分页和插入延迟，并对比按批删除一个月数据和删除整个分区的耗时。
+#
+# 用法:
+#     python db_maintenance.py run --db local.sqlite3
+#     python db_maintenance.py run --dsn postgresql://localhost/app --pause 0.05
+#     python db_maintenance.py bench --sizes 10000 40000 160000
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from db_migrate import MIGRATIONS_DIR, PostgresBackend, SqliteBackend, migrate
+from performance_test import percentile
+from synthetic_data import SyntheticData, load_sqlite, timestamp
+
+PARTITION_MONTHS_AHEAD = 3
+
+
+def load_policies(backend):
+    rows = backend.query('SELECT table_name, retain_days, batch_size FROM data_retention_policies WHERE enabled')
+    return {table: {'retain_days': days, 'batch_size': batch} for table, days, batch in rows}
+
+
+def purge_in_batches(backend, table, column, cutoff, batch_size, pause=0.0):
+    """删除 column < cutoff 的行，每批一个事务；返回删除行数、批数和最长一批的耗时"""
+    if backend.name == 'postgresql':
+        sql = (f'DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {column} < %s '
+               'LIMIT %s FOR UPDATE SKIP LOCKED)')
+    else:
+        sql = f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {column} < %s LIMIT %s)'
+    deleted = batches = 0
+    longest = 0.0
+    while True:
+        started = time.perf_counter()
+        count = backend.execute(sql, (cutoff, batch_size))
+        longest = max(longest, time.perf_counter() - started)
+        if count <= 0:
+            break
+        deleted += count
+        batches += 1
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return {'deleted': deleted, 'batches': batches, 'longest_batch_ms': longest * 1000}
+
+
+def _cutoff(backend, moment):
+    # sqlite 中时间是 ISO 字符串，PostgreSQL 直接传 datetime
+    return moment if backend.name == 'postgresql' else timestamp(moment)
+
+
+def purge_expired_sessions(backend, retain_days, batch_size, now=None, pause=0.0):
+    now = now or datetime.now(timezone.utc)
+    cutoff = _cutoff(backend, now - timedelta(days=retain_days))
+    return purge_in_batches(backend, 'user_sessions', 'expires_at', cutoff, batch_size, pause)
+
+
+def apply_history_retention(backend, retain_days, batch_size, now=None, pause=0.0):
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retain_days)
+    result = {'dropped_partitions': [], 'created_partitions': 0}
+    if backend.name == 'postgresql':
+        result['created_partitions'] = backend.query(
+            'SELECT ensure_download_history_partitions(%s, %s)',
+            (now.date(), (now + timedelta(days=31 * PARTITION_MONTHS_AHEAD)).date()))[0][0]
+        result['dropped_partitions'] = [row[0] for row in backend.query(
+            'SELECT drop_download_history_partitions(%s)', (cutoff.date(),))]
+        table = 'user_download_history_default'
+    else:
+        table = 'user_download_history'
+    result.update(purge_in_batches(backend, table, 'download_date', _cutoff(backend, cutoff), batch_size, pause))
+    return result
+
+
+def run_maintenance(backend, now=None, pause=0.0):
+    policies = load_policies(backend)
+    report = {}
+    if 'user_sessions' in policies:
+        policy = policies['user_sessions']
+        report['user_sessions'] = purge_expired_sessions(backend, policy['retain_days'], policy['batch_size'],
+                                                         now, pause)
+    if 'user_download_history' in policies:
+        policy = policies['user_download_history']
+        report['user_download_history'] = apply_history_retention(backend, policy['retain_days'],
+                                                                  policy['batch_size'], now, pause)
+    return report
+
+
+# ---- 基准测试 ----
+
+HISTORY_DAYS = 3 * 365
+SESSION_DAYS = 30
+
+
+def _fill(conn, data, users, sessions, downloads, rng):
+    """users 个用户，sessions 个会话和 downloads 条下载记录均匀分布在过去三年；返回仍有效的会话令牌"""
+    load_sqlite(data, conn, ['users'])
+    now = data.now
+    active = []
+    rows = []
+    for _ in range(sessions):
+        created = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        expires = created + timedelta(days=SESSION_DAYS)
+        token = uuid.UUID(int=rng.getrandbits(128)).hex
+        if expires > now:
+            active.append(token)
+        rows.append((str(uuid.UUID(int=rng.getrandbits(128))), data.user_id(rng.randrange(users)), token,
+                     timestamp(expires), timestamp(created)))
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO user_sessions (id, user_id, session_token, expires_at, created_at) '
+                     'VALUES (?, ?, ?, ?, ?)', rows)
+    rows = []
+    for _ in range(downloads):
+        when = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        rows.append((str(uuid.UUID(int=rng.getrandbits(128))), data.user_id(rng.randrange(users)),
+                     'resource-1', '资源 1', timestamp(when)))
+    conn.executemany('INSERT INTO user_download_history (id, user_id, resource_id, resource_title, download_date) '
+                     'VALUES (?, ?, ?, ?, ?)', rows)
+    conn.execute('COMMIT')
+    conn.execute('ANALYZE')
+    return active
+
+
+def _timed(func, runs):
+    samples = []
+    for n in range(runs):
+        started = time.perf_counter()
+        func(n)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {'p50': percentile(samples, 50), 'p99': percentile(samples, 99)}
+
+
+def _measure(conn, data, users, active, rng, runs):
+    now = timestamp(data.now)
+    tokens = [rng.choice(active) for _ in range(runs)] if active else ['-'] * runs
+    user_ids = [data.user_id(rng.randrange(users)) for _ in range(runs)]
+    return {
+        'session_lookup': _timed(lambda n: conn.execute(
+            'SELECT user_id FROM user_sessions WHERE session_token = ? AND expires_at > ?',
+            (tokens[n], now)).fetchall(), runs),
+        'session_insert': _timed(lambda n: conn.execute(
+            'INSERT INTO user_sessions (id, user_id, session_token, expires_at, created_at) VALUES (?, ?, ?, ?, ?)',
+            (f'bench-{n}', user_ids[n], f'bench-token-{n}', now, now)), runs),
+        'history_page': _timed(lambda n: conn.execute(
+            'SELECT resource_id, download_date FROM user_download_history WHERE user_id = ? '
+            'ORDER BY download_date DESC LIMIT 20', (user_ids[n],)).fetchall(), runs),
+        'history_insert': _timed(lambda n: conn.execute(
+            'INSERT INTO user_download_history (id, user_id, resource_id, resource_title, download_date) '
+            'VALUES (?, ?, ?, ?, ?)', (f'bench-{n}', user_ids[n], 'resource-1', '资源 1', now)), runs),
+    }
+
+
+def _layout(size, target, runs, directory, maintain):
+    backend = SqliteBackend()
+    conn = backend.conn
+    migrate(backend, directory, target=target)
+    users = max(1000, size // 20)
+    data = SyntheticData(users)
+    rng = random.Random(size)
+    active = _fill(conn, data, users, size, size, rng)
+    result = {}
+    if maintain:
+        started = time.perf_counter()
+        result['maintenance'] = run_maintenance(backend, data.now)
+        result['maintenance_seconds'] = time.perf_counter() - started
+        conn.execute('ANALYZE')
+    result['rows'] = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                      for table in ('user_sessions', 'user_download_history')}
+    result['latency_us'] = _measure(conn, data, users, active, rng, runs)
+    backend.close()
+    return result
+
+
+def retention_cost(rows):
+    """删除一个月的数据：按批 DELETE 与删除整个分区（DROP TABLE）的耗时对比（毫秒）"""
+    backend = SqliteBackend()
+    conn = backend.conn
+    conn.execute('CREATE TABLE history (id TEXT PRIMARY KEY, user_id TEXT, download_date TEXT)')
+    conn.execute('CREATE INDEX history_user_date ON history(user_id, download_date)')
+    conn.execute('CREATE INDEX history_date ON history(download_date)')
+    conn.execute('CREATE TABLE history_month (id TEXT PRIMARY KEY, user_id TEXT, download_date TEXT)')
+    conn.execute('CREATE INDEX history_month_user_date ON history_month(user_id, download_date)')
+    rng = random.Random(rows)
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    data = [(uuid.UUID(int=rng.getrandbits(128)).hex, str(rng.randrange(1000)),
+             timestamp(start + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400)))) for _ in range(rows)]
+    month_end = timestamp(start + timedelta(days=31))
+    conn.execute('BEGIN')
+    conn.executemany('INSERT INTO history VALUES (?, ?, ?)', data)
+    conn.executemany('INSERT INTO history_month VALUES (?, ?, ?)', [row for row in data if row[2] < month_end])
+    conn.execute('COMMIT')
+    started = time.perf_counter()
+    batch = purge_in_batches(backend, 'history', 'download_date', month_end, 1000)
+    delete_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    conn.execute('DROP TABLE history_month')
+    drop_ms = (time.perf_counter() - started) * 1000
+    backend.close()
+    return {'rows': batch['deleted'], 'batched_delete_ms': delete_ms, 'longest_batch_ms': batch['longest_batch_ms'],
+            'drop_partition_ms': drop_ms}
+
+
+def bench(sizes, runs=500, directory=MIGRATIONS_DIR):
+    results = []
+    for size in sizes:
+        results.append({
+            'size': size,
+            'before': _layout(size, '001', runs, directory, maintain=False),
+            'after': _layout(size, None, runs, directory, maintain=True),
+            'retention': retention_cost(size),
+        })
+    return results
+
+
+def print_bench(results):
+    labels = [('session_lookup', '会话查询'), ('session_insert', '会话插入'),
+              ('history_page', '下载历史分页'), ('history_insert', '下载历史插入')]
+    for result in results:
+        before, after = result['before'], result['after']
+        print(f'\n规模: 会话和下载记录各 {result["size"]} 行（三年内均匀分布）')
+        print(f'  001（不清理）: user_sessions {before["rows"]["user_sessions"]} 行，'
+              f'user_download_history {before["rows"]["user_download_history"]} 行')
+        print(f'  002 + 清理:    user_sessions {after["rows"]["user_sessions"]} 行，'
+              f'user_download_history {after["rows"]["user_download_history"]} 行'
+              f'（维护耗时 {after["maintenance_seconds"] * 1000:.0f} ms）')
+        for key, label in labels:
+            b, a = before['latency_us'][key], after['latency_us'][key]
+            print(f'  {label}: p50 {b["p50"]:.1f} -> {a["p50"]:.1f} µs, p99 {b["p99"]:.1f} -> {a["p99"]:.1f} µs')
+        for table, stats in after['maintenance'].items():
+            print(f'  清理 {table}: {stats["deleted"]} 行，{stats["batches"]} 批，'
+                  f'最长一批 {stats["longest_batch_ms"]:.1f} ms')
+        cost = result['retention']
+        print(f'  删除一个月的数据（{cost["rows"]} 行）: 按批 DELETE {cost["batched_delete_ms"]:.1f} ms'
+              f'（最长一批 {cost["longest_batch_ms"]:.1f} ms），删除分区 {cost["drop_partition_ms"]:.2f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='按保留策略清理过期会话和下载历史')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR, help='迁移脚本目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help='执行一次清理')
+    p.add_argument('--db', default='local.sqlite3', help='sqlite 数据库文件')
+    p.add_argument('--dsn', help='PostgreSQL 连接串（需要 psycopg2）')
+    p.add_argument('--pause', type=float, default=0.0, help='每批之间暂停的秒数')
+    p.add_argument('--json', action='store_true', help='以JSON输出结果')
+
+    p = sub.add_parser('bench', help='对比不同数据规模下清理前后的延迟')
+    p.add_argument('--sizes', type=int, nargs='+', default=[10000, 40000, 160000], help='会话和下载记录的行数')
+    p.add_argument('--runs', type=int, default=500, help='每项测量的次数')
+    p.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        results = bench(args.sizes, args.runs, args.dir)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            print_bench(results)
+        return 0
+
+    backend = PostgresBackend(args.dsn) if args.dsn else SqliteBackend(args.db)
+    try:
+        report = run_maintenance(backend, pause=args.pause)
+    except Exception as e:
+        print(f'错误: 清理失败（是否已执行 002 迁移？）: {e}', file=sys.stderr)
+        return 2
+    finally:
+        backend.close()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    else:
+        for table, stats in report.items():
+            line = f'{table}: 删除 {stats["deleted"]} 行（{stats["batches"]} 批，最长一批 {stats["longest_batch_ms"]:.1f} ms）'
+            if stats.get('dropped_partitions'):
+                line += f'，删除分区 {", ".join(stats["dropped_partitions"])}'
+            if stats.get('created_partitions'):
+                line += f'，新建分区 {stats["created_partitions"]} 个'
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+# 数据库迁移与查询计划基准
+# 按编号顺序执行 database/migrations/NNN_*.sql，已执行的版本记录在 schema_migrations 表中
+# （含校验和，已执行的脚本被改动时报错）。
+#
+# 本地替身使用 sqlite3：执行前把 PostgreSQL 方言（UUID、TIMESTAMPTZ、NOW()、gen_random_uuid()、
+# ::jsonb 等）转换成 sqlite 能执行的写法；sqlite 无法表达的语句可以放在同名的 .sqlite.sql 文件中替换。
+# 指定 --dsn 时连接真正的 PostgreSQL（需要 psycopg2），脚本原样执行。
+#
+# bench 子命令在内存数据库中执行全部迁移，按 --scale 生成用户、会话和下载历史，
+# 对应用中的主要查询记录 EXPLAIN QUERY PLAN 和延迟分位数，并报告多余和缺失的索引
+# （加 --strict 时发现这样的索引以状态码 1 退出）。
+# 已执行迁移的校验和只包含当前后端实际执行的脚本（sqlite 上有 .sqlite.sql 替换脚本时是它）。
+#
+# 用法:
+#     python db_migrate.py migrate --db local.sqlite3
+#     python db_migrate.py status --db local.sqlite3
+#     python db_migrate.py bench --scale 20000 --json > plan.json
+#     python db_migrate.py bench --strict
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from performance_test import percentile
+from synthetic_data import SyntheticData, load_sqlite, timestamp
+
+# 相对本文件而不是当前目录，从其他目录运行（synthetic_data.py、db_loadtest.py 等）时同样能找到
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'migrations')
+TRACKING_TABLE = 'schema_migrations'
+MIGRATION_NAME = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+# PostgreSQL -> sqlite 的最小转换，只覆盖迁移脚本中用到的写法
+_DIALECT = [
+    (re.compile(r'\bgen_random_uuid\(\)', re.I), '(lower(hex(randomblob(16))))'),
+    (re.compile(r'\bBIGSERIAL\s+PRIMARY\s+KEY\b', re.I), 'INTEGER PRIMARY KEY'),  # sqlite 只有这种写法是自增 rowid
+    (re.compile(r'\bTIMESTAMP\s+WITH\s+TIME\s+ZONE\b', re.I), 'TEXT'),
+    (re.compile(r'\bTIMESTAMPTZ\b', re.I), 'TEXT'),
+    (re.compile(r'\bNOW\(\)', re.I), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'\bUUID\b'), 'TEXT'),
+    (re.compile(r'\bJSONB?\b', re.I), 'TEXT'),
+    (re.compile(r'::\w+'), ''),
+]
+
+
+class MigrationError(Exception):
+    pass
+
+
+def pg_to_sqlite(sql):
+    for pattern, replacement in _DIALECT:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """返回按版本号排序的 [(版本, 名称, 路径)]"""
+    migrations = []
+    for filename in os.listdir(directory):
+        m = MIGRATION_NAME.match(filename)
+        if m:
+            migrations.append((m.group(1), m.group(2), os.path.join(directory, filename)))
+    migrations.sort(key=lambda item: int(item[0]))
+    versions = [version for version, _, _ in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise MigrationError(f'迁移版本号重复: {", ".join(sorted(duplicates))}')
+    return migrations
+
+
+def _checksum(path):
+    """一个脚本文件的校验和"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class SqliteBackend:
+    name = 'sqlite'
+
+    def __init__(self, path=':memory:'):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+
+    def source_path(self, path):
+        """实际执行的脚本：有 .sqlite.sql 替换脚本时用它"""
+        override = path[:-len('.sql')] + '.sqlite.sql'
+        return override if os.path.exists(override) else path
+
+    def script_for(self, path):
+        with open(self.source_path(path), 'r', encoding='utf-8') as f:
+            return pg_to_sqlite(f.read())
+
+    def apply(self, sql, record):
+        """在一个事务里执行迁移脚本并写入记录"""
+        cur = self.conn.cursor()
+        try:
+            cur.execute('BEGIN')
+            for statement in split_statements(sql):
+                cur.execute(statement)
+            cur.execute(f'INSERT INTO {TRACKING_TABLE} (version, name, checksum, applied_at, duration_ms) '
+                        'VALUES (?, ?, ?, ?, ?)', record)
+            cur.execute('COMMIT')
+        except Exception:
+            cur.execute('ROLLBACK')
+            raise
+
+    def query(self, sql, params=()):
+        return self.conn.execute(sql.replace('%s', '?'), params).fetchall()
+
+    def execute(self, sql, params=()):
+        """执行一条语句（自动提交），返回影响的行数"""
+        return self.conn.execute(sql.replace('%s', '?'), params).rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresBackend:
+    name = 'postgresql'
+
+    def __init__(self, dsn):
+        import psycopg2
+
+        self.conn = psycopg2.connect(dsn)
+
+    def source_path(self, path):
+        return path
+
+    def script_for(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def apply(self, sql, record):
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(sql)
+                cur.execute(f'INSERT INTO {TRACKING_TABLE} (version, name, checksum, applied_at, duration_ms) '
+                            'VALUES (%s, %s, %s, %s, %s)', record)
+
+    def query(self, sql, params=()):
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def execute(self, sql, params=()):
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+def split_statements(sql):
+    """按分号拆分语句，忽略字符串、注释和 $$ 包围的函数体中的分号"""
+    statements = []
+    current = []
+    i = 0
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end < 0 else end + 1
+            current.append('\n')
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        if ch == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and sql[end + 1:end + 2] == "'":
+                    end += 2
+                elif sql[end] == "'":
+                    break
+                else:
+                    end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        m = re.match(r'\$\w*\$', sql[i:])
+        if m:
+            end = sql.find(m.group(), i + len(m.group()))
+            end = n if end < 0 else end + len(m.group())
+            current.append(sql[i:end])
+            i = end
+            continue
+        if ch == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def ensure_tracking_table(backend):
+    backend.execute(f'CREATE TABLE IF NOT EXISTS {TRACKING_TABLE} ('
+                    'version VARCHAR(20) PRIMARY KEY, name VARCHAR(255) NOT NULL, '
+                    'checksum VARCHAR(64) NOT NULL, applied_at VARCHAR(40) NOT NULL, '
+                    'duration_ms INTEGER NOT NULL)')
+
+
+def applied_migrations(backend):
+    ensure_tracking_table(backend)
+    rows = backend.query(f'SELECT version, name, checksum, applied_at, duration_ms FROM {TRACKING_TABLE}')
+    return {row[0]: row for row in rows}
+
+
+def migrate(backend, directory=MIGRATIONS_DIR, target=None, allow_changed=False):
+    """按顺序执行尚未执行的迁移，返回执行过的 [(版本, 名称, 毫秒)]"""
+    applied = applied_migrations(backend)
+    done = []
+    for version, name, path in discover_migrations(directory):
+        if target is not None and int(version) > int(target):
+            break
+        checksum = _checksum(backend.source_path(path))
+        if version in applied:
+            if applied[version][2] != checksum and not allow_changed:
+                raise MigrationError(f'迁移 {version}_{name} 执行后被修改过（校验和不一致），'
+                                     '请新建迁移而不是修改已执行的脚本')
+            continue
+        started = time.perf_counter()
+        sql = backend.script_for(path)
+        try:
+            backend.apply(sql, (version, name, checksum, datetime.now(timezone.utc).isoformat(), 0))
+        except Exception as e:
+            raise MigrationError(f'迁移 {version}_{name} 失败: {e}') from e
+        elapsed = int((time.perf_counter() - started) * 1000)
+        backend.execute(f'UPDATE {TRACKING_TABLE} SET duration_ms = %s WHERE version = %s', (elapsed, version))
+        done.append((version, name, elapsed))
+    return done
+
+
+def migration_status(backend, directory=MIGRATIONS_DIR):
+    applied = applied_migrations(backend)
+    status = []
+    for version, name, path in discover_migrations(directory):
+        row = applied.get(version)
+        if row is None:
+            state = 'pending'
+        elif row[2] != _checksum(backend.source_path(path)):
+            state = 'changed'
+        else:
+            state = 'applied'
+        status.append({'version': version, 'name': name, 'state': state,
+                       'applied_at': row[3] if row else None})
+    return status
+
+
+# ---- 合成数据 ----
+
+def load_synthetic_data(backend, users=10000, sessions_per_user=2, downloads_per_user=20, seed=42):
+    """用 synthetic_data 生成数据并导入，返回 {表: 行数} 和抽样用的键"""
+    data = SyntheticData(users, seed, sessions_per_user, downloads_per_user)
+    counts = load_sqlite(data, backend.conn)
+    rng = random.Random(seed)
+    picked = [rng.randrange(users) for _ in range(min(200, users))]
+    tokens = [token for i in picked for token in data.session_tokens(i)]
+    samples = {
+        'user_id': [data.user_id(i) for i in picked],
+        'username': [data.username(i) for i in picked],
+        'email': [data.email(i) for i in picked],
+        'session_token': tokens or ['-'],
+        'now': [timestamp(data.now)],
+    }
+    return counts, samples
+
+
+# ---- 查询计划 ----
+
+# 应用中的主要查询（对应 UserManagement/ResourceCenter/AppCenter 里的 supabase 调用）
+# ideal 是能让该查询不做全表扫描、不额外排序的索引
+QUERIES = [
+    {'name': 'login_by_username', 'source': 'UserManagement.login',
+     'sql': 'SELECT email FROM users WHERE username = ?', 'params': ['username'],
+     'ideal': ('users', ['username'])},
+    {'name': 'profile_by_email', 'source': 'UserManagement.login',
+     'sql': 'SELECT * FROM users WHERE email = ?', 'params': ['email'],
+     'ideal': ('users', ['email'])},
+    {'name': 'profile_by_id', 'source': 'UserManagement.register',
+     'sql': 'SELECT * FROM users WHERE id = ?', 'params': ['user_id'],
+     'ideal': ('users', ['id'])},
+    {'name': 'recent_downloads', 'source': 'ResourceCenter.loadDownloadHistory',
+     'sql': 'SELECT * FROM user_download_history WHERE user_id = ? ORDER BY download_date DESC LIMIT 20',
+     'params': ['user_id'], 'ideal': ('user_download_history', ['user_id', 'download_date'])},
+    {'name': 'clear_downloads', 'source': 'ResourceCenter.saveDownloadHistory',
+     'sql': 'SELECT id FROM user_download_history WHERE user_id = ?', 'params': ['user_id'],
+     'ideal': ('user_download_history', ['user_id'])},
+    {'name': 'installed_apps', 'source': 'AppCenter.loadInstalledApps',
+     'sql': 'SELECT app_id FROM user_installed_apps WHERE user_id = ?', 'params': ['user_id'],
+     'ideal': ('user_installed_apps', ['user_id'])},
+    {'name': 'session_by_token', 'source': 'user_sessions',
+     'sql': 'SELECT * FROM user_sessions WHERE session_token = ?', 'params': ['session_token'],
+     'ideal': ('user_sessions', ['session_token'])},
+    {'name': 'expired_sessions', 'source': 'user_sessions 清理',
+     'sql': 'SELECT id FROM user_sessions WHERE expires_at < ? LIMIT 1000', 'params': ['now'],
+     'ideal': ('user_sessions', ['expires_at'])},
+]
+
+
+def explain(conn, sql, params):
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(plan):
+    """全表扫描和额外排序"""
+    problems = []
+    for line in plan:
+        if re.match(r'SCAN \w+$', line) or re.match(r'SCAN TABLE \w+$', line):
+            problems.append('全表扫描')
+        if 'TEMP B-TREE' in line:
+            problems.append('额外排序')
+    return problems
+
+
+def _used_indexes(plan):
+    found = set()
+    for line in plan:
+        m = re.search(r'USING (?:COVERING )?INDEX (\w+)', line)
+        if m:
+            found.add(m.group(1))
+        if 'INTEGER PRIMARY KEY' in line:
+            found.add('rowid')
+    return found
+
+
+def time_query(conn, sql, param_names, samples, runs):
+    latencies = []
+    rng = random.Random(7)
+    for _ in range(runs):
+        params = [rng.choice(samples[name]) for name in param_names]
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return {f'p{pct}': percentile(latencies, pct) for pct in (50, 95, 99)}
+
+
+def indexes(conn):
+    """{表: [{name, columns, unique, origin}]}，origin: c=CREATE INDEX, u=UNIQUE 约束, pk=主键"""
+    result = {}
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    for table in tables:
+        entries = []
+        for _, name, unique, origin, _ in conn.execute(f'PRAGMA index_list({table})'):
+            columns = [row[2] for row in conn.execute(f'PRAGMA index_info({name})')]
+            entries.append({'name': name, 'columns': columns, 'unique': bool(unique), 'origin': origin})
+        result[table] = entries
+    return result
+
+
+def redundant_indexes(index_map):
+    """显式创建的索引，其列是另一个索引（或 UNIQUE/主键约束）的前缀"""
+    findings = []
+    for table, entries in index_map.items():
+        for entry in entries:
+            if entry['origin'] != 'c':
+                continue
+            for other in entries:
+                if other is entry or other['columns'][:len(entry['columns'])] != entry['columns']:
+                    continue
+                if len(other['columns']) == len(entry['columns']) and other['origin'] == 'c' \
+                        and other['name'] > entry['name']:
+                    continue
+                covered_by = other['name'] if other['origin'] == 'c' else \
+                    f'{"UNIQUE" if other["origin"] == "u" else "PRIMARY KEY"}({", ".join(other["columns"])})'
+                findings.append({'table': table, 'index': entry['name'], 'columns': entry['columns'],
+                                 'covered_by': covered_by})
+                break
+    return findings
+
+
+def _has_index(index_map, table, columns):
+    return any(entry['columns'][:len(columns)] == columns for entry in index_map.get(table, []))
+
+
+def insert_cost(conn, rows=2000, drop=()):
+    """向 users 插入一批行的耗时（毫秒），drop 中的索引在事务内临时删除，结束后回滚"""
+    rng = random.Random(99)
+    data = [(str(uuid.UUID(int=rng.getrandbits(128))), f'bench{i}', f'bench{i}@example.com', 'x')
+            for i in range(rows)]
+    conn.execute('BEGIN')
+    try:
+        for name in drop:
+            conn.execute(f'DROP INDEX {name}')
+        started = time.perf_counter()
+        conn.executemany('INSERT INTO users (id, username, email, password) VALUES (?, ?, ?, ?)', data)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        conn.execute('ROLLBACK')
+
+
+def bench(scale=10000, runs=300, directory=MIGRATIONS_DIR, sessions_per_user=2, downloads_per_user=20):
+    backend = SqliteBackend()
+    conn = backend.conn
+    applied = migrate(backend, directory)
+    started = time.perf_counter()
+    counts, samples = load_synthetic_data(backend, scale, sessions_per_user, downloads_per_user)
+    load_seconds = time.perf_counter() - started
+    index_map = indexes(conn)
+
+    results = []
+    used = set()
+    for query in QUERIES:
+        plan = explain(conn, query['sql'], [samples[name][0] for name in query['params']])
+        used |= _used_indexes(plan)
+        entry = {
+            'name': query['name'],
+            'source': query['source'],
+            'sql': query['sql'],
+            'plan': plan,
+            'problems': plan_problems(plan),
+            'latency_us': time_query(conn, query['sql'], query['params'], samples, runs),
+        }
+        table, columns = query['ideal']
+        if entry['problems'] and not _has_index(index_map, table, columns):
+            # 临时建出建议的索引，看计划和延迟能改善多少
+            name = f'whatif_{table}_{"_".join(columns)}'
+            conn.execute(f'CREATE INDEX {name} ON {table}({", ".join(columns)})')
+            conn.execute(f'ANALYZE {table}')
+            entry['suggested_index'] = {
+                'table': table,
+                'columns': columns,
+                'plan': explain(conn, query['sql'], [samples[n][0] for n in query['params']]),
+                'latency_us': time_query(conn, query['sql'], query['params'], samples, runs),
+            }
+            conn.execute(f'DROP INDEX {name}')
+        results.append(entry)
+
+    redundant = redundant_indexes(index_map)
+    explicit = [entry['name'] for entries in index_map.values() for entry in entries if entry['origin'] == 'c']
+    unused = [name for name in explicit if name not in used and name not in {r['index'] for r in redundant}]
+    users_redundant = [r['index'] for r in redundant if r['table'] == 'users']
+    write_cost = {
+        'rows': 2000,
+        'with_indexes_ms': insert_cost(conn),
+        'without_redundant_ms': insert_cost(conn, drop=users_redundant),
+    }
+    backend.close()
+    return {
+        'backend': 'sqlite (PostgreSQL 方言转换)',
+        'sqlite_version': sqlite3.sqlite_version,
+        'migrations': [f'{v}_{n}' for v, n, _ in applied],
+        'rows': counts,
+        'load_seconds': load_seconds,
+        'queries': results,
+        'redundant_indexes': redundant,
+        'missing_indexes': [{'query': r['name'], **{k: r['suggested_index'][k] for k in ('table', 'columns')}}
+                            for r in results if 'suggested_index' in r],
+        'unused_indexes': unused,
+        'users_insert': write_cost,
+    }
+
+
+def _latency(lat):
+    return f'p50 {lat["p50"]:.1f} µs, p95 {lat["p95"]:.1f} µs, p99 {lat["p99"]:.1f} µs'
+
+
+def print_bench(report):
+    print(f'后端: {report["backend"]} {report["sqlite_version"]}')
+    print(f'迁移: {", ".join(report["migrations"])}')
+    print('数据: ' + ', '.join(f'{t} {n} 行' for t, n in report['rows'].items())
+          + f'（生成并导入耗时 {report["load_seconds"]:.2f} 秒）')
+    for query in report['queries']:
+        flag = f'  [{", ".join(query["problems"])}]' if query['problems'] else ''
+        print(f'\n{query["name"]} ({query["source"]}){flag}')
+        print(f'  {query["sql"]}')
+        for line in query['plan']:
+            print(f'    {line}')
+        print(f'  {_latency(query["latency_us"])}')
+        suggestion = query.get('suggested_index')
+        if suggestion:
+            print(f'  建议索引 {suggestion["table"]}({", ".join(suggestion["columns"])}) 后:')
+            for line in suggestion['plan']:
+                print(f'    {line}')
+            print(f'  {_latency(suggestion["latency_us"])}')
+
+    print('\n多余的索引:')
+    for item in report['redundant_indexes'] or [{'index': None}]:
+        if item['index'] is None:
+            print('  无')
+            break
+        print(f'  {item["index"]} ({item["table"]}.{", ".join(item["columns"])}) 已被 {item["covered_by"]} 覆盖')
+    print('缺失的索引:')
+    for item in report['missing_indexes'] or [{'query': None}]:
+        if item['query'] is None:
+            print('  无')
+            break
+        print(f'  {item["table"]}({", ".join(item["columns"])})  用于 {item["query"]}')
+    if report['unused_indexes']:
+        print(f'主要查询都没有用到的索引: {", ".join(report["unused_indexes"])}')
+    cost = report['users_insert']
+    print(f'users 插入 {cost["rows"]} 行: {cost["with_indexes_ms"]:.1f} ms，'
+          f'去掉多余索引后 {cost["without_redundant_ms"]:.1f} ms')
+
+
+def _backend(args):
+    if args.dsn:
+        return PostgresBackend(args.dsn)
+    return SqliteBackend(args.db)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='执行数据库迁移并分析查询计划')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR, help='迁移脚本目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('migrate', '执行尚未执行的迁移'), ('status', '查看迁移状态')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--db', default='local.sqlite3', help='sqlite 数据库文件')
+        p.add_argument('--dsn', help='PostgreSQL 连接串（需要 psycopg2）')
+        if name == 'migrate':
+            p.add_argument('--target', help='只执行到该版本')
+            p.add_argument('--allow-changed', action='store_true', help='忽略已执行脚本的校验和变化')
+
+    p = sub.add_parser('bench', help='在内存数据库中生成数据并分析查询计划')
+    p.add_argument('--scale', type=int, default=10000, help='用户数')
+    p.add_argument('--sessions', type=int, default=2, help='平均每个用户的会话数')
+    p.add_argument('--downloads', type=int, default=20, help='平均每个用户的下载记录数')
+    p.add_argument('--runs', type=int, default=300, help='每个查询执行次数')
+    p.add_argument('--json', action='store_true', help='以JSON输出报告')
+    p.add_argument('--strict', action='store_true', help='发现多余或缺失的索引时以状态码 1 退出（用于CI）')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'bench':
+            report = bench(args.scale, args.runs, args.dir, args.sessions, args.downloads)
+            if args.json:
+                print(json.dumps(report, ensure_ascii=False, indent=2))
+            else:
+                print_bench(report)
+            return 1 if args.strict and (report['redundant_indexes'] or report['missing_indexes']) else 0
+
+        backend = _backend(args)
+        try:
+            if args.command == 'migrate':
+                done = migrate(backend, args.dir, args.target, args.allow_changed)
+                for version, name, elapsed in done:
+                    print(f'已执行 {version}_{name} ({elapsed} ms)')
+                if not done:
+                    print('没有需要执行的迁移')
+            else:
+                for item in migration_status(backend, args.dir):
+                    print(f'{item["version"]}_{item["name"]}: {item["state"]}'
+                          + (f' ({item["applied_at"]})' if item['applied_at'] else ''))
+        finally:
+            backend.close()
+    except MigrationError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
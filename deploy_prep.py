@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# 部署前构建
+# 代替部署文档中手工复制文件的步骤：把页面和它们引用的本地资源（脚本、样式、图片、字体，
+# 以及CSS中 url()/@import 引用的文件）输出到 dist/，资源文件名加上内容哈希（main.3fa2b1c9d0.css），
+# 并改写页面和CSS中的引用。带哈希的文件可以长期缓存，浏览器不必每次访问都重新验证。
+#
+# 文本文件另外写出 .gz 和 .br（需要 brotli 模块）预压缩版本，devserver.py 和支持预压缩的服务器
+# 会直接使用。dist/manifest.json 记录每个源文件对应的输出文件、哈希和压缩后大小。
+#
+# 增量构建：大小和修改时间都没变的源文件直接沿用 manifest 中的哈希，不重新读取；
+# 输出内容没变的文件不重写、不重新压缩。压缩在进程池中并行执行。
+# 运行时由JS按固定路径读取的文件（--copy，如 data/*.json、CNAME）保留原名。
+# --media 先运行 optimize_media.py（图片转码、懒加载、字体子集化），再优先读取它改写后的文件；
+# --catalog 先运行 catalog_shards.py（模块中的数据目录拆成按需加载的分片、预渲染首屏）；
+# --prerender 运行 prerender_routes.py（首屏写进静态HTML，并为每个导航路由生成一个页面）。
+#
+# 用法:
+#     python deploy_prep.py                         # index.html -> dist/
+#     python deploy_prep.py index.html about.html --out dist --jobs 8
+#     python deploy_prep.py --json > deploy-report.json
+#     python deploy_prep.py --media --catalog --prerender
+
+import argparse
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bundle_assets import is_local
+from html_tokenizer import STARTTAG, tokenize_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+OUT_DIR = 'dist'
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHARS = 10
+COMPRESS_MIN = 1024
+COMPRESSIBLE = {'.html', '.css', '.js', '.json', '.svg', '.map', '.txt', '.xml', '.ico', '.ttf', '.otf'}
+DEFAULT_COPY = ['CNAME', 'data/*.json']
+
+# 标签 -> 引用本地文件的属性
+URL_ATTRS = {
+    'script': ('src',),
+    'link': ('href',),
+    'img': ('src', 'srcset'),
+    'source': ('src', 'srcset'),
+    'video': ('src', 'poster'),
+    'audio': ('src',),
+    'track': ('src',),
+    'input': ('src',),
+}
+# 带 integrity 的标签，引用的文件内容在构建中改变时（如CSS中的 url() 被改写）需要重新计算
+SRI_TAGS = {'script', 'link'}
+LINK_RELS = {'stylesheet', 'icon', 'shortcut', 'apple-touch-icon', 'preload', 'prefetch', 'modulepreload',
+             'manifest', 'mask-icon'}
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3''')
+
+
+def _split_url(url):
+    """去掉查询串和片段，返回 (路径, 后缀)"""
+    m = re.match(r'([^?#]*)(.*)', url, re.S)
+    return m.group(1), m.group(2)
+
+
+def _resolve(base_dir, url):
+    """页面或CSS中的相对URL -> 站点根目录下的相对路径；不是本地文件时返回 None"""
+    if not is_local(url) or url.startswith(('#', 'mailto:', 'javascript:', 'about:', 'blob:')):
+        return None
+    path, _ = _split_url(url)
+    if not path:
+        return None
+    joined = path.lstrip('/') if path.startswith('/') else posixpath.join(base_dir, path)
+    return posixpath.normpath(joined)
+
+
+def _hashed_name(path, digest):
+    stem, ext = posixpath.splitext(path)
+    return f'{stem}.{digest[:HASH_CHARS]}{ext}'
+
+
+def _rewrite(base_dir, url, output):
+    """引用改成指向输出文件，保留原来的写法（根路径或相对路径）和查询串"""
+    path, suffix = _split_url(url)
+    if path.startswith('/'):
+        return '/' + output + suffix
+    return posixpath.relpath(output, base_dir or '.') + suffix
+
+
+def _srcset_urls(value):
+    return [part.strip().split()[0] for part in value.split(',') if part.strip()]
+
+
+def sri_hash(data):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode('ascii')
+
+
+def page_references(html):
+    """页面（bytes）中引用本地资源的属性和 integrity 属性：[((起, 止), 属性名, 属性值, 标签位置)]
+
+    起止是属性值的字节位置，标签位置用来找出同一个标签上的引用和 integrity。
+    """
+    refs = []
+    for token in tokenize_string(html):
+        if token.kind != STARTTAG or token.name not in URL_ATTRS:
+            continue
+        if token.name == 'link':
+            rels = set(dict(token.attrs).get('rel', '').lower().split())
+            if not rels & LINK_RELS:
+                continue
+        tag = html[token.offset:token.end].decode('utf-8')
+        names = URL_ATTRS[token.name] + (('integrity',) if token.name in SRI_TAGS else ())
+        for name in names:
+            m = re.search(r'\s' + name + r'''\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', tag, re.I)
+            if not m:
+                continue
+            group = next(g for g in (1, 2, 3) if m.group(g) is not None)
+            start = token.offset + len(tag[:m.start(group)].encode('utf-8'))
+            end = start + len(m.group(group).encode('utf-8'))
+            refs.append(((start, end), name, m.group(group), token.offset))
+    return refs
+
+
+def css_references(css):
+    """CSS 中的 url() 和 @import：[(起止位置, 引用)]"""
+    refs = []
+    for m in _CSS_URL.finditer(css):
+        group = 2 if m.group(2) is not None else 4
+        url = m.group(group).strip()
+        if not url.startswith('data:'):
+            refs.append(((m.start(group), m.end(group)), url))
+    return refs
+
+
+def _splice(text, replacements):
+    """按位置替换，text 和替换值同为 str 或同为 bytes"""
+    pieces = []
+    pos = 0
+    for (start, end), value in sorted(replacements):
+        pieces.append(text[pos:start])
+        pieces.append(value)
+        pos = end
+    pieces.append(text[pos:])
+    return text[:0].join(pieces)
+
+
+def compress_file(path):
+    """写出 .gz 和 .br，返回 (gzip 字节数, brotli 字节数)；在进程池中执行"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    gz = gzip.compress(data, 9, mtime=0)
+    _write_if_changed(path + '.gz', gz)
+    br_size = None
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        _write_if_changed(path + '.br', br)
+        br_size = len(br)
+    return len(gz), br_size
+
+
+def _write_if_changed(path, data):
+    """内容相同时不重写，保持修改时间不变（devserver 按修改时间判断预压缩文件是否过期）"""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+class DeployBuild:
+    def __init__(self, site_root='.', out_dir=OUT_DIR, jobs=None, overlays=()):
+        self.site_root = site_root
+        self.overlays = overlays   # 按顺序优先读取的目录（optimize_media、catalog_shards 的暂存目录）
+        self.out_dir = out_dir
+        self.jobs = jobs
+        self.previous = self._load_manifest()
+        self.files = {}            # 源文件 -> manifest 条目
+        self.status = {}           # 源文件 -> new/changed/unchanged
+        self.rehashed = 0
+        self.missing = []
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.out_dir, MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest.get('files', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def _source(self, rel):
+        for overlay in self.overlays:
+            staged = os.path.join(overlay, *rel.split('/'))
+            if os.path.exists(staged):
+                return staged
+        return os.path.join(self.site_root, *rel.split('/'))
+
+    def _stat(self, rel):
+        st = os.stat(self._source(rel))
+        return st.st_size, st.st_mtime_ns
+
+    def _read(self, rel):
+        with open(self._source(rel), 'rb') as f:
+            return f.read()
+
+    def _record(self, rel, output, data, digest, size, mtime_ns, deps=None):
+        previous = self.previous.get(rel)
+        path = os.path.join(self.out_dir, *output.split('/'))
+        written = _write_if_changed(path, data) if data is not None else False
+        if previous is None:
+            self.status[rel] = 'new'
+        elif written or previous.get('output') != output:
+            self.status[rel] = 'changed'
+        else:
+            self.status[rel] = 'unchanged'
+        entry = {'output': output, 'sha256': digest, 'size': size, 'mtime_ns': mtime_ns,
+                 'bytes': os.path.getsize(path)}
+        if deps:
+            entry['deps'] = deps
+        if previous and self.status[rel] == 'unchanged':
+            for key in ('gzip', 'br'):
+                if key in previous:
+                    entry[key] = previous[key]
+        self.files[rel] = entry
+        return entry
+
+    def _unchanged(self, rel, size, mtime_ns, previous, stack=()):
+        """源文件大小和修改时间都没变、输出还在，且引用的文件输出名也没变时返回 True"""
+        if not previous or previous['size'] != size or previous['mtime_ns'] != mtime_ns:
+            return False
+        if not os.path.exists(os.path.join(self.out_dir, *previous['output'].split('/'))):
+            return False
+        return all(self.asset(dep, stack) == output for dep, output in previous.get('deps', {}).items())
+
+    def asset(self, rel, stack=()):
+        """输出一个资源文件，返回带哈希的输出路径；CSS 会先处理它引用的文件"""
+        if rel in self.files:
+            return self.files[rel]['output']
+        if rel in stack:
+            raise ValueError(f'CSS 循环引用: {" -> ".join(stack + (rel,))}')
+        try:
+            size, mtime_ns = self._stat(rel)
+        except OSError:
+            self.missing.append(rel)
+            return None
+        previous = self.previous.get(rel)
+        stack = stack + (rel,)
+        if self._unchanged(rel, size, mtime_ns, previous, stack):
+            # 沿用上次的哈希，不读取文件
+            return self._record(rel, previous['output'], None, previous['sha256'], size, mtime_ns,
+                                previous.get('deps'))['output']
+        if rel.endswith('.css'):
+            return self._css(rel, size, mtime_ns, stack)
+        data = self._read(rel)
+        self.rehashed += 1
+        digest = hashlib.sha256(data).hexdigest()
+        return self._record(rel, _hashed_name(rel, digest), data, digest, size, mtime_ns)['output']
+
+    def _css(self, rel, size, mtime_ns, stack):
+        base = posixpath.dirname(rel)
+        text = self._read(rel).decode('utf-8')
+        self.rehashed += 1
+        replacements = []
+        deps = {}
+        for span, url in css_references(text):
+            target = _resolve(base, url)
+            output = self.asset(target, stack) if target else None
+            if output:
+                deps[target] = output
+                replacements.append((span, _rewrite(base, url, output)))
+        data = _splice(text, replacements).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        return self._record(rel, _hashed_name(rel, digest), data, digest, size, mtime_ns, deps)['output']
+
+    def page(self, rel):
+        """改写页面中的引用，页面本身保留原名"""
+        size, mtime_ns = self._stat(rel)
+        previous = self.previous.get(rel)
+        if self._unchanged(rel, size, mtime_ns, previous):
+            self._record(rel, rel, None, previous['sha256'], size, mtime_ns, previous.get('deps'))
+            return
+        base = posixpath.dirname(rel)
+        html = self._read(rel)
+        self.rehashed += 1
+        replacements = []
+        deps = {}
+        outputs = {}
+        integrity = []
+        for span, name, value, tag in page_references(html):
+            if name == 'integrity':
+                integrity.append((span, value, tag))
+                continue
+            urls = _srcset_urls(value) if name == 'srcset' else [value]
+            new_value = value
+            for url in urls:
+                target = _resolve(base, url)
+                output = self.asset(target) if target else None
+                if output:
+                    deps[target] = output
+                    outputs[tag] = output
+                    new_value = new_value.replace(url, _rewrite(base, url, output), 1)
+            if new_value != value:
+                replacements.append((span, new_value.encode('utf-8')))
+        for span, value, tag in integrity:
+            if tag in outputs:
+                with open(os.path.join(self.out_dir, *outputs[tag].split('/')), 'rb') as f:
+                    sri = sri_hash(f.read())
+                if sri != value:
+                    replacements.append((span, sri.encode('ascii')))
+        data = _splice(html, replacements)
+        self._record(rel, rel, data, hashlib.sha256(data).hexdigest(), size, mtime_ns, deps)
+
+    def copy(self, rel):
+        size, mtime_ns = self._stat(rel)
+        data = self._read(rel)
+        self._record(rel, rel, data, hashlib.sha256(data).hexdigest(), size, mtime_ns)
+
+    def compress(self):
+        """并行压缩新增或有变化的文本文件"""
+        todo = []
+        for rel, entry in self.files.items():
+            ext = posixpath.splitext(entry['output'])[1].lower()
+            if ext not in COMPRESSIBLE or entry['bytes'] < COMPRESS_MIN:
+                continue
+            path = os.path.join(self.out_dir, *entry['output'].split('/'))
+            expected = [path + '.gz'] + ([path + '.br'] if brotli else [])
+            if self.status[rel] == 'unchanged' and 'gzip' in entry and all(os.path.exists(p) for p in expected):
+                continue
+            todo.append((rel, path))
+        if todo:
+            with ProcessPoolExecutor(self.jobs) as pool:
+                for (rel, _), (gz, br) in zip(todo, pool.map(compress_file, [path for _, path in todo])):
+                    self.files[rel]['gzip'] = gz
+                    if br is not None:
+                        self.files[rel]['br'] = br
+        return len(todo)
+
+    def remove_stale(self):
+        """删除上次构建输出、这次不再需要的文件（其他工具写入 dist/ 的文件不受影响）"""
+        keep = {entry['output'] for entry in self.files.values()}
+        removed = []
+        for entry in self.previous.values():
+            output = entry['output']
+            if output in keep:
+                continue
+            for suffix in ('', '.gz', '.br'):
+                path = os.path.join(self.out_dir, *output.split('/')) + suffix
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed.append(output + suffix)
+        return removed
+
+    def write_manifest(self):
+        manifest = {'version': MANIFEST_VERSION, 'files': dict(sorted(self.files.items()))}
+        data = json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8')
+        _write_if_changed(os.path.join(self.out_dir, MANIFEST), data)
+
+
+def build(pages, site_root='.', out_dir=OUT_DIR, copy_patterns=DEFAULT_COPY, jobs=None, keep_stale=False,
+          media=False, catalog=False, prerender=False):
+    started = time.perf_counter()
+    media_report = catalog_report = prerender_report = None
+    overlays = []
+    # optimize_media、catalog_shards 和 prerender_routes 使用本模块的函数，在这里导入以免循环导入
+    if media:
+        import optimize_media
+        media_report = optimize_media.optimize(pages, site_root, jobs=jobs)
+        overlays.append(optimize_media.STAGE_DIR)
+    if catalog:
+        import catalog_shards
+        catalog_report = catalog_shards.stage(pages, site_root, sources=list(overlays))
+        overlays.insert(0, catalog_shards.STAGE_DIR)
+    if prerender:
+        import prerender_routes
+        prerender_report = prerender_routes.stage(pages, site_root, sources=list(overlays))
+        overlays.insert(0, prerender_routes.STAGE_DIR)
+        # 路由页面只在暂存目录中，和原页面一样处理引用
+        pages = list(pages) + [os.path.join(site_root, *rel.split('/')) for rel in prerender_report['files']]
+    builder = DeployBuild(site_root, out_dir, jobs, overlays)
+    for page in pages:
+        builder.page(posixpath.normpath(os.path.relpath(page, site_root).replace(os.sep, '/')))
+    if catalog_report:
+        # 分片由脚本在运行时按清单加载，文件名已带内容哈希，原名复制
+        for rel in catalog_report['files']:
+            builder.copy(rel)
+    for pattern in copy_patterns:
+        for path in sorted(glob.glob(os.path.join(site_root, pattern))):
+            rel = os.path.relpath(path, site_root).replace(os.sep, '/')
+            if rel not in builder.files and os.path.isfile(path):
+                builder.copy(rel)
+    hashed = time.perf_counter()
+    compressed = builder.compress()
+    removed = [] if keep_stale else builder.remove_stale()
+    builder.write_manifest()
+    finished = time.perf_counter()
+    return {
+        'out_dir': out_dir,
+        'files': builder.files,
+        'status': builder.status,
+        'missing': builder.missing,
+        'rehashed': builder.rehashed,
+        'compressed': compressed,
+        'removed': removed,
+        'brotli': brotli is not None,
+        'media': media_report,
+        'catalog': catalog_report,
+        'prerender': prerender_report,
+        'seconds': {'hash': hashed - started, 'compress': finished - hashed, 'total': finished - started},
+    }
+
+
+def _ratio(compressed, size):
+    return f'{compressed / size * 100:5.1f}%' if compressed is not None and size else '    -'
+
+
+def print_report(report):
+    if report['media']:
+        import optimize_media
+        optimize_media.print_report(report['media'])
+        print()
+    if report['catalog']:
+        import catalog_shards
+        catalog_shards.print_report(report['catalog'])
+        print()
+    if report['prerender']:
+        import prerender_routes
+        prerender_routes.print_report(report['prerender'])
+        print()
+    files = report['files']
+    print(f'{"文件":<44}{"状态":<10}{"大小":>10}{"gzip":>8}{"brotli":>8}')
+    for rel, entry in sorted(files.items(), key=lambda item: -item[1]['bytes']):
+        print(f'{entry["output"]:<46}{report["status"][rel]:<12}{entry["bytes"] / 1024:>8.1f} KB'
+              f'{_ratio(entry.get("gzip"), entry["bytes"]):>8}{_ratio(entry.get("br"), entry["bytes"]):>8}')
+    total = sum(entry['bytes'] for entry in files.values())
+    total_gz = sum(entry.get('gzip', entry['bytes']) for entry in files.values())
+    line = f'\n共 {len(files)} 个文件 {total / 1024:.1f} KB，gzip 后 {total_gz / 1024:.1f} KB'
+    if report['brotli']:
+        total_br = sum(entry.get('br', entry['bytes']) for entry in files.values())
+        line += f'，brotli 后 {total_br / 1024:.1f} KB'
+    else:
+        line += '（未安装 brotli，没有生成 .br）'
+    print(line)
+    changed = sum(1 for status in report['status'].values() if status != 'unchanged')
+    seconds = report['seconds']
+    print(f'变化 {changed} 个，重新读取哈希 {report["rehashed"]} 个，重新压缩 {report["compressed"]} 个，'
+          f'删除旧文件 {len(report["removed"])} 个；耗时 {seconds["total"] * 1000:.0f} ms'
+          f'（哈希和改写 {seconds["hash"] * 1000:.0f} ms，压缩 {seconds["compress"] * 1000:.0f} ms）')
+    for rel in report['missing']:
+        print(f'警告: 引用的文件不存在: {rel}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成带内容哈希文件名和预压缩文件的部署目录')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要部署的页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--out', default=OUT_DIR, help='输出目录')
+    parser.add_argument('--copy', nargs='*', default=DEFAULT_COPY, help='保留原名复制的文件（glob）')
+    parser.add_argument('--jobs', type=int, default=None, help='压缩进程数（默认CPU核数）')
+    parser.add_argument('--keep-stale', action='store_true', help='保留上次构建的旧文件（给仍在用旧页面的客户端）')
+    parser.add_argument('--media', action='store_true', help='先优化图片和字体（optimize_media.py）')
+    parser.add_argument('--catalog', action='store_true', help='把模块中的数据目录拆成分片（catalog_shards.py）')
+    parser.add_argument('--prerender', action='store_true', help='预渲染首屏并为每个路由生成页面（prerender_routes.py）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        report = build(args.pages, args.root, args.out, args.copy, args.jobs, args.keep_stale, args.media,
+                       args.catalog, args.prerender)
+    except (OSError, ValueError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['missing'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# 开发模式：监视文件变化，只重新运行受影响的检查，并让打开着的页面自动刷新
+# 在 devserver 的基础上增加：
+#   - 快照索引：记录每个文件的 (大小, 修改时间) 和每个目录的修改时间。每轮轮询只 stat 已知文件，
+#     目录的修改时间变了（有文件新增、删除或改名）才重新列出这一个目录，不做全量扫描。
+#   - 去抖：发现变化后等文件静止 DEBOUNCE 秒再处理，编辑器“写临时文件再改名”这类连续写入只处理一次。
+#   - 按文件只运行受影响的检查：
+#       site/ 下的模板和片段  -> site_build 增量构建，再检查生成的页面
+#       .html 页面            -> html_checks（与 sitelint 共用结果缓存）
+#       .js 脚本              -> 对引用它的页面运行 js_deps 依赖分析
+#       .css 样式表           -> 不检查，页面上直接替换样式表
+#   - 页面通过 SSE（/__livereload）接收事件：只有CSS变化时替换对应的 <link>，其他变化整页刷新。
+#     HTML响应末尾会自动插入 /__livereload.js，页面文件本身不需要修改。
+#
+# 用法:
+#     python dev_watch.py                       # http://localhost:8000 ，监视整个仓库
+#     python dev_watch.py --port 8080 --no-checks
+#     python dev_watch.py --idle 10             # 空闲轮询 10 秒，输出占用的CPU比例
+
+import argparse
+import json
+import os
+import posixpath
+import queue
+import sys
+import threading
+import time
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import devserver
+import js_deps
+from bundle_assets import read_script_manifest
+from deploy_prep import _resolve
+from site_build import SRC_DIR, STATE_FILE, SiteBuild
+from sitecache import CACHE_DIR, ResultCache
+from sitelint import HTML_EXTENSIONS, lint_files
+
+POLL_INTERVAL = 0.25       # 空闲时的轮询间隔（秒）
+DEBOUNCE = 0.1             # 最后一次变化之后静止多久才开始处理
+HEARTBEAT = 15             # SSE 心跳间隔，防止代理断开空闲连接
+SKIP_DIRS = {'node_modules', 'dist', '__pycache__', 'telemetry'}
+# 这些文件变化时才通知页面（.py、.md 等与页面无关）
+WEB_ASSETS = HTML_EXTENSIONS + ('.js', '.css', '.json', '.svg', '.png', '.jpg', '.jpeg', '.gif',
+                                '.webp', '.avif', '.ico', '.woff', '.woff2')
+EVENTS_PATH = '/__livereload'
+CLIENT_PATH = '/__livereload.js'
+
+CLIENT_JS = r"""(function () {
+    if (!window.EventSource) return;
+    var source = new EventSource('/__livereload');
+    source.addEventListener('reload', function () { location.reload(); });
+    source.addEventListener('css', function (event) {
+        var paths = JSON.parse(event.data);
+        var links = document.querySelectorAll('link[rel="stylesheet"]');
+        var swapped = 0;
+        Array.prototype.forEach.call(links, function (link) {
+            var url = new URL(link.href, location.href);
+            if (url.origin !== location.origin || paths.indexOf(url.pathname) === -1) return;
+            url.searchParams.set('livereload', Date.now());
+            // 新样式表加载完再移除旧的，避免页面闪一下无样式
+            var fresh = link.cloneNode();
+            fresh.href = url.href;
+            fresh.onload = fresh.onerror = function () { link.remove(); };
+            link.after(fresh);
+            swapped++;
+        });
+        if (!swapped) location.reload();
+    });
+})();
+"""
+
+
+class SnapshotIndex:
+    """目录树的快照：文件的 (大小, 修改时间) 和目录的修改时间，poll() 返回上次以来变化的文件"""
+
+    def __init__(self, root='.', skip_dirs=SKIP_DIRS):
+        self.root = root
+        self.skip_dirs = skip_dirs
+        self.files = {}
+        self.dirs = {}
+        self._scan_dir('')
+
+    def _full(self, rel):
+        return os.path.join(self.root, *rel.split('/')) if rel else self.root
+
+    def _scan_dir(self, rel, changed=None):
+        """列出一个目录，登记新出现的文件；新出现的子目录递归登记"""
+        try:
+            mtime = os.stat(self._full(rel)).st_mtime_ns
+            with os.scandir(self._full(rel)) as it:
+                entries = list(it)
+        except OSError:
+            return
+        self.dirs[rel] = mtime
+        for entry in entries:
+            path = posixpath.join(rel, entry.name) if rel else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in self.skip_dirs and not entry.name.startswith('.') and path not in self.dirs:
+                    self._scan_dir(path, changed)
+            elif path not in self.files:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                self.files[path] = (st.st_size, st.st_mtime_ns)
+                if changed is not None:
+                    changed.add(path)
+
+    def poll(self):
+        changed = set()
+        for rel, recorded in list(self.dirs.items()):
+            try:
+                mtime = os.stat(self._full(rel)).st_mtime_ns
+            except OSError:
+                # 目录被删除：其中的文件在下面 stat 失败时报告
+                self.dirs = {d: m for d, m in self.dirs.items() if d != rel and not d.startswith(rel + '/')}
+                continue
+            if mtime != recorded:
+                self._scan_dir(rel, changed)
+        for path, recorded in list(self.files.items()):
+            try:
+                st = os.stat(self._full(path))
+            except OSError:
+                del self.files[path]
+                changed.add(path)
+                continue
+            if (st.st_size, st.st_mtime_ns) != recorded:
+                self.files[path] = (st.st_size, st.st_mtime_ns)
+                changed.add(path)
+        return changed
+
+    def refresh(self, paths):
+        """更新这些文件的记录但不报告变化（用于检查过程中自己写出的文件）"""
+        for path in paths:
+            try:
+                st = os.stat(self._full(path))
+            except OSError:
+                self.files.pop(path, None)
+                continue
+            self.files[path] = (st.st_size, st.st_mtime_ns)
+
+
+def wait_for_changes(index, interval=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+    """阻塞到有文件变化、并且静止 debounce 秒，返回变化的文件；stop 被设置时提前返回"""
+    changed = set()
+    last_change = 0.0
+    while stop is None or not stop.is_set():
+        found = index.poll()
+        now = time.monotonic()
+        if found:
+            changed |= found
+            last_change = now
+        elif changed and now - last_change >= debounce:
+            break
+        time.sleep(debounce / 2 if changed else interval)
+    return changed
+
+
+def idle_cpu(index, seconds=10.0, interval=POLL_INTERVAL):
+    """只做轮询时本进程占用单个CPU的百分比"""
+    cpu, wall = time.process_time(), time.monotonic()
+    deadline = wall + seconds
+    while time.monotonic() < deadline:
+        index.poll()
+        time.sleep(interval)
+    return (time.process_time() - cpu) / (time.monotonic() - wall) * 100
+
+
+class DevChecks:
+    """根据变化的文件运行受影响的检查"""
+
+    def __init__(self, root='.', html_pages=(), cache=None):
+        self.root = root
+        self.cache = cache
+        src = os.path.join(root, SRC_DIR)
+        self.builder = SiteBuild(src, root, os.path.join(root, STATE_FILE)) if os.path.isdir(src) else None
+        # 页面 -> 它引用的本地脚本
+        self.page_scripts = {page: self._scripts_of(page) for page in html_pages}
+
+    def _scripts_of(self, page):
+        try:
+            entries = read_script_manifest(os.path.join(self.root, page))
+        except OSError:
+            return set()
+        base = posixpath.dirname(page)
+        return {_resolve(base, entry['src']) for entry in entries if entry['src']} - {None}
+
+    def _deps(self, page):
+        _, report = js_deps.analyze(os.path.join(self.root, page), self.root)
+        problems = [('error', f'执行时循环依赖: {" <-> ".join(cycle)}') for cycle in report['cycles']['load']]
+        for item in report['before']['violations']:
+            problems.append(('warning' if item['guarded'] else 'error',
+                             f'{item["script"]} 执行时需要 {item["needs"]}（{", ".join(item["names"])}），但它还没有执行'))
+        for item in report['missing']:
+            if 'load' in item['phases'] and not item['guarded']:
+                problems.append(('error', f'{item["script"]} 执行时用到的 {item["name"]} 没有脚本提供'))
+        return {'page': page, 'problems': problems}
+
+    def run(self, changed):
+        started = time.perf_counter()
+        result = {'build': None, 'lint': [], 'deps': [], 'outputs': []}
+        site_prefix = SRC_DIR + '/'
+        html = {p for p in changed if p.endswith(HTML_EXTENSIONS) and not p.startswith(site_prefix)}
+        scripts = {p for p in changed if p.endswith('.js')}
+
+        if self.builder and any(p.startswith(site_prefix) for p in changed):
+            result['build'] = self.builder.build()
+            result['outputs'] = [os.path.relpath(path, self.root).replace(os.sep, '/')
+                                 for path in result['build']['written']]
+            html.update(result['outputs'])
+
+        pages = set()
+        for page in html:
+            if os.path.exists(os.path.join(self.root, page)):
+                self.page_scripts[page] = self._scripts_of(page)
+                if self.page_scripts[page]:
+                    pages.add(page)
+            else:
+                self.page_scripts.pop(page, None)
+        pages.update(page for page, used in self.page_scripts.items() if used & scripts)
+
+        existing = sorted(page for page in html if os.path.exists(os.path.join(self.root, page)))
+        if existing:
+            result['lint'] = lint_files([os.path.join(self.root, page) for page in existing], 1, self.cache)
+        result['deps'] = [self._deps(page) for page in sorted(pages)]
+        result['ms'] = (time.perf_counter() - started) * 1000
+        return result
+
+
+def reload_event(changed):
+    """变化的文件 -> 要发给页面的事件 (名称, 数据)，与页面无关时返回 None"""
+    web = sorted(p for p in changed if p.endswith(WEB_ASSETS) and not p.startswith(SRC_DIR + '/'))
+    if not web:
+        return None
+    if all(p.endswith('.css') for p in web):
+        return 'css', ['/' + p for p in web]
+    return 'reload', web
+
+
+def inject_client(data):
+    """在最后一个 </body> 之前插入客户端脚本"""
+    tag = f'<script src="{CLIENT_PATH}"></script>'.encode('utf-8')
+    pos = data.lower().rfind(b'</body>')
+    return data + tag if pos < 0 else data[:pos] + tag + data[pos:]
+
+
+class ReloadHub:
+    """把事件转发给所有连接着的页面"""
+
+    def __init__(self):
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        events = queue.Queue()
+        with self.lock:
+            self.clients.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self.lock:
+            self.clients.discard(events)
+
+    def publish(self, event, data):
+        with self.lock:
+            for events in self.clients:
+                events.put((event, data))
+
+    def close(self):
+        """让所有 SSE 连接结束"""
+        with self.lock:
+            for events in self.clients:
+                events.put(None)
+
+
+class LiveReloadHandler(devserver.StaticHandler):
+    """在静态文件服务之外提供 SSE 事件流，并给HTML页面插入客户端脚本"""
+
+    hub = None
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == EVENTS_PATH:
+            self._events()
+        elif path == CLIENT_PATH:
+            self._send_body(CLIENT_JS.encode('utf-8'), 'text/javascript; charset=utf-8', head=False)
+        else:
+            super().do_GET()
+
+    def _serve(self, head):
+        path = self._translate(self.path)
+        if not path.endswith(HTML_EXTENSIONS) or not os.path.isfile(path):
+            super()._serve(head)
+            return
+        # 插入脚本后的页面不走 ETag/压缩缓存，每次都读最新内容
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._send_body(inject_client(data), 'text/html; charset=utf-8', head)
+
+    def _send_body(self, body, ctype, head):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _events(self):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.close_connection = True
+        events = self.hub.subscribe()
+        try:
+            self.wfile.write(b'retry: 1000\n\n')
+            while True:
+                try:
+                    item = events.get(timeout=HEARTBEAT)
+                except queue.Empty:
+                    self.wfile.write(b': ping\n\n')
+                    continue
+                if item is None:
+                    break
+                event, data = item
+                self.wfile.write(f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'.encode('utf-8'))
+        except OSError:
+            pass
+        finally:
+            self.hub.unsubscribe(events)
+
+
+def make_server(root='.', host='', port=devserver.PORT, hub=None, quiet=True):
+    """创建带 /__livereload 的开发服务器（尚未开始服务）"""
+    server = devserver.make_server(root, host, port, quiet)
+    server.RequestHandlerClass = type('BoundLiveReloadHandler', (LiveReloadHandler, server.RequestHandlerClass),
+                                      {'hub': hub or ReloadHub()})
+    return server
+
+
+def print_result(changed, result):
+    print(f'[{time.strftime("%H:%M:%S")}] {", ".join(sorted(changed))}')
+    if result is None:
+        return
+    build = result['build']
+    if build:
+        for output in result['outputs']:
+            print(f'  构建 {output}')
+        for output in build['conflicts']:
+            print(f'  构建冲突: {output} 被直接修改过，未覆盖（运行 site_build.py split 导入修改）')
+        for error in build['errors']:
+            print(f'  构建错误: {error}')
+    for item in result['lint']:
+        for finding in item['findings']:
+            where = f':{finding["line"]}' if 'line' in finding else ''
+            print(f'  [{finding["level"]}] {item["path"]}{where} {finding["check"]}: {finding["message"]}')
+    for item in result['deps']:
+        for level, message in item['problems']:
+            print(f'  [{level}] {item["page"]} js_deps: {message}')
+    checked = len(result['lint']) + len(result['deps'])
+    if checked or build:
+        print(f'  检查了 {len(result["lint"])} 个页面、{len(result["deps"])} 个页面的脚本依赖，'
+              f'耗时 {result["ms"]:.0f} ms')
+
+
+def watch(root='.', hub=None, checks=True, interval=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+    """监视 root，处理每批变化并通知页面；stop 被设置后返回"""
+    index = SnapshotIndex(root)
+    runner = None
+    if checks:
+        pages = [p for p in index.files if p.endswith(HTML_EXTENSIONS) and not p.startswith(SRC_DIR + '/')]
+        runner = DevChecks(root, pages, ResultCache(os.path.join(root, CACHE_DIR)))
+    print(f'监视 {len(index.files)} 个文件（{len(index.dirs)} 个目录），每 {interval} 秒轮询一次')
+    while stop is None or not stop.is_set():
+        changed = wait_for_changes(index, interval, debounce, stop)
+        if not changed:
+            continue
+        result = runner.run(changed) if runner else None
+        if result:
+            index.refresh(result['outputs'])
+            changed |= set(result['outputs'])
+        print_result(changed, result)
+        event = reload_event(changed)
+        if event and hub:
+            hub.publish(*event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='开发服务器：文件变化时运行相关检查并自动刷新页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--host', default='', help='监听地址')
+    parser.add_argument('--port', type=int, default=devserver.PORT, help='端口')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='轮询间隔（秒）')
+    parser.add_argument('--no-checks', action='store_true', help='只刷新页面，不运行检查')
+    parser.add_argument('--idle', type=float, metavar='SECONDS', help='空闲轮询指定秒数，输出CPU占用后退出')
+    args = parser.parse_args(argv)
+
+    if args.idle:
+        index = SnapshotIndex(args.root)
+        usage = idle_cpu(index, args.idle, args.interval)
+        print(f'{len(index.files)} 个文件，每 {args.interval} 秒轮询一次，空闲CPU占用 {usage:.2f}%')
+        return 0
+
+    hub = ReloadHub()
+    server = make_server(args.root, args.host, args.port, hub, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'开发服务器已启动: http://localhost:{server.server_address[1]}')
+    try:
+        watch(args.root, hub, not args.no_checks, args.interval)
+    except KeyboardInterrupt:
+        print('\n已停止。')
+    finally:
+        hub.close()
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
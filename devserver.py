@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# 本地静态文件服务器
+# 替代 SimpleHTTPRequestHandler：多线程 + HTTP/1.1 keep-alive，
+# 支持预压缩的 .br/.gz 文件（没有时按需gzip并缓存）、ETag/Last-Modified 与 304
+# （gzip/br/原始内容各有自己的 ETag）、
+# Range 请求，大文件用 sendfile 发送，小文件保存在内存LRU中。
+#
+# 用法:
+#     python devserver.py --port 8000
+#     python devserver.py --bench              # 启动后压测并输出每秒请求数
+
+import argparse
+import email.utils
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+PORT = 8000
+CACHE_BYTES = 16 * 1024 * 1024      # 内存LRU总大小
+CACHE_MAX_FILE = 512 * 1024         # 超过这个大小的文件不进内存缓存
+SENDFILE_MIN = 256 * 1024           # 超过这个大小且不压缩时使用 sendfile
+COMPRESS_MIN = 1024                 # 太小的文件不压缩
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                'application/xml', 'application/manifest+json')
+# 各种编码的响应 ETag 加上的后缀，同一个文件的不同表示不能共用强 ETag
+ETAG_SUFFIX = {None: '', 'gzip': '-gz', 'br': '-br'}
+# 文件名中带内容哈希（如 bundle1.576d6c466f.js）的资源可以长期缓存
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.[\w]+$')
+
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('application/json', '.map')
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+
+class LRUCache:
+    """按字节数限制的线程安全LRU"""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def _accepts(header, encoding):
+    """Accept-Encoding 中是否接受某种编码（忽略 q=0）"""
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() == encoding:
+            return params.replace(' ', '') != 'q=0'
+    return False
+
+
+def _parse_range(header, size):
+    """解析单个 bytes 区间，返回 (start, end) 闭区间；不合法返回 None"""
+    m = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        start = max(0, size - int(m.group(2)))
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """静态文件处理器，root 和 cache 由 make_server 设置"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SiteDevServer/1.0'
+    # 响应头和响应体分两次写出，关闭 Nagle 以免 keep-alive 连接上每个请求多等 40ms
+    disable_nagle_algorithm = True
+    root = '.'
+    cache = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _translate(self, url_path):
+        """把URL路径转换成root下的文件路径，拒绝 .. 越界"""
+        path = posixpath.normpath(unquote(urlsplit(url_path).path))
+        parts = [p for p in path.split('/') if p and p not in ('.', '..')]
+        full = os.path.join(self.root, *parts)
+        if os.path.isdir(full):
+            full = os.path.join(full, 'index.html')
+        return full
+
+    def _send_error(self, status):
+        body = f'{status.value} {status.phrase}\n'.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _serve(self, head):
+        path = self._translate(self.path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        ctype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if ctype.startswith('text/') or ctype in ('application/json', 'image/svg+xml'):
+            ctype += '; charset=utf-8'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+        accept = self.headers.get('Accept-Encoding', '')
+        range_header = self.headers.get('Range')
+        encoding, body, source = None, None, path
+        gzip_on_the_fly = False
+        if not range_header:
+            encoding, source = self._precompressed(path, stat, accept)
+            if encoding is None and self._compressible(ctype, stat.st_size) and _accepts(accept, 'gzip'):
+                encoding = 'gzip'
+                gzip_on_the_fly = True
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}{ETAG_SUFFIX[encoding]}"'
+
+        if self._not_modified(etag, stat.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(path, etag, last_modified)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if gzip_on_the_fly:
+            body = self._gzip_cached(path, stat)
+
+        if body is None:
+            size = os.path.getsize(source) if source != path else stat.st_size
+        else:
+            size = len(body)
+
+        status = HTTPStatus.OK
+        start, end = 0, size - 1
+        if range_header and encoding is None:
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start, end = byte_range
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self._common_headers(path, etag, last_modified)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Accept-Ranges', 'bytes')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head:
+            return
+
+        if body is not None:
+            self.wfile.write(body)
+        else:
+            self._send_file(source, stat, start, end - start + 1)
+
+    def _common_headers(self, path, etag, last_modified):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Vary', 'Accept-Encoding')
+        if HASHED_NAME.search(os.path.basename(path)):
+            self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    @staticmethod
+    def _compressible(ctype, size):
+        return size >= COMPRESS_MIN and ctype.startswith(COMPRESSIBLE)
+
+    @staticmethod
+    def _precompressed(path, stat, accept):
+        """优先使用与原文件同样新的 .br/.gz 预压缩文件"""
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if not _accepts(accept, encoding):
+                continue
+            try:
+                if os.stat(path + suffix).st_mtime >= stat.st_mtime:
+                    return encoding, path + suffix
+            except OSError:
+                continue
+        return None, path
+
+    def _gzip_cached(self, path, stat):
+        key = (path, stat.st_mtime_ns, 'gzip')
+        body = self.cache.get(key)
+        if body is None:
+            with open(path, 'rb') as f:
+                body = gzip.compress(f.read(), 6)
+            self.cache.put(key, body)
+        return body
+
+    def _send_file(self, path, stat, offset, count):
+        if count >= SENDFILE_MIN:
+            with open(path, 'rb') as f:
+                self.wfile.flush()
+                self.connection.sendfile(f, offset, count)
+            return
+        key = (path, stat.st_mtime_ns, None)
+        data = self.cache.get(key) if stat.st_size <= CACHE_MAX_FILE else None
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) <= CACHE_MAX_FILE:
+                self.cache.put(key, data)
+        self.wfile.write(data[offset:offset + count])
+
+
+def make_server(root='.', host='', port=PORT, quiet=False, cache_bytes=CACHE_BYTES):
+    """创建多线程服务器（尚未开始服务）"""
+    handler = type('BoundStaticHandler', (StaticHandler,), {
+        'root': os.path.abspath(root),
+        'cache': LRUCache(cache_bytes),
+        'quiet': quiet,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(root='.', host='127.0.0.1', port=0, quiet=True):
+    """在后台线程中启动服务器，返回 (server, base_url)"""
+    server = make_server(root, host, port, quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f'http://{bound_host}:{bound_port}/'
+
+
+def run_bench(urls, duration=5.0, connections=8):
+    """用 keep-alive 连接循环请求 urls，返回每秒请求数和延迟分位数"""
+    import http.client
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        parts = urlsplit(urls[0])
+        conn = http.client.HTTPConnection(parts.netloc, timeout=10)
+        local = []
+        i = offset
+        while time.perf_counter() < deadline:
+            url = urlsplit(urls[i % len(urls)])
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', url.path or '/', headers={'Accept-Encoding': 'gzip, br'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    with lock:
+                        errors[0] += 1
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.netloc, timeout=10)
+                continue
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': pct(50),
+        'p99': pct(99),
+    }
+
+
+def bench(root='.', page='index.html', duration=5.0, connections=8):
+    """启动临时服务器并压测页面及其本地资源"""
+    from performance_test import local_asset_urls
+
+    server, base_url = start_in_thread(root)
+    try:
+        page_url = base_url + page
+        urls = [page_url] + local_asset_urls(page_url, os.path.join(root, page))
+        result = run_bench(urls, duration, connections)
+        result['cache'] = {'hits': server.RequestHandlerClass.cache.hits,
+                           'misses': server.RequestHandlerClass.cache.misses}
+    finally:
+        server.shutdown()
+        server.server_close()
+    return result
+
+
+def print_bench(result):
+    print(f"压测结果: {result['requests']} 个请求 / {result['seconds']:.2f} 秒 = "
+          f"{result['rps']:.0f} 请求/秒 (失败 {result['errors']})")
+    print(f"延迟: p50 {result['p50'] * 1000:.2f} ms, p99 {result['p99'] * 1000:.2f} ms")
+    if 'cache' in result:
+        print(f"内存缓存: 命中 {result['cache']['hits']} 次, 未命中 {result['cache']['misses']} 次")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='本地静态文件服务器')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--host', default='', help='监听地址')
+    parser.add_argument('--port', type=int, default=PORT, help='端口')
+    parser.add_argument('--quiet', action='store_true', help='不输出访问日志')
+    parser.add_argument('--bench', action='store_true', help='压测并输出每秒请求数后退出')
+    parser.add_argument('--duration', type=float, default=5.0, help='压测时长（秒）')
+    parser.add_argument('--connections', type=int, default=8, help='压测并发连接数')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print_bench(bench(args.root, duration=args.duration, connections=args.connections))
+        return 0
+
+    server = make_server(args.root, args.host, args.port, args.quiet)
+    print(f"服务器已启动: http://localhost:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务器已停止。")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+# HTML结构检查
+# 每个检查都是分词事件流上的一个 pass，多个检查共用同一次扫描：
+#     results = run_checks('index.html', [TagBalanceCheck(), ScriptTagCheck()])
+
+import re
+import sys
+from collections import deque
+
+from html_tokenizer import (
+    COMMENT, ENDTAG, SCRIPT, STARTTAG, STYLE, TEXT, TOKENIZER_VERSION, VOID_TAGS, tokenize_file
+)
+
+JS_KEYWORDS = ['function', 'var', 'let', 'const', 'if', 'else', 'for', 'while', 'return', 'console.log']
+# 按单词匹配，避免 'format' 之类的英文单词被误判成 'for'
+_JS_KEYWORD_PATTERNS = [
+    (keyword, re.compile(r'(?<![\w.])' + re.escape(keyword) + r'(?!\w)', re.ASCII))
+    for keyword in JS_KEYWORDS
+]
+
+
+def finding(check, level, message, token=None):
+    """生成一条检查结果，带上事件位置"""
+    item = {'check': check, 'level': level, 'message': message}
+    if token is not None:
+        item.update(line=token.line, col=token.col, offset=token.offset)
+    return item
+
+
+def location(token):
+    return f'第 {token.line} 行第 {token.col} 列 (字节 {token.offset})'
+
+
+class Check:
+    """检查基类，子类只需关心自己 kinds 中的事件"""
+
+    name = ''
+    version = 1
+    kinds = ()
+
+    def __init__(self):
+        self.findings = []
+
+    def report(self, level, message, token=None):
+        self.findings.append(finding(self.name, level, message, token))
+
+    def feed(self, token):
+        """处理一个 kinds 中的事件；基类什么也不做"""
+
+    def result(self):
+        return {'findings': self.findings}
+
+
+class TagBalanceCheck(Check):
+    """标签闭合检查（原 test_html_structure.py）"""
+
+    name = 'tag-balance'
+    kinds = (STARTTAG, ENDTAG)
+
+    def __init__(self):
+        super().__init__()
+        self.open_tags = []
+        self.main_start = None
+        self.main_end = None
+
+    def feed(self, token):
+        if token.kind == STARTTAG:
+            if token.name == 'main' and self.main_start is None:
+                self.main_start = token.offset
+            if not token.selfclosing and token.name not in VOID_TAGS:
+                self.open_tags.append((token.name, token))
+            return
+
+        if token.name == 'main':
+            self.main_end = token.offset
+        if self.open_tags and self.open_tags[-1][0] == token.name:
+            self.open_tags.pop()
+        else:
+            self.report('error', f'不匹配的结束标签 </{token.name}> 在{location(token)}', token)
+
+    def result(self):
+        for name, token in self.open_tags:
+            self.report('warning', f'未闭合的标签 <{name}> 在{location(token)}', token)
+        return {
+            'findings': self.findings,
+            'unclosed': [name for name, _ in self.open_tags],
+            'main_start': self.main_start,
+            'main_end': self.main_end,
+        }
+
+
+class ScriptTagCheck(Check):
+    """script开始/结束标签配对检查（原 count_script_tags.py）"""
+
+    name = 'script-tags'
+    kinds = (STARTTAG, ENDTAG)
+
+    def __init__(self):
+        super().__init__()
+        self.starts = []
+        self.ends = []
+        self.pending = None
+
+    def feed(self, token):
+        if token.name != 'script':
+            return
+        if token.kind == STARTTAG:
+            if self.pending is not None:
+                self.report('error', f'未闭合的script标签在{location(self.pending)}', self.pending)
+            self.starts.append(token.offset)
+            self.pending = token
+        else:
+            self.ends.append(token.offset)
+            if self.pending is None:
+                self.report('error', f'多余的script结束标签在{location(token)}', token)
+            self.pending = None
+
+    def result(self):
+        if self.pending is not None:
+            self.report('error', f'未闭合的script标签在{location(self.pending)}', self.pending)
+            self.pending = None
+        return {
+            'findings': self.findings,
+            'start_count': len(self.starts),
+            'end_count': len(self.ends),
+        }
+
+
+class JsStringCheck(Check):
+    """内联脚本中未闭合字符串的粗略检查（原 check_js_strings.py）
+
+    last 不为 None 时只检查最后 last 个script标签。
+    """
+
+    name = 'js-strings'
+    kinds = (STARTTAG, SCRIPT)
+    QUOTES = (("'", '单引号字符串'), ('"', '双引号字符串'), ('`', '模板字符串'))
+
+    def __init__(self, last=None):
+        super().__init__()
+        self.scripts = deque(maxlen=last)
+        self.script_count = 0
+
+    def feed(self, token):
+        if token.kind == STARTTAG:
+            if token.name == 'script':
+                self.script_count += 1
+                self.scripts.append((token, None))
+            return
+        if self.scripts:
+            tag, _ = self.scripts[-1]
+            self.scripts[-1] = (tag, {quote: token.data.count(quote) for quote, _ in self.QUOTES})
+
+    def result(self):
+        for tag, counts in self.scripts:
+            if not counts:
+                continue
+            for quote, label in self.QUOTES:
+                if counts[quote] % 2 != 0:
+                    self.report('warning', f'{location(tag)}的script标签中发现未闭合的{label}', tag)
+        return {'findings': self.findings, 'script_count': self.script_count}
+
+
+class LastScriptsCheck(Check):
+    """记录最后几个script标签的完整源码（原 view_last_scripts.py）"""
+
+    name = 'last-scripts'
+    kinds = (STARTTAG, SCRIPT, ENDTAG)
+
+    def __init__(self, count=3):
+        super().__init__()
+        self.blocks = deque(maxlen=count)
+        self.total = 0
+        self.current = None
+
+    def feed(self, token):
+        if token.name != 'script':
+            return
+        if token.kind == STARTTAG:
+            self.total += 1
+            self.current = {'index': self.total, 'start': token.offset, 'line': token.line,
+                            'end': None, 'source': token.data}
+            self.blocks.append(self.current)
+        elif self.current is not None:
+            self.current['source'] += token.data
+            if token.kind == ENDTAG:
+                self.current['end'] = token.offset
+                self.current = None
+
+    def result(self):
+        for block in self.blocks:
+            if block['end'] is None:
+                item = finding(self.name, 'error', f'未找到script标签的结束，从字节 {block["start"]} 开始')
+                item.update(line=block['line'], offset=block['start'])
+                self.findings.append(item)
+        return {'findings': self.findings, 'total': self.total, 'blocks': list(self.blocks)}
+
+
+class MainToBodyCheck(Check):
+    """检查 </main> 与 </body> 之间的内容（原 find_main_to_body.py）"""
+
+    name = 'main-to-body'
+    kinds = (STARTTAG, ENDTAG, TEXT)
+
+    def __init__(self):
+        super().__init__()
+        self.state = 'before'      # before -> inside -> after
+        self.script_starts = 0
+        self.script_ends = 0
+        self.last_script = None
+        self.text = []
+
+    def feed(self, token):
+        if self.state == 'before':
+            if token.kind == ENDTAG and token.name == 'main':
+                self.state = 'inside'
+            return
+        if self.state != 'inside':
+            return
+        if token.kind == ENDTAG and token.name == 'body':
+            self.state = 'after'
+        elif token.name == 'script':
+            if token.kind == STARTTAG:
+                self.script_starts += 1
+                self.last_script = token
+            else:
+                self.script_ends += 1
+        elif token.kind == TEXT and token.data.strip():
+            self.text.append(token.data)
+
+    def result(self):
+        found = self.state == 'after'
+        text = ''.join(self.text).strip() if found else ''
+        if text:
+            self.report('warning', f'main到body之间发现文本内容: {text[:200]!r}')
+        if found and self.script_starts != self.script_ends:
+            self.report('error', f'main到body之间script标签数量不匹配: '
+                                 f'{self.script_starts}个开始，{self.script_ends}个结束',
+                        self.last_script)
+        return {
+            'findings': self.findings,
+            'found': found,
+            'script_starts': self.script_starts,
+            'script_ends': self.script_ends,
+            'text': text,
+        }
+
+
+class TextContentCheck(Check):
+    """页面可见文本检查（原 check_all_text.py）
+
+    只保留文本开头和结尾的片段，内存占用与文件大小无关。
+    """
+
+    name = 'text-content'
+    kinds = (TEXT, STARTTAG, ENDTAG, COMMENT, SCRIPT, STYLE)
+    HEAD = 200
+    TAIL = 500
+
+    def __init__(self):
+        super().__init__()
+        self.head = ''
+        self.tail = ''
+        self.length = 0
+        self.file_size = 0
+        self.file_tail = ''
+
+    def feed(self, token):
+        self.file_size = token.end
+        raw = f'<!--{token.data}-->' if token.kind == COMMENT else token.data
+        self.file_tail = (self.file_tail + raw)[-100:]
+        if token.kind != TEXT:
+            return
+        data = token.data
+        if not self.length:
+            data = data.lstrip()
+            if not data:
+                return
+        self.length += len(data)
+        if len(self.head) < self.HEAD:
+            self.head += data[:self.HEAD - len(self.head)]
+        # 多保留一些，以便去掉结尾空白后仍有足够内容
+        self.tail = (self.tail + data)[-self.TAIL * 2:]
+
+    def result(self):
+        tail = self.tail.rstrip()
+        length = self.length - (len(self.tail) - len(tail))
+        last_500 = tail[-self.TAIL:]
+        keywords = [keyword for keyword, pattern in _JS_KEYWORD_PATTERNS if pattern.search(last_500)]
+        if keywords:
+            self.report('warning', f'页面文本末尾包含JavaScript关键字: {keywords}')
+        return {
+            'findings': self.findings,
+            'file_size': self.file_size,
+            'text_length': length,
+            'head': self.head,
+            'tail': tail[-self.HEAD:],
+            'keywords': keywords,
+            'file_tail': self.file_tail,
+        }
+
+
+class DocumentCheck(Check):
+    """文档骨架检查（原 parse_html.py）"""
+
+    name = 'document'
+    kinds = (STARTTAG, ENDTAG, TEXT)
+    REQUIRED = ('html', 'head', 'body')
+
+    def __init__(self):
+        super().__init__()
+        self.seen = set()
+        self.main_count = 0
+        self.script_count = 0
+        self.body_children = []
+        self.depth = 0          # 相对body的嵌套深度，0 表示body的直接子级
+        self.in_body = False
+
+    def feed(self, token):
+        if token.kind == STARTTAG:
+            self.seen.add(token.name)
+            if token.name == 'main':
+                self.main_count += 1
+            elif token.name == 'script':
+                self.script_count += 1
+            if token.name == 'body':
+                self.in_body = True
+                self.depth = 0
+            elif self.in_body:
+                if self.depth == 0:
+                    self.body_children.append(token.name)
+                if not token.selfclosing and token.name not in VOID_TAGS:
+                    self.depth += 1
+        elif token.kind == ENDTAG:
+            if token.name == 'body':
+                self.in_body = False
+            elif self.in_body and self.depth:
+                self.depth -= 1
+        elif self.in_body and self.depth == 0 and token.data.strip():
+            self.report('warning', f'body中有直接的文本内容: {token.data.strip()[:50]!r}', token)
+
+    def result(self):
+        for name in self.REQUIRED:
+            if name not in self.seen:
+                self.report('error', f'缺少{name}标签!')
+        return {
+            'findings': self.findings,
+            'main_count': self.main_count,
+            'script_count': self.script_count,
+            'body_children': self.body_children,
+        }
+
+
+# 全站检查时默认运行的检查
+DEFAULT_CHECKS = [
+    DocumentCheck, TagBalanceCheck, ScriptTagCheck, JsStringCheck, MainToBodyCheck, TextContentCheck
+]
+
+
+def checks_version(classes=DEFAULT_CHECKS):
+    """检查器版本签名，任一检查或分词器升级版本后缓存自动失效"""
+    parts = [f'{cls.name}:{cls.version}' for cls in classes]
+    parts.append(f'tokenizer:{TOKENIZER_VERSION}')
+    return ','.join(parts)
+
+
+def run_checks(path, checks):
+    """对文件只扫描一次，把每个事件分发给关心它的检查"""
+    dispatch = {}
+    for check in checks:
+        for kind in check.kinds:
+            dispatch.setdefault(kind, []).append(check)
+    for token in tokenize_file(path):
+        for check in dispatch.get(token.kind, ()):
+            check.feed(token)
+    return {check.name: check.result() for check in checks}
+
+
+def all_findings(results):
+    """把各检查的结果合并成一个列表"""
+    return [item for result in results.values() for item in result['findings']]
+
+
+def main():
+    paths = sys.argv[1:] or ['index.html']
+    total = 0
+    for path in paths:
+        results = run_checks(path, [cls() for cls in DEFAULT_CHECKS])
+        findings = all_findings(results)
+        total += len(findings)
+        print(f'{path}: {len(findings)} 个问题')
+        for item in findings:
+            where = f'{item["line"]}:{item["col"]}' if 'col' in item else '-'
+            print(f'  [{item["level"]}] {where} {item["check"]}: {item["message"]}')
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
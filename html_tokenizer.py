@@ -0,0 +1,254 @@
+# 流式HTML分词器
+# 对文件流做一次线性扫描，产出 标签/文本/注释/脚本 事件，
+# 每个事件都带有字节偏移和行列号，供各个检查脚本共用。
+
+import re
+from collections import namedtuple
+
+# 分词规则变化时递增，使依赖分词结果的缓存失效
+TOKENIZER_VERSION = 1
+
+# 事件类型
+DOCTYPE = 'doctype'
+STARTTAG = 'starttag'
+ENDTAG = 'endtag'
+TEXT = 'text'
+COMMENT = 'comment'
+SCRIPT = 'script'
+STYLE = 'style'
+
+# 不需要闭合的标签
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+])
+
+# 内容按原始文本处理的标签（内部的 '<' 不当作标签）
+RAWTEXT_TAGS = {b'script': SCRIPT, b'style': STYLE}
+
+# 事件: offset/end 为字节偏移，line/col 从1开始（列按字符计）
+# data 对标签是原始标签文本，对文本/注释/脚本是其内容
+Token = namedtuple('Token', 'kind name attrs data offset end line col selfclosing')
+
+CHUNK_SIZE = 64 * 1024
+
+_TAG_NAME = re.compile(rb'[^\s/>]+')
+# 引号内的 '>' 不结束标签；未闭合的引号匹配到缓冲区末尾
+_TAG_END = re.compile(rb'"[^"]*(?:"|$)|\'[^\']*(?:\'|$)|>')
+_ATTR = re.compile(
+    rb'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?'
+)
+_RAWTEXT_END = {
+    name: re.compile(rb'</' + name + rb'\s*>', re.IGNORECASE)
+    for name in RAWTEXT_TAGS
+}
+
+
+def _decode(data):
+    return data.decode('utf-8', 'replace')
+
+
+def _parse_attrs(raw):
+    """解析标签属性，返回 (名称, 值) 列表"""
+    attrs = []
+    for m in _ATTR.finditer(raw):
+        value = m.group(2)
+        if value is None:
+            value = m.group(3)
+        if value is None:
+            value = m.group(4)
+        attrs.append((_decode(m.group(1)).lower(), _decode(value) if value is not None else None))
+    return attrs
+
+
+class HTMLTokenizer:
+    """增量HTML分词器，按块读取文件流，只缓存尚未完成的那个事件"""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0           # buf 中当前读取位置
+        self.base = 0          # buf[0] 对应的字节偏移
+        self.eof = False
+        self.line = 1
+        self.col = 1
+        self.rawtext = None    # 正在读取原始文本的标签名（script/style）
+
+    def _fill(self):
+        """再读一块数据，文件结束时返回 False
+
+        读入新数据时丢弃已消费的部分，缓冲区中的下标整体左移 pos 位，
+        调用方如果持有下标需要自行换算。
+        """
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if self.pos:
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def _advance(self, start, end):
+        """根据已消费的字节更新行列号"""
+        buf = self.buf
+        last_nl = buf.rfind(b'\n', start, end)
+        if last_nl != -1:
+            self.line += buf.count(b'\n', start, end)
+            self.col = len(_decode(buf[last_nl + 1:end])) + 1
+        else:
+            self.col += len(_decode(buf[start:end]))
+
+    def _emit(self, kind, end, name='', attrs=(), selfclosing=False, body=None):
+        """消费 buf[pos:end] 并生成事件"""
+        start = self.pos
+        data = _decode(self.buf[start:end] if body is None else body)
+        token = Token(kind, name, attrs, data, self.base + start, self.base + end,
+                      self.line, self.col, selfclosing)
+        self._advance(start, end)
+        self.pos = end
+        return token
+
+    def _find(self, pattern, offset):
+        """从 pos+offset 处查找，找不到时继续读入直到文件结束，返回相对 pos 的下标"""
+        while True:
+            idx = self.buf.find(pattern, self.pos + offset)
+            if idx != -1:
+                return idx - self.pos
+            if not self._fill():
+                return -1
+
+    def _available(self):
+        return len(self.buf) - self.pos
+
+    def __iter__(self):
+        return self.tokens()
+
+    def tokens(self):
+        """按文档顺序产出事件"""
+        while self._available() or self._fill():
+            if self.rawtext is not None:
+                yield from self._read_rawtext()
+                continue
+
+            lt = self._find(b'<', 0)
+            if lt == -1:
+                yield self._emit(TEXT, len(self.buf))
+                continue
+            if lt > 0:
+                yield self._emit(TEXT, self.pos + lt)
+                continue
+
+            # 至少需要看到 '<' 后面的几个字节才能判断类型
+            while self._available() < 4 and self._fill():
+                pass
+            head = self.buf[self.pos:self.pos + 4]
+            nxt = head[1:2]
+            if head == b'<!--':
+                yield self._read_comment()
+            elif nxt == b'!' or nxt == b'?':
+                yield self._read_declaration()
+            elif nxt == b'/' and head[2:3].isalpha():
+                yield self._read_tag(ENDTAG)
+            elif nxt.isalpha():
+                yield self._read_tag(STARTTAG)
+            else:
+                # 孤立的 '<'，当作文本
+                yield self._emit(TEXT, self.pos + 1)
+
+    def _read_comment(self):
+        close = self._find(b'-->', 4)
+        if close == -1:
+            end = len(self.buf)
+            body = self.buf[self.pos + 4:end]
+        else:
+            end = self.pos + close + 3
+            body = self.buf[self.pos + 4:self.pos + close]
+        return self._emit(COMMENT, end, body=body)
+
+    def _read_declaration(self):
+        close = self._find(b'>', 2)
+        end = len(self.buf) if close == -1 else self.pos + close + 1
+        return self._emit(DOCTYPE, end)
+
+    def _read_tag(self, kind):
+        start = 2 if kind == ENDTAG else 1
+        rel = start              # 相对 pos 的扫描位置，_fill 后仍然有效
+        end = -1
+        while end == -1:
+            for m in _TAG_END.finditer(self.buf, self.pos + rel):
+                quoted = m.group()
+                if quoted == b'>':
+                    end = m.end()
+                    break
+                if len(quoted) < 2 or quoted[-1:] != quoted[:1]:
+                    # 引号在缓冲区末尾仍未闭合，读入更多数据后重新扫描
+                    rel = m.start() - self.pos
+                    break
+            else:
+                rel = len(self.buf) - self.pos
+            if end == -1 and not self._fill():
+                end = len(self.buf)
+
+        raw = self.buf[self.pos:end]
+        name_match = _TAG_NAME.match(raw, start)
+        bname = name_match.group().lower() if name_match else b''
+        inner = raw[name_match.end() if name_match else start:]
+        inner = inner[:-1] if inner.endswith(b'>') else inner
+        selfclosing = inner.rstrip().endswith(b'/')
+        attrs = _parse_attrs(inner) if kind == STARTTAG else ()
+        token = self._emit(kind, end, name=_decode(bname), attrs=attrs, selfclosing=selfclosing)
+        if kind == STARTTAG and bname in RAWTEXT_TAGS and not selfclosing:
+            self.rawtext = bname
+        return token
+
+    def _read_rawtext(self):
+        name = self.rawtext
+        self.rawtext = None
+        pattern = _RAWTEXT_END[name]
+        m = pattern.search(self.buf, self.pos)
+        while m is None:
+            # 结束标签可能跨块，从上次末尾往前留一点余量再找
+            rel = max(0, self._available() - 16)
+            if not self._fill():
+                break
+            m = pattern.search(self.buf, self.pos + rel)
+        end = m.start() if m else len(self.buf)
+        if end > self.pos:
+            yield self._emit(RAWTEXT_TAGS[name], end, name=_decode(name))
+        if m:
+            yield self._emit(ENDTAG, m.end(), name=_decode(name))
+
+
+def tokenize(stream, chunk_size=CHUNK_SIZE):
+    """对二进制或文本流分词"""
+    return HTMLTokenizer(stream, chunk_size).tokens()
+
+
+def tokenize_file(path, chunk_size=CHUNK_SIZE):
+    """对文件分词，不会一次性读入整个文件"""
+    with open(path, 'rb') as f:
+        yield from HTMLTokenizer(f, chunk_size).tokens()
+
+
+def tokenize_string(content):
+    """对内存中的字符串分词（主要用于小片段）"""
+    import io
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return HTMLTokenizer(io.BytesIO(content)).tokens()
+
+
+def attr(token, name, default=None):
+    """取标签属性值"""
+    for key, value in token.attrs:
+        if key == name:
+            return value
+    return default
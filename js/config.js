@@ -17,7 +17,8 @@ const appConfig = {
     api: {
         baseUrl: '', // 预留API基础URL
         timeout: 10000,
-        retryCount: 3
+        retryCount: 3,
+        pointsLedgerUrl: ''      // 积分账本服务地址（points_ledger.py，如 https://api.example.com/points），为空时积分只保存在本地
     },
     
     // 主题配置
@@ -29,8 +30,10 @@ const appConfig = {
     // 性能监控配置
     performance: {
         enable: true,
-        samplingRate: 1.0,
-        logLevel: 'info'
+        samplingRate: 1.0,       // 上报采样率（0~1），每次页面访问决定一次
+        logLevel: 'info',
+        beaconUrl: '',           // 性能数据上报地址（telemetry_collector.py 的 /beacon），为空时只输出到控制台
+        maxResources: 150        // 每次上报最多包含的资源条数（按耗时从长到短）
     },
     
     // 数据存储配置
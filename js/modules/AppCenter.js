@@ -122,6 +122,8 @@ class AppCenter {
         // 设置应用和分类数据
         this.apps = this.appData.apps;
         this.categories = this.appData.categories;
+        // 部署版本中应用列表被 catalog_shards.py 移到了 data/catalog/，打开应用中心时按分类加载
+        this.catalog = this.apps.length === 0 && window.catalogStore ? window.catalogStore.view('apps') : null;
         
         // 尝试从Supabase加载已安装的应用
         if (this.supabase && window.userManagement) {
@@ -175,6 +177,18 @@ class AppCenter {
         });
     }
 
+    /**
+     * 从数据目录加载某个分类的应用（只在部署版本中需要），没有对应分片时加载全部
+     */
+    async loadCatalog(category) {
+        if (!this.catalog) return;
+        try {
+            this.apps = this.apps.concat(await this.catalog.ensure(category));
+        } catch (error) {
+            console.error('加载应用数据失败:', error);
+        }
+    }
+
     async showAppCenter() {
         const appCenterContent = document.getElementById('appCenterContent');
         if (!appCenterContent) return;
@@ -183,6 +197,7 @@ class AppCenter {
         if (this.supabase && window.userManagement) {
             await this.loadInstalledAppsFromSupabase();
         }
+        await this.loadCatalog(this.currentCategory);
         
         // 渲染应用中心界面
         appCenterContent.innerHTML = `
@@ -271,7 +286,7 @@ class AppCenter {
         `).join('');
     }
 
-    filterAppsByCategory(category) {
+    async filterAppsByCategory(category) {
         this.currentCategory = category;
         
         // 更新分类筛选器的激活状态
@@ -281,6 +296,7 @@ class AppCenter {
                 btn.classList.add('active');
             }
         });
+        await this.loadCatalog(category);
         
         // 更新应用列表
         const appList = document.getElementById('appList');
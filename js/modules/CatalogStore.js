@@ -0,0 +1,106 @@
+/**
+ * 数据目录加载模块 - 按需加载工具、资源、应用列表的JSON分片
+ * 部署版本中这些列表由 catalog_shards.py 从模块脚本中移出，拆成 data/catalog/ 下按分类的分片，
+ * 开发时模块里仍有完整列表，不会用到这里的加载逻辑。
+ * @module CatalogStore
+ */
+
+class CatalogStore {
+    constructor(manifestUrl = 'data/catalog/manifest.json') {
+        this.manifestUrl = manifestUrl;
+        this.manifestPromise = null;
+        this.shards = new Map(); // 分片文件 -> Promise<条目数组>
+    }
+
+    /**
+     * 读取清单（分片文件名带内容哈希，清单本身不缓存）
+     */
+    getManifest() {
+        if (!this.manifestPromise) {
+            this.manifestPromise = fetch(this.manifestUrl, { cache: 'no-cache' })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`数据目录清单加载失败: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .catch(error => {
+                    this.manifestPromise = null;
+                    throw error;
+                });
+        }
+        return this.manifestPromise;
+    }
+
+    fetchShard(file) {
+        if (!this.shards.has(file)) {
+            const url = new URL(file, new URL(this.manifestUrl, location.href));
+            const promise = fetch(url).then(response => {
+                if (!response.ok) {
+                    throw new Error(`数据目录分片加载失败: ${file}`);
+                }
+                return response.json();
+            });
+            promise.catch(() => this.shards.delete(file));
+            this.shards.set(file, promise);
+        }
+        return this.shards.get(file);
+    }
+
+    /**
+     * 加载目录中某个分类的条目；没有这个分类的分片时（如“全部”）加载完整列表
+     * @returns {Promise<{items: Array, complete: boolean}>}
+     */
+    async load(name, category) {
+        const manifest = await this.getManifest();
+        const catalogue = manifest.catalogues[name];
+        if (!catalogue) {
+            throw new Error(`未知的数据目录: ${name}`);
+        }
+        const shard = category !== undefined ? catalogue.shards[category] : undefined;
+        const items = await this.fetchShard(shard ? shard.file : catalogue.all.file);
+        return { items, complete: !shard };
+    }
+
+    /**
+     * 模块使用的视图：记录已经加载过的分类，每个条目只返回一次
+     */
+    view(name) {
+        return new CatalogView(this, name);
+    }
+}
+
+class CatalogView {
+    constructor(store, name) {
+        this.store = store;
+        this.name = name;
+        this.loaded = new Set();
+        this.complete = false;
+        this.ids = new Set();
+    }
+
+    /**
+     * 确保某个分类（省略时为全部）已经加载，返回新加载的条目
+     */
+    async ensure(category) {
+        if (this.complete || this.loaded.has(category)) {
+            return [];
+        }
+        const { items, complete } = await this.store.load(this.name, category);
+        this.loaded.add(category);
+        this.complete = this.complete || complete;
+        const added = items.filter(item => !this.ids.has(item.id));
+        added.forEach(item => this.ids.add(item.id));
+        return added;
+    }
+}
+
+// 创建单例实例
+const catalogStore = new CatalogStore();
+
+// 导出单例实例
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = catalogStore;
+} else {
+    window.catalogStore = catalogStore;
+}
@@ -2,10 +2,245 @@
  * 评论和评分系统
  * 用于处理资源的评论和评分功能
  */
+
+/**
+ * 按资源分页保存评论的存储
+ * 每个资源的评论按时间顺序分页，每页一个 localStorage 条目，只在显示到那一页时才读取；
+ * 评论数和评分的总和/人数保存在一个很小的索引里，随增删评论和评分增量更新，
+ * 列表页为每张卡片取评分和评论数时不需要读取任何评论。
+ */
+class CommentStore {
+    constructor(storage = localStorage, pageSize = 20) {
+        this.storage = storage;
+        this.pageSize = pageSize;
+        this.indexKey = 'resourceCommentIndex';
+        this.index = this.read(this.indexKey) || {}; // 资源ID -> { pages, comments, ratingSum, ratingCount }
+        this.pages = new Map();   // "资源ID:页码" -> 该页评论（按时间顺序）
+        this.ratings = new Map(); // 资源ID -> 评分数组
+        this.persistent = true;   // 旧数据转换失败时为false，本次只在内存中使用转换后的数据
+        this.migrateLegacy();
+    }
+
+    read(key) {
+        try {
+            const value = this.storage.getItem(key);
+            return value ? JSON.parse(value) : null;
+        } catch (error) {
+            console.error(`Failed to read ${key}:`, error);
+            return null;
+        }
+    }
+
+    /**
+     * 写入一个条目
+     * @returns {boolean} 是否写入成功（空间不足时为false）
+     */
+    write(key, value) {
+        if (!this.persistent) return false;
+        try {
+            this.storage.setItem(key, JSON.stringify(value));
+            return true;
+        } catch (error) {
+            console.error(`Failed to save ${key}:`, error);
+            return false;
+        }
+    }
+
+    pageKey(resourceId, page) {
+        return `resourceComments:${resourceId}:${page}`;
+    }
+
+    /**
+     * 把旧格式（resourceComments / resourceRatings 两个完整对象）转换成分页格式
+     * 所有分页、评分和索引都写入成功后才删除旧数据；任何一项失败（如超出存储空间）时撤销已写入的条目，
+     * 保留旧数据，下次加载时重试，本次只在内存中使用转换后的数据。
+     */
+    migrateLegacy() {
+        const comments = this.read('resourceComments');
+        const ratings = this.read('resourceRatings');
+        if (!comments && !ratings) return;
+
+        const written = [];
+        let ok = true;
+        const save = (key, value) => {
+            ok = ok && this.write(key, value);
+            if (ok) written.push(key);
+        };
+
+        Object.entries(comments || {}).forEach(([resourceId, list]) => {
+            // 旧格式最新的评论在前
+            const ordered = list.slice().reverse();
+            const stats = this.ensureStats(resourceId);
+            for (let i = 0; i < ordered.length; i += this.pageSize) {
+                const key = this.pageKey(resourceId, stats.pages++);
+                this.pages.set(key, ordered.slice(i, i + this.pageSize));
+                save(key, this.pages.get(key));
+            }
+            stats.comments += ordered.length;
+        });
+        Object.entries(ratings || {}).forEach(([resourceId, list]) => {
+            const stats = this.ensureStats(resourceId);
+            stats.ratingSum = list.reduce((sum, r) => sum + r.rating, 0);
+            stats.ratingCount = list.length;
+            this.ratings.set(String(resourceId), list);
+            save(`resourceRatings:${resourceId}`, list);
+        });
+        save(this.indexKey, this.index);
+
+        if (!ok) {
+            written.forEach(key => this.storage.removeItem(key));
+            this.persistent = false;
+            console.warn('评论数据转换失败，已保留旧数据，下次加载时重试');
+            return;
+        }
+        this.storage.removeItem('resourceComments');
+        this.storage.removeItem('resourceRatings');
+        // 转换后的数据已经写入，之后仍按需读取
+        this.pages.clear();
+        this.ratings.clear();
+    }
+
+    /**
+     * 获取资源的汇总
+     * @param {string} resourceId - 资源ID
+     * @returns {Object} { pages, comments, ratingSum, ratingCount }
+     */
+    getStats(resourceId) {
+        return this.index[resourceId] || { pages: 0, comments: 0, ratingSum: 0, ratingCount: 0 };
+    }
+
+    ensureStats(resourceId) {
+        if (!this.index[resourceId]) {
+            this.index[resourceId] = { pages: 0, comments: 0, ratingSum: 0, ratingCount: 0 };
+        }
+        return this.index[resourceId];
+    }
+
+    /**
+     * 读取一页评论（第一次访问时才从存储中解析）
+     * @param {string} resourceId - 资源ID
+     * @param {number} page - 页码，0 为最早的一页
+     * @returns {Array} 该页评论（按时间顺序）
+     */
+    loadPage(resourceId, page) {
+        const key = this.pageKey(resourceId, page);
+        if (!this.pages.has(key)) {
+            this.pages.set(key, this.read(key) || []);
+        }
+        return this.pages.get(key);
+    }
+
+    /**
+     * 按从新到旧的顺序获取第 n 页评论
+     * @param {string} resourceId - 资源ID
+     * @param {number} n - 0 为最新的一页
+     * @returns {Array} 评论列表（最新的在前）
+     */
+    getNewestPage(resourceId, n) {
+        const page = this.getStats(resourceId).pages - 1 - n;
+        return page < 0 ? [] : this.loadPage(resourceId, page).slice().reverse();
+    }
+
+    /**
+     * 添加评论到最后一页，最后一页已满时新建一页
+     */
+    addComment(resourceId, comment) {
+        const stats = this.ensureStats(resourceId);
+        let page = stats.pages - 1;
+        if (page < 0 || this.loadPage(resourceId, page).length >= this.pageSize) {
+            page = stats.pages++;
+        }
+        this.loadPage(resourceId, page).push(comment);
+        stats.comments++;
+
+        this.write(this.pageKey(resourceId, page), this.loadPage(resourceId, page));
+        this.write(this.indexKey, this.index);
+    }
+
+    /**
+     * 从最新的一页开始查找评论（要操作的评论通常在已显示的页里）
+     * @returns {Object|null} { page, position, comment }
+     */
+    findComment(resourceId, commentId) {
+        for (let page = this.getStats(resourceId).pages - 1; page >= 0; page--) {
+            const comments = this.loadPage(resourceId, page);
+            const position = comments.findIndex(comment => comment.id === commentId);
+            if (position !== -1) {
+                return { page, position, comment: comments[position] };
+            }
+        }
+        return null;
+    }
+
+    /**
+     * 删除 findComment 找到的评论
+     */
+    removeComment(resourceId, found) {
+        const comments = this.loadPage(resourceId, found.page);
+        const stats = this.ensureStats(resourceId);
+        comments.splice(found.position, 1);
+        stats.comments--;
+        this.write(this.pageKey(resourceId, found.page), comments);
+
+        // 去掉末尾的空页，否则最新一页为空时会显示“暂无评论”
+        while (stats.pages > 0 && this.loadPage(resourceId, stats.pages - 1).length === 0) {
+            const key = this.pageKey(resourceId, --stats.pages);
+            this.pages.delete(key);
+            if (this.persistent) this.storage.removeItem(key);
+        }
+        this.write(this.indexKey, this.index);
+    }
+
+    /**
+     * 保存 findComment 找到的评论被修改后（如点赞）所在的页
+     */
+    updateComment(resourceId, found) {
+        this.write(this.pageKey(resourceId, found.page), this.loadPage(resourceId, found.page));
+    }
+
+    getRatings(resourceId) {
+        const key = String(resourceId);
+        if (!this.ratings.has(key)) {
+            this.ratings.set(key, this.read(`resourceRatings:${key}`) || []);
+        }
+        return this.ratings.get(key);
+    }
+
+    /**
+     * 获取用户对资源的评分
+     * @returns {number} 评分，没有评过时为0
+     */
+    getUserRating(resourceId, userId) {
+        const entry = this.getRatings(resourceId).find(r => r.userId === userId);
+        return entry ? entry.rating : 0;
+    }
+
+    /**
+     * 添加或修改用户评分，同时更新评分总和和人数
+     */
+    setRating(resourceId, userId, rating) {
+        const ratings = this.getRatings(resourceId);
+        const stats = this.ensureStats(resourceId);
+        const existing = ratings.find(r => r.userId === userId);
+
+        if (existing) {
+            stats.ratingSum += rating - existing.rating;
+            existing.rating = rating;
+        } else {
+            ratings.push({ userId: userId, rating: rating, timestamp: new Date().toISOString() });
+            stats.ratingSum += rating;
+            stats.ratingCount++;
+        }
+
+        this.write(`resourceRatings:${resourceId}`, ratings);
+        this.write(this.indexKey, this.index);
+    }
+}
+
 class CommentSystem {
     constructor() {
-        this.comments = JSON.parse(localStorage.getItem('resourceComments')) || {};
-        this.ratings = JSON.parse(localStorage.getItem('resourceRatings')) || {};
+        this.store = new CommentStore();
+        this.visiblePages = {}; // 资源ID -> 已显示的评论页数
         this.currentUser = null;
         this.userManagement = null;
         this.init();
@@ -70,6 +305,14 @@ class CommentSystem {
             }
         });
 
+        // 加载更多评论
+        document.addEventListener('click', (e) => {
+            const moreBtn = e.target.closest('.load-more-comments');
+            if (moreBtn) {
+                this.loadMoreComments(moreBtn.dataset.resourceId);
+            }
+        });
+
         // 删除评论事件
         document.addEventListener('click', (e) => {
             const deleteBtn = e.target.closest('.delete-comment');
@@ -116,14 +359,8 @@ class CommentSystem {
             likedBy: []
         };
 
-        // 保存评论
-        if (!this.comments[resourceId]) {
-            this.comments[resourceId] = [];
-        }
-        this.comments[resourceId].unshift(comment); // 添加到开头
-
-        // 保存到localStorage
-        this.saveComments();
+        // 保存评论（只写入最后一页和索引）
+        this.store.addComment(resourceId, comment);
 
         // 更新UI
         this.displayComments(resourceId);
@@ -146,12 +383,10 @@ class CommentSystem {
     deleteComment(resourceId, commentId) {
         if (!this.currentUser) return;
 
-        const comments = this.comments[resourceId] || [];
-        const commentIndex = comments.findIndex(comment => comment.id === commentId);
-
-        if (commentIndex === -1) return;
+        const found = this.store.findComment(resourceId, commentId);
+        if (!found) return;
 
-        const comment = comments[commentIndex];
+        const comment = found.comment;
         
         // 检查是否有权限删除
         if (comment.userId !== (this.currentUser.id || this.currentUser.username) && 
@@ -164,8 +399,7 @@ class CommentSystem {
         }
 
         // 删除评论
-        comments.splice(commentIndex, 1);
-        this.saveComments();
+        this.store.removeComment(resourceId, found);
 
         // 更新UI
         this.displayComments(resourceId);
@@ -190,27 +424,8 @@ class CommentSystem {
             return;
         }
 
-        // 保存用户评分
-        if (!this.ratings[resourceId]) {
-            this.ratings[resourceId] = [];
-        }
-
-        const userRatingIndex = this.ratings[resourceId].findIndex(r => r.userId === (this.currentUser.id || this.currentUser.username));
-        
-        if (userRatingIndex !== -1) {
-            // 更新现有评分
-            this.ratings[resourceId][userRatingIndex].rating = rating;
-        } else {
-            // 添加新评分
-            this.ratings[resourceId].push({
-                userId: this.currentUser.id || this.currentUser.username,
-                rating: rating,
-                timestamp: new Date().toISOString()
-            });
-        }
-
-        // 保存到localStorage
-        this.saveRatings();
+        // 保存用户评分，同时更新评分总和和人数
+        this.store.setRating(resourceId, this.currentUser.id || this.currentUser.username, rating);
 
         // 更新UI
         this.displayRating(resourceId);
@@ -227,11 +442,8 @@ class CommentSystem {
      * @returns {number} 平均评分
      */
     getAverageRating(resourceId) {
-        const resourceRatings = this.ratings[resourceId] || [];
-        if (resourceRatings.length === 0) return 0;
-        
-        const sum = resourceRatings.reduce((acc, r) => acc + r.rating, 0);
-        return sum / resourceRatings.length;
+        const stats = this.store.getStats(resourceId);
+        return stats.ratingCount === 0 ? 0 : stats.ratingSum / stats.ratingCount;
     }
 
     /**
@@ -240,16 +452,21 @@ class CommentSystem {
      * @returns {number} 评分人数
      */
     getRatingCount(resourceId) {
-        return (this.ratings[resourceId] || []).length;
+        return this.store.getStats(resourceId).ratingCount;
     }
 
     /**
-     * 获取资源的评论列表
+     * 获取资源已显示的评论（最新的在前，默认只有第一页）
      * @param {string} resourceId - 资源ID
      * @returns {Array} 评论列表
      */
     getComments(resourceId) {
-        return this.comments[resourceId] || [];
+        const pages = this.visiblePages[resourceId] || 1;
+        const comments = [];
+        for (let n = 0; n < pages; n++) {
+            comments.push(...this.store.getNewestPage(resourceId, n));
+        }
+        return comments;
     }
 
     /**
@@ -258,7 +475,26 @@ class CommentSystem {
      * @returns {number} 评论数量
      */
     getCommentCount(resourceId) {
-        return this.getComments(resourceId).length;
+        return this.store.getStats(resourceId).comments;
+    }
+
+    /**
+     * 是否还有未显示的更早的评论
+     * @param {string} resourceId - 资源ID
+     * @returns {boolean}
+     */
+    hasMoreComments(resourceId) {
+        return (this.visiblePages[resourceId] || 1) < this.store.getStats(resourceId).pages;
+    }
+
+    /**
+     * 加载并显示下一页更早的评论
+     * @param {string} resourceId - 资源ID
+     */
+    loadMoreComments(resourceId) {
+        if (!this.hasMoreComments(resourceId)) return;
+        this.visiblePages[resourceId] = (this.visiblePages[resourceId] || 1) + 1;
+        this.displayComments(resourceId);
     }
 
     /**
@@ -298,7 +534,9 @@ class CommentSystem {
                     </button>
                 </div>
             </div>
-        `).join('');
+        `).join('') + (this.hasMoreComments(resourceId) ? `
+            <button class="load-more-comments" data-resource-id="${resourceId}">加载更多评论</button>
+        ` : '');
 
         // 添加点赞事件监听
         commentsContainer.querySelectorAll('.like-comment').forEach(btn => {
@@ -323,8 +561,7 @@ class CommentSystem {
         // 获取用户自己的评分
         let userRating = 0;
         if (this.currentUser) {
-            const userRatingObj = this.ratings[resourceId]?.find(r => r.userId === (this.currentUser.id || this.currentUser.username));
-            userRating = userRatingObj?.rating || 0;
+            userRating = this.store.getUserRating(resourceId, this.currentUser.id || this.currentUser.username);
         }
 
         ratingContainer.innerHTML = `
@@ -367,10 +604,10 @@ class CommentSystem {
             return;
         }
 
-        const comments = this.comments[resourceId] || [];
-        const comment = comments.find(c => c.id === commentId);
-        
-        if (!comment) return;
+        const found = this.store.findComment(resourceId, commentId);
+        if (!found) return;
+
+        const comment = found.comment;
 
         const userId = this.currentUser.id || this.currentUser.username;
         const likeIndex = comment.likedBy.indexOf(userId);
@@ -385,8 +622,8 @@ class CommentSystem {
             comment.likes++;
         }
 
-        // 保存到localStorage
-        this.saveComments();
+        // 只保存评论所在的页
+        this.store.updateComment(resourceId, found);
 
         // 更新UI
         this.displayComments(resourceId);
@@ -417,20 +654,6 @@ class CommentSystem {
         }
     }
 
-    /**
-     * 保存评论到localStorage
-     */
-    saveComments() {
-        localStorage.setItem('resourceComments', JSON.stringify(this.comments));
-    }
-
-    /**
-     * 保存评分到localStorage
-     */
-    saveRatings() {
-        localStorage.setItem('resourceRatings', JSON.stringify(this.ratings));
-    }
-
     /**
      * 在资源卡片上显示评分信息
      * @param {string} resourceId - 资源ID
@@ -458,4 +681,5 @@ const commentSystem = new CommentSystem();
 // 导出模块
 if (typeof module !== 'undefined' && module.exports) {
     module.exports = CommentSystem;
+    module.exports.CommentStore = CommentStore;
 }
\ No newline at end of file
@@ -138,12 +138,76 @@ class CoreFramework {
                 if (slowResources.length > 0) {
                     console.warn('慢速加载资源:', slowResources.map(r => ({ name: r.name, duration: r.duration })));
                 }
+
+                // 按采样率决定本次访问是否上报
+                const config = window.appConfig.performance;
+                const samplingRate = typeof config.samplingRate === 'number' ? config.samplingRate : 1;
+                if (config.beaconUrl && Math.random() < samplingRate) {
+                    this.setupPerformanceBeacon(config);
+                }
             } catch (error) {
                 console.error('性能监控启动失败:', error);
             }
         }
     }
 
+    /**
+     * 页面隐藏时上报一次性能数据，每次页面访问只发送一条
+     * @private
+     * @param {Object} config - appConfig.performance
+     */
+    setupPerformanceBeacon(config) {
+        let sent = false;
+        const send = () => {
+            if (sent) return;
+            const payload = this.collectPerformanceData(config.beaconUrl, config.maxResources || 150);
+            if (!payload) return;
+            sent = true;
+            const body = JSON.stringify(payload);
+            // sendBeacon 以 text/plain 发送字符串，不需要 CORS 预检，页面关闭后也会继续发送
+            if (navigator.sendBeacon && navigator.sendBeacon(config.beaconUrl, body)) return;
+            fetch(config.beaconUrl, { method: 'POST', body, keepalive: true, mode: 'no-cors' }).catch(() => {});
+        };
+
+        // 切换标签页或关闭页面时资源计时最完整；pagehide 作为不支持 visibilitychange 时的后备
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') send();
+        });
+        window.addEventListener('pagehide', send);
+    }
+
+    /**
+     * 收集本次页面访问的 navigation 和 resource 计时
+     * @private
+     * @param {string} beaconUrl - 上报地址（上报请求本身不计入）
+     * @param {number} maxResources - 最多包含的资源条数
+     * @returns {Object|null} 上报数据，没有 navigation 计时时返回 null
+     */
+    collectPerformanceData(beaconUrl, maxResources) {
+        const navigation = performance.getEntriesByType('navigation')[0];
+        if (!navigation) return null;
+        const round = value => Math.round(value * 10) / 10;
+        const since = end => (end > 0 ? round(end - navigation.startTime) : null);
+
+        const resources = performance.getEntriesByType('resource')
+            .filter(r => r.name.indexOf('http') === 0 && r.name.indexOf(beaconUrl) !== 0)
+            .sort((a, b) => b.duration - a.duration)
+            .slice(0, maxResources)
+            .map(r => ({ name: r.name, type: r.initiatorType, duration: round(r.duration), size: r.transferSize || 0 }));
+
+        return {
+            v: 1,
+            page: location.pathname,
+            nav: {
+                ttfb: since(navigation.responseStart),
+                domContentLoaded: since(navigation.domContentLoadedEventEnd),
+                load: since(navigation.loadEventEnd),
+                size: navigation.transferSize || 0
+            },
+            resources
+        };
+    }
+
     /**
      * 事件监听
      * @public
@@ -6,9 +6,47 @@
                 this.datasets = new Map();
                 this.financialManager = financialManager;
                 this.crmSystem = crmSystem;
+                this.dashboard = null; // analytics_pipeline.py 预先算好的报表，加载后代替示例数据
                 this.initializeSampleData();
             }
 
+            // 加载离线计算的报表（data/analytics.json），失败时继续使用示例数据
+            async loadDashboard(url = 'data/analytics.json') {
+                try {
+                    const response = await fetch(url, { cache: 'no-cache' });
+                    if (!response.ok) {
+                        throw new Error(`报表加载失败: ${response.status}`);
+                    }
+                    this.dashboard = await response.json();
+                } catch (error) {
+                    console.warn('离线报表不可用，使用示例数据:', error);
+                    this.dashboard = null;
+                }
+                return this.dashboard;
+            }
+
+            // 找到与日期范围对应的预先计算的时间段：完全一致的优先，否则取包含该范围的最短时间段
+            findPeriod(startDate, endDate) {
+                if (!this.dashboard) return null;
+                const periods = [
+                    ...Object.values(this.dashboard.periods),
+                    ...Object.values(this.dashboard.months)
+                ];
+                const toDay = value => value instanceof Date ? value.toISOString().slice(0, 10) : String(value).slice(0, 10);
+                if (!startDate && !endDate) {
+                    return this.dashboard.periods.last30 || null;
+                }
+                const start = startDate ? toDay(startDate) : this.dashboard.firstDay;
+                const end = endDate ? toDay(endDate) : this.dashboard.lastDay;
+                const exact = periods.find(period => period.startDate === start && period.endDate === end);
+                if (exact) return exact;
+                const length = period => Date.parse(period.endDate) - Date.parse(period.startDate);
+                const covering = periods
+                    .filter(period => period.startDate <= start && period.endDate >= end)
+                    .sort((a, b) => length(a) - length(b))[0];
+                return covering ? { ...covering, approximate: true } : null;
+            }
+
             initializeSampleData() {
                 // 模拟数据集
                 const sampleDatasets = [
@@ -33,6 +71,16 @@
 
             // 分析用户行为
             analyzeUserBehavior(startDate, endDate) {
+                const period = this.findPeriod(startDate, endDate);
+                if (period) {
+                    return {
+                        period: { startDate: period.startDate, endDate: period.endDate, approximate: !!period.approximate },
+                        metrics: period.metrics,
+                        trends: period.trends,
+                        insights: this.generateBehavioralInsights(period.metrics, period.trends)
+                    };
+                }
+
                 // 模拟用户行为分析
                 const metrics = {
                     totalUsers: 12500,
@@ -61,6 +109,21 @@
 
             // 分析销售业绩
             analyzeSalesPerformance(period = 'month') {
+                // 离线报表中 week/month/quarter 对应最近 7/30/90 天，也可以直接传 2024-01 这样的月份
+                if (this.dashboard) {
+                    const windows = { week: 'last7', month: 'last30', quarter: 'last90' };
+                    const report = this.dashboard.periods[windows[period] || period] || this.dashboard.months[period];
+                    if (report) {
+                        return {
+                            period,
+                            financial: report.sales.financial,
+                            customer: report.sales.customer,
+                            marketing: null, // 导出数据中没有营销花费
+                            kpis: report.sales.kpis
+                        };
+                    }
+                }
+
                 // 模拟销售分析
                 const financialReport = this.financialManager ? this.financialManager.generateFinancialReport(period) : { overview: { income: 0, expenses: 0, netIncome: 0 } };
                 const customerStats = this.crmSystem ? this.crmSystem.getCustomerStats() : { totalCustomers: 0, customerRetentionRate: 0 };
@@ -97,6 +160,9 @@
 
             // 计算NPS
             calculateNPS() {
+                if (this.dashboard && this.dashboard.nps.score !== null) {
+                    return this.dashboard.nps.score;
+                }
                 // 模拟NPS计算
                 return 42; // 假设的NPS分数
             }
@@ -128,6 +194,13 @@
 
             // 收入预测
             forecastRevenue(months = 12) {
+                if (this.dashboard && this.dashboard.forecast.length) {
+                    return this.dashboard.forecast.slice(0, months).map(item => ({
+                        ...item,
+                        predictedRevenue: this.formatCurrency(item.predictedRevenue)
+                    }));
+                }
+
                 const forecast = [];
                 const currentRevenue = this.financialManager ? this.financialManager.getFinancialOverview().netIncome : 0;
                 
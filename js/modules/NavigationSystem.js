@@ -519,12 +519,16 @@ class NavigationSystem {
     initializeCurrentRoute() {
         // 检查URL中的hash
         const hash = window.location.hash;
+        // 预渲染的路由页面（prerender_routes.py 生成的 browser.html 等）在 <body data-route> 中记录路由
+        const pageRoute = document.body ? document.body.dataset.route : undefined;
         
         if (hash && hash.length > 1) {
             const route = hash.substring(1);
             if (this.routes.has(route)) {
                 this.navigate(route);
             }
+        } else if (pageRoute && this.routes.has(pageRoute)) {
+            this.navigate(pageRoute);
         } else {
             // 默认导航到第一个路由
             const firstRoute = this.routes.keys().next().value;
@@ -10,6 +10,22 @@ class PointSystem {
         this.redeemItems = this.loadRedeemItems();
         this.isInitialized = false;
         
+        // 积分账本（points_ledger.py）：配置了地址且用户已登录时，积分变动以带幂等key的流水批量提交，
+        // 余额和今日/本月已获得积分以服务器返回的汇总为准，本地不再保存完整历史
+        const apiConfig = (typeof window !== 'undefined' && window.appConfig && window.appConfig.api) || {};
+        this.ledger = {
+            url: (apiConfig.pointsLedgerUrl || '').replace(/\/+$/, ''),
+            pending: this.loadPendingLedger(), // 尚未被服务器确认的流水（刷新页面后用同样的key重试）
+            inflight: [],
+            summary: null,
+            // 与服务器相同的日期划分（东八区），服务器汇总中的 utcOffsetMinutes 为准
+            utcOffsetMinutes: 480,
+            timer: null,
+            retryDelay: 0,
+            flushDelay: 1000,
+            maxBatch: 100
+        };
+        
         // 积分规则配置
         this.pointRules = {
             // 积分获取规则
@@ -51,6 +67,10 @@ class PointSystem {
         // 检查每日登录奖励
         this.checkDailyLoginReward();
         
+        if (this.getLedgerUserId()) {
+            this.loadLedger();
+        }
+        
         this.isInitialized = true;
         console.log('PointSystem initialized');
     }
@@ -160,9 +180,11 @@ class PointSystem {
             this.pointHistory = this.pointHistory.slice(0, 100);
         }
         
-        // 保存数据
+        // 保存数据（启用账本时提交流水，完整历史以服务器为准）
         this.savePoints();
-        this.savePointHistory();
+        if (!this.queueLedgerEntry(historyItem)) {
+            this.savePointHistory();
+        }
         
         // 更新显示
         this.updatePointsDisplay();
@@ -208,9 +230,11 @@ class PointSystem {
             this.pointHistory = this.pointHistory.slice(0, 100);
         }
         
-        // 保存数据
+        // 保存数据（启用账本时提交流水，完整历史以服务器为准）
         this.savePoints();
-        this.savePointHistory();
+        if (!this.queueLedgerEntry(historyItem)) {
+            this.savePointHistory();
+        }
         
         // 更新显示
         this.updatePointsDisplay();
@@ -317,11 +341,12 @@ class PointSystem {
      * @returns {number} 今日赚取积分
      */
     getTodayEarnedPoints() {
-        const todayStart = new Date().setHours(0, 0, 0, 0);
-        const todayEnd = new Date().setHours(23, 59, 59, 999);
+        const ledgerEarned = this.getLedgerEarned('today');
+        if (ledgerEarned !== null) return ledgerEarned;
         
+        const today = this.getPeriodKey(Date.now(), 'today');
         return this.pointHistory
-            .filter(h => h.type === 'earn' && h.timestamp >= todayStart && h.timestamp <= todayEnd)
+            .filter(h => h.type === 'earn' && this.getPeriodKey(h.timestamp, 'today') === today)
             .reduce((total, h) => total + h.amount, 0);
     }
 
@@ -330,15 +355,193 @@ class PointSystem {
      * @returns {number} 本月赚取积分
      */
     getMonthlyEarnedPoints() {
-        const now = new Date();
-        const monthStart = new Date(now.getFullYear(), now.getMonth(), 1).setHours(0, 0, 0, 0);
-        const monthEnd = new Date(now.getFullYear(), now.getMonth() + 1, 0).setHours(23, 59, 59, 999);
+        const ledgerEarned = this.getLedgerEarned('month');
+        if (ledgerEarned !== null) return ledgerEarned;
         
+        const month = this.getPeriodKey(Date.now(), 'month');
         return this.pointHistory
-            .filter(h => h.type === 'earn' && h.timestamp >= monthStart && h.timestamp <= monthEnd)
+            .filter(h => h.type === 'earn' && this.getPeriodKey(h.timestamp, 'month') === month)
             .reduce((total, h) => total + h.amount, 0);
     }
 
+    /**
+     * 获取时间戳所在的日/月，按账本服务器的时区划分（与 points_rollups.period 格式相同）
+     * @param {number} timestamp - 毫秒时间戳
+     * @param {string} period - today 或 month
+     * @returns {string} YYYY-MM-DD 或 YYYY-MM
+     */
+    getPeriodKey(timestamp, period) {
+        const shifted = new Date(timestamp + this.ledger.utcOffsetMinutes * 60000).toISOString();
+        return shifted.slice(0, period === 'today' ? 10 : 7);
+    }
+
+    /**
+     * 获取账本使用的用户ID
+     * @returns {string|null} 未配置账本地址或未登录时返回null
+     */
+    getLedgerUserId() {
+        if (!this.ledger.url || typeof window === 'undefined' || !window.userManagement) return null;
+        const user = window.userManagement.getCurrentUser();
+        return user && user.id ? String(user.id) : null;
+    }
+
+    /**
+     * 根据服务器汇总计算今日/本月已获得积分，不再扫描历史
+     * @param {string} period - today 或 month
+     * @returns {number|null} 没有可用汇总时返回null
+     */
+    getLedgerEarned(period) {
+        const summary = this.ledger.summary;
+        if (!summary || !this.getLedgerUserId()) return null;
+        
+        // 汇总是上次同步时的数据，跨日/跨月后对应周期从0开始；未确认的流水按记录时间归入周期，与服务器一致
+        const current = this.getPeriodKey(Date.now(), period);
+        const confirmed = summary.periods && summary.periods[period] === current ? summary[period].earned : 0;
+        
+        return this.getUnsyncedEntries()
+            .filter(entry => entry.type === 'earn' && this.getPeriodKey(entry.timestamp, period) === current)
+            .reduce((total, entry) => total + entry.amount, confirmed);
+    }
+
+    /**
+     * 获取当前用户尚未被服务器确认的流水（正在提交的在前）
+     * @returns {Array} 流水数组
+     */
+    getUnsyncedEntries() {
+        const userId = this.getLedgerUserId();
+        return this.ledger.inflight.concat(this.ledger.pending).filter(entry => entry.userId === userId);
+    }
+
+    /**
+     * 把一条积分变动加入待提交队列
+     * @param {Object} historyItem - 积分历史记录，id 作为幂等key
+     * @returns {boolean} 是否由账本处理
+     */
+    queueLedgerEntry(historyItem) {
+        const userId = this.getLedgerUserId();
+        if (!userId) return false;
+        
+        this.ledger.pending.push({
+            key: historyItem.id,
+            userId: userId,
+            type: historyItem.type,
+            subType: historyItem.subType,
+            amount: historyItem.amount,
+            description: historyItem.description,
+            timestamp: historyItem.timestamp
+        });
+        this.savePendingLedger();
+        this.scheduleLedgerFlush(this.ledger.flushDelay);
+        return true;
+    }
+
+    /**
+     * 延迟提交，合并短时间内的多次积分变动
+     * @param {number} delay - 延迟毫秒数
+     */
+    scheduleLedgerFlush(delay) {
+        if (this.ledger.timer) return;
+        this.ledger.timer = setTimeout(() => {
+            this.ledger.timer = null;
+            this.flushLedger();
+        }, delay);
+    }
+
+    /**
+     * 批量提交待确认的流水，并用服务器返回的余额和汇总校准本地数据
+     */
+    async flushLedger() {
+        const ledger = this.ledger;
+        if (ledger.inflight.length || !ledger.pending.length) return;
+        
+        ledger.inflight = ledger.pending.splice(0, ledger.maxBatch);
+        try {
+            const response = await fetch(`${ledger.url}/batch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ entries: ledger.inflight })
+            });
+            if (response.status >= 500) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const data = response.ok ? await response.json() : null;
+            // 这一批已有结果，余额中不再计入
+            ledger.inflight = [];
+            ledger.retryDelay = 0;
+            this.savePendingLedger();
+            if (!data) {
+                // 请求本身有误，重试也不会成功
+                console.error('Points ledger rejected batch:', response.status);
+            } else {
+                const rejected = data.results.filter(r => r.status === 'insufficient' || r.status === 'limit');
+                if (rejected.length) {
+                    this.showNotification(`${rejected.length} 条积分变动未被记录（余额不足或已达上限）`, 'warning');
+                }
+                const summary = data.balances[this.getLedgerUserId()];
+                if (summary) this.applyLedgerSummary(summary);
+            }
+        } catch (error) {
+            // 网络失败：放回队列，稍后用同样的key重试（服务器按key去重）
+            console.warn('Failed to sync points ledger:', error);
+            ledger.pending = ledger.inflight.concat(ledger.pending);
+            ledger.inflight = [];
+            ledger.retryDelay = Math.min((ledger.retryDelay || ledger.flushDelay) * 2, 60000);
+            this.scheduleLedgerFlush(ledger.retryDelay);
+            return;
+        }
+        
+        if (ledger.pending.length) {
+            this.scheduleLedgerFlush(0);
+        }
+    }
+
+    /**
+     * 应用服务器返回的余额和今日/本月汇总（加上仍未确认的流水）
+     * @param {Object} summary - GET /points/<userId> 的返回值
+     */
+    applyLedgerSummary(summary) {
+        this.ledger.summary = summary;
+        if (Number.isFinite(summary.utcOffsetMinutes)) {
+            this.ledger.utcOffsetMinutes = summary.utcOffsetMinutes;
+        }
+        this.currentPoints = this.getUnsyncedEntries()
+            .reduce((total, entry) => total + (entry.type === 'earn' ? entry.amount : -entry.amount), summary.balance);
+        this.savePoints();
+        this.updatePointsDisplay();
+    }
+
+    /**
+     * 从账本服务加载余额、汇总和最近的积分历史
+     */
+    async loadLedger() {
+        const userId = this.getLedgerUserId();
+        const base = `${this.ledger.url}/${encodeURIComponent(userId)}`;
+        try {
+            const [summaryResponse, historyResponse] = await Promise.all([
+                fetch(base), fetch(`${base}/history?limit=20`)
+            ]);
+            if (!summaryResponse.ok || !historyResponse.ok) {
+                throw new Error(`HTTP ${summaryResponse.status}/${historyResponse.status}`);
+            }
+            this.applyLedgerSummary(await summaryResponse.json());
+            
+            const { entries } = await historyResponse.json();
+            const unsynced = this.getUnsyncedEntries().reverse();
+            this.pointHistory = unsynced.map(entry => ({
+                id: entry.key, type: entry.type, subType: entry.subType, amount: entry.amount,
+                description: entry.description, timestamp: entry.timestamp, balance: this.currentPoints
+            })).concat(entries.map(entry => ({
+                id: entry.key, type: entry.type, subType: entry.subType, amount: entry.amount,
+                description: entry.description, timestamp: Date.parse(entry.createdAt), balance: entry.balance
+            })));
+            this.renderPointHistory();
+        } catch (error) {
+            console.warn('Failed to load points ledger:', error);
+        }
+        
+        this.flushLedger();
+    }
+
     /**
      * 更新积分显示
      */
@@ -622,6 +825,36 @@ class PointSystem {
         }
     }
 
+    /**
+     * 加载尚未提交到账本的流水
+     * @returns {Array} 流水数组
+     */
+    loadPendingLedger() {
+        try {
+            const pending = localStorage.getItem('pointLedgerPending');
+            return pending ? JSON.parse(pending) : [];
+        } catch (error) {
+            console.error('Failed to load pending ledger entries:', error);
+            return [];
+        }
+    }
+
+    /**
+     * 保存尚未确认的流水（包括正在提交的），页面关闭后下次加载时重试
+     */
+    savePendingLedger() {
+        try {
+            const unsynced = this.ledger.inflight.concat(this.ledger.pending);
+            if (unsynced.length) {
+                localStorage.setItem('pointLedgerPending', JSON.stringify(unsynced));
+            } else {
+                localStorage.removeItem('pointLedgerPending');
+            }
+        } catch (error) {
+            console.error('Failed to save pending ledger entries:', error);
+        }
+    }
+
     /**
      * 加载兑换历史
      * @returns {Array} 兑换历史数组
@@ -146,17 +146,11 @@ class ResourceCenter {
         // 设置资源和分类数据
         this.resources = this.resourceData.resources;
         this.categories = this.resourceData.categories;
+        // 部署版本中资源列表被 catalog_shards.py 移到了 data/catalog/，打开资源中心时按分类加载
+        this.catalog = this.resources.length === 0 && window.catalogStore ? window.catalogStore.view('resources') : null;
         
         // 初始化分类和标签管理器
-        if (window.categoryTagManager) {
-            // 注册资源和分类
-            this.resources.forEach(resource => {
-                window.categoryTagManager.registerResource(resource);
-            });
-            
-            // 更新分类列表
-            this.categories = ['全部', ...window.categoryTagManager.getAllCategories()];
-        }
+        this.registerResources(this.resources);
         
         // 尝试从Supabase加载下载历史
         if (this.supabase && window.userManagement) {
@@ -187,6 +181,32 @@ class ResourceCenter {
         }
     }
 
+    registerResources(resources) {
+        if (!window.categoryTagManager || resources.length === 0) return;
+        
+        // 注册资源和分类
+        resources.forEach(resource => {
+            window.categoryTagManager.registerResource(resource);
+        });
+        
+        // 更新分类列表
+        this.categories = ['全部', ...window.categoryTagManager.getAllCategories()];
+    }
+
+    /**
+     * 从数据目录加载某个分类的资源（只在部署版本中需要），没有对应分片时加载全部
+     */
+    async loadCatalog(category) {
+        if (!this.catalog) return;
+        try {
+            const added = await this.catalog.ensure(category);
+            this.resources = this.resources.concat(added);
+            this.registerResources(added);
+        } catch (error) {
+            console.error('加载资源数据失败:', error);
+        }
+    }
+
     setupEventListeners() {
         // 资源中心相关事件监听
         document.addEventListener('click', (e) => {
@@ -273,6 +293,7 @@ class ResourceCenter {
         if (this.supabase && window.userManagement) {
             await this.loadDownloadHistoryFromSupabase();
         }
+        await this.loadCatalog(this.currentCategory);
         
         // 渲染资源中心界面
         resourceCenterContent.innerHTML = `
@@ -365,6 +386,21 @@ class ResourceCenter {
         `;
     }
 
+    /**
+     * 卡片上的评分和评论数：读取评论系统增量维护的汇总，不遍历评论和评分；
+     * 还没有用户评分时显示资源自带的评分
+     */
+    getResourceStats(resource) {
+        if (typeof commentSystem === 'undefined') {
+            return { rating: resource.rating, comments: 0 };
+        }
+        const ratingCount = commentSystem.getRatingCount(resource.id);
+        return {
+            rating: ratingCount > 0 ? commentSystem.getAverageRating(resource.id).toFixed(1) : resource.rating,
+            comments: commentSystem.getCommentCount(resource.id)
+        };
+    }
+
     renderResourceList(filteredResources = null) {
         let resourcesToRender = filteredResources || this.resources;
         
@@ -376,6 +412,7 @@ class ResourceCenter {
         
         return resourcesToRender.map(resource => {
             const isFavorite = this.favorites.some(fav => fav.resourceId === resource.id);
+            const stats = this.getResourceStats(resource);
             return `
             <div class="resource-card" data-resource-id="${resource.id}">
                 <div class="resource-thumbnail">
@@ -404,7 +441,10 @@ class ResourceCenter {
                     </div>
                     <div class="resource-rating-downloads">
                         <span class="resource-rating">
-                            <i class="fas fa-star"></i> ${resource.rating}
+                            <i class="fas fa-star"></i> ${stats.rating}
+                        </span>
+                        <span class="resource-comments">
+                            <i class="fas fa-comment"></i> ${stats.comments}
                         </span>
                         <span class="resource-downloads">
                             <i class="fas fa-download"></i> ${resource.downloads.toLocaleString()}
@@ -426,7 +466,7 @@ class ResourceCenter {
         }).join('');
     }
 
-    filterResourcesByCategory(category) {
+    async filterResourcesByCategory(category) {
         this.currentCategory = category;
         
         // 更新分类筛选器的激活状态
@@ -436,6 +476,7 @@ class ResourceCenter {
                 btn.classList.add('active');
             }
         });
+        await this.loadCatalog(category);
         
         // 更新资源列表
         const resourceList = document.getElementById('resourceList');
@@ -18,13 +18,17 @@ class SearchSystem {
         this.isInitialized = false;
         this.isSearching = false;
         this.currentSearch = '';
+        this.index = null;
+        this.indexPromise = null;
+        this.decodedPostings = new Map();
         
         // 默认配置
         this.config = {
             minSearchLength: 2,
             searchDelay: 300, // 防抖延迟
             maxResults: 10,
-            highlight: true
+            highlight: true,
+            indexUrl: 'data/search-index.json' // 由 build_search_index.py 生成，加载失败时搜索页面内容
         };
     }
 
@@ -215,8 +219,9 @@ class SearchSystem {
             this.handleSearch(e.target.value);
         }, this.config.searchDelay));
 
-        // 焦点事件
+        // 焦点事件（同时预先加载搜索索引）
         this.searchInput.addEventListener('focus', () => {
+            this.loadIndex();
             this.showSearchResults();
         });
 
@@ -273,19 +278,214 @@ class SearchSystem {
      * @param {string} query - 搜索查询
      */
     performSearch(query) {
-        // 模拟搜索过程
-        setTimeout(() => {
+        this.loadIndex().then(index => {
             if (this.currentSearch !== query) {
                 // 搜索已更新，忽略结果
                 return;
             }
             
-            // 从页面内容中搜索
-            const results = this.searchPageContent(query);
+            // 优先查询预先生成的索引，没有索引时从页面内容中搜索
+            const results = index ? this.searchIndex(query) : this.searchPageContent(query);
             this.displayResults(results, query);
             
             this.isSearching = false;
-        }, 500);
+        });
+    }
+
+    /**
+     * 加载构建时生成的搜索索引
+     * @private
+     * @returns {Promise<Object|null>} 搜索索引，加载失败时为null
+     */
+    loadIndex() {
+        if (this.indexPromise) {
+            return this.indexPromise;
+        }
+        
+        if (!this.config.indexUrl || typeof fetch !== 'function') {
+            this.indexPromise = Promise.resolve(null);
+            return this.indexPromise;
+        }
+        
+        this.indexPromise = fetch(this.config.indexUrl)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(index => {
+                if (!index || index.version !== 1) {
+                    throw new Error('不支持的索引版本');
+                }
+                this.index = index;
+                this.decodedPostings = new Map();
+                return index;
+            })
+            .catch(error => {
+                console.warn('搜索索引加载失败，改为搜索页面内容:', error.message);
+                return null;
+            });
+        return this.indexPromise;
+    }
+
+    /**
+     * 分词：英文和数字按单词，中文按相邻两字切分（与 build_search_index.py 一致）
+     * @private
+     * @param {string} text - 文本
+     * @returns {Array<string>} 词列表
+     */
+    tokenize(text) {
+        const terms = [];
+        const runs = text.toLowerCase().match(/[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+/g) || [];
+        
+        runs.forEach(run => {
+            if (run.charCodeAt(0) < 0x80 || run.length === 1) {
+                terms.push(run);
+            } else {
+                for (let i = 0; i < run.length - 1; i++) {
+                    terms.push(run.substr(i, 2));
+                }
+            }
+        });
+        return terms;
+    }
+
+    /**
+     * 解码一个词的倒排列表
+     * @private
+     * @param {number} position - 词在索引中的下标
+     * @returns {Map<number, number>} 文档号到权重的映射
+     */
+    decodePosting(position) {
+        let posting = this.decodedPostings.get(position);
+        if (posting) {
+            return posting;
+        }
+        
+        posting = new Map();
+        let docId = 0;
+        this.index.postings[position].split(',').forEach(part => {
+            const [delta, weight] = part.split('.');
+            docId += parseInt(delta, 36);
+            posting.set(docId, weight ? parseInt(weight, 36) : 1);
+        });
+        this.decodedPostings.set(position, posting);
+        return posting;
+    }
+
+    /**
+     * 查找词在索引中的位置
+     * @private
+     * @param {string} term - 查询词
+     * @param {boolean} prefix - 英文词是否按前缀匹配
+     * @returns {Array<number>} 命中的词下标
+     */
+    findTerms(term, prefix) {
+        const terms = this.index.terms;
+        
+        // 单个汉字：匹配所有包含它的二元组
+        if (term.length === 1 && term.charCodeAt(0) >= 0x80) {
+            const positions = [];
+            terms.forEach((candidate, i) => {
+                if (candidate.includes(term)) positions.push(i);
+            });
+            return positions;
+        }
+        
+        // 二分查找第一个不小于 term 的词
+        let low = 0;
+        let high = terms.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (terms[mid] < term) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        
+        if (prefix && term.charCodeAt(0) < 0x80) {
+            const positions = [];
+            for (let i = low; i < terms.length && terms[i].startsWith(term); i++) {
+                positions.push(i);
+            }
+            return positions;
+        }
+        return terms[low] === term ? [low] : [];
+    }
+
+    /**
+     * 查询搜索索引，所有查询词都要命中，最后一个英文词按前缀匹配
+     * @private
+     * @param {string} query - 搜索查询
+     * @returns {Array} 搜索结果
+     */
+    searchIndex(query) {
+        const terms = this.tokenize(query);
+        if (!terms.length) {
+            return [];
+        }
+        
+        const docCount = this.index.docs.length;
+        let scores = null;
+        
+        for (let n = 0; n < terms.length; n++) {
+            const matched = new Map();
+            this.findTerms(terms[n], n === terms.length - 1).forEach(position => {
+                const posting = this.decodePosting(position);
+                const idf = Math.log(1 + docCount / posting.size);
+                posting.forEach((weight, docId) => {
+                    matched.set(docId, (matched.get(docId) || 0) + weight * idf);
+                });
+            });
+            
+            if (scores === null) {
+                scores = matched;
+            } else {
+                const merged = new Map();
+                scores.forEach((score, docId) => {
+                    if (matched.has(docId)) merged.set(docId, score + matched.get(docId));
+                });
+                scores = merged;
+            }
+            if (!scores.size) {
+                return [];
+            }
+        }
+        
+        return Array.from(scores.entries())
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, this.config.maxResults)
+            .map(([docId, score]) => {
+                const [kind, title, content, target] = this.index.docs[docId];
+                return { kind, title, content: content || title, target, score };
+            });
+    }
+
+    /**
+     * 找到索引结果对应的页面元素
+     * @private
+     * @param {Object} result - 搜索结果
+     * @returns {HTMLElement|null} 页面元素
+     */
+    resolveResultElement(result) {
+        const target = result.target || '';
+        if (target.startsWith('#')) {
+            return document.querySelector(target);
+        }
+        
+        const [type, id] = target.split(':');
+        const selectors = {
+            tool: [`[data-tool-id="${id}"]`, '#tools'],
+            resource: [`.resource-card[data-resource-id="${id}"]`],
+            app: [`.app-card[data-app-id="${id}"]`]
+        };
+        for (const selector of selectors[type] || []) {
+            const element = document.querySelector(selector);
+            if (element) return element;
+        }
+        return null;
     }
 
     /**
@@ -409,14 +609,18 @@ class SearchSystem {
      * @param {Object} result - 搜索结果
      */
     selectResult(result) {
-        // 滚动到结果位置
-        result.element.scrollIntoView({
-            behavior: 'smooth',
-            block: 'center'
-        });
+        const element = result.element || this.resolveResultElement(result);
         
-        // 高亮结果元素
-        this.highlightResult(result.element);
+        if (element) {
+            // 滚动到结果位置
+            element.scrollIntoView({
+                behavior: 'smooth',
+                block: 'center'
+            });
+            
+            // 高亮结果元素
+            this.highlightResult(element);
+        }
         
         // 清空搜索输入并隐藏结果
         this.searchInput.value = '';
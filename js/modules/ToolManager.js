@@ -6,6 +6,8 @@
 class ToolManager {
     constructor() {
         this.tools = this.initTools();
+        // 部署版本中 initTools() 的列表被 catalog_shards.py 移到了 data/catalog/，渲染前再加载
+        this.catalog = this.tools.length === 0 && window.catalogStore ? window.catalogStore.view('tools') : null;
         this.currentUser = null;
         this.userManagement = null;
         this.currentSortOption = 'popular'; // 默认按受欢迎程度排序
@@ -148,6 +150,22 @@ class ToolManager {
         ];
     }
 
+    /**
+     * 从数据目录加载工具列表（只在部署版本中需要）
+     */
+    loadCatalog() {
+        if (!this.catalogLoading) {
+            this.catalogLoading = this.catalog.ensure().then(tools => {
+                this.tools = this.tools.concat(tools);
+            });
+            this.catalogLoading.catch(error => {
+                console.error('加载工具列表失败:', error);
+                this.catalogLoading = null; // 下次需要时重试
+            });
+        }
+        return this.catalogLoading;
+    }
+
     /**
      * 初始化用户系统
      */
@@ -237,6 +255,12 @@ class ToolManager {
         const toolsGrid = document.getElementById('toolsGrid');
         if (!toolsGrid) return;
 
+        // 列表还没加载时保留静态页面中预渲染的卡片，加载完成后再渲染
+        if (this.catalog && !this.catalog.complete) {
+            this.loadCatalog().then(() => this.loadTools(), () => {});
+            return;
+        }
+
         let filteredTools = this.tools;
 
         // 应用筛选
@@ -247,10 +271,26 @@ class ToolManager {
         // 应用排序
         filteredTools = this.sortTools(filteredTools, this.currentSortOption);
 
+        // 静态页面中已有相同的卡片时直接沿用
+        if (this.hydrateTools(toolsGrid, filteredTools)) return;
+
         // 渲染工具卡片
         toolsGrid.innerHTML = filteredTools.map(tool => this.createToolCard(tool)).join('');
     }
 
+    /**
+     * 沿用构建时预渲染的卡片（prerender_routes.py，按未登录用户、默认排序渲染，容器带 data-prerendered）
+     * 只在第一次渲染时检查；卡片顺序不同或已登录（锁定状态可能不同）时返回 false，重新渲染
+     */
+    hydrateTools(toolsGrid, tools) {
+        if (!('prerendered' in toolsGrid.dataset)) return false;
+        delete toolsGrid.dataset.prerendered;
+        const cards = Array.from(toolsGrid.querySelectorAll('.tool-card'), card => card.dataset.toolId);
+        return !this.currentUser &&
+            cards.length === tools.length &&
+            cards.every((id, index) => id === String(tools[index].id));
+    }
+
     /**
      * 创建工具卡片HTML
      */
@@ -354,6 +394,10 @@ class ToolManager {
      * 打开工具
      */
     openTool(toolId) {
+        if (this.catalog && !this.catalog.complete) {
+            this.loadCatalog().then(() => this.openTool(toolId), () => {});
+            return;
+        }
         const tool = this.tools.find(t => t.id === toolId);
         if (!tool) return;
 
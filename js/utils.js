@@ -417,8 +417,8 @@ window.toggleHistoryPanel = utils.toggleHistoryPanel;
 window.togglePassword = utils.togglePassword;
 window.openLoginModal = utils.openLoginModal;
 window.openRegisterModal = utils.openRegisterModal;
-window.openFeedbackModal = utils.openFeedbackModal;
+// window.openFeedbackModal 由 index.html 的内联脚本定义（utils.js 为 defer，在这里赋值会覆盖它）
 window.uploadResource = utils.uploadResource;
-console.log('Utils.js: 全局函数绑定完成，openFeedbackModal:', typeof window.openFeedbackModal);
+console.log('Utils.js: 全局函数绑定完成');
 
 
@@ -0,0 +1,175 @@
+# 从JS模块源码中读取内置的数据目录（工具、资源、应用列表）
+# 只解析对象/数组字面量：键可以不加引号，字符串、数字、true/false/null 原样转换，
+# 其他表达式（如 Date.now() - 86400000、函数）记为 None。
+
+import ast
+
+from js_minify import tokenize
+
+# 名称 -> (模块文件, 定位用的标识符, 数组所在的属性)
+CATALOGUES = {
+    'tools': ('js/modules/ToolManager.js', 'initTools() {', None),
+    'resources': ('js/modules/ResourceCenter.js', 'this.resourceData =', 'resources'),
+    'apps': ('js/modules/AppCenter.js', 'this.appData =', 'apps'),
+}
+
+_CLOSE = {'[': ']', '{': '}', '(': ')'}
+
+
+class LiteralError(ValueError):
+    pass
+
+
+def _tokens(source):
+    return [(kind, text) for kind, text, _ in tokenize(source) if kind not in ('space', 'comment')]
+
+
+def _string(kind, text):
+    if kind == 'template':
+        if '${' in text:
+            return None
+        return text[1:-1]
+    return ast.literal_eval(text)
+
+
+def _skip_expression(tokens, i):
+    """跳过一个无法求值的表达式，停在同层的 ',' 或闭括号上"""
+    depth = 0
+    while i < len(tokens):
+        text = tokens[i][1]
+        if text in _CLOSE:
+            depth += 1
+        elif text in (']', '}', ')'):
+            if depth == 0:
+                return i
+            depth -= 1
+        elif text == ',' and depth == 0:
+            return i
+        i += 1
+    return i
+
+
+def _number(tokens, i):
+    """词法切分时小数会被 '.' 拆开，这里重新拼起来；返回 (数字, 占用的记号数)"""
+    text = tokens[i][1]
+    if i + 2 < len(tokens) and tokens[i + 1][1] == '.' and tokens[i + 2][1][:1].isdigit():
+        return float(f'{text}.{tokens[i + 2][1]}'), 3
+    if text.lower().startswith('0x') or not any(c in text.lower() for c in '.e'):
+        return int(text, 0), 1
+    return float(text), 1
+
+
+def _value(tokens, i):
+    kind, text = tokens[i]
+    if text == '[':
+        items = []
+        i += 1
+        while tokens[i][1] != ']':
+            value, i = _value(tokens, i)
+            items.append(value)
+            if tokens[i][1] == ',':
+                i += 1
+        return items, i + 1
+    if text == '{':
+        obj = {}
+        i += 1
+        while tokens[i][1] != '}':
+            key_kind, key = tokens[i]
+            if tokens[i + 1][1] == ':':
+                key = _string(key_kind, key) if key_kind in ('string', 'template') else key
+                obj[key], i = _value(tokens, i + 2)
+            else:
+                i = _skip_expression(tokens, i)
+            if tokens[i][1] == ',':
+                i += 1
+        return obj, i + 1
+    end = _skip_expression(tokens, i)
+    if end == i + 1:
+        if kind in ('string', 'template'):
+            return _string(kind, text), end
+        if text in ('true', 'false'):
+            return text == 'true', end
+        if text in ('null', 'undefined'):
+            return None, end
+    sign = -1 if text == '-' else 1
+    start = i + 1 if text in '-+' else i
+    if tokens[start][1][:1].isdigit():
+        number, used = _number(tokens, start)
+        if start + used == end:
+            return sign * number, end
+    return None, end
+
+
+def parse_literal(source, start=0):
+    """解析 source[start:] 中第一个 '[' 或 '{' 开始的字面量"""
+    tokens = _tokens(source[start:])
+    for i, (_, text) in enumerate(tokens):
+        if text in ('[', '{'):
+            try:
+                return _value(tokens, i)[0]
+            except (IndexError, SyntaxError, ValueError) as e:
+                raise LiteralError(f'无法解析字面量: {e}') from e
+    raise LiteralError('没有找到字面量')
+
+
+def extract_catalog(path, anchor, key=None):
+    """读取 anchor 之后的第一个字面量；key 不为空时取其中的属性"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    start = source.find(anchor)
+    if start < 0:
+        raise LiteralError(f'{path} 中没有找到 {anchor}')
+    value = parse_literal(source, start + len(anchor))
+    if key is not None:
+        value = value.get(key) if isinstance(value, dict) else None
+    if not isinstance(value, list):
+        raise LiteralError(f'{path} 的 {anchor} 不是数组')
+    return value
+
+
+def catalog_span(source, anchor, key=None):
+    """anchor 之后数组字面量在 source 中的位置 (开始, 结束)，用于在模块副本中替换掉它"""
+    start = source.find(anchor)
+    if start < 0:
+        raise LiteralError(f'没有找到 {anchor}')
+    base = start + len(anchor)
+    tokens = [(kind, text, base + idx) for kind, text, idx in tokenize(source[base:])
+              if kind not in ('space', 'comment')]
+    i = next((i for i, (_, text, _) in enumerate(tokens) if text in ('[', '{')), None)
+    if i is None:
+        raise LiteralError('没有找到字面量')
+    if key is not None:
+        # 在对象的第一层找 key: [
+        depth = 0
+        for j in range(i, len(tokens) - 2):
+            kind, text, _ = tokens[j]
+            if text in _CLOSE:
+                depth += 1
+            elif text in (']', '}', ')'):
+                depth -= 1
+            elif depth == 1 and tokens[j + 1][1] == ':' and \
+                    (_string(kind, text) if kind in ('string', 'template') else text) == key:
+                i = j + 2
+                break
+        else:
+            raise LiteralError(f'没有找到属性 {key}')
+    if tokens[i][1] != '[':
+        raise LiteralError(f'{anchor} 不是数组')
+    depth = 0
+    for kind, text, idx in tokens[i:]:
+        if text in _CLOSE:
+            depth += 1
+        elif text in (']', '}', ')'):
+            depth -= 1
+            if depth == 0:
+                return tokens[i][2], idx + 1
+    raise LiteralError('数组没有闭合')
+
+
+def load_catalogues(names=None):
+    """返回 {目录名: 条目列表}"""
+    result = {}
+    for name, (path, anchor, key) in CATALOGUES.items():
+        if names is None or name in names:
+            result[name] = extract_catalog(path, anchor, key)
+    return result
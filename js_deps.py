@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+# JS依赖分析
+# 扫描 js/ 下各脚本定义和引用的全局变量（class/function/顶层 const、window.X = ...），
+# 建立脚本之间的依赖图，检查循环依赖、找不到提供者和被多个脚本重复定义的全局变量，
+# 计算关键路径，并给出每个脚本能否 defer/async 以及推荐的加载顺序。
+#
+# 依赖分两种：
+#   load    - 脚本执行时（顶层代码、立即执行函数、顶层 new 出来的类的构造函数）就要用到
+#   runtime - 只在事件回调、方法里用到，DOMContentLoaded 之前提供即可
+#
+# 用法:
+#     python js_deps.py                      # 分析 index.html
+#     python js_deps.py --write              # 按推荐顺序改写 index.html 的 script 标签
+#     python js_deps.py --out dist/index.html --json
+
+import argparse
+import json
+import os
+import sys
+
+from bundle_assets import is_local, read_script_manifest, render_script_tags
+from html_tokenizer import STARTTAG, tokenize_file
+from js_minify import tokenize
+
+JS_ROOT = 'js'
+SKIP_DIRS = {'tests', 'node_modules'}
+
+# CDN脚本无法扫描，按URL片段登记它们提供的全局变量
+EXTERNAL_PROVIDES = {
+    'supabase-js': {'supabase'},
+    'font-awesome': set(),
+}
+
+# 浏览器自带的全局变量，引用它们不算缺少提供者
+BROWSER_GLOBALS = {
+    'addEventListener', 'removeEventListener', 'dispatchEvent', 'location', 'history',
+    'navigator', 'document', 'localStorage', 'sessionStorage', 'performance', 'console',
+    'open', 'close', 'print', 'alert', 'confirm', 'prompt', 'scrollTo', 'scrollBy',
+    'scrollX', 'scrollY', 'pageXOffset', 'pageYOffset', 'innerWidth', 'innerHeight',
+    'outerWidth', 'outerHeight', 'matchMedia', 'getComputedStyle', 'requestAnimationFrame',
+    'cancelAnimationFrame', 'setTimeout', 'clearTimeout', 'setInterval', 'clearInterval',
+    'fetch', 'crypto', 'isSecureContext', 'speechSynthesis', 'SpeechSynthesisUtterance',
+    'URL', 'Blob', 'FileReader', 'Notification', 'IntersectionObserver', 'event',
+    'devicePixelRatio', 'screen', 'origin', 'indexedDB', 'caches', 'self', 'top', 'parent',
+    'frames', 'name', 'onload', 'onerror', 'gc', 'module', 'define', 'require', 'exports',
+    'this', 'Math', 'JSON', 'Date', 'Object', 'Array', 'String', 'Number', 'Promise',
+    'parseInt', 'parseFloat', 'isNaN', 'encodeURIComponent', 'decodeURIComponent',
+    'Error', 'Symbol', 'Map', 'Set', 'RegExp',
+}
+
+_CONTROL = {'if', 'for', 'while', 'switch', 'catch', 'with'}
+_DECLARE = {'const', 'let', 'var'}
+_KEYWORDS = _CONTROL | _DECLARE | {
+    'else', 'try', 'finally', 'do', 'return', 'new', 'typeof', 'instanceof', 'in', 'of',
+    'delete', 'void', 'throw', 'break', 'continue', 'case', 'default', 'function', 'class',
+    'extends', 'super', 'this', 'null', 'undefined', 'true', 'false', 'async', 'await',
+    'yield', 'static', 'get', 'set', 'import', 'export', 'debugger', 'arguments',
+}
+_GUARD_AFTER = {')', '&', '|', '?'}
+
+
+class ScriptInfo:
+    """一个脚本定义和引用的全局变量"""
+
+    def __init__(self, name, path=None, size=0):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.provides = set()
+        self.refs = {}          # 名称 -> {'load'|'runtime': 是否只在判断存在性时用到}
+        self.globals = set()    # 以 window.X 形式引用、明确是全局变量的名称
+        self.calls = set()      # 以函数形式调用的裸标识符
+        self.document_write = False
+        self.touches_dom = False
+
+    def add_ref(self, name, phase, guarded):
+        phases = self.refs.setdefault(name, {})
+        phases[phase] = phases.get(phase, False) or guarded
+
+    def deps(self, phase=None):
+        return {name for name, phases in self.refs.items() if phase is None or phase in phases}
+
+
+class _Scanner:
+    """按作用域扫描一段JS代码
+
+    只区分“脚本执行时会运行的代码”和“函数体里的代码”，不做完整的语法分析：
+    '{' 前面是 if/for 等控制语句或 else/try 时是普通代码块，
+    前面是 ')' 或 '=>' 时是函数体，class 后面的是类体。
+    """
+
+    def __init__(self, info):
+        self.info = info
+        self.frames = []        # (类型, 是否立即执行, 构造函数所属的类)
+        self.ctor_refs = {}     # 类名 -> [(名称, 是否只判断存在性)]
+        self.loaded_classes = set()
+
+    def _at_load(self):
+        return all(kind != 'class' and (kind != 'function' or immediate)
+                   for kind, immediate, _ in self.frames)
+
+    def _constructor_of(self):
+        for kind, _, owner in reversed(self.frames):
+            if kind == 'function':
+                return owner
+        return None
+
+    def scan(self, source):
+        tokens = [(kind, text) for kind, text, _ in tokenize(source)
+                  if kind not in ('space', 'comment')]
+        parens = []             # 每个 '(' 前面的记号
+        paren_owner = None      # 最近闭合的 ')' 对应的 '(' 前面的记号
+        pending_function = None # function 关键字后等待函数体；值为是否立即执行
+        pending_class = None
+        member = None           # 类体里最近的方法名
+        for i, (kind, text) in enumerate(tokens):
+            prev = tokens[i - 1][1] if i else ''
+            nxt = tokens[i + 1][1] if i + 1 < len(tokens) else ''
+            if kind == 'punct':
+                if text == '(':
+                    parens.append(prev)
+                elif text == ')':
+                    paren_owner = parens.pop() if parens else None
+                elif text == '{':
+                    self._open(prev, tokens[i - 2][1] if i > 1 else '', paren_owner,
+                               pending_function, pending_class, member)
+                    if prev == ')' or (prev == '>' and tokens[i - 2][1] == '='):
+                        pending_function = None
+                    if pending_class is not None and self.frames[-1][0] == 'class':
+                        pending_class = None
+                elif text == '}' and self.frames:
+                    self.frames.pop()
+                continue
+            if kind != 'word':
+                continue
+            if text == 'function':
+                pending_function = prev in ('(', '!')
+                continue
+            if text == 'class':
+                pending_class = nxt if nxt != 'extends' and nxt != '{' else ''
+                if not self.frames and pending_class:
+                    self.info.provides.add(pending_class)
+                continue
+            if self.frames and self.frames[-1][0] == 'class' and nxt == '(':
+                member = text
+            if prev in _DECLARE or prev == 'function':
+                if not self.frames:
+                    self.info.provides.add(text)
+                continue
+            if text == 'write' and prev == '.' and tokens[i - 2][1] == 'document':
+                self.info.document_write = True
+            if prev == 'new' and self._at_load():
+                self.loaded_classes.add(text)
+            if text == 'window' and nxt == '.' and i + 2 < len(tokens) and tokens[i + 2][0] == 'word':
+                self._reference(tokens, i + 2, window=True)
+            elif prev != '.' and nxt != ':' and text not in _KEYWORDS and not text[0].isdigit():
+                if text == 'document' and self._at_load():
+                    self.info.touches_dom = True
+                self._reference(tokens, i, window=False)
+
+        for cls in self.loaded_classes:
+            for name, guarded in self.ctor_refs.get(cls, ()):
+                self.info.add_ref(name, 'load', guarded)
+
+    def _open(self, prev, prev2, paren_owner, pending_function, pending_class, member):
+        if prev == '>' and prev2 == '=':
+            self.frames.append(('function', False, None))
+        elif prev == ')' and paren_owner not in _CONTROL:
+            in_class = self.frames and self.frames[-1][0] == 'class'
+            owner = self._class_name if in_class and member == 'constructor' else None
+            self.frames.append(('function', bool(pending_function), owner))
+        elif pending_class is not None and prev != ')':
+            self._class_name = pending_class
+            self.frames.append(('class', False, None))
+        else:
+            self.frames.append(('block', False, None))
+
+    _class_name = None
+
+    def _reference(self, tokens, i, window):
+        name = tokens[i][1]
+        prev = tokens[i - 1][1] if i else ''
+        before = tokens[i - 3][1] if window and i > 2 else prev
+        nxt = tokens[i + 1][1] if i + 1 < len(tokens) else ''
+        after = tokens[i + 2][1] if i + 2 < len(tokens) else ''
+        if window and nxt == '=' and after != '=':
+            self.info.provides.add(name)
+            return
+        guarded = before == 'typeof' or nxt in _GUARD_AFTER
+        if window:
+            self.info.globals.add(name)
+        if not window and nxt == '(':
+            self.info.calls.add(name)
+        if self._at_load():
+            self.info.add_ref(name, 'load', guarded)
+        else:
+            owner = self._constructor_of()
+            if owner:
+                self.ctor_refs.setdefault(owner, []).append((name, guarded))
+            self.info.add_ref(name, 'runtime', guarded)
+
+
+def scan_source(name, source, path=None, runtime_only=False):
+    info = ScriptInfo(name, path, len(source.encode('utf-8')))
+    _Scanner(info).scan(source)
+    for own in info.provides:
+        info.refs.pop(own, None)
+    if runtime_only:
+        info.refs = {name: {'runtime': all(phases.values())} for name, phases in info.refs.items()}
+    return info
+
+
+def scan_file(path, name=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        return scan_source(name or path.replace(os.sep, '/'), f.read(), path)
+
+
+def scan_js_tree(site_root='.', js_root=JS_ROOT):
+    """扫描 js/ 下的所有脚本（跳过测试），返回 {相对站点根目录的路径: ScriptInfo}"""
+    scripts = {}
+    for dirpath, dirnames, filenames in os.walk(os.path.join(site_root, js_root)):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith('.js'):
+                path = os.path.join(dirpath, filename)
+                info = scan_file(path, os.path.relpath(path, site_root).replace(os.sep, '/'))
+                scripts[info.name] = info
+    return scripts
+
+
+def _external_info(src):
+    info = ScriptInfo(src)
+    for fragment, names in EXTERNAL_PROVIDES.items():
+        if fragment in src:
+            info.provides |= names
+    return info
+
+
+def _handler_info(html_path):
+    """把HTML里 onclick 等事件属性当作一个只在运行时引用全局变量的脚本"""
+    chunks = []
+    for token in tokenize_file(html_path):
+        if token.kind == STARTTAG:
+            chunks.extend(value for name, value in token.attrs if name.startswith('on') and value)
+    return scan_source('<事件属性>', ';\n'.join(chunks), runtime_only=True)
+
+
+def _inline_sources(html_path, entries):
+    with open(html_path, 'rb') as f:
+        content = f.read()
+    for entry in entries:
+        if entry['inline']:
+            block = content[entry['start']:entry['end']].decode('utf-8')
+            body = block[block.index('>') + 1:block.rindex('</')]
+            yield entry, body
+
+
+class PageGraph:
+    """页面上各 script 标签之间的依赖图"""
+
+    def __init__(self, html_path, site_root='.', js_root=JS_ROOT):
+        self.html_path = html_path
+        self.entries = read_script_manifest(html_path)
+        self.tree = scan_js_tree(site_root, js_root)
+        inline = dict((id(entry), body) for entry, body in _inline_sources(html_path, self.entries))
+        self.nodes = []
+        for index, entry in enumerate(self.entries):
+            if entry['inline']:
+                info = scan_source(f'<内联脚本 第{entry["line"]}行>', inline[id(entry)])
+            elif is_local(entry['src']):
+                path = os.path.join(site_root, entry['src'].split('?')[0])
+                key = os.path.relpath(path, site_root).replace(os.sep, '/')
+                info = self.tree.get(key) or scan_file(path, key)
+            else:
+                info = _external_info(entry['src'])
+            self.nodes.append(info)
+        self.handlers = _handler_info(html_path)
+
+        self.providers = {}
+        for index, info in enumerate(self.nodes):
+            for name in info.provides:
+                self.providers.setdefault(name, []).append(index)
+        self.edges = {}         # (消费者下标, 提供者下标) -> {阶段: 是否只判断存在性}
+        for index, info in enumerate(self.nodes):
+            for name, phases in info.refs.items():
+                for provider in self.providers.get(name, ()):
+                    if provider != index:
+                        edge = self.edges.setdefault((index, provider), {})
+                        for phase, guarded in phases.items():
+                            edge[phase] = edge.get(phase, True) and guarded
+
+    def dependencies(self, index, phase=None):
+        return sorted(provider for (consumer, provider), phases in self.edges.items()
+                      if consumer == index and (phase is None or phase in phases))
+
+    def dependents(self, index, phase=None):
+        return sorted(consumer for (consumer, provider), phases in self.edges.items()
+                      if provider == index and (phase is None or phase in phases))
+
+    # ---- 检查 ----
+
+    def missing_providers(self):
+        """引用了但 js/ 和页面里都没有定义的全局变量，以及定义了但页面没有加载的"""
+        tree_providers = {}
+        for info in self.tree.values():
+            for name in info.provides:
+                tree_providers.setdefault(name, []).append(info.name)
+        missing = []
+        for info in self.nodes + [self.handlers]:
+            for name, phases in sorted(info.refs.items()):
+                if name in self.providers or name in BROWSER_GLOBALS:
+                    continue
+                # 裸标识符和 typeof X 多半是局部变量，只有 window.X、别处有定义的名称，
+                # 以及事件属性里直接调用的函数才算全局引用
+                handler_call = info is self.handlers and name in info.calls
+                if name not in info.globals and name not in tree_providers and not handler_call:
+                    continue
+                missing.append({
+                    'name': name,
+                    'script': info.name,
+                    'phases': sorted(phases),
+                    'guarded': all(phases.values()),
+                    'defined_in': tree_providers.get(name, []),
+                })
+        return missing
+
+    def duplicates(self, order, modes):
+        """多个脚本都定义的全局变量，按执行顺序列出，最后执行的定义生效（有 async 的提供者时无法确定）"""
+        sequence = self.execution_order(order, modes)
+        position = {index: n for n, index in enumerate(sequence)}
+        result = []
+        for name, providers in sorted(self.providers.items()):
+            if len(providers) < 2:
+                continue
+            ordered = sorted(providers, key=lambda i: position.get(i, len(sequence)))
+            known = all(i in position for i in providers)
+            result.append({
+                'name': name,
+                'scripts': [self.nodes[i].name for i in ordered],
+                'winner': self.nodes[ordered[-1]].name if known else None,
+            })
+        return result
+
+    def cycles(self, phase=None):
+        """强连通分量（Tarjan），返回长度大于1的循环
+
+        phase='load' 时只看执行时依赖，这样的循环无论怎么排都有脚本拿不到依赖；
+        运行时的相互调用很常见，只作为提示。
+        """
+        graph = {i: self.dependencies(i, phase) for i in range(len(self.nodes))}
+        index_of, low, stack, on_stack, result = {}, {}, [], set(), []
+        counter = [0]
+
+        def visit(v):
+            index_of[v] = low[v] = counter[0]
+            counter[0] += 1
+            stack.append(v)
+            on_stack.add(v)
+            for w in graph[v]:
+                if w not in index_of:
+                    visit(w)
+                    low[v] = min(low[v], low[w])
+                elif w in on_stack:
+                    low[v] = min(low[v], index_of[w])
+            if low[v] == index_of[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    component.append(w)
+                    if w == v:
+                        break
+                if len(component) > 1:
+                    result.append(sorted(component))
+
+        for v in graph:
+            if v not in index_of:
+                visit(v)
+        return [[self.nodes[i].name for i in component] for component in result]
+
+    # ---- 加载方式和顺序 ----
+
+    def plan_modes(self):
+        """推荐每个脚本的加载方式：sync / defer / async
+
+        内联脚本、用到 document.write 的脚本和 type=module 保持原样；
+        被同步脚本在执行时用到的脚本必须同步；
+        没人引用、执行时不依赖其他脚本也不碰DOM的脚本可以 async；其余都可以 defer。
+        """
+        modes = []
+        for entry, info in zip(self.entries, self.nodes):
+            if entry['inline'] or info.document_write:
+                modes.append('sync')
+            elif entry['mode'] == 'module':
+                modes.append('module')
+            else:
+                modes.append('defer')
+        changed = True
+        while changed:
+            changed = False
+            for (consumer, provider), phases in self.edges.items():
+                if 'load' in phases and modes[consumer] == 'sync' and modes[provider] == 'defer':
+                    modes[provider] = 'sync'
+                    changed = True
+        referenced = {provider for _, provider in self.edges}
+        handler_names = set(self.handlers.refs)
+        for index, info in enumerate(self.nodes):
+            if modes[index] != 'defer' or index in referenced or info.provides & handler_names:
+                continue
+            if not self.dependencies(index, 'load') and not info.touches_dom:
+                modes[index] = 'async'
+        return modes
+
+    def plan_order(self, modes):
+        """在每段连续的外部脚本内按依赖拓扑排序，原顺序作为次序；同步脚本排在前面"""
+        order = []
+        for run in self.runs():
+            members = set(run)
+            rank = {'sync': 0, 'module': 1, 'defer': 1, 'async': 2}
+            remaining = sorted(run, key=lambda i: (rank[modes[i]], i))
+            placed = []
+            while remaining:
+                for candidate in remaining:
+                    blockers = [p for p in self.dependencies(candidate, 'load')
+                                if p in members and p not in placed and p != candidate]
+                    if not blockers:
+                        break
+                else:
+                    # 执行时的循环依赖无法排序，保持原顺序
+                    candidate = remaining[0]
+                placed.append(candidate)
+                remaining.remove(candidate)
+            order.append(placed)
+        return order
+
+    def runs(self):
+        """连续的外部脚本段（中间只有空白和注释）；内联脚本自成一段，位置不动"""
+        runs = []
+        for index, entry in enumerate(self.entries):
+            if entry['inline'] or entry['gap'] or not runs or self.entries[runs[-1][-1]]['inline']:
+                runs.append([index])
+            else:
+                runs[-1].append(index)
+        return runs
+
+    def execution_order(self, order, modes):
+        """浏览器实际的执行顺序：同步和内联按文档顺序，defer/module 在解析完成后按文档顺序，async 不确定"""
+        flat = [i for run in order for i in run]
+        sync = [i for i in flat if modes[i] == 'sync']
+        deferred = [i for i in flat if modes[i] in ('defer', 'module')]
+        return sync + deferred
+
+    def violations(self, order, modes):
+        """执行时依赖的脚本还没执行的情况"""
+        sequence = self.execution_order(order, modes)
+        position = {index: n for n, index in enumerate(sequence)}
+        problems = []
+        for (consumer, provider), phases in sorted(self.edges.items()):
+            if 'load' not in phases:
+                if modes[provider] == 'async':
+                    problems.append(self._violation(consumer, provider, 'runtime', phases))
+                continue
+            if modes[provider] == 'async' or position.get(provider, -1) > position.get(consumer, -1):
+                problems.append(self._violation(consumer, provider, 'load', phases))
+        return problems
+
+    def _violation(self, consumer, provider, phase, phases):
+        names = sorted(self.nodes[consumer].deps(phase) & self.nodes[provider].provides)
+        return {
+            'script': self.nodes[consumer].name,
+            'needs': self.nodes[provider].name,
+            'names': names,
+            'phase': phase,
+            'guarded': phases[phase],
+        }
+
+    def critical_path(self, modes):
+        """按执行时依赖串起来、必须依次下载执行的最长链（按字节计），以及阻塞解析的脚本"""
+        best = {}
+
+        def longest(index):
+            if index not in best:
+                chain = []
+                for provider in self.dependencies(index, 'load'):
+                    if modes[provider] != 'async':
+                        candidate = longest(provider)
+                        if sum(self.nodes[i].size for i in candidate) > sum(self.nodes[i].size for i in chain):
+                            chain = candidate
+                best[index] = chain + [index]
+            return best[index]
+
+        chains = [longest(i) for i in range(len(self.nodes)) if modes[i] != 'async']
+        chain = max(chains, key=lambda c: sum(self.nodes[i].size for i in c), default=[])
+        return {
+            'path': [self.nodes[i].name for i in chain],
+            'bytes': sum(self.nodes[i].size for i in chain),
+            'blocking_scripts': sum(1 for i, e in enumerate(self.entries)
+                                    if modes[i] == 'sync' and not e['inline']),
+            'blocking_bytes': sum(self.nodes[i].size for i in range(len(self.nodes)) if modes[i] == 'sync'),
+        }
+
+
+def analyze(html_path, site_root='.'):
+    graph = PageGraph(html_path, site_root)
+    current_modes = [e['mode'] if not e['inline'] else 'sync' for e in graph.entries]
+    current_order = graph.runs()
+    modes = graph.plan_modes()
+    order = graph.plan_order(modes)
+    scripts = []
+    for index, (entry, info) in enumerate(zip(graph.entries, graph.nodes)):
+        scripts.append({
+            'script': info.name,
+            'line': entry['line'],
+            'bytes': info.size,
+            'mode': current_modes[index],
+            'recommended': modes[index],
+            'provides': sorted(info.provides),
+            'load_deps': [graph.nodes[i].name for i in graph.dependencies(index, 'load')],
+            'runtime_deps': [graph.nodes[i].name for i in graph.dependencies(index, 'runtime')],
+        })
+    return graph, {
+        'page': html_path,
+        'scripts': scripts,
+        'cycles': {'load': graph.cycles('load'), 'runtime': graph.cycles()},
+        'missing': graph.missing_providers(),
+        'before': {
+            'violations': graph.violations(current_order, current_modes),
+            'duplicates': graph.duplicates(current_order, current_modes),
+            'critical_path': graph.critical_path(current_modes),
+        },
+        'after': {
+            'order': [[graph.nodes[i].name for i in run] for run in order],
+            'violations': graph.violations(order, modes),
+            'duplicates': graph.duplicates(order, modes),
+            'critical_path': graph.critical_path(modes),
+        },
+        '_order': order,
+        '_modes': modes,
+    }
+
+
+def rewrite_page(graph, order, modes, out_path):
+    """按推荐的顺序和加载方式重写每段外部脚本标签"""
+    with open(graph.html_path, 'rb') as f:
+        content = f.read()
+    pieces = []
+    pos = 0
+    for run, placed in zip(graph.runs(), order):
+        first, last = graph.entries[run[0]], graph.entries[run[-1]]
+        if first['inline']:
+            continue
+        line_start = content.rfind(b'\n', 0, first['start']) + 1
+        indent = content[line_start:first['start']].decode('utf-8')
+        entries = [dict(graph.entries[i], mode=modes[i]) for i in placed]
+        tags = render_script_tags(entries, indent).lstrip(' \t').rstrip('\n')
+        pieces.append(content[pos:first['start']])
+        pieces.append(tags.encode('utf-8'))
+        pos = last['end']
+    pieces.append(content[pos:])
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'wb') as f:
+        f.write(b''.join(pieces))
+
+
+def _kb(size):
+    return f'{size / 1024:.1f} KB'
+
+
+def changed_winners(report):
+    """重复定义的全局变量中，推荐顺序改变了生效定义的"""
+    before = {item['name']: item['winner'] for item in report['before']['duplicates']}
+    return [{'name': item['name'], 'before': before.get(item['name']), 'after': item['winner']}
+            for item in report['after']['duplicates'] if before.get(item['name']) != item['winner']]
+
+
+def print_report(report):
+    print(f'页面: {report["page"]}')
+    print(f'{"脚本":<44} {"大小":>9}  当前     推荐')
+    for script in report['scripts']:
+        mark = '' if script['mode'] == script['recommended'] else '  *'
+        print(f'{script["script"]:<44} {_kb(script["bytes"]):>9}  {script["mode"]:<8} {script["recommended"]}{mark}')
+        if script['load_deps']:
+            print(f'    执行时依赖: {", ".join(script["load_deps"])}')
+
+    for kind, label in (('load', '执行时循环依赖（错误）'), ('runtime', '运行时相互引用（提示）')):
+        if report['cycles'][kind]:
+            print(f'\n{label}:')
+            for cycle in report['cycles'][kind]:
+                print(f'  {" <-> ".join(cycle)}')
+    if report['missing']:
+        print('\n找不到提供者的全局变量:')
+        for item in report['missing']:
+            where = f'（定义在未加载的 {", ".join(item["defined_in"])}）' if item['defined_in'] else ''
+            guard = '，已判断存在性' if item['guarded'] else ''
+            print(f'  {item["name"]}: {item["script"]} {"/".join(item["phases"])}{guard}{where}')
+
+    for label, key in (('当前', 'before'), ('推荐', 'after')):
+        state = report[key]
+        path = state['critical_path']
+        print(f'\n{label}: 阻塞解析的脚本 {path["blocking_scripts"]} 个, {_kb(path["blocking_bytes"])}')
+        if path['path']:
+            print(f'  关键路径 ({_kb(path["bytes"])}): {" -> ".join(path["path"])}')
+        for problem in state['violations']:
+            level = '警告' if problem['guarded'] else '错误'
+            print(f'  {level}: {problem["script"]} 执行时需要 {problem["needs"]} '
+                  f'({", ".join(problem["names"])})，但它还没有执行')
+        for item in state['duplicates']:
+            winner = item['winner'] or '不确定（有 async 脚本）'
+            print(f'  警告: {item["name"]} 被 {", ".join(item["scripts"])} 重复定义，生效的是 {winner}')
+    for item in changed_winners(report):
+        print(f'  错误: 推荐顺序使 {item["name"]} 生效的定义从 {item["before"]} 变成 {item["after"]}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='分析页面脚本之间的全局变量依赖和加载顺序')
+    parser.add_argument('page', nargs='?', default='index.html', help='要分析的HTML页面')
+    parser.add_argument('--write', action='store_true', help='按推荐顺序直接改写页面')
+    parser.add_argument('--out', help='把改写后的页面写到指定路径')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    graph, report = analyze(args.page)
+    order, modes = report.pop('_order'), report.pop('_modes')
+    out_path = args.page if args.write else args.out
+    if out_path:
+        rewrite_page(graph, order, modes, out_path)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+        if out_path:
+            print(f'\n已改写: {out_path}')
+    errors = [p for p in report['after']['violations'] if not p['guarded']]
+    errors += report['cycles']['load']
+    errors += changed_winners(report)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
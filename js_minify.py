@@ -0,0 +1,227 @@
+# JavaScript压缩
+# 去掉注释、缩进和多余空白，保留换行以免依赖自动分号插入的代码出错。
+# 字符串、模板字符串（含 ${} 嵌套）和正则字面量原样保留。
+# 同时记录每个输出行对应的源码位置，供生成 source map 使用。
+# 词法切分 tokenize() 也供 js_deps.py 的依赖分析使用。
+
+import re
+from bisect import bisect_right
+
+_WHITESPACE = re.compile(r'\s+')
+_LINE_COMMENT = re.compile(r'//[^\n]*')
+_BLOCK_COMMENT = re.compile(r'/\*[\s\S]*?(?:\*/|$)')
+_STRING = {
+    "'": re.compile(r"'(?:[^'\\\n]|\\[\s\S])*'?"),
+    '"': re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?'),
+}
+_TEMPLATE_CHUNK = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+_REGEX = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-zA-Z]*')
+_WORD = re.compile(r'[\w$\u0080-\uffff]+')
+
+# 这些关键字后面的 '/' 是正则字面量而不是除号
+_REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of', 'new',
+    'delete', 'void', 'throw', 'yield', 'await',
+}
+_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch in '_$' or ord(ch) > 127
+
+
+def _needs_space(prev, nxt):
+    """去掉空白后两侧字符会粘连成另一个记号时，必须保留一个空格"""
+    if _is_word_char(prev) and _is_word_char(nxt):
+        return True
+    if prev == nxt and prev in '+-':
+        return True
+    if prev in '+-' and nxt in '+-':
+        return True
+    if prev == '/' and nxt in '/*':
+        return True
+    if prev.isdigit() and nxt == '.':
+        return True
+    return False
+
+
+class _Lexer:
+    """把JS源码切分成记号：(类型, 文本, 起始下标)
+
+    类型为 space、comment、string、template、regex、word、punct。
+    模板字符串在 '${' 处断开，中间的表达式照常切分。
+    """
+
+    def __init__(self, source):
+        self.src = source
+        self.last_token = ''    # 最后一个有意义的记号，用于判断 '/' 的含义
+        self.braces = []        # '{' 或模板字符串的 '${'
+
+    def _regex_allowed(self):
+        token = self.last_token
+        return not token or token in _REGEX_AFTER or token in _REGEX_KEYWORDS
+
+    def _template(self, i):
+        """从 '`' 或 '}' 之后扫描模板字符串
+
+        返回结束位置；遇到 '${' 时返回负数，表示接下来进入表达式。
+        """
+        src = self.src
+        i = _TEMPLATE_CHUNK.match(src, i).end()
+        if i >= len(src) or src[i] == '`':
+            return min(i + 1, len(src))
+        self.braces.append('${')
+        return -(i + 2)
+
+    def __iter__(self):
+        src = self.src
+        i = 0
+        n = len(src)
+        while i < n:
+            ch = src[i]
+            if ch.isspace():
+                m = _WHITESPACE.match(src, i)
+                yield 'space', m.group(), i
+                i = m.end()
+                continue
+            if ch == '/' and src.startswith('//', i):
+                m = _LINE_COMMENT.match(src, i)
+                yield 'comment', m.group(), i
+                i = m.end()
+                continue
+            if ch == '/' and src.startswith('/*', i):
+                m = _BLOCK_COMMENT.match(src, i)
+                yield 'comment', m.group(), i
+                i = m.end()
+                continue
+            if ch in _STRING:
+                m = _STRING[ch].match(src, i)
+                self.last_token = 'string'
+                yield 'string', m.group(), i
+                i = m.end()
+                continue
+            if ch == '`' or (ch == '}' and self.braces and self.braces[-1] == '${'):
+                start = i
+                if ch == '}':
+                    self.braces.pop()
+                end = self._template(i + 1)
+                if end < 0:
+                    end = -end
+                    self.last_token = '{'
+                else:
+                    self.last_token = 'string'
+                yield 'template', src[start:end], start
+                i = end
+                continue
+            if ch == '/' and self._regex_allowed():
+                m = _REGEX.match(src, i)
+                if m:
+                    self.last_token = 'regex'
+                    yield 'regex', m.group(), i
+                    i = m.end()
+                    continue
+            m = _WORD.match(src, i)
+            if m:
+                self.last_token = m.group()
+                yield 'word', m.group(), i
+                i = m.end()
+                continue
+            if ch == '{':
+                self.braces.append('{')
+            elif ch == '}' and self.braces:
+                self.braces.pop()
+            self.last_token = ch
+            yield 'punct', ch, i
+            i += 1
+
+
+def tokenize(source):
+    """逐个产生JS记号 (类型, 文本, 起始下标)"""
+    return iter(_Lexer(source))
+
+
+class _Minifier:
+    def __init__(self, source):
+        self.src = source
+        self.out = []
+        self.last = ''          # 输出中最后一个字符
+        self.pending = None     # None / ' ' / '\n'
+        self.line_starts = [0] + [m.end() for m in re.finditer(r'\n', source)]
+        self.line_map = []      # 每个输出行第一个记号的 (源行, 源列)，从0开始
+
+    def _position(self, index):
+        line = bisect_right(self.line_starts, index) - 1
+        return line, index - self.line_starts[line]
+
+    def _emit(self, text, index):
+        if self.pending == '\n' and self.out:
+            self.out.append('\n')
+            self.last = '\n'
+        elif self.pending == ' ' and self.last and self.last != '\n' and _needs_space(self.last, text[0]):
+            self.out.append(' ')
+        self.pending = None
+        if not self.out or self.out[-1] == '\n':
+            self.line_map.append(self._position(index))
+        self.out.append(text)
+        self.last = text[-1]
+        # 模板字符串等记号内部的换行原样保留，这些输出行同样需要映射
+        nl = text.find('\n')
+        while nl != -1:
+            self.line_map.append(self._position(index + nl + 1))
+            nl = text.find('\n', nl + 1)
+
+    def _space(self, text):
+        kind = '\n' if '\n' in text else ' '
+        if self.pending != '\n':
+            self.pending = kind
+
+    def run(self):
+        for kind, text, index in tokenize(self.src):
+            if kind == 'space':
+                self._space(text)
+            elif kind == 'comment':
+                # 行注释后面的换行由随后的空白记号处理
+                if text.startswith('/*'):
+                    self._space(text)
+            else:
+                self._emit(text, index)
+        return ''.join(self.out)
+
+
+def minify(source):
+    """压缩JS源码，返回 (压缩后的代码, 每个输出行对应的源码 (行, 列))"""
+    minifier = _Minifier(source)
+    code = minifier.run()
+    return code, minifier.line_map
+
+
+# ---- source map ----
+
+_BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def _vlq(value):
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    out = ''
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        out += _BASE64[digit]
+        if not value:
+            return out
+
+
+def encode_mappings(lines):
+    """lines: 每个输出行一个 (源文件下标, 源行, 源列) 或 None，编码成 v3 mappings"""
+    parts = []
+    prev_source = prev_line = prev_col = 0
+    for entry in lines:
+        if entry is None:
+            parts.append('')
+            continue
+        source, line, col = entry
+        parts.append(_vlq(0) + _vlq(source - prev_source) + _vlq(line - prev_line) + _vlq(col - prev_col))
+        prev_source, prev_line, prev_col = source, line, col
+    return ';'.join(parts)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# 批量迁移旧的 localStorage 用户到 Supabase users 表
+# 代替 migrate_users_to_supabase.js 中逐个用户查询再插入的循环（每个用户两次请求）：
+# 流式读取导出的用户 JSON（数组或每行一个对象），在内存中按用户名和邮箱去重，
+# 再通过 PostgREST 分批 upsert（on_conflict=username，已存在的用户跳过），并发数有上限。
+#
+# 可重试的错误（连接失败、429、5xx）按指数退避重试；批次因唯一约束冲突等数据错误失败时
+# 对半拆分重试，找出具体出错的用户，其余用户照常写入。
+# 每完成一批就更新检查点文件，中断后用同样的参数重新运行会跳过已完成的批次。
+#
+# 用户 id 由邮箱生成（uuid5），重复运行不会产生新的 id。
+# 旧数据中的明文密码不会上传，password 列写入不可用的占位符；Supabase Auth 账号没有批量接口，
+# 不在这里创建，用户首次登录前需走找回密码流程。
+#
+# 导出用户: 在网站控制台运行 exportUsersForMigration()，会下载 users.json
+#
+# 用法:
+#     python migrate_users.py users.json --url https://xxx.supabase.co --key <service_role key>
+#     python migrate_users.py users.json --batch-size 1000 --concurrency 8 --checkpoint users.ckpt.json
+#     python migrate_users.py users.json --dry-run
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+TABLE = 'users'
+ON_CONFLICT = 'username'
+DEFAULT_ROLE = '普通用户'
+UNUSABLE_PASSWORD = '!'
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+USER_NAMESPACE = uuid.UUID('6f1c6f2e-3a56-4d38-9d0b-3f6a2b8e9c11')
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\r\n'
+
+
+class RequestError(Exception):
+    def __init__(self, status, message, retryable, retry_after=None):
+        super().__init__(f'HTTP {status}: {message}' if status else message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def iter_json_records(f, chunk_size=CHUNK_SIZE):
+    """逐个产出 JSON 数组中的对象；也接受每行一个对象的格式，不会一次读入整个文件"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    in_array = None
+    while True:
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or (in_array and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer) or (not eof and len(buffer) - pos < chunk_size // 2):
+            chunk = '' if eof else f.read(chunk_size)
+            if not chunk:
+                eof = True
+                if pos >= len(buffer):
+                    return
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+            continue
+        if in_array and buffer[pos] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        pos = end
+        yield value
+
+
+def normalize_user(record, now):
+    """旧记录 -> users 表的一行；缺少用户名或邮箱时返回 None"""
+    if not isinstance(record, dict):
+        return None
+    username = str(record.get('username') or '').strip()
+    email = str(record.get('email') or '').strip().lower()
+    if not username or '@' not in email:
+        return None
+    return {
+        'id': str(uuid.uuid5(USER_NAMESPACE, email)),
+        'username': username,
+        'email': email,
+        'password': UNUSABLE_PASSWORD,
+        'full_name': record.get('fullName') or record.get('full_name') or None,
+        'role': record.get('role') or DEFAULT_ROLE,
+        'status': record.get('status') or 'active',
+        'created_at': record.get('createdAt') or record.get('created_at') or now,
+        'updated_at': now,
+    }
+
+
+def unique_users(records, stats, now=None):
+    """按用户名（不区分大小写）和邮箱去重，先出现的记录优先"""
+    now = now or datetime.now(timezone.utc).isoformat()
+    usernames = set()
+    emails = set()
+    for record in records:
+        stats['read'] += 1
+        row = normalize_user(record, now)
+        if row is None:
+            stats['invalid'] += 1
+            continue
+        key = row['username'].casefold()
+        if key in usernames or row['email'] in emails:
+            stats['duplicates'] += 1
+            continue
+        usernames.add(key)
+        emails.add(row['email'])
+        yield row
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RestClient:
+    """PostgREST 客户端，每个线程一个长连接"""
+
+    def __init__(self, base_url, key, timeout=30):
+        parts = urlsplit(base_url.rstrip('/'))
+        self.https = parts.scheme == 'https'
+        self.netloc = parts.netloc
+        self.prefix = parts.path
+        self.key = key
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self.local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def upsert(self, table, rows, on_conflict):
+        body = json.dumps(rows, ensure_ascii=False).encode('utf-8')
+        headers = {
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}',
+            'Content-Type': 'application/json',
+            'Prefer': 'resolution=ignore-duplicates,return=minimal',
+        }
+        path = f'{self.prefix}/rest/v1/{table}?on_conflict={on_conflict}'
+        with self.lock:
+            self.requests += 1
+        try:
+            conn = self._connection()
+            conn.request('POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._reset()
+            raise RequestError(None, f'{type(e).__name__}: {e}', retryable=True) from e
+        if response.status >= 300:
+            if response.getheader('Connection', '').lower() == 'close':
+                self._reset()
+            retry_after = response.getheader('Retry-After')
+            try:
+                message = json.loads(payload).get('message') or payload.decode('utf-8', 'replace')
+            except (ValueError, AttributeError):
+                message = payload.decode('utf-8', 'replace')
+            raise RequestError(response.status, message[:200], response.status in RETRY_STATUS,
+                               float(retry_after) if retry_after and retry_after.isdigit() else None)
+
+
+class Checkpoint:
+    """全部写入成功的批次号；有失败用户的批次不记录，下次运行时重试。参数或输入文件变化时作废"""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done = set()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('fingerprint') == fingerprint:
+                for start, end in data.get('done', []):
+                    self.done.update(range(start, end + 1))
+
+    def _ranges(self):
+        ranges = []
+        for n in sorted(self.done):
+            if ranges and ranges[-1][1] == n - 1:
+                ranges[-1][1] = n
+            else:
+                ranges.append([n, n])
+        return ranges
+
+    def mark(self, number):
+        with self.lock:
+            self.done.add(number)
+            if not self.path:
+                return
+            data = {'fingerprint': self.fingerprint, 'done': self._ranges()}
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+
+def _fingerprint(path, batch_size):
+    st = os.stat(path)
+    return f'{os.path.abspath(path)}:{st.st_size}:{int(st.st_mtime)}:{batch_size}'
+
+
+class Migrator:
+    def __init__(self, client, retries=5, backoff=0.5, max_backoff=30.0):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retried = 0
+        self.lock = threading.Lock()
+
+    def _send(self, rows):
+        """发送一批，可重试的错误按指数退避重试"""
+        for attempt in range(self.retries + 1):
+            try:
+                return self.client.upsert(TABLE, rows, ON_CONFLICT)
+            except RequestError as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+                delay = e.retry_after or min(self.max_backoff, self.backoff * 2 ** attempt)
+                with self.lock:
+                    self.retried += 1
+                time.sleep(delay * random.uniform(0.5, 1.0) if e.retry_after is None else delay)
+
+    def write(self, rows):
+        """写入一批，返回失败的 [{username, email, error}]；数据错误时对半拆分定位"""
+        try:
+            self._send(rows)
+            return []
+        except RequestError as e:
+            if e.retryable or len(rows) == 1:
+                return [{'username': row['username'], 'email': row['email'], 'error': str(e)} for row in rows]
+        middle = len(rows) // 2
+        return self.write(rows[:middle]) + self.write(rows[middle:])
+
+
+def migrate(path, client, batch_size=500, concurrency=4, checkpoint_path=None, retries=5, backoff=0.5,
+            progress=None):
+    stats = {'read': 0, 'invalid': 0, 'duplicates': 0, 'batches': 0, 'skipped_batches': 0,
+             'written': 0, 'failed': 0, 'errors': []}
+    checkpoint = Checkpoint(checkpoint_path, _fingerprint(path, batch_size))
+    migrator = Migrator(client, retries, backoff)
+    started = time.perf_counter()
+
+    def run(number, rows):
+        failed = migrator.write(rows)
+        if not failed:
+            checkpoint.mark(number)
+        return len(rows), failed
+
+    with open(path, 'r', encoding='utf-8') as f, ThreadPoolExecutor(concurrency) as pool:
+        pending = set()
+        for number, rows in enumerate(batches(unique_users(iter_json_records(f), stats), batch_size)):
+            stats['batches'] += 1
+            if number in checkpoint.done:
+                stats['skipped_batches'] += 1
+                continue
+            # 最多同时有 concurrency 个批次在途，读取速度不会超过写入速度
+            if len(pending) >= concurrency:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(finished, stats, progress)
+            pending.add(pool.submit(run, number, rows))
+        _collect(wait(pending)[0], stats, progress)
+
+    stats['requests'] = client.requests
+    stats['retries'] = migrator.retried
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def _collect(futures, stats, progress):
+    for future in futures:
+        count, failed = future.result()
+        stats['written'] += count - len(failed)
+        stats['failed'] += len(failed)
+        stats['errors'].extend(failed)
+        if progress:
+            progress(stats)
+
+
+class DryRunClient:
+    requests = 0
+
+    def upsert(self, table, rows, on_conflict):
+        self.requests += 1
+
+
+def print_report(stats):
+    print('\n=== 用户迁移结果 ===')
+    print(f'读取记录: {stats["read"]}（无效 {stats["invalid"]}，重复 {stats["duplicates"]}）')
+    print(f'批次: {stats["batches"]}（检查点中已完成 {stats["skipped_batches"]}）')
+    print(f'写入: {stats["written"]}，失败: {stats["failed"]}')
+    print(f'请求: {stats["requests"]}（重试 {stats["retries"]}），耗时 {stats["seconds"]:.2f} 秒')
+    for error in stats['errors'][:20]:
+        print(f'  {error["username"]} <{error["email"]}>: {error["error"]}')
+    if len(stats['errors']) > 20:
+        print(f'  ... 共 {len(stats["errors"])} 个失败')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量迁移 localStorage 用户到 Supabase')
+    parser.add_argument('input', help='导出的用户 JSON（数组或每行一个对象）')
+    parser.add_argument('--url', default=os.environ.get('SUPABASE_URL'), help='Supabase 项目URL（默认 $SUPABASE_URL）')
+    parser.add_argument('--key', default=os.environ.get('SUPABASE_SERVICE_KEY'),
+                        help='service_role key（默认 $SUPABASE_SERVICE_KEY）')
+    parser.add_argument('--batch-size', type=int, default=500, help='每次请求写入的用户数')
+    parser.add_argument('--concurrency', type=int, default=4, help='同时进行的请求数')
+    parser.add_argument('--retries', type=int, default=5, help='每批最多重试次数')
+    parser.add_argument('--checkpoint', help='检查点文件（默认 <输入>.checkpoint.json）')
+    parser.add_argument('--dry-run', action='store_true', help='只读取和去重，不发送请求')
+    parser.add_argument('--json', action='store_true', help='以JSON输出结果')
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        client = DryRunClient()
+        checkpoint = None
+    else:
+        if not args.url or not args.key:
+            print('错误: 需要 --url 和 --key（或设置 SUPABASE_URL / SUPABASE_SERVICE_KEY）', file=sys.stderr)
+            return 2
+        client = RestClient(args.url, args.key)
+        checkpoint = args.checkpoint or args.input + '.checkpoint.json'
+
+    def progress(stats):
+        if not args.json:
+            print(f'\r已写入 {stats["written"]}，失败 {stats["failed"]}', end='', flush=True)
+
+    try:
+        stats = migrate(args.input, client, args.batch_size, args.concurrency, checkpoint, args.retries,
+                        progress=progress)
+    except (OSError, ValueError) as e:
+        print(f'\n错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    else:
+        print_report(stats)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 // 用户数据迁移工具 - 将 localStorage 用户迁移到 Supabase
 
+// 每次查询已存在用户名的数量
+const EXISTING_LOOKUP_BATCH = 200;
+
 /**
  * 迁移工具主函数
  */
@@ -48,28 +51,32 @@ async function migrateUsersToSupabase() {
         errors: []
     };
     
-    // 逐个迁移用户
+    // 一次查询一批用户名，不再逐个用户查询是否已存在
+    const existingUsernames = new Set();
+    for (let i = 0; i < localStorageUsers.length; i += EXISTING_LOOKUP_BATCH) {
+        const usernames = localStorageUsers.slice(i, i + EXISTING_LOOKUP_BATCH).map(user => user.username);
+        const { data, error } = await supabase
+            .from('users')
+            .select('username')
+            .in('username', usernames);
+        
+        if (error) {
+            console.error('检查已存在用户失败:', error);
+            return;
+        }
+        data.forEach(row => existingUsernames.add(row.username));
+    }
+    
+    // 逐个创建账号（Supabase Auth 没有批量注册接口；大量用户请用 migrate_users.py 批量迁移）
     for (const user of localStorageUsers) {
         try {
-            console.log(`迁移用户: ${user.username} (${user.email})`);
-            
-            // 检查用户是否已存在于 Supabase
-            const { data: existingUser, error: checkError } = await supabase
-                .from('users')
-                .select('id')
-                .eq('username', user.username)
-                .single();
-            
-            if (checkError && checkError.code !== 'PGRST116') {
-                // 116 错误表示未找到记录，这是正常的
-                throw checkError;
-            }
-            
-            if (existingUser) {
+            if (existingUsernames.has(user.username)) {
                 console.log(`用户 ${user.username} 已存在于 Supabase，跳过`);
                 continue;
             }
             
+            console.log(`迁移用户: ${user.username} (${user.email})`);
+            
             // 使用 Supabase Auth 创建用户
             const { data: authData, error: authError } = await supabase.auth.signUp({
                 email: user.email,
@@ -129,14 +136,29 @@ async function migrateUsersToSupabase() {
     console.log('\n迁移完成！');
 }
 
+/**
+ * 导出 localStorage 用户为 users.json，供 migrate_users.py 批量迁移
+ */
+function exportUsersForMigration() {
+    const users = localStorage.getItem('users') || '[]';
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(new Blob([users], { type: 'application/json' }));
+    link.download = 'users.json';
+    link.click();
+    URL.revokeObjectURL(link.href);
+    console.log(`已导出 ${JSON.parse(users).length} 个用户，运行 python migrate_users.py users.json 批量迁移`);
+}
+
 /**
  * 初始化迁移工具
  */
 function initMigrationTool() {
     // 全局访问
     window.migrateUsersToSupabase = migrateUsersToSupabase;
+    window.exportUsersForMigration = exportUsersForMigration;
     
-    console.log('用户迁移工具已加载。请通过统一测试工具面板或在控制台运行 migrateUsersToSupabase()');
+    console.log('用户迁移工具已加载。请通过统一测试工具面板或在控制台运行 migrateUsersToSupabase()，'
+        + '用户较多时运行 exportUsersForMigration() 导出后用 migrate_users.py 批量迁移');
 }
 
 // 页面加载完成后初始化
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# 图片和字体优化
+# 在 performance_test.analyze_html_resources 找到的图片和字体基础上：
+#   - 本地图片转成 AVIF/WebP，按 WIDTHS 生成多个宽度，页面中的 <img> 包进 <picture>，
+#     用 srcset/sizes 让浏览器按屏幕选择（需要 Pillow，AVIF 需要 Pillow 支持 AVIF）；
+#   - <img> 没有写尺寸时按图片实际大小补上 width/height，避免加载后页面跳动
+#     （尺寸从文件头读取，不需要 Pillow）；
+#   - 前 EAGER_IMAGES 张图片之后的图片加 loading="lazy" decoding="async"；
+#   - 字体按页面和脚本中实际用到的字符做子集（需要 fontTools），中文字体通常能从几 MB 降到几十 KB。
+#
+# 结果按 (源文件内容哈希, 参数) 缓存在 .sitecache/media/，转码和子集化在进程池中并行执行。
+# 改写后的页面、CSS 和生成的文件写到暂存目录（默认 .sitecache/media-stage/），目录结构与站点相同；
+# deploy_prep.py --media 会先运行这一步，再优先从暂存目录读取文件。
+#
+# 用法:
+#     python optimize_media.py                         # 处理 index.html，输出前后字节数
+#     python optimize_media.py index.html --jobs 8 --json
+#     python deploy_prep.py --media                    # 优化后再生成 dist/
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from deploy_prep import _resolve, _splice, _write_if_changed, css_references, page_references
+from html_tokenizer import ENDTAG, SCRIPT, STARTTAG, TEXT, attr, tokenize_file, tokenize_string
+from js_minify import tokenize as js_tokenize
+from performance_test import analyze_html_resources
+from sitecache import CACHE_DIR, file_digest
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 生成规则变化时递增，使缓存失效
+MEDIA_VERSION = 1
+BLOB_DIR = os.path.join(CACHE_DIR, 'media')
+STAGE_DIR = os.path.join(CACHE_DIR, 'media-stage')
+WIDTHS = (320, 640, 960, 1280, 1920)
+QUALITY = {'avif': 55, 'webp': 80}
+PIL_FORMAT = {'avif': 'AVIF', 'webp': 'WEBP'}
+RASTER_EXTS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+FONT_EXTS = {'.woff', '.woff2', '.ttf', '.otf'}
+FONT_FORMAT = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': 'truetype', '.otf': 'opentype'}
+EAGER_IMAGES = 2
+TEXT_ATTRS = ('alt', 'title', 'placeholder', 'aria-label', 'value', 'label')
+# 用户输入和动态内容里常见的字符，子集中总是保留
+BASE_CHARACTERS = ''.join(chr(c) for c in range(0x20, 0x7f)) + '，。、；：？！“”‘’（）《》【】…—·￥'
+
+
+def image_size(path):
+    """从文件头读取 PNG/GIF/JPEG/WebP 的 (宽, 高)，无法识别时返回 None"""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                w, h = struct.unpack('<HH', head[26:30])
+                return w & 0x3fff, h & 0x3fff
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+            return None
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xff:
+                    return None
+                if marker[1] in (0xd8, 0x01) or 0xd0 <= marker[1] <= 0xd7:
+                    continue
+                length = struct.unpack('>H', f.read(2))[0]
+                # SOF0~SOF15，除去 DHT(c4)、JPG(c8)、DAC(cc)
+                if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+                    h, w = struct.unpack('>xHH', f.read(5))
+                    return w, h
+                f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def image_formats():
+    """当前环境能生成的图片格式，按优先顺序"""
+    if Image is None:
+        return []
+    formats = []
+    for fmt in ('avif', 'webp'):
+        try:
+            if features.check(fmt):
+                formats.append(fmt)
+        except (ValueError, KeyError):
+            pass
+    return formats
+
+
+def _cache_dir(cache_root, namespace, digest, params):
+    raw = json.dumps([namespace, MEDIA_VERSION, digest, params], sort_keys=True).encode('utf-8')
+    key = hashlib.sha256(raw).hexdigest()
+    return os.path.join(cache_root, key[:2], key)
+
+
+def _load_meta(key_dir):
+    try:
+        with open(os.path.join(key_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _commit(tmp_dir, key_dir, meta):
+    """结果写完后整个目录换上去，进程中断不会留下不完整的缓存"""
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.makedirs(os.path.dirname(key_dir), exist_ok=True)
+    try:
+        os.replace(tmp_dir, key_dir)
+    except OSError:
+        # 另一个进程已经生成了相同的结果
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def transcode_image(source, digest, formats, widths, cache_root):
+    """把图片转成各宽度的 formats，返回 {'dir', 'width', 'height', 'variants', 'cached'}
+
+    某种格式在原始宽度下反而比源文件大时（常见于很小的 PNG 图标），不使用这种格式。
+    """
+    params = {'formats': formats, 'widths': widths, 'quality': QUALITY}
+    key_dir = _cache_dir(cache_root, 'image', digest, params)
+    meta = _load_meta(key_dir)
+    if meta is not None:
+        return dict(meta, dir=key_dir, cached=True)
+    tmp_dir = f'{key_dir}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    source_bytes = os.path.getsize(source)
+    with Image.open(source) as opened:
+        im = ImageOps.exif_transpose(opened)
+        if im.mode not in ('RGB', 'RGBA'):
+            im = im.convert('RGBA' if 'transparency' in im.info or im.mode in ('LA', 'PA') else 'RGB')
+        width, height = im.size
+        targets = sorted({w for w in widths if w < width} | {width})
+        variants = []
+        for fmt in formats:
+            produced = []
+            for w in targets:
+                h = max(1, round(height * w / width))
+                resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+                name = f'w{w}.{fmt}'
+                resized.save(os.path.join(tmp_dir, name), PIL_FORMAT[fmt], quality=QUALITY[fmt])
+                produced.append({'format': fmt, 'width': w, 'height': h, 'file': name,
+                                 'bytes': os.path.getsize(os.path.join(tmp_dir, name))})
+            if produced[-1]['bytes'] < source_bytes:
+                variants.extend(produced)
+            else:
+                for variant in produced:
+                    os.remove(os.path.join(tmp_dir, variant['file']))
+    meta = {'width': width, 'height': height, 'variants': variants}
+    _commit(tmp_dir, key_dir, meta)
+    return dict(meta, dir=key_dir, cached=False)
+
+
+def subset_font(source, digest, characters, cache_root):
+    """按 characters 子集化字体，输出 woff2（没有 brotli 时为 woff），返回 {'dir', 'file', 'bytes', 'cached'}"""
+    flavor = 'woff2' if brotli is not None else 'woff'
+    params = {'chars': hashlib.sha256(characters.encode('utf-8')).hexdigest(), 'flavor': flavor}
+    key_dir = _cache_dir(cache_root, 'font', digest, params)
+    meta = _load_meta(key_dir)
+    if meta is not None:
+        return dict(meta, dir=key_dir, cached=True)
+    tmp_dir = f'{key_dir}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    options = font_subset.Options()
+    options.flavor = flavor
+    options.layout_features = ['*']
+    font = TTFont(source)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes={ord(c) for c in characters})
+    subsetter.subset(font)
+    name = f'subset.{flavor}'
+    font_subset.save_font(font, os.path.join(tmp_dir, name), options)
+    meta = {'file': name, 'bytes': os.path.getsize(os.path.join(tmp_dir, name)), 'glyphs': len(font.getGlyphOrder())}
+    _commit(tmp_dir, key_dir, meta)
+    return dict(meta, dir=key_dir, cached=False)
+
+
+def _js_text(source):
+    """JS 源码中字符串和模板字符串里的文字（\\uXXXX 转义已还原）"""
+    parts = []
+    for kind, text, _ in js_tokenize(source):
+        if kind in ('string', 'template'):
+            parts.append(re.sub(r'\\u\{?([0-9a-fA-F]{4,5})\}?', lambda m: chr(int(m.group(1), 16)), text))
+    return ''.join(parts)
+
+
+def used_characters(pages, site_root='.'):
+    """页面文本、常见文字属性、内联和本地脚本中的字符串用到的全部字符"""
+    chars = set(BASE_CHARACTERS)
+    scripts = set()
+    for page in pages:
+        base = posixpath.dirname(os.path.relpath(page, site_root).replace(os.sep, '/'))
+        for token in tokenize_file(page):
+            if token.kind == TEXT:
+                chars.update(html.unescape(token.data))
+            elif token.kind == SCRIPT:
+                chars.update(_js_text(token.data))
+            elif token.kind == STARTTAG:
+                for name in TEXT_ATTRS:
+                    chars.update(attr(token, name) or '')
+                src = attr(token, 'src') if token.name == 'script' else None
+                target = _resolve(base, src) if src else None
+                if target:
+                    scripts.add(target)
+    for rel in sorted(scripts):
+        path = os.path.join(site_root, *rel.split('/'))
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                chars.update(_js_text(f.read()))
+    return ''.join(sorted(c for c in chars if c.isprintable() or c == ' '))
+
+
+def _css_fonts(rel, site_root, found, seen):
+    """本地CSS（含 @import 的CSS）中 url() 引用的字体"""
+    if rel in seen:
+        return
+    seen.add(rel)
+    path = os.path.join(site_root, *rel.split('/'))
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        css = f.read()
+    for _, url in css_references(css):
+        target = _resolve(posixpath.dirname(rel), url)
+        if not target:
+            continue
+        ext = posixpath.splitext(target)[1].lower()
+        if ext == '.css':
+            _css_fonts(target, site_root, found, seen)
+        elif ext in FONT_EXTS:
+            found.setdefault(target, set()).add(rel)
+
+
+def discover(pages, site_root='.'):
+    """页面引用的本地图片和字体：({图片: {页面}}, {字体: {引用它的页面或CSS}}, {页面: 本地CSS列表})"""
+    images, fonts, stylesheets = {}, {}, {}
+    seen = set()
+    for page in pages:
+        rel_page = os.path.relpath(page, site_root).replace(os.sep, '/')
+        base = posixpath.dirname(rel_page)
+        resources = analyze_html_resources(page)
+        for url in resources['images']:
+            target = _resolve(base, html.unescape(url))
+            if target and posixpath.splitext(target)[1].lower() in RASTER_EXTS:
+                images.setdefault(target, set()).add(rel_page)
+        for url in resources['fonts']:
+            target = _resolve(base, html.unescape(url))
+            if target:
+                fonts.setdefault(target, set()).add(rel_page)
+        css_files = [t for t in (_resolve(base, html.unescape(u)) for u in resources['css']) if t]
+        stylesheets[rel_page] = css_files
+        for css in css_files:
+            _css_fonts(css, site_root, fonts, seen)
+    return images, fonts, stylesheets
+
+
+def _variant_name(rel, variant):
+    stem = posixpath.splitext(rel)[0]
+    return f'{stem}.w{variant["width"]}.{variant["format"]}'
+
+
+def _font_name(rel, result):
+    stem = posixpath.splitext(rel)[0]
+    return f'{stem}.subset{posixpath.splitext(result["file"])[1]}'
+
+
+def _srcset(base, rel, variants):
+    return ', '.join(f'{posixpath.relpath(_variant_name(rel, v), base or ".")} {v["width"]}w' for v in variants)
+
+
+def _add_attrs(tag, attrs):
+    """在开始标签末尾（> 或 /> 之前）加上属性"""
+    text = ''.join(f' {name}="{html.escape(str(value))}"' for name, value in attrs)
+    end = len(tag) - (2 if tag.endswith('/>') else 1)
+    head = tag[:end].rstrip()
+    return head + text + tag[len(head):]
+
+
+def rewrite_page(data, rel, images, fonts):
+    """改写页面：<img> 加尺寸、lazy 和 <picture>，字体引用换成子集文件；返回 (新内容, 统计)"""
+    base = posixpath.dirname(rel)
+    stats = {'dimensions': 0, 'lazy': 0, 'pictures': 0}
+    replacements = []
+    picture_depth = 0
+    seen_images = 0
+    for token in tokenize_string(data):
+        if token.name == 'picture':
+            picture_depth += 1 if token.kind == STARTTAG else -1 if token.kind == ENDTAG else 0
+            continue
+        if token.kind != STARTTAG or token.name != 'img':
+            continue
+        seen_images += 1
+        src = attr(token, 'src')
+        target = _resolve(base, html.unescape(src)) if src else None
+        info = images.get(target) if target else None
+        tag = data[token.offset:token.end].decode('utf-8')
+        extra = []
+        if info and info.get('width') and attr(token, 'width') is None and attr(token, 'height') is None:
+            extra += [('width', info['width']), ('height', info['height'])]
+            stats['dimensions'] += 1
+        if seen_images > EAGER_IMAGES and attr(token, 'loading') is None:
+            extra += [('loading', 'lazy'), ('decoding', 'async')]
+            stats['lazy'] += 1
+        new_tag = _add_attrs(tag, extra) if extra else tag
+        variants = info.get('variants') if info else None
+        if variants and not picture_depth and attr(token, 'srcset') is None:
+            sizes = attr(token, 'sizes') or f'(max-width: {info["width"]}px) 100vw, {info["width"]}px'
+            sources = []
+            for fmt in ('avif', 'webp'):
+                chosen = [v for v in variants if v['format'] == fmt]
+                if chosen:
+                    sources.append(f'<source type="image/{fmt}" srcset="{_srcset(base, target, chosen)}" '
+                                   f'sizes="{html.escape(sizes)}">')
+            new_tag = '<picture>' + ''.join(sources) + new_tag + '</picture>'
+            stats['pictures'] += 1
+        if new_tag != tag:
+            replacements.append(((token.offset, token.end), new_tag.encode('utf-8')))
+    for span, name, value, _ in page_references(data):
+        target = _resolve(base, value) if name == 'href' else None
+        if target in fonts:
+            output = posixpath.relpath(fonts[target], base or '.')
+            replacements.append((span, output.encode('utf-8')))
+    return _splice(data, replacements), stats
+
+
+def rewrite_css(text, rel, fonts):
+    """CSS 中的字体 url() 换成子集文件，紧随其后的 format() 改成新格式"""
+    base = posixpath.dirname(rel)
+    replacements = []
+    for (start, end), url in css_references(text):
+        target = _resolve(base, url)
+        if target not in fonts:
+            continue
+        output = fonts[target]
+        replacements.append(((start, end), posixpath.relpath(output, base or '.')))
+        m = re.compile(r'''['"]?\s*\)\s*format\(\s*(['"]?)([\w-]+)\1\s*\)''').match(text, end)
+        if m:
+            new_format = FONT_FORMAT[posixpath.splitext(output)[1]]
+            replacements.append((m.span(2), new_format))
+    return _splice(text, replacements)
+
+
+def _stage_file(stage_dir, rel, data, produced):
+    produced.add(rel)
+    _write_if_changed(os.path.join(stage_dir, *rel.split('/')), data)
+
+
+def optimize(pages, site_root='.', stage_dir=STAGE_DIR, cache_root=BLOB_DIR, widths=WIDTHS, jobs=None):
+    """处理页面引用的图片和字体，结果写到 stage_dir，返回报告"""
+    started = time.perf_counter()
+    images, fonts, stylesheets = discover(pages, site_root)
+    formats = image_formats()
+    characters = used_characters(pages, site_root) if fonts and font_subset is not None else ''
+    image_info, font_outputs = {}, {}
+    report = {'images': {}, 'fonts': {}, 'formats': formats, 'font_subsetting': font_subset is not None,
+              'characters': len(characters), 'pages': {}, 'missing': [], 'cached': 0}
+
+    tasks = {}
+    with ProcessPoolExecutor(jobs) as pool:
+        for rel in sorted(images):
+            path = os.path.join(site_root, *rel.split('/'))
+            if not os.path.exists(path):
+                report['missing'].append(rel)
+                continue
+            size = image_size(path)
+            image_info[rel] = {'width': size[0] if size else None, 'height': size[1] if size else None}
+            report['images'][rel] = {'bytes': os.path.getsize(path), 'optimized': None, 'variants': 0}
+            if formats and size:
+                tasks[pool.submit(transcode_image, path, file_digest(path), formats, list(widths),
+                                  cache_root)] = ('image', rel)
+        for rel in sorted(fonts):
+            path = os.path.join(site_root, *rel.split('/'))
+            if not os.path.exists(path):
+                report['missing'].append(rel)
+                continue
+            report['fonts'][rel] = {'bytes': os.path.getsize(path), 'optimized': None}
+            if font_subset is not None:
+                tasks[pool.submit(subset_font, path, file_digest(path), characters, cache_root)] = ('font', rel)
+        results = {key: future.result() for future, key in tasks.items()}
+
+    produced = set()
+    for (kind, rel), result in sorted(results.items()):
+        report['cached'] += result['cached']
+        if kind == 'image':
+            image_info[rel]['variants'] = result['variants']
+            for variant in result['variants']:
+                with open(os.path.join(result['dir'], variant['file']), 'rb') as f:
+                    _stage_file(stage_dir, _variant_name(rel, variant), f.read(), produced)
+            full = [v['bytes'] for v in result['variants'] if v['width'] == result['width']]
+            report['images'][rel].update(optimized=min(full) if full else None, variants=len(result['variants']))
+        else:
+            output = _font_name(rel, result)
+            font_outputs[rel] = output
+            with open(os.path.join(result['dir'], result['file']), 'rb') as f:
+                _stage_file(stage_dir, output, f.read(), produced)
+            report['fonts'][rel].update(optimized=result['bytes'], glyphs=result['glyphs'])
+
+    css_files = sorted({css for files in stylesheets.values() for css in files})
+    for rel in css_files:
+        path = os.path.join(site_root, *rel.split('/'))
+        if not font_outputs or not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        new_text = rewrite_css(text, rel, font_outputs)
+        if new_text != text:
+            _stage_file(stage_dir, rel, new_text.encode('utf-8'), produced)
+
+    for page in pages:
+        rel = os.path.relpath(page, site_root).replace(os.sep, '/')
+        with open(page, 'rb') as f:
+            data = f.read()
+        new_data, stats = rewrite_page(data, rel, image_info, font_outputs)
+        report['pages'][rel] = stats
+        if new_data != data:
+            _stage_file(stage_dir, rel, new_data, produced)
+
+    # 暂存目录中上次生成、这次不再需要的文件
+    for root, _, names in os.walk(stage_dir):
+        for name in names:
+            rel = os.path.relpath(os.path.join(root, name), stage_dir).replace(os.sep, '/')
+            if rel not in produced:
+                os.remove(os.path.join(root, name))
+    report['staged'] = sorted(produced)
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def print_report(report):
+    def total(group, key):
+        return sum(entry[key] if entry[key] is not None else entry['bytes'] for entry in group.values())
+
+    for title, group in (('图片', report['images']), ('字体', report['fonts'])):
+        if not group:
+            print(f'{title}: 页面中没有引用本地{title}')
+            continue
+        print(f'{title}:')
+        for rel, entry in sorted(group.items()):
+            after = entry['optimized']
+            change = f'{after / 1024:>9.1f} KB  {(1 - after / entry["bytes"]) * 100:>5.1f}%' if after else '        未处理'
+            print(f'  {rel:<48}{entry["bytes"] / 1024:>9.1f} KB -> {change}')
+        before, after = total(group, 'bytes'), total(group, 'optimized')
+        print(f'  合计 {before / 1024:.1f} KB -> {after / 1024:.1f} KB')
+    if not report['formats']:
+        print('未安装 Pillow（或不支持 WebP/AVIF），图片只补充尺寸和懒加载属性')
+    if not report['font_subsetting'] and report['fonts']:
+        print('未安装 fontTools，字体没有子集化')
+    for rel, stats in report['pages'].items():
+        print(f'{rel}: 补充尺寸 {stats["dimensions"]} 个，懒加载 {stats["lazy"]} 个，<picture> {stats["pictures"]} 个')
+    for rel in report['missing']:
+        print(f'警告: 引用的文件不存在: {rel}')
+    print(f'暂存 {len(report["staged"])} 个文件，缓存命中 {report["cached"]} 个，耗时 {report["seconds"] * 1000:.0f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='图片转码、响应式图片、懒加载和字体子集化')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要处理的页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--stage', default=STAGE_DIR, help='输出（暂存）目录')
+    parser.add_argument('--widths', type=int, nargs='+', default=list(WIDTHS), help='响应式图片宽度')
+    parser.add_argument('--jobs', type=int, default=None, help='进程数（默认CPU核数）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        report = optimize(args.pages, args.root, args.stage, widths=args.widths, jobs=args.jobs)
+    except (OSError, ValueError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,38 @@
+#!/usr/bin/env python3
+# 网站性能分析与加载基准测试
+# 只依赖标准库：在临时端口启动本地服务器，并发抓取页面及其引用的本地资源，
+# 统计 TTFB、总耗时、传输字节数（原始/gzip/brotli）和请求数，多次迭代后给出分位数。
+# brotli 大小需要第三方 brotli 模块，没有安装时这一项为空（报告中显示"未安装brotli"），其余不受影响。
+# 连接被拒绝、超时等网络错误按URL记为失败，不会中断测试。
+#
+# 用法:
+#     python performance_test.py                               # 静态分析 + 5 次基准测试
+#     python performance_test.py -n 20 --save perf.json        # 保存结果
+#     python performance_test.py --baseline perf.json --threshold 0.1
+#     python performance_test.py --root dist                   # 测试构建后的页面
+
+import argparse
+import gzip
+import http.client
+import json
 import os
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+import devserver
+from sitecache import ResultCache, format_summary
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# analyze_html_resources 的规则变化时递增，使缓存失效
+ANALYSIS_VERSION = 1
+PERCENTILES = (50, 90, 95, 99)
 
 def get_file_size(file_path):
     """获取文件大小（KB）"""
@@ -38,37 +71,243 @@ def analyze_html_resources(html_path):
     
     return resources
 
-def calculate_total_resources_size(resources):
-    """计算外部资源的总大小"""
+def calculate_total_resources_size(resources, root='.'):
+    """计算外部资源的总大小，本地资源相对于站点根目录 root"""
     total_size = 0
     
     for resource_type, urls in resources.items():
         for url in urls:
             # 只计算本地资源
             if not url.startswith('http') and not url.startswith('//'):
-                local_path = url.lstrip('/')
-                if os.path.exists(local_path):
+                local_path = os.path.join(root, unquote(url.split('?')[0].split('#')[0]).lstrip('/'))
+                if os.path.isfile(local_path):
                     total_size += os.path.getsize(local_path)
     
     return round(total_size / 1024, 2)
 
-def test_loading_time(url, iterations=3):
-    """测试网站加载时间"""
-    print(f"\n测试 {url} 的加载时间...")
-    print("  注意: 由于未安装requests模块，跳过加载时间测试")
-    return None
+def start_local_server(root='.'):
+    """在临时端口启动静态文件服务器（与 test_website.py 相同的 devserver），返回 (server, base_url)"""
+    return devserver.start_in_thread(root)
+
+
+def failed(response):
+    """fetch 的结果是否失败（网络错误或 4xx/5xx）"""
+    return response['error'] is not None or response['status'] >= 400
+
+
+def fetch(url):
+    """请求一个URL，返回计时和字节数
+
+    ttfb 为发出请求到收到响应头的时间；wire_bytes 为实际传输的响应体字节数，
+    raw_bytes 为解压后的大小，gzip/brotli 为该内容压缩后的大小（用于估算压缩传输的收益）。
+    连接失败、超时或响应不完整时 status 为 0，error 为错误信息。
+    """
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    started = time.perf_counter()
+    conn = conn_cls(parts.netloc, timeout=30)
+    try:
+        conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+        response = conn.getresponse()
+        ttfb = time.perf_counter() - started
+        body = response.read()
+        total = time.perf_counter() - started
+        encoding = response.getheader('Content-Encoding', '')
+        status = response.status
+        raw = gzip.decompress(body) if encoding == 'gzip' else body
+    except (OSError, EOFError, http.client.HTTPException) as e:
+        elapsed = time.perf_counter() - started
+        return {'url': url, 'status': 0, 'error': f'{type(e).__name__}: {e}', 'ttfb': elapsed, 'total': elapsed,
+                'wire_bytes': 0, 'raw_bytes': 0, 'gzip_bytes': 0, 'brotli_bytes': 0 if brotli else None}
+    finally:
+        conn.close()
+    return {
+        'url': url,
+        'status': status,
+        'error': None,
+        'ttfb': ttfb,
+        'total': total,
+        'wire_bytes': len(body),
+        'raw_bytes': len(raw),
+        'gzip_bytes': len(gzip.compress(raw, 6)),
+        'brotli_bytes': len(brotli.compress(raw)) if brotli else None,
+    }
+
+
+def local_asset_urls(page_url, html_path):
+    """页面中引用的本地资源URL列表"""
+    urls = []
+    for refs in analyze_html_resources(html_path).values():
+        for ref in refs:
+            if ref.startswith(('http:', 'https:', '//', 'data:')):
+                continue
+            url = urljoin(page_url, ref)
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+def load_page_once(page_url, asset_urls, concurrency):
+    """模拟一次页面加载: 先取HTML，再并发获取全部资源"""
+    started = time.perf_counter()
+    html = fetch(page_url)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        assets = list(pool.map(fetch, asset_urls))
+    page_total = time.perf_counter() - started
+    responses = [html] + assets
+    return {
+        'ttfb': html['ttfb'],
+        'html_total': html['total'],
+        'page_total': page_total,
+        'requests': len(responses),
+        'errors': sum(1 for r in responses if failed(r)),
+        'wire_bytes': sum(r['wire_bytes'] for r in responses),
+        'raw_bytes': sum(r['raw_bytes'] for r in responses),
+        'gzip_bytes': sum(r['gzip_bytes'] for r in responses),
+        'brotli_bytes': sum(r['brotli_bytes'] for r in responses) if brotli else None,
+        'resources': responses,
+    }
+
+
+def percentile(values, pct):
+    """线性插值的分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
 
-def main():
+
+def summarize(values):
+    stats = {f'p{p}': percentile(values, p) for p in PERCENTILES}
+    stats['min'] = min(values) if values else None
+    stats['max'] = max(values) if values else None
+    stats['mean'] = sum(values) / len(values) if values else None
+    return stats
+
+
+def measure_loading_time(url=None, iterations=5, concurrency=6, root='.', page='index.html', warmup=1):
+    """测试页面加载时间，url 为空时在本地临时端口启动服务器"""
+    server = None
+    if url is None:
+        server, base_url = start_local_server(root)
+        url = urljoin(base_url, page)
+    print(f"\n测试 {url} 的加载时间 ({iterations} 次, 并发 {concurrency})...")
+    try:
+        html_path = os.path.join(root, unquote(urlsplit(url).path).lstrip('/') or 'index.html')
+        asset_urls = local_asset_urls(url, html_path)
+        for _ in range(warmup):
+            load_page_once(url, asset_urls, concurrency)
+        runs = [load_page_once(url, asset_urls, concurrency) for _ in range(iterations)]
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    per_resource = {}
+    failures = {}
+    for run in runs:
+        for resource in run['resources']:
+            per_resource.setdefault(resource['url'], []).append(resource['total'])
+            if failed(resource):
+                failure = failures.setdefault(resource['url'], {'count': 0, 'error': None})
+                failure['count'] += 1
+                failure['error'] = resource['error'] or f'HTTP {resource["status"]}'
+    last = runs[-1]
+    return {
+        'url': url,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'requests': last['requests'],
+        'errors': last['errors'],
+        'wire_bytes': last['wire_bytes'],
+        'raw_bytes': last['raw_bytes'],
+        'gzip_bytes': last['gzip_bytes'],
+        'brotli_bytes': last['brotli_bytes'],
+        'ttfb': summarize([r['ttfb'] for r in runs]),
+        'html_total': summarize([r['html_total'] for r in runs]),
+        'page_total': summarize([r['page_total'] for r in runs]),
+        'resources': {
+            u: {'p50': percentile(times, 50), 'bytes': next(
+                r['raw_bytes'] for r in last['resources'] if r['url'] == u)}
+            for u, times in per_resource.items()
+        },
+        'failures': failures,
+    }
+
+
+def print_benchmark(result):
+    def ms(value):
+        return f'{value * 1000:.1f} ms' if value is not None else '-'
+
+    print(f"   请求数: {result['requests']} (失败 {result['errors']})")
+    brotli_text = f"{result['brotli_bytes'] / 1024:.1f} KB" if result['brotli_bytes'] is not None else '未安装brotli'
+    print(f"   传输字节: {result['wire_bytes'] / 1024:.1f} KB, 原始 {result['raw_bytes'] / 1024:.1f} KB, "
+          f"gzip {result['gzip_bytes'] / 1024:.1f} KB, brotli {brotli_text}")
+    for name, label in (('ttfb', 'TTFB'), ('html_total', 'HTML总耗时'), ('page_total', '页面总耗时')):
+        stats = result[name]
+        print(f"   {label}: " + ', '.join(f'p{p} {ms(stats[f"p{p}"])}' for p in PERCENTILES))
+    for url, failure in result.get('failures', {}).items():
+        print(f"   ✗ {urlsplit(url).path or url}: {failure['count']}/{result['iterations']} 次失败 ({failure['error']})")
+    slowest = sorted(result['resources'].items(), key=lambda item: item[1]['p50'], reverse=True)[:5]
+    print("   最慢的资源 (p50):")
+    for url, stats in slowest:
+        print(f"     {ms(stats['p50'])}  {urlsplit(url).path}")
+
+
+def compare_with_baseline(result, baseline, threshold):
+    """与基准结果比较，返回回归项列表
+
+    耗时比较 p50 和 p95，字节数和请求数直接比较，超过 (1 + threshold) 倍即为回归。
+    """
+    regressions = []
+    checks = [
+        ('page_total.p50', result['page_total']['p50'], baseline['page_total']['p50']),
+        ('page_total.p95', result['page_total']['p95'], baseline['page_total']['p95']),
+        ('ttfb.p50', result['ttfb']['p50'], baseline['ttfb']['p50']),
+        ('wire_bytes', result['wire_bytes'], baseline['wire_bytes']),
+        ('requests', result['requests'], baseline['requests']),
+    ]
+    for name, current, previous in checks:
+        if previous and current > previous * (1 + threshold):
+            regressions.append((name, previous, current))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='网站性能分析与加载基准测试')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--page', default='index.html', help='要测试的页面')
+    parser.add_argument('--url', help='测试已有服务器上的URL，而不是启动本地服务器')
+    parser.add_argument('-n', '--iterations', type=int, default=5, help='迭代次数')
+    parser.add_argument('-c', '--concurrency', type=int, default=6, help='并发连接数（浏览器每个域名通常为6）')
+    parser.add_argument('--save', help='把结果保存为JSON文件')
+    parser.add_argument('--baseline', help='用于比较的基准结果JSON文件')
+    parser.add_argument('--threshold', type=float, default=0.1, help='允许的回归比例，默认 0.1 即 10%%')
+    parser.add_argument('--skip-benchmark', action='store_true', help='只做静态分析')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    html_path = os.path.join(args.root, args.page)
     print("=== 网站性能优化分析 ===\n")
     
     # 1. 分析HTML文件
     print("1. HTML文件分析:")
-    html_size = get_file_size('index.html')
+    html_size = get_file_size(html_path)
     print(f"   HTML文件大小: {html_size} KB")
     
     # 2. 分析外部资源
     print("\n2. 外部资源分析:")
-    resources = analyze_html_resources('index.html')
+    cache = ResultCache()
+    resources = cache.cached('html-resources', ANALYSIS_VERSION, html_path, analyze_html_resources)
     
     print(f"   CSS文件数量: {len(resources['css'])}")
     print(f"   JavaScript文件数量: {len(resources['js'])}")
@@ -76,16 +315,36 @@ def main():
     print(f"   字体文件数量: {len(resources['fonts'])}")
     
     # 3. 计算总资源大小
-    total_size = calculate_total_resources_size(resources)
+    total_size = calculate_total_resources_size(resources, args.root)
     total_with_html = total_size + html_size
     
     print(f"\n3. 资源大小分析:")
     print(f"   本地资源总大小: {total_size} KB")
     print(f"   包含HTML的总大小: {total_with_html} KB")
     
-    # 4. 测试加载时间（如果本地服务器正在运行）
+    # 4. 测试加载时间
     print("\n4. 加载时间测试:")
-    print("   由于未安装requests模块，跳过加载时间测试")
+    exit_code = 0
+    if args.skip_benchmark:
+        print("   已跳过")
+    else:
+        result = measure_loading_time(args.url, args.iterations, args.concurrency, args.root, args.page)
+        print_benchmark(result)
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"   结果已保存到 {args.save}")
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_with_baseline(result, baseline, args.threshold)
+            if regressions:
+                exit_code = 1
+                print(f"   ✗ 与基准相比出现回归 (阈值 {args.threshold:.0%}):")
+                for name, previous, current in regressions:
+                    print(f"     {name}: {previous:.4g} -> {current:.4g}")
+            else:
+                print(f"   ✓ 与基准相比没有超过 {args.threshold:.0%} 的回归")
     
     # 5. 比较重构前后的变化
     print("\n5. 重构效果总结:")
@@ -95,5 +354,8 @@ def main():
     print("   ✓ 可维护性: 代码结构更清晰，便于维护")
     print("   ✓ 性能: 支持浏览器缓存外部资源")
 
+    print(f"\n{format_summary(cache.summary())}")
+    return exit_code
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# 积分账本服务
+# PointSystem 原来每次获得/消费积分都把余额和整个历史数组写回 localStorage，
+# 统计今日/本月已获得积分时还要扫描全部历史。这里改为服务端账本（表结构见 003_points_ledger.sql）:
+#   - points_ledger 只追加；每条流水带客户端生成的 idempotency_key，网络重试时重复提交的流水
+#     返回第一次的结果，不会重复记账；
+#   - points_balances 是物化的余额，points_rollups 是按日/按月的获得、消费合计，
+#     与流水在同一个事务里更新，查询余额和今日/本月积分都只读一两行；
+#   - 一批流水一个事务：先批量查出已存在的 key、涉及用户的余额和汇总，在内存中按顺序校验
+#     （余额不足、超过每日/每月上限的流水被拒绝，不记账），再用 executemany 一次写入。
+# 日期按东八区划分（与站点用户一致，PointSystem.js 用服务端返回的 utcOffsetMinutes 划分日期）。
+# 流水按客户端记录的 timestamp 归入日/月汇总并写入 created_at：离线积攒、过了零点才提交的流水
+# 仍计入发生当天的上限；timestamp 限制在 [提交时间 - MAX_BACKDATE, 提交时间] 之内，缺省时取提交时间。
+# 本地替身为 sqlite（db_migrate.py 负责建表），
+# 指定 --dsn 时使用 PostgreSQL（需要 psycopg2）。服务本身不做鉴权，部署时放在鉴权网关之后。
+#
+# 接口:
+#     POST /points/batch             {"entries": [{"key", "userId", "type": "earn"|"spend", "subType", "amount",
+#                                     "description", "timestamp": 毫秒}]} -> 每条的结果和涉及用户的最新余额
+#     GET  /points/<userId>          余额、累计获得/消费、今日和本月的获得/消费
+#     GET  /points/<userId>/history?limit=20&before=<id>
+#
+# 用法:
+#     python points_ledger.py serve --db points.sqlite3 --port 8091
+#     python points_ledger.py bench --users 100000 --per-user 1000 --db loadtest-points.sqlite3
+#     python points_ledger.py bench --users 2000 --per-user 200          # 内存数据库，快速检查
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from db_migrate import PostgresBackend, SqliteBackend, migrate
+from performance_test import percentile
+
+PORT = 8091
+LEDGER_TZ = timezone(timedelta(hours=8))
+LIMITS = {'dailyMax': 200, 'monthlyMax': 5000}  # 与 PointSystem.pointRules.limits 相同
+KINDS = ('earn', 'spend')
+MAX_BATCH = 1000
+MAX_BODY = 512 * 1024
+IN_CHUNK = 500          # IN (...) 中的参数个数上限（sqlite 默认最多 999 个参数）
+HISTORY_LIMIT = 100
+MAX_BACKDATE = timedelta(days=7)  # 客户端时间最多早于提交时间这么久，更早的按这个时间计
+
+
+class LedgerError(ValueError):
+    pass
+
+
+def _chunks(items, size=IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def validate_entry(entry):
+    """检查一条流水的字段，返回规范化后的 dict"""
+    if not isinstance(entry, dict):
+        raise LedgerError('流水必须是对象')
+    key, user, kind = entry.get('key'), entry.get('userId'), entry.get('type')
+    amount = entry.get('amount')
+    if not isinstance(key, str) or not 0 < len(key) <= 100:
+        raise LedgerError('key 必须是 1~100 个字符的字符串')
+    if not isinstance(user, str) or not user:
+        raise LedgerError(f'{key}: 缺少 userId')
+    if kind not in KINDS:
+        raise LedgerError(f'{key}: type 必须是 earn 或 spend')
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+        raise LedgerError(f'{key}: amount 必须是正整数')
+    timestamp = entry.get('timestamp')
+    if timestamp is not None and (not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool)
+                                  or timestamp != timestamp):
+        raise LedgerError(f'{key}: timestamp 必须是毫秒数')
+    return {'key': key, 'userId': user, 'type': kind, 'subType': str(entry.get('subType') or kind)[:30],
+            'amount': amount, 'description': str(entry.get('description') or '')[:255], 'timestamp': timestamp}
+
+
+class PointsLedger:
+    """账本读写；同一个连接由锁串行使用（sqlite 的写入本来就是串行的）"""
+
+    def __init__(self, conn, limits=LIMITS, tz=LEDGER_TZ):
+        self.conn = conn
+        self.limits = limits
+        self.tz = tz
+        self.sqlite = isinstance(conn, sqlite3.Connection)
+        self.ph = '?' if self.sqlite else '%s'
+        # PostgreSQL 中并发的批次可能涉及同一用户，先锁住余额行；sqlite 用 BEGIN IMMEDIATE 串行化
+        self.lock_rows = '' if self.sqlite else ' FOR UPDATE'
+        self.integrity_error = sys.modules[type(conn).__module__.split('.')[0]].IntegrityError
+        self._lock = threading.Lock()
+
+    def _periods(self, now):
+        now = (now or datetime.now(timezone.utc)).astimezone(self.tz)
+        return now, now.strftime('%Y-%m-%d'), now.strftime('%Y-%m')
+
+    def _occurred(self, entry, now):
+        """流水的发生时间：客户端的 timestamp，限制在 [now - MAX_BACKDATE, now] 之内"""
+        if entry['timestamp'] is None:
+            return now
+        earliest = now - MAX_BACKDATE
+        try:
+            moment = datetime.fromtimestamp(entry['timestamp'] / 1000, self.tz)
+        except (OverflowError, OSError, ValueError):
+            return earliest if entry['timestamp'] < 0 else now
+        return min(max(moment, earliest), now)
+
+    def _in(self, items):
+        return ', '.join([self.ph] * len(items))
+
+    def _begin(self, cur):
+        if self.sqlite:
+            cur.execute('BEGIN IMMEDIATE')
+
+    def _commit(self, cur):
+        if self.sqlite:
+            cur.execute('COMMIT')
+        else:
+            self.conn.commit()
+
+    def _rollback(self, cur):
+        if self.sqlite:
+            if self.conn.in_transaction:
+                cur.execute('ROLLBACK')
+        else:
+            self.conn.rollback()
+
+    def apply(self, entries, now=None):
+        """在一个事务中写入一批流水，返回与 entries 顺序相同的结果
+
+        结果的 status: applied（已记账）、duplicate（这个 key 已经记过账，返回当时的结果）、
+        insufficient（余额不足）、limit（超过每日或每月获得上限）。被拒绝的流水不记账，可以用同一个 key 重试。
+        """
+        entries = [validate_entry(entry) for entry in entries]
+        if len(entries) > MAX_BATCH:
+            raise LedgerError(f'每批最多 {MAX_BATCH} 条流水')
+        if not entries:
+            return []
+        with self._lock:
+            # 两个并发批次提交同一个新 key 时，后提交的违反唯一约束；重试一次会把它识别为重复
+            for attempt in range(2):
+                cur = self.conn.cursor()
+                try:
+                    self._begin(cur)
+                    results = self._apply(cur, entries, self._periods(now)[0])
+                    self._commit(cur)
+                    return results
+                except self.integrity_error:
+                    self._rollback(cur)
+                    if attempt:
+                        raise
+                except Exception:
+                    self._rollback(cur)
+                    raise
+
+    def _apply(self, cur, entries, now):
+        ph = self.ph
+        moments = [self._periods(self._occurred(entry, now)) for entry in entries]
+        periods = sorted({period for _, day, month in moments for period in (day, month)})
+        existing = {}
+        for chunk in _chunks(list({entry['key'] for entry in entries})):
+            cur.execute(f'SELECT idempotency_key, id, user_id, balance_after FROM points_ledger '
+                        f'WHERE idempotency_key IN ({self._in(chunk)})', chunk)
+            existing.update({key: (entry_id, user, balance) for key, entry_id, user, balance in cur.fetchall()})
+
+        users = sorted({entry['userId'] for entry in entries})
+        cur.executemany(f'INSERT INTO points_balances (user_id) VALUES ({ph}) ON CONFLICT (user_id) DO NOTHING',
+                        [(user,) for user in users])
+        balances = {}
+        rollups = {}
+        for chunk in _chunks(users):
+            cur.execute(f'SELECT user_id, balance, earned_total, spent_total FROM points_balances '
+                        f'WHERE user_id IN ({self._in(chunk)}){self.lock_rows}', chunk)
+            balances.update({row[0]: list(row[1:]) for row in cur.fetchall()})
+            cur.execute(f'SELECT user_id, period, earned, spent FROM points_rollups '
+                        f'WHERE user_id IN ({self._in(chunk)}) AND period IN ({self._in(periods)})', chunk + periods)
+            rollups.update({(user, period): [earned, spent] for user, period, earned, spent in cur.fetchall()})
+
+        results = []
+        rows = []
+        changed = set()
+        for entry, (moment, day, month) in zip(entries, moments):
+            key, user, amount = entry['key'], entry['userId'], entry['amount']
+            if key in existing:
+                entry_id, owner, balance = existing[key]
+                results.append({'key': key, 'status': 'duplicate', 'id': entry_id, 'balance': balance})
+                continue
+            balance = balances[user]
+            today = rollups.setdefault((user, day), [0, 0])
+            this_month = rollups.setdefault((user, month), [0, 0])
+            if entry['type'] == 'earn':
+                if today[0] + amount > self.limits['dailyMax'] or this_month[0] + amount > self.limits['monthlyMax']:
+                    results.append({'key': key, 'status': 'limit', 'balance': balance[0]})
+                    continue
+                balance[0] += amount
+                balance[1] += amount
+                today[0] += amount
+                this_month[0] += amount
+            else:
+                if balance[0] < amount:
+                    results.append({'key': key, 'status': 'insufficient', 'balance': balance[0]})
+                    continue
+                balance[0] -= amount
+                balance[2] += amount
+                today[1] += amount
+                this_month[1] += amount
+            rows.append((user, key, entry['type'], entry['subType'], amount, balance[0], entry['description'],
+                         moment.isoformat()))
+            # 批次内重复的 key 按已记账处理，id 在插入后补上
+            existing[key] = (None, user, balance[0])
+            changed.add(user)
+            results.append({'key': key, 'status': 'applied', 'balance': balance[0]})
+
+        if rows:
+            cur.executemany(f'INSERT INTO points_ledger (user_id, idempotency_key, kind, sub_type, amount, '
+                            f'balance_after, description, created_at) VALUES ({", ".join([ph] * 8)})', rows)
+            cur.executemany(f'UPDATE points_balances SET balance = {ph}, earned_total = {ph}, spent_total = {ph}, '
+                            f'updated_at = {ph} WHERE user_id = {ph}',
+                            [(*balances[user], now.isoformat(), user) for user in sorted(changed)])
+            cur.executemany(f'INSERT INTO points_rollups (user_id, period, earned, spent) VALUES ({ph}, {ph}, {ph}, {ph}) '
+                            'ON CONFLICT (user_id, period) DO UPDATE SET earned = excluded.earned, spent = excluded.spent',
+                            [(user, period, *values) for (user, period), values in rollups.items() if user in changed])
+            applied = [result['key'] for result in results if result['status'] == 'applied']
+            ids = {}
+            for chunk in _chunks(applied):
+                cur.execute(f'SELECT idempotency_key, id FROM points_ledger WHERE idempotency_key IN ({self._in(chunk)})',
+                            chunk)
+                ids.update(cur.fetchall())
+            for result in results:
+                if result['status'] == 'applied':
+                    result['id'] = ids[result['key']]
+                elif result['status'] == 'duplicate' and result['id'] is None:
+                    result['id'] = ids[result['key']]
+        return results
+
+    def summary(self, user, now=None):
+        """余额和今日/本月合计：两次主键查询"""
+        now, day, month = self._periods(now)
+        ph = self.ph
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(f'SELECT balance, earned_total, spent_total FROM points_balances WHERE user_id = {ph}', (user,))
+            row = cur.fetchone() or (0, 0, 0)
+            cur.execute(f'SELECT period, earned, spent FROM points_rollups WHERE user_id = {ph} AND period IN ({ph}, {ph})',
+                        (user, day, month))
+            periods = {period: {'earned': earned, 'spent': spent} for period, earned, spent in cur.fetchall()}
+            if not self.sqlite:
+                self.conn.rollback()  # 结束只读事务
+        empty = {'earned': 0, 'spent': 0}
+        return {'userId': user, 'balance': row[0], 'earnedTotal': row[1], 'spentTotal': row[2],
+                'today': periods.get(day, empty), 'month': periods.get(month, empty), 'limits': self.limits,
+                'periods': {'today': day, 'month': month},
+                'utcOffsetMinutes': int(now.utcoffset().total_seconds() // 60)}
+
+    def history(self, user, limit=20, before=None):
+        """按时间倒序分页读取流水，before 为上一页最后一条的 id"""
+        limit = max(1, min(int(limit), HISTORY_LIMIT))
+        ph = self.ph
+        sql = ('SELECT id, idempotency_key, kind, sub_type, amount, balance_after, description, created_at '
+               f'FROM points_ledger WHERE user_id = {ph}')
+        params = [user]
+        if before is not None:
+            sql += f' AND id < {ph}'
+            params.append(int(before))
+        sql += f' ORDER BY id DESC LIMIT {ph}'
+        params.append(limit)
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            if not self.sqlite:
+                self.conn.rollback()
+        return [{'id': row[0], 'key': row[1], 'type': row[2], 'subType': row[3], 'amount': row[4],
+                 'balance': row[5], 'description': row[6], 'createdAt': str(row[7])} for row in rows]
+
+
+def open_ledger(db=':memory:', dsn=None):
+    """执行迁移并返回账本"""
+    if dsn:
+        backend = PostgresBackend(dsn)
+        migrate(backend)
+        return PointsLedger(backend.conn)
+    # 服务在多个线程中使用同一个连接（由 PointsLedger 的锁串行），内存数据库也只能有这一个连接
+    conn = sqlite3.connect(db, isolation_level=None, check_same_thread=False, timeout=30)
+    if db != ':memory:':
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+    backend = SqliteBackend()
+    backend.close()
+    backend.conn = conn
+    migrate(backend)
+    return PointsLedger(conn)
+
+
+class LedgerHandler(BaseHTTPRequestHandler):
+    """账本HTTP接口，ledger 由 make_server 设置"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PointsLedger/1.0'
+    ledger = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Cache-Control', 'no-store')
+        if body:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self._reply(HTTPStatus.NO_CONTENT)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [unquote(p) for p in parts.path.split('/') if p]
+        if len(segments) == 2 and segments[0] == 'points':
+            self._reply(HTTPStatus.OK, self.ledger.summary(segments[1]))
+        elif len(segments) == 3 and segments[0] == 'points' and segments[2] == 'history':
+            query = parse_qs(parts.query)
+            try:
+                entries = self.ledger.history(segments[1], query.get('limit', ['20'])[0],
+                                              query.get('before', [None])[0])
+            except ValueError as e:
+                self._reply(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+                return
+            self._reply(HTTPStatus.OK, {'entries': entries})
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/points/batch':
+            self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'body too large'})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length))
+            entries = payload.get('entries') if isinstance(payload, dict) else payload
+            if not isinstance(entries, list):
+                raise LedgerError('请求体应为 {"entries": [...]}')
+            results = self.ledger.apply(entries)
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            return
+        users = sorted({entry['userId'] for entry in entries})
+        self._reply(HTTPStatus.OK, {'results': results,
+                                    'balances': {user: self.ledger.summary(user) for user in users}})
+
+
+def make_server(ledger, host='', port=PORT, quiet=False):
+    handler = type('BoundLedgerHandler', (LedgerHandler,), {'ledger': ledger, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(ledger, host='127.0.0.1', port=0, quiet=True):
+    """在后台线程中启动服务，返回 (server, base_url)"""
+    server = make_server(ledger, host, port, quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f'http://{bound_host}:{bound_port}/'
+
+
+# ---- 基准测试 ----
+
+def _user_id(i):
+    return f'00000000-0000-4000-8000-{i:012d}'
+
+
+def _scan_summary(conn, user, day, month, ph):
+    """不用物化表时的做法（PointSystem 原来的方式）：扫描该用户的全部流水"""
+    cur = conn.cursor()
+    cur.execute(f'SELECT kind, amount, created_at FROM points_ledger WHERE user_id = {ph}', (user,))
+    balance = today = this_month = 0
+    for kind, amount, created in cur.fetchall():
+        balance += amount if kind == 'earn' else -amount
+        created = str(created)
+        if kind == 'earn' and created.startswith(month):
+            this_month += amount
+            if created.startswith(day):
+                today += amount
+    return balance, today, this_month
+
+
+def bench(ledger, users=2000, per_user=200, batch=500, queries=2000, seed=1, start=datetime(2024, 1, 1, tzinfo=LEDGER_TZ)):
+    """写入 users × per_user 条流水（按天分批，每批多个用户），再测量查询延迟和重试批次"""
+    rng = random.Random(seed)
+    # 每个用户每天最多 per_day 条，够 per_user 条需要的天数
+    per_day = 5
+    days = -(-per_user // per_day)
+    written = rejected = 0
+    started = time.perf_counter()
+    last_batch = []
+    for d in range(days):
+        now = start + timedelta(days=d, hours=12)
+        todo = min(per_day, per_user - d * per_day)
+        pending = []
+        for i in range(users):
+            for j in range(todo):
+                n = d * per_day + j
+                earn = n % 4 != 3
+                pending.append({'key': f'{i}:{n}', 'userId': _user_id(i), 'type': 'earn' if earn else 'spend',
+                                'subType': 'share' if earn else 'download', 'amount': rng.randint(1, 30 if earn else 20),
+                                'description': ''})
+                if len(pending) == batch:
+                    results = ledger.apply(pending, now)
+                    written += sum(1 for r in results if r['status'] == 'applied')
+                    rejected += sum(1 for r in results if r['status'] != 'applied')
+                    last_batch, pending = pending, []
+        if pending:
+            results = ledger.apply(pending, now)
+            written += sum(1 for r in results if r['status'] == 'applied')
+            rejected += sum(1 for r in results if r['status'] != 'applied')
+            last_batch = pending
+    load_seconds = time.perf_counter() - started
+    now = start + timedelta(days=days - 1, hours=12)
+
+    def timed(fn):
+        samples = []
+        for _ in range(queries):
+            user = _user_id(rng.randrange(users))
+            t = time.perf_counter()
+            fn(user)
+            samples.append((time.perf_counter() - t) * 1000)
+        return {'p50': percentile(samples, 50), 'p95': percentile(samples, 95), 'p99': percentile(samples, 99)}
+
+    _, day, month = ledger._periods(now)
+    with ledger._lock:
+        scan = timed(lambda user: _scan_summary(ledger.conn, user, day, month, ledger.ph))
+    report = {
+        'users': users, 'per_user': per_user, 'entries': written, 'rejected': rejected,
+        'load_seconds': load_seconds, 'entries_per_second': written / load_seconds if load_seconds else None,
+        'summary_ms': timed(lambda user: ledger.summary(user, now)),
+        'history_ms': timed(lambda user: ledger.history(user, 20)),
+        'scan_ms': scan,
+    }
+    t = time.perf_counter()
+    replay = ledger.apply(last_batch, now)
+    report['replay'] = {'entries': len(replay), 'duplicates': sum(1 for r in replay if r['status'] == 'duplicate'),
+                        'ms': (time.perf_counter() - t) * 1000}
+    user = _user_id(0)
+    report['consistent'] = ledger.summary(user, now)['balance'] == _scan_summary(ledger.conn, user, day, month,
+                                                                                 ledger.ph)[0]
+    return report
+
+
+def _latency(lat):
+    return f'p50 {lat["p50"]:.3f} ms  p95 {lat["p95"]:.3f} ms  p99 {lat["p99"]:.3f} ms'
+
+
+def print_bench(report):
+    print(f'{report["users"]} 个用户 × {report["per_user"]} 条流水: 写入 {report["entries"]} 条'
+          f'（拒绝 {report["rejected"]} 条），{report["load_seconds"]:.1f} s，'
+          f'{report["entries_per_second"]:.0f} 条/秒')
+    print(f'余额和今日/本月合计  {_latency(report["summary_ms"])}')
+    print(f'流水分页（20 条）    {_latency(report["history_ms"])}')
+    print(f'扫描全部流水（对比）  {_latency(report["scan_ms"])}')
+    replay = report['replay']
+    print(f'重放最后一批 {replay["entries"]} 条: {replay["duplicates"]} 条识别为重复，{replay["ms"]:.1f} ms')
+    print(f'物化余额与流水合计一致: {"是" if report["consistent"] else "否"}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='只追加的积分账本服务')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'bench'):
+        p = sub.add_parser(name)
+        p.add_argument('--db', default=':memory:' if name == 'bench' else 'points.sqlite3', help='sqlite 数据库文件')
+        p.add_argument('--dsn', help='PostgreSQL 连接串（需要 psycopg2）')
+    sub.choices['serve'].add_argument('--host', default='')
+    sub.choices['serve'].add_argument('--port', type=int, default=PORT)
+    bench_parser = sub.choices['bench']
+    bench_parser.add_argument('--users', type=int, default=2000)
+    bench_parser.add_argument('--per-user', type=int, default=200)
+    bench_parser.add_argument('--batch', type=int, default=500)
+    bench_parser.add_argument('--queries', type=int, default=2000)
+    bench_parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        ledger = open_ledger(args.db, args.dsn)
+    except Exception as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.command == 'bench':
+        report = bench(ledger, args.users, args.per_user, min(args.batch, MAX_BATCH), args.queries)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_bench(report)
+        return 0
+    server = make_server(ledger, args.host, args.port)
+    print(f'积分账本服务: http://{args.host or "localhost"}:{args.port}/points/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
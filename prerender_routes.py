@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# 按路由预渲染页面
+# 首页的工具卡片由 ToolManager.loadTools 在全部脚本执行完后才渲染，之前 #toolsGrid 是空的。
+# 构建时按同样的规则把首屏内容写进静态HTML，并为 NavigationSystem 知道的每个路由各写一个页面：
+#   - 路由的发现方式与 NavigationSystem.registerDefaultRoutes 相同：.nav-container 中 href="#..." 的链接，
+#     加上脚本里的 commonRoutes；
+#   - 页面中的工具卡片与 ToolManager.createToolCard 相同（按未登录用户、默认排序，见 catalog_shards.py），
+#     #toolsGrid 带 data-prerendered 标记，ToolManager 会沿用这些卡片而不是重新生成；
+#   - index.html 的路由页面写成 <路由>.html（其他页面为 <页面>-<路由>.html），<body data-route> 记录路由，
+#     对应的导航链接预先加上 active，NavigationSystem 没有 hash 时按 data-route 初始化。
+# 结果写到暂存目录，deploy_prep.py --prerender 会优先读取其中的页面。
+#
+# --measure 用 devserver.py 分别提供原页面和预渲染页面，测量看到首屏内容的时间（time to first
+# meaningful content）：预渲染页面只需要HTML和 <head> 中的样式表；原页面还要等到渲染卡片的脚本
+# 和它之前的全部脚本下载完（defer 脚本按顺序执行）。不含脚本执行时间，实际差距会更大。
+#
+# 用法:
+#     python prerender_routes.py                   # 处理 index.html，列出路由和生成的文件
+#     python prerender_routes.py --measure --runs 20
+#     python prerender_routes.py --json
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from bundle_assets import is_local
+from catalog_shards import TOOL_NAMES_ANCHOR, TOOLS_GRID, _sync_dir, is_prerendered, prerender_tools
+from deploy_prep import _splice
+from devserver import make_server
+from html_tokenizer import STARTTAG, ENDTAG, VOID_TAGS, attr, tokenize_string
+from js_catalog import CATALOGUES, LiteralError, catalog_span, parse_literal
+from performance_test import fetch
+from sitecache import CACHE_DIR
+
+STAGE_DIR = os.path.join(CACHE_DIR, 'prerender-stage')
+NAVIGATION_JS = 'js/modules/NavigationSystem.js'
+COMMON_ROUTES_ANCHOR = 'const commonRoutes ='
+NAV_SCOPE_CLASS = 'nav-container'
+ACTIVE_CLASS = 'active'
+CONNECTIONS = 6  # 浏览器对同一主机的并发连接数
+RUNS = 10
+
+
+def _classes(token):
+    return attr(token, 'class', '').split()
+
+
+def nav_links(tokens):
+    """.nav-container 中 href 以 # 开头的链接（与 registerDefaultRoutes 的选择器相同）"""
+    links = []
+    stack = []      # 打开的元素名
+    scope = None    # .nav-container 所在的栈深度
+    for token in tokens:
+        if token.kind == STARTTAG:
+            if token.name == 'a' and scope is not None and attr(token, 'href', '').startswith('#'):
+                links.append(token)
+            if token.name in VOID_TAGS or token.selfclosing:
+                continue
+            if scope is None and NAV_SCOPE_CLASS in _classes(token):
+                scope = len(stack)
+            stack.append(token.name)
+        elif token.kind == ENDTAG and token.name in stack:
+            while stack and stack.pop() != token.name:
+                pass
+            if scope is not None and len(stack) <= scope:
+                scope = None
+    return links
+
+
+def discover_routes(data, navigation_source):
+    """页面的路由，顺序与 NavigationSystem 注册的顺序相同（第一个是没有 hash 时的默认路由）"""
+    routes = []
+    for link in nav_links(tokenize_string(data)):
+        route = attr(link, 'href')[1:]
+        if route and route not in routes:
+            routes.append(route)
+    at = navigation_source.find(COMMON_ROUTES_ANCHOR)
+    if at < 0:
+        raise LiteralError(f'{NAVIGATION_JS} 中没有找到 {COMMON_ROUTES_ANCHOR}')
+    for route in parse_literal(navigation_source, at + len(COMMON_ROUTES_ANCHOR)):
+        if route not in routes:
+            routes.append(route)
+    return routes
+
+
+def route_file(rel, route):
+    """路由页面的相对路径，与原页面在同一目录，页面中的相对引用不用改写"""
+    base, name = posixpath.split(rel)
+    stem = posixpath.splitext(name)[0]
+    return posixpath.join(base, f'{route}.html' if stem == 'index' else f'{stem}-{route}.html')
+
+
+def _add_class(tag, name):
+    match = re.search(rb'\sclass\s*=\s*(["\'])(.*?)\1', tag, re.S)
+    if match is None:
+        end = len(tag) - (2 if tag.endswith(b'/>') else 1)
+        return tag[:end] + f' class="{name}"'.encode('ascii') + tag[end:]
+    return tag[:match.end(2)] + f' {name}'.encode('ascii') + tag[match.end(2):]
+
+
+def render_route(data, route):
+    """<body> 加 data-route，路由对应的导航链接加 active"""
+    tokens = list(tokenize_string(data))
+    replacements = []
+    for link in nav_links(tokens):
+        if attr(link, 'href') == f'#{route}' and ACTIVE_CLASS not in _classes(link):
+            tag = data[link.offset:link.end]
+            replacements.append(((link.offset, link.end), _add_class(tag, ACTIVE_CLASS)))
+    body = next((t for t in tokens if t.kind == STARTTAG and t.name == 'body'), None)
+    if body is not None:
+        end = body.end - 1
+        replacements.append(((end, end), f' data-route="{route}"'.encode('utf-8')))
+    return _splice(data, replacements)
+
+
+def _read_tools(site_root):
+    """从源码（而不是 catalog_shards 去掉列表后的副本）读取工具列表和分类名称"""
+    path, anchor, key = CATALOGUES['tools']
+    with open(os.path.join(site_root, *path.split('/')), 'r', encoding='utf-8') as f:
+        source = f.read()
+    start, end = catalog_span(source, anchor, key)
+    names_at = source.find(TOOL_NAMES_ANCHOR)
+    if names_at < 0:
+        raise LiteralError(f'{path} 中没有找到 {TOOL_NAMES_ANCHOR}')
+    return parse_literal(source[start:end]), parse_literal(source, names_at + len(TOOL_NAMES_ANCHOR))
+
+
+def _source_path(rel, site_root, sources):
+    for directory in sources:
+        path = os.path.join(directory, *rel.split('/'))
+        if os.path.exists(path):
+            return path
+    return os.path.join(site_root, *rel.split('/'))
+
+
+def stage(pages, site_root='.', stage_dir=STAGE_DIR, sources=()):
+    """预渲染页面并为每个路由写一个页面到 stage_dir，返回报告
+
+    sources 是优先读取页面的目录（例如 catalog_shards、optimize_media 的暂存目录）。
+    """
+    started = time.perf_counter()
+    with open(os.path.join(site_root, *NAVIGATION_JS.split('/')), 'r', encoding='utf-8') as f:
+        navigation_source = f.read()
+    tools, category_names = _read_tools(site_root)
+    outputs = {}
+    report = {'pages': {}}
+    for page in pages:
+        rel = posixpath.normpath(os.path.relpath(page, site_root).replace(os.sep, '/'))
+        with open(_source_path(rel, site_root, sources), 'rb') as f:
+            data = f.read()
+        rendered = prerender_tools(data, tools, category_names)
+        if rendered is not None:
+            data = rendered
+        outputs[rel] = data
+        entry = {'tools': len(tools) if rendered is not None else 0, 'routes': {}, 'skipped': []}
+        for route in discover_routes(data, navigation_source):
+            target = route_file(rel, route)
+            if target in outputs or os.path.exists(os.path.join(site_root, *target.split('/'))):
+                entry['skipped'].append(route)  # 不覆盖已有的页面
+                continue
+            outputs[target] = render_route(data, route)
+            entry['routes'][route] = target
+        report['pages'][rel] = entry
+    _sync_dir(stage_dir, outputs)
+    report['files'] = sorted(target for entry in report['pages'].values() for target in entry['routes'].values())
+    report['stage_dir'] = stage_dir
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def serve(site_root, overlays=()):
+    """在后台线程中启动 devserver，overlays 中的文件优先于站点根目录；返回 (server, base_url)"""
+    server = make_server(site_root, '127.0.0.1', 0, quiet=True)
+    base = server.RequestHandlerClass
+    overlays = [os.path.abspath(d) for d in overlays]
+
+    def translate(self, url_path):
+        path = base._translate(self, url_path)
+        rel = os.path.relpath(path, self.root)
+        for directory in overlays:
+            candidate = os.path.join(directory, rel)
+            if os.path.isfile(candidate):
+                return candidate
+        return path
+
+    server.RequestHandlerClass = type('OverlayHandler', (base,), {'_translate': translate})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}/'
+
+
+def critical_assets(data):
+    """看到首屏内容前必须下载的本地资源：(样式表, 脚本, 是否已预渲染)
+
+    未预渲染时，卡片在渲染它的脚本执行后才出现；defer 脚本按文档顺序执行，
+    所以它之前的全部脚本也要下载完。找不到这个脚本（如已合并打包）时算上全部脚本。
+    """
+    styles, scripts = [], []
+    prerendered = False
+    renderer = CATALOGUES['tools'][0]
+    in_head = True
+    for token in tokenize_string(data):
+        if token.kind == STARTTAG and token.name == 'body':
+            in_head = False
+        elif token.kind == STARTTAG and token.name == 'link' and in_head:
+            if 'stylesheet' in attr(token, 'rel', '').lower().split() and attr(token, 'media', 'all') != 'print':
+                href = attr(token, 'href')
+                if is_local(href):
+                    styles.append(href)
+        elif token.kind == STARTTAG and token.name == 'script' and is_local(attr(token, 'src')):
+            scripts.append(attr(token, 'src'))
+        elif token.kind == STARTTAG and attr(token, 'id') == TOOLS_GRID:
+            prerendered = is_prerendered(token)
+    for i, src in enumerate(scripts):
+        if posixpath.normpath(src.split('?')[0]) == renderer:
+            scripts = scripts[:i + 1]
+            break
+    return styles, ([] if prerendered else scripts), prerendered
+
+
+def first_content_once(page_url, styles, scripts, connections=CONNECTIONS):
+    """一次加载：先取HTML，再并发获取关键资源；返回各阶段完成时间（秒）"""
+    started = time.perf_counter()
+    page = fetch(page_url)
+    html_done = time.perf_counter() - started
+
+    def timed(url):
+        response = fetch(url)
+        return time.perf_counter() - started, response['wire_bytes']
+
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        # 样式表和脚本同时开始下载
+        style_futures = [pool.submit(timed, urljoin(page_url, href)) for href in styles]
+        script_futures = [pool.submit(timed, urljoin(page_url, src)) for src in scripts]
+        style_done = [future.result() for future in style_futures]
+        script_done = [future.result() for future in script_futures]
+    css = max([t for t, _ in style_done], default=html_done)
+    js = max([t for t, _ in script_done], default=html_done)
+    return {
+        'html': html_done,
+        'css': css,
+        'scripts': js,
+        'content': max(html_done, css, js),
+        'bytes': page['wire_bytes'] + sum(size for _, size in style_done + script_done),
+    }
+
+
+def _first_content(base_url, rel, data, runs):
+    styles, scripts, prerendered = critical_assets(data)
+    url = urljoin(base_url, rel)
+    first_content_once(url, styles, scripts)  # 预热服务器的文件缓存
+    samples = [first_content_once(url, styles, scripts) for _ in range(runs)]
+    result = {key: statistics.median(s[key] for s in samples) * 1000 for key in ('html', 'css', 'scripts', 'content')}
+    result.update({'prerendered': prerendered, 'requests': 1 + len(styles) + len(scripts),
+                   'bytes': samples[-1]['bytes']})
+    return result
+
+
+def measure(pages, site_root='.', stage_dir=STAGE_DIR, sources=(), runs=RUNS):
+    """分别测量原页面和预渲染页面看到首屏内容的时间（中位数，毫秒）"""
+    results = {}
+    before_server, before_url = serve(site_root, sources)
+    after_server, after_url = serve(site_root, [stage_dir] + list(sources))
+    try:
+        for page in pages:
+            rel = posixpath.normpath(os.path.relpath(page, site_root).replace(os.sep, '/'))
+            with open(_source_path(rel, site_root, sources), 'rb') as f:
+                before = f.read()
+            with open(os.path.join(stage_dir, *rel.split('/')), 'rb') as f:
+                after = f.read()
+            results[rel] = {'before': _first_content(before_url, rel, before, runs),
+                            'after': _first_content(after_url, rel, after, runs)}
+    finally:
+        for server in (before_server, after_server):
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def print_report(report):
+    for rel, entry in report['pages'].items():
+        print(f'{rel}: 预渲染 {entry["tools"]} 张工具卡片，{len(entry["routes"])} 个路由页面')
+        for route, target in entry['routes'].items():
+            print(f'    #{route:<16}-> {target}')
+        for route in entry['skipped']:
+            print(f'    #{route:<16}   已有同名页面，跳过')
+    print(f'输出到 {report["stage_dir"]}/，耗时 {report["seconds"] * 1000:.0f} ms')
+    measured = report.get('measure')
+    if not measured:
+        return
+    print()
+    print(f'{"页面":<16}{"":<8}{"请求":>6}{"HTML":>10}{"样式表":>10}{"脚本":>10}{"首屏内容":>12}')
+    for rel, item in measured.items():
+        for when, label in (('before', '预渲染前'), ('after', '预渲染后')):
+            r = item[when]
+            print(f'{rel:<16}{label:<8}{r["requests"]:>6}{r["html"]:>8.1f}ms{r["css"]:>8.1f}ms'
+                  f'{r["scripts"]:>8.1f}ms{r["content"]:>10.1f}ms')
+        before, after = item['before']['content'], item['after']['content']
+        print(f'{"":<16}首屏内容提前 {before - after:.1f} ms（{(1 - after / before) * 100:.0f}%），'
+              f'关键请求 {item["before"]["requests"]} -> {item["after"]["requests"]} 个')
+    print('（本机回环测量，不含脚本执行时间；网络越慢、设备越慢，差距越大）')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把首屏内容预渲染进静态HTML，并为每个路由生成页面')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要预渲染的页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--stage', default=STAGE_DIR, help='输出（暂存）目录')
+    parser.add_argument('--measure', action='store_true', help='用 devserver 测量预渲染前后看到首屏内容的时间')
+    parser.add_argument('--runs', type=int, default=RUNS, help='测量次数（取中位数）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        report = stage(args.pages, args.root, args.stage)
+        if args.measure:
+            report['measure'] = measure(args.pages, args.root, args.stage, runs=args.runs)
+    except (OSError, LiteralError) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
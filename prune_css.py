@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# CSS无用规则清理与关键CSS提取
+# 解析 css/main.css，根据 index.html 的标记和 js/ 中拼出来的类名判断哪些选择器会被用到，
+# 输出精简后的样式表，并把首屏（body 的前几个子元素）用到的规则内联到 <head>，
+# 完整样式表改为异步加载。
+#
+# 选择器匹配不逐个元素去试：每个选择器只记录它需要的类名/ID/标签，
+# 建立 名称 -> 选择器 的索引，再用页面中出现过的名称去递减计数，计数归零即保留。
+#
+# 用法:
+#     python prune_css.py                              # 处理 index.html，输出到 dist/
+#     python prune_css.py dist/index.html              # 接在 bundle_assets.py 之后处理
+#     python prune_css.py --above-fold 3 --json
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from html_tokenizer import ENDTAG, SCRIPT, STARTTAG, attr, tokenize_file
+
+CSS_PATH = 'css/main.css'
+OUT_DIR = 'dist'
+JS_GLOBS = ['js/**/*.js']
+
+# 内容是规则列表、需要递归解析的 @ 规则
+NESTED_AT_RULES = {'media', 'supports', 'document', 'layer', 'container'}
+# 总是保留的选择器目标
+GLOBAL_TAGS = {'html', 'body', ':root', '*'}
+
+_COMMENT_OR_STRING = re.compile(r'/\*[\s\S]*?\*/|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+_BRACES = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{};]')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_PSEUDO_FUNC = re.compile(r'(?<!\\)::?[\w-]+\((?:[^()]|\([^()]*\))*\)')
+_PSEUDO = re.compile(r'(?<!\\)::?[\w-]+')
+_CLASS = re.compile(r'\.((?:\\.|[\w-])+)')
+_ID = re.compile(r'#((?:\\.|[\w-])+)')
+_TAG = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)')
+_JS_STRING = re.compile(r'\'(?:[^\'\\\n]|\\.)*\'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\]|\\[\s\S])*`')
+_WORD = re.compile(r'[A-Za-z_][\w-]*')
+_ANIMATION = re.compile(r'animation(?:-name)?\s*:([^;]+)')
+
+
+# ---- 解析与输出 ----
+
+def strip_comments(text):
+    return _COMMENT_OR_STRING.sub(lambda m: '' if m.group().startswith('/*') else m.group(), text)
+
+
+def _split_top(text, sep=','):
+    """按顶层的分隔符切分（括号和引号内的不算）"""
+    parts, depth, start, quote = [], 0, 0, None
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote and text[i - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _block_end(text, start):
+    """text[start] 是 '{'，返回匹配的 '}' 的位置"""
+    depth = 0
+    for m in _BRACES.finditer(text, start):
+        token = m.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                return m.start()
+    return len(text)
+
+
+def _prelude_end(text, start):
+    """返回从 start 开始第一个不在引号内的 '{' 或 ';' 的位置"""
+    for m in _BRACES.finditer(text, start):
+        if m.group() in '{;':
+            return m.start()
+    return len(text)
+
+
+def parse_css(text, _stripped=False):
+    """解析CSS为节点列表
+
+    普通规则: {'type': 'rule', 'selectors': [...], 'body': '...'}
+    @规则:    {'type': 'at', 'name': 'media', 'prelude': '...', 'children': [...]}
+              或 {'type': 'at', 'name': ..., 'prelude': ..., 'body': '...' 或 None}
+    """
+    if not _stripped:
+        text = strip_comments(text)
+    nodes = []
+    i, n = 0, len(text)
+    while i < n:
+        while i < n and text[i].isspace():
+            i += 1
+        if i >= n:
+            break
+        end = _prelude_end(text, i)
+        prelude = text[i:end].strip()
+        if end >= n or text[end] == ';':
+            if prelude.startswith('@'):
+                name, _, rest = prelude[1:].partition(' ')
+                nodes.append({'type': 'at', 'name': name.lower(), 'prelude': rest.strip(), 'body': None})
+            i = end + 1
+            continue
+        close = _block_end(text, end)
+        body = text[end + 1:close]
+        if prelude.startswith('@'):
+            match = re.match(r'@([\w-]+)\s*(.*)', prelude, re.S)
+            name, rest = match.group(1).lower(), match.group(2).strip()
+            node = {'type': 'at', 'name': name, 'prelude': rest}
+            if name in NESTED_AT_RULES:
+                node['children'] = parse_css(body, True)
+            else:
+                node['body'] = body
+            nodes.append(node)
+        elif prelude:
+            nodes.append({'type': 'rule', 'selectors': _split_top(prelude), 'body': body})
+        i = close + 1
+    return nodes
+
+
+def compact_body(body):
+    """压缩声明块中的空白（引号内保持不变）"""
+    pieces = []
+    last = 0
+    for m in re.finditer(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'', body):
+        pieces.append(_compact_plain(body[last:m.start()]))
+        pieces.append(m.group())
+        last = m.end()
+    pieces.append(_compact_plain(body[last:]))
+    return ''.join(pieces).strip().rstrip(';')
+
+
+def _compact_plain(text):
+    text = re.sub(r'\s+', ' ', text)
+    return re.sub(r'\s*([;{},])\s*|:\s+', lambda m: m.group(1) if m.group(1) else ':', text)
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if node['type'] == 'rule':
+            out.append(f'{",".join(node["selectors"])}{{{compact_body(node["body"])}}}')
+        elif 'children' in node:
+            inner = serialize(node['children'])
+            if inner:
+                out.append(f'@{node["name"]} {node["prelude"]}{{{inner}}}')
+        elif node['body'] is None:
+            out.append(f'@{node["name"]} {node["prelude"]};')
+        else:
+            inner = node['body']
+            inner = serialize(parse_css(inner, True)) if node['name'] == 'keyframes' else compact_body(inner)
+            out.append(f'@{node["name"]} {node["prelude"]}{{{inner}}}')
+    return ''.join(out)
+
+
+# ---- 选择器需求与索引 ----
+
+def _unescape(name):
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def selector_requirements(selector):
+    """选择器中必须出现在页面上的名称: '.类名'、'#id'、标签名
+
+    属性选择器和伪类只会让匹配更严格，忽略它们只会多保留，不会误删。
+    """
+    simplified = _PSEUDO_FUNC.sub('', selector)
+    simplified = _ATTRIBUTE.sub('', simplified)
+    simplified = _PSEUDO.sub('', simplified)
+    reqs = {'.' + _unescape(c) for c in _CLASS.findall(simplified)}
+    reqs |= {'#' + _unescape(i) for i in _ID.findall(simplified)}
+    without_names = _CLASS.sub(' ', _ID.sub(' ', simplified))
+    reqs |= {t.lower() for t in _TAG.findall(without_names)}
+    return reqs - GLOBAL_TAGS
+
+
+class SelectorIndex:
+    """名称 -> 选择器 的倒排索引"""
+
+    def __init__(self, nodes):
+        self.selectors = []     # (规则节点, 选择器)
+        self.need = []          # 每个选择器还差几个名称没匹配到
+        self.index = {}
+        self._add(nodes)
+
+    def _add(self, nodes):
+        for node in nodes:
+            if node['type'] == 'rule':
+                for selector in node['selectors']:
+                    reqs = selector_requirements(selector)
+                    sid = len(self.selectors)
+                    self.selectors.append((node, selector))
+                    self.need.append(len(reqs))
+                    for key in reqs:
+                        self.index.setdefault(key, []).append(sid)
+            elif 'children' in node:
+                self._add(node['children'])
+
+    def match(self, used, prefixes=()):
+        """返回匹配的选择器编号集合
+
+        prefixes 是JS中以 '-' 结尾的字符串片段（如 'theme-' + name），
+        以这些前缀开头的类名都视为可能用到。
+        """
+        need = list(self.need)
+        for key, sids in self.index.items():
+            if key in used or (key[0] == '.' and prefixes and key[1:].startswith(prefixes)):
+                for sid in sids:
+                    need[sid] -= 1
+        return {sid for sid, remaining in enumerate(need) if remaining == 0}
+
+    def filter(self, nodes, matched):
+        """按匹配结果生成新的节点树，没有选择器剩下的规则整个删除"""
+        keep = {}
+        for sid in matched:
+            node, selector = self.selectors[sid]
+            keep.setdefault(id(node), set()).add(selector)
+        return self._filter(nodes, keep)
+
+    def _filter(self, nodes, keep):
+        result = []
+        for node in nodes:
+            if node['type'] == 'rule':
+                selectors = [s for s in node['selectors'] if s in keep.get(id(node), ())]
+                if selectors:
+                    result.append(dict(node, selectors=selectors))
+            elif 'children' in node:
+                children = self._filter(node['children'], keep)
+                if children:
+                    result.append(dict(node, children=children))
+            else:
+                result.append(node)
+        return result
+
+
+def drop_unused_keyframes(nodes):
+    """删除没有被任何 animation 声明引用的 @keyframes"""
+    names = set()
+
+    def collect(items):
+        for node in items:
+            if node['type'] == 'rule':
+                for value in _ANIMATION.findall(node['body']):
+                    names.update(_WORD.findall(value))
+            elif 'children' in node:
+                collect(node['children'])
+
+    def prune(items):
+        result = []
+        for node in items:
+            if node['type'] == 'at' and node['name'].endswith('keyframes') and node['prelude'] not in names:
+                continue
+            if 'children' in node:
+                node = dict(node, children=prune(node['children']))
+            result.append(node)
+        return result
+
+    collect(nodes)
+    return prune(nodes)
+
+
+# ---- 页面与脚本中用到的名称 ----
+
+def js_words(text):
+    """JS字符串字面量中出现的所有单词（可能是类名、ID或标签名）"""
+    words = set()
+    for m in _JS_STRING.finditer(text):
+        words.update(_WORD.findall(m.group()))
+    return words
+
+
+def collect_html_usage(html_path, above_fold=2):
+    """返回 (全页面用到的名称, 首屏用到的名称, 内联脚本中的单词)
+
+    首屏指 body 的前 above_fold 个直接子元素。
+    """
+    used, critical, words = set(GLOBAL_TAGS), set(GLOBAL_TAGS), set()
+    depth = None            # body 内的嵌套深度
+    children = 0
+    for token in tokenize_file(html_path):
+        if token.kind == SCRIPT:
+            words |= js_words(token.data)
+            continue
+        if token.kind == ENDTAG:
+            if depth:
+                depth -= 1
+            continue
+        if token.kind != STARTTAG:
+            continue
+        names = {token.name}
+        names.update('.' + c for c in (attr(token, 'class') or '').split())
+        if attr(token, 'id'):
+            names.add('#' + attr(token, 'id'))
+        used |= names
+        if token.name == 'body':
+            depth = 0
+            critical |= names
+            continue
+        if depth is None:
+            critical |= names
+            continue
+        if depth == 0:
+            children += 1
+        if children <= above_fold:
+            critical |= names
+        if not token.selfclosing and token.name not in ('br', 'hr', 'img', 'input', 'meta', 'link', 'source', 'wbr'):
+            depth += 1
+    return used, critical, words
+
+
+def collect_js_usage(patterns=JS_GLOBS):
+    words = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            with open(path, 'r', encoding='utf-8') as f:
+                words |= js_words(f.read())
+    return words
+
+
+def expand_words(words):
+    """JS中的单词可能是类名、ID或标签名，三种形式都算作用到"""
+    used = set()
+    for word in words:
+        used.update((word, word.lower(), '.' + word, '#' + word))
+    prefixes = tuple(sorted(w for w in words if w.endswith('-') and len(w) > 2))
+    return used, prefixes
+
+
+# ---- 改写HTML ----
+
+def rewrite_stylesheet_link(html_path, css_href, critical_css, new_href, out_path):
+    """把 <link rel=stylesheet href=css_href> 换成内联关键CSS加异步加载的完整样式表"""
+    with open(html_path, 'rb') as f:
+        content = f.read()
+    target = None
+    for token in tokenize_file(html_path):
+        if (token.kind == STARTTAG and token.name == 'link'
+                and (attr(token, 'rel') or '').lower() == 'stylesheet'
+                and attr(token, 'href') == css_href):
+            target = token
+            break
+    if target is None:
+        return False
+    replacement = (
+        f'<style id="critical-css">{critical_css}</style>\n'
+        f'    <link rel="preload" href="{new_href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'    <noscript><link rel="stylesheet" href="{new_href}"></noscript>'
+    )
+    content = content[:target.offset] + replacement.encode('utf-8') + content[target.end:]
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(out_path, 'wb') as f:
+        f.write(content)
+    return True
+
+
+def _gzip_len(text):
+    return len(gzip.compress(text.encode('utf-8'), 9))
+
+
+def prune_page(html_path, css_path=CSS_PATH, out_dir=OUT_DIR, above_fold=2, js_patterns=JS_GLOBS):
+    """处理一个页面，返回报告"""
+    with open(css_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+
+    started = time.perf_counter()
+    nodes = parse_css(original)
+    parse_time = time.perf_counter() - started
+
+    used, critical_used, inline_words = collect_html_usage(html_path, above_fold)
+    word_used, prefixes = expand_words(collect_js_usage(js_patterns) | inline_words)
+
+    started = time.perf_counter()
+    index = SelectorIndex(nodes)
+    matched = index.match(used | word_used, prefixes)
+    pruned = drop_unused_keyframes(index.filter(nodes, matched))
+    critical = drop_unused_keyframes(index.filter(nodes, index.match(critical_used)))
+    match_time = time.perf_counter() - started
+
+    pruned_css = serialize(pruned)
+    critical_css = serialize(critical)
+    digest = hashlib.sha256(pruned_css.encode('utf-8')).hexdigest()[:10]
+    stem, ext = os.path.splitext(css_path)
+    new_href = f'{stem}.{digest}{ext}'.replace(os.sep, '/')
+    os.makedirs(os.path.join(out_dir, os.path.dirname(css_path)), exist_ok=True)
+    with open(os.path.join(out_dir, new_href), 'w', encoding='utf-8') as f:
+        f.write(pruned_css)
+
+    if os.path.abspath(html_path).startswith(os.path.abspath(out_dir) + os.sep):
+        out_path = html_path
+    else:
+        out_path = os.path.join(out_dir, html_path)
+    linked = rewrite_stylesheet_link(html_path, css_path.replace(os.sep, '/'), critical_css, new_href, out_path)
+
+    return {
+        'page': html_path,
+        'output': out_path if linked else None,
+        'stylesheet': os.path.join(out_dir, new_href),
+        'selectors': len(index.selectors),
+        'selectors_kept': len(matched),
+        'bytes_before': len(original.encode('utf-8')),
+        'bytes_after': len(pruned_css.encode('utf-8')),
+        'gzip_before': _gzip_len(original),
+        'gzip_after': _gzip_len(pruned_css),
+        'critical_bytes': len(critical_css.encode('utf-8')),
+        'parse_ms': round(parse_time * 1000, 1),
+        'match_ms': round(match_time * 1000, 1),
+    }
+
+
+def print_report(report):
+    print(f'{report["page"]}:')
+    print(f'  选择器: {report["selectors"]} -> {report["selectors_kept"]}')
+    print(f'  样式表: {report["bytes_before"] / 1024:.1f} KB -> {report["bytes_after"] / 1024:.1f} KB '
+          f'(gzip {report["gzip_before"] / 1024:.1f} KB -> {report["gzip_after"] / 1024:.1f} KB), '
+          f'写入 {report["stylesheet"]}')
+    print(f'  内联关键CSS: {report["critical_bytes"] / 1024:.1f} KB')
+    print(f'  解析 {report["parse_ms"]} ms, 匹配 {report["match_ms"]} ms')
+    if report['output']:
+        print(f'  页面已改写: {report["output"]}')
+    else:
+        print('  警告: 页面中没有找到对应的 <link rel="stylesheet">，未改写页面')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='清理无用CSS规则并提取关键CSS')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要处理的HTML页面')
+    parser.add_argument('--css', default=CSS_PATH, help='样式表路径')
+    parser.add_argument('--out-dir', default=OUT_DIR, help='输出目录')
+    parser.add_argument('--above-fold', type=int, default=2, help='body 的前几个子元素算作首屏')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    reports = [prune_page(page, args.css, args.out_dir, args.above_fold) for page in args.pages]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
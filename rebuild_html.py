@@ -1,5 +1,7 @@
 import re
 
+from bundle_assets import read_script_manifest, render_script_tags
+
 # 读取原始HTML文件
 with open('index.html', 'r', encoding='utf-8') as f:
     content = f.read()
@@ -8,6 +10,16 @@ with open('index.html', 'r', encoding='utf-8') as f:
 body_match = re.search(r'<body\b[^>]*>([\s\S]*?)</body>', content, flags=re.IGNORECASE)
 body_content = body_match.group(1) if body_match else ''
 
+# 脚本清单按 index.html 中的顺序和加载方式生成，不再手写
+external_scripts = render_script_tags(read_script_manifest('index.html'))
+
+# 字体和图标样式沿用 index.html 中的 <link>（vendor_deps.py 改写后的本地副本和 integrity 会保留）
+head_match = re.search(r'<head\b[^>]*>([\s\S]*?)</head>', content, flags=re.IGNORECASE)
+head_links = '\n    '.join(
+    m.group(0) for m in re.finditer(r'<link\b[^>]*>', head_match.group(1) if head_match else '', flags=re.IGNORECASE)
+    if 'css/main.css' not in m.group(0)
+)
+
 # 使用循环移除所有内联style标签 - 确保完全清理
 while True:
     new_content = re.sub(r'<style\b[^>]*>([\s\S]*?)</style>', '', body_content, flags=re.IGNORECASE)
@@ -34,9 +46,7 @@ new_html = f'''<!DOCTYPE html>
     <title>智能导航中心 v2.0 - 多功能集成平台</title>
     
     <!-- 字体和图标 -->
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/brands.min.css">
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
+    {head_links}
     
     <!-- 外部CSS文件 -->
     <link rel="stylesheet" href="css/main.css">
@@ -45,15 +55,7 @@ new_html = f'''<!DOCTYPE html>
 {body_content}
 
 <!-- 外部JavaScript文件引用 -->
-<script src="js/config.js"></script>
-<script src="js/modules/ProjectManagement.js"></script>
-<script src="js/modules/CRMService.js"></script>
-<script src="js/modules/FinancialManagement.js"></script>
-<script src="js/modules/CollaborationSystem.js"></script>
-<script src="js/modules/DataAnalyticsSystem.js"></script>
-<script src="js/modules/APIIntegrationSystem.js"></script>
-<script src="js/app.js"></script>
-</body>
+{external_scripts}</body>
 </html>'''
 
 # 保存修改后的文件
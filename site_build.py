@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# 页面模板构建
+# 页面由 site/pages/ 下的模板和 site/partials/ 下的片段拼成，代替用正则整段替换 index.html：
+#     <!-- @include partials/nav-navbar.html -->        原样插入片段（片段里可以再 include）
+#     <!-- @scripts partials/scripts-1.json -->         按脚本清单生成 <script src> 标签
+# 指令是HTML注释，模板本身仍是合法的HTML。
+#
+# 增量构建：.sitecache/site-build.json 记录每个页面用到的模板、片段和清单的大小与修改时间，
+# 都没变的页面不重新渲染；输出先写临时文件再替换，内容没变时不改动文件。
+# 输出文件在上次构建之后被直接修改过（例如 js_deps.py --write 改写了 index.html）时不会覆盖，
+# 先用 split 把修改导入片段，或者加 --force。
+#
+# 用法:
+#     python site_build.py split index.html        # 把现有页面拆成模板和片段（可重复运行）
+#     python site_build.py build                   # 渲染 site/pages/*.html 到站点根目录
+#     python site_build.py watch                   # 片段变化后立即重新构建
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+
+from bundle_assets import render_script_tags, script_mode
+from deploy_prep import _splice, _write_if_changed
+from html_tokenizer import COMMENT, ENDTAG, SCRIPT, STARTTAG, TEXT, VOID_TAGS, attr, tokenize_string
+from sitecache import CACHE_DIR
+
+SRC_DIR = 'site'
+PAGES_DIR = 'pages'
+PARTIALS_DIR = 'partials'
+STATE_FILE = os.path.join(CACHE_DIR, 'site-build.json')
+STATE_VERSION = 1
+WATCH_INTERVAL = 0.05
+DIRECTIVE = re.compile(r'^\s*@(include|scripts)\s+(\S+)\s*$')
+
+
+class BuildError(Exception):
+    pass
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _indent_before(data, offset):
+    line_start = data.rfind(b'\n', 0, offset) + 1
+    return data[line_start:offset].decode('utf-8')
+
+
+def render_scripts(manifest, indent):
+    """按清单生成脚本标签，格式与 js_deps.py --write 相同"""
+    entries = [dict(entry, inline=False) for entry in manifest['scripts']]
+    return render_script_tags(entries, indent).lstrip(' \t').rstrip('\n')
+
+
+class SiteBuild:
+    def __init__(self, src_dir=SRC_DIR, out_dir='.', state_file=STATE_FILE):
+        self.src_dir = src_dir
+        self.out_dir = out_dir
+        self.state_file = state_file
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state.get('pages', {}) if state.get('version') == STATE_VERSION else {}
+
+    def _save_state(self):
+        data = json.dumps({'version': STATE_VERSION, 'pages': self.state}, ensure_ascii=False, indent=1)
+        _write_if_changed(self.state_file, data.encode('utf-8'))
+
+    def _path(self, rel):
+        return os.path.join(self.src_dir, *rel.split('/'))
+
+    def pages(self):
+        return sorted(posixpath.join(PAGES_DIR, os.path.basename(path))
+                      for path in glob.glob(os.path.join(self.src_dir, PAGES_DIR, '*.html')))
+
+    def output_path(self, page):
+        return os.path.join(self.out_dir, posixpath.basename(page))
+
+    def render(self, rel, deps, stack=()):
+        """渲染模板或片段，deps 收集用到的文件；返回 bytes"""
+        if rel in stack:
+            raise BuildError(f'片段循环引用: {" -> ".join(stack + (rel,))}')
+        try:
+            with open(self._path(rel), 'rb') as f:
+                data = f.read()
+            deps[rel] = _stat(self._path(rel))
+        except OSError as e:
+            raise BuildError(f'{" -> ".join(stack + (rel,))}: 无法读取 ({e.strerror})') from e
+        stack = stack + (rel,)
+        pieces = []
+        pos = 0
+        for token in tokenize_string(data):
+            if token.kind != COMMENT:
+                continue
+            m = DIRECTIVE.match(token.data)
+            if not m:
+                continue
+            kind, target = m.groups()
+            if kind == 'include':
+                content = self.render(target, deps, stack)
+            else:
+                try:
+                    with open(self._path(target), 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                    deps[target] = _stat(self._path(target))
+                except (OSError, ValueError) as e:
+                    raise BuildError(f'{" -> ".join(stack)}: 脚本清单 {target} 无法读取: {e}') from e
+                content = render_scripts(manifest, _indent_before(data, token.offset)).encode('utf-8')
+            pieces.append(data[pos:token.offset])
+            pieces.append(content)
+            pos = token.end
+        pieces.append(data[pos:])
+        return b''.join(pieces)
+
+    def _fresh(self, page, entry, output):
+        """依赖的大小和修改时间都没变、输出还是上次写出的内容时返回 True"""
+        if not entry or not os.path.exists(output):
+            return False
+        for rel, recorded in entry['deps'].items():
+            try:
+                if _stat(self._path(rel)) != recorded:
+                    return False
+            except OSError:
+                return False
+        return _stat(output) == entry['output_stat']
+
+    def build(self, force=False):
+        """构建全部页面，返回 {'rendered', 'written', 'unchanged', 'conflicts', 'errors', 'ms'}"""
+        started = time.perf_counter()
+        report = {'rendered': [], 'written': [], 'unchanged': [], 'conflicts': [], 'errors': []}
+        for page in self.pages():
+            output = self.output_path(page)
+            entry = self.state.get(page)
+            if not force and self._fresh(page, entry, output):
+                report['unchanged'].append(page)
+                continue
+            deps = {}
+            try:
+                data = self.render(page, deps)
+            except BuildError as e:
+                report['errors'].append(str(e))
+                continue
+            report['rendered'].append(page)
+            if not force and os.path.exists(output):
+                with open(output, 'rb') as f:
+                    current = f.read()
+                recorded = entry['sha256'] if entry else None
+                if current != data and _sha256(current) != recorded:
+                    # 输出在上次构建后被直接改过（或从未由本工具生成），覆盖会丢失修改
+                    report['conflicts'].append(output)
+                    continue
+            if _write_if_changed(output, data):
+                report['written'].append(output)
+            self.state[page] = {'output': output, 'sha256': _sha256(data), 'output_stat': _stat(output),
+                                'deps': deps}
+        self._save_state()
+        report['ms'] = (time.perf_counter() - started) * 1000
+        return report
+
+    def snapshot(self):
+        """源目录中所有文件的 (大小, 修改时间)，watch 用来发现变化"""
+        files = {}
+        stack = [self.src_dir]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat()
+                        files[entry.path] = (st.st_size, st.st_mtime_ns)
+        return files
+
+
+def _partial_name(token, used):
+    label = attr(token, 'id') or (attr(token, 'class') or '').split(' ')[0] or str(len(used) + 1)
+    base = token.name + '-' + re.sub(r'[^\w-]+', '-', label).strip('-')
+    name = base
+    n = 2
+    while name in used:
+        name = f'{base}-{n}'
+        n += 1
+    used.add(name)
+    return name
+
+
+def _children(tokens, start, end):
+    """tokens[start:end] 中的顶层子节点：[(第一个记号下标, 最后一个记号下标)]"""
+    children = []
+    depth = 0
+    first = None
+    for i in range(start, end):
+        token = tokens[i]
+        if token.kind == STARTTAG:
+            if depth == 0:
+                first = i
+            if token.name not in VOID_TAGS and not token.selfclosing:
+                depth += 1
+            elif depth == 0:
+                children.append((i, i))
+        elif token.kind == ENDTAG:
+            depth -= 1
+            if depth == 0 and first is not None:
+                children.append((first, i))
+                first = None
+        elif depth == 0 and token.kind in (COMMENT, TEXT):
+            children.append((i, i))
+    return children
+
+
+def split(page_path, src_dir=SRC_DIR, state_file=STATE_FILE):
+    """把页面拆成模板和片段：<head> 的内容、<body> 的每个顶层元素各成一个片段，
+    相邻的外部脚本标签变成脚本清单。文件内容没变时不改写。返回写出的文件列表。"""
+    with open(page_path, 'rb') as f:
+        data = f.read()
+    tokens = list(tokenize_string(data))
+    # 每种标签第一次出现的位置
+    find = {(t.kind, t.name): i for i, t in reversed(list(enumerate(tokens))) if t.kind in (STARTTAG, ENDTAG)}
+    try:
+        head_open, head_close = find[(STARTTAG, 'head')], find[(ENDTAG, 'head')]
+        body_open, body_close = find[(STARTTAG, 'body')], find[(ENDTAG, 'body')]
+    except KeyError as e:
+        raise BuildError(f'{page_path}: 找不到 <head> 或 <body>') from e
+
+    files = {}
+    replacements = []
+    used = set()
+    page_name = os.path.basename(page_path)
+    prefix = posixpath.splitext(page_name)[0]
+
+    def partial(start, end, name, suffix='.html', content=None):
+        rel = f'{PARTIALS_DIR}/{prefix}/{name}{suffix}'
+        files[rel] = data[start:end] if content is None else content
+        directive = 'scripts' if suffix == '.json' else 'include'
+        replacements.append(((start, end), f'<!-- @{directive} {rel} -->'.encode('utf-8')))
+
+    head = [tokens[i] for i in range(head_open + 1, head_close) if not
+            (tokens[i].kind == TEXT and not tokens[i].data.strip())]
+    if head:
+        partial(head[0].offset, head[-1].end, 'head')
+
+    run = []
+
+    def flush_scripts():
+        if not run:
+            return
+        start, end = run[0][0].offset, run[-1][1]
+        manifest = {'scripts': [{'src': attr(token, 'src'), 'mode': script_mode(token)} for token, _ in run]}
+        # 标签写法与清单生成的不同（如带了其他属性）时保留在模板里
+        if render_scripts(manifest, _indent_before(data, start)) == data[start:end].decode('utf-8'):
+            content = (json.dumps(manifest, ensure_ascii=False, indent=1) + '\n').encode('utf-8')
+            count = sum(1 for rel in files if rel.endswith('.json'))
+            partial(start, end, f'scripts-{count + 1}', '.json', content)
+        run.clear()
+
+    for first, last in _children(tokens, body_open + 1, body_close):
+        token = tokens[first]
+        if token.kind == TEXT and not token.data.strip():
+            continue
+        external = (token.name == 'script' and token.kind == STARTTAG and attr(token, 'src')
+                    and all(t.kind != SCRIPT or not t.data.strip() for t in tokens[first:last + 1]))
+        if external:
+            run.append((token, tokens[last].end))
+            continue
+        flush_scripts()
+        if token.kind == STARTTAG:
+            partial(token.offset, tokens[last].end, _partial_name(token, used))
+    flush_scripts()
+
+    template = _splice(data, replacements)
+    files[f'{PAGES_DIR}/{page_name}'] = template
+    written = []
+    for rel, content in sorted(files.items()):
+        if _write_if_changed(os.path.join(src_dir, *rel.split('/')), content):
+            written.append(rel)
+    # 拆分结果以后由 build 维护，记录为已构建，避免第一次 build 误报冲突
+    builder = SiteBuild(src_dir, os.path.dirname(page_path) or '.', state_file)
+    page = f'{PAGES_DIR}/{page_name}'
+    deps = {}
+    if builder.render(page, deps) != data:
+        raise BuildError(f'{page_path}: 拆分后重新拼装的结果与原文件不一致')
+    builder.state[page] = {'output': page_path, 'sha256': _sha256(data), 'output_stat': _stat(page_path),
+                           'deps': deps}
+    builder._save_state()
+    return written
+
+
+def print_report(report):
+    for page in report['rendered']:
+        print(f'渲染 {page}')
+    for output in report['written']:
+        print(f'写入 {output}')
+    for output in report['conflicts']:
+        print(f'冲突: {output} 在上次构建后被直接修改过，未覆盖（先运行 split 导入修改，或加 --force）')
+    for error in report['errors']:
+        print(f'错误: {error}')
+    print(f'{len(report["rendered"])} 个页面重新渲染，{len(report["unchanged"])} 个没有变化，'
+          f'耗时 {report["ms"]:.1f} ms')
+
+
+def watch(builder, interval=WATCH_INTERVAL, force=False):
+    """轮询源目录，有变化时重新构建（Ctrl+C 退出）"""
+    print_report(builder.build(force))
+    snapshot = builder.snapshot()
+    print(f'监视 {builder.src_dir}/ 中的 {len(snapshot)} 个文件...')
+    try:
+        while True:
+            time.sleep(interval)
+            current = builder.snapshot()
+            if current == snapshot:
+                continue
+            changed = sorted(set(current.items()) ^ set(snapshot.items()))
+            snapshot = current
+            report = builder.build(force)
+            names = ', '.join(sorted({os.path.relpath(path, builder.src_dir) for path, _ in changed}))
+            print(f'[{time.strftime("%H:%M:%S")}] {names}: ', end='')
+            print_report(report)
+    except KeyboardInterrupt:
+        print('\n已停止监视。')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='由模板和片段构建页面')
+    parser.add_argument('--src', default=SRC_DIR, help='模板和片段目录')
+    parser.add_argument('--out', default='.', help='输出目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+    split_parser = sub.add_parser('split', help='把现有页面拆成模板和片段')
+    split_parser.add_argument('pages', nargs='+', help='要拆分的页面')
+    build_parser = sub.add_parser('build', help='渲染全部页面')
+    build_parser.add_argument('--force', action='store_true', help='忽略增量记录并覆盖被直接修改过的输出')
+    build_parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    watch_parser = sub.add_parser('watch', help='监视片段变化并重新构建')
+    watch_parser.add_argument('--force', action='store_true', help='覆盖被直接修改过的输出')
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'split':
+            for page in args.pages:
+                written = split(page, args.src)
+                print(f'{page}: 写出 {len(written)} 个文件到 {args.src}/' if written else f'{page}: 没有变化')
+            return 0
+        builder = SiteBuild(args.src, args.out)
+        if args.command == 'watch':
+            watch(builder, force=args.force)
+            return 0
+        report = builder.build(args.force)
+    except BuildError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['errors'] or report['conflicts'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# 基于内容哈希的结果缓存
+# 检查/分析结果以 (命名空间, 检查器版本, 文件内容哈希) 为键存放在 .sitecache/ 下，
+# 文件内容不变时直接返回上次的结果。缓存总大小超过上限时按最近使用时间淘汰。
+
+import hashlib
+import json
+import os
+import tempfile
+
+CACHE_DIR = '.sitecache'
+MAX_BYTES = 64 * 1024 * 1024
+_READ_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """计算文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """磁盘上的 JSON 结果缓存，带按大小的 LRU 淘汰
+
+    命中时会更新缓存文件的 mtime，淘汰时先删除 mtime 最早的条目。
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None      # 缓存目录当前总大小，首次写入时才统计
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + '.json')
+
+    @staticmethod
+    def make_key(namespace, version, digest):
+        raw = f'{namespace}\0{version}\0{digest}'.encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key):
+        """返回缓存的值，不存在时返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """写入缓存（先写临时文件再替换，避免读到半个文件）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target=None):
+        """删除最久未使用的条目，直到总大小不超过上限的 90%"""
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def lookup(self, namespace, version, path):
+        """按文件内容查缓存，返回 (键, 值)，未命中时值为 None"""
+        key = self.make_key(namespace, version, file_digest(path))
+        return key, self.get(key)
+
+    def cached(self, namespace, version, path, compute):
+        """文件内容不变时返回缓存结果，否则调用 compute(path) 并写入缓存"""
+        key, value = self.lookup(namespace, version, path)
+        if value is None:
+            value = compute(path)
+            self.put(key, value)
+        return value
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(rate, 1)}
+
+
+def format_summary(summary):
+    """把 ResultCache.summary() 的结果格式化成一行文字"""
+    return f'缓存: 命中 {summary["hits"]} 次, 未命中 {summary["misses"]} 次 (命中率 {summary["hit_rate"]}%)'
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# 全站HTML检查
+# 找出仓库中所有HTML页面，用进程池并行运行 html_checks 中的检查，
+# 汇总成一份报告（文本或JSON）。
+#
+# 用法:
+#     python sitelint.py                 # 检查所有页面
+#     python sitelint.py --jobs 1        # 单进程，便于对比扩展性
+#     python sitelint.py --format json index.html test_modal.html
+#     python sitelint.py --no-cache      # 忽略 .sitecache/ 中的结果
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from html_checks import DEFAULT_CHECKS, all_findings, checks_version, run_checks
+from sitecache import CACHE_DIR, ResultCache, format_summary
+
+# 不参与检查的目录（site/ 中是模板和片段，检查的是 site_build.py 生成的页面）
+SKIP_DIRS = {'.git', 'node_modules', 'dist', 'vendor', '.sitecache', '__pycache__', 'site'}
+HTML_EXTENSIONS = ('.html', '.htm')
+LINT_NAMESPACE = 'sitelint'
+LEVELS = ('error', 'warning', 'info')
+
+
+def discover_html(root='.'):
+    """递归查找HTML文件，返回排序后的相对路径列表"""
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+        for filename in filenames:
+            if filename.lower().endswith(HTML_EXTENSIONS):
+                pages.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return sorted(pages)
+
+
+def lint_file(path):
+    """检查单个文件（在工作进程中运行）"""
+    started = time.perf_counter()
+    try:
+        results = run_checks(path, [cls() for cls in DEFAULT_CHECKS])
+        findings = all_findings(results)
+    except OSError as e:
+        findings = [{'check': 'io', 'level': 'error', 'message': f'无法读取文件: {e}'}]
+    return {
+        'path': path,
+        'findings': findings,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _lint_uncached(paths, jobs):
+    if jobs == 1 or len(paths) <= 1:
+        return [lint_file(path) for path in paths]
+    # 按文件大小从大到小提交，减少尾部等待
+    order = sorted(paths, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(order))) as pool:
+        return list(pool.map(lint_file, order, chunksize=max(1, len(order) // (jobs * 4))))
+
+
+def lint_files(paths, jobs=None, cache=None):
+    """并行检查多个文件，jobs 为 1 时在当前进程内顺序执行
+
+    传入 cache 时先在主进程查缓存，只有内容变化过的文件才交给进程池。
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if cache is None:
+        return sorted(_lint_uncached(paths, jobs), key=lambda r: r['path'])
+
+    version = checks_version()
+    results = []
+    pending = {}
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            key, findings = cache.lookup(LINT_NAMESPACE, version, path)
+        except OSError:
+            key, findings = None, None
+        if findings is None:
+            pending[path] = key
+            continue
+        results.append({'path': path, 'findings': findings,
+                        'seconds': time.perf_counter() - started, 'cached': True})
+
+    for result in _lint_uncached(list(pending), jobs):
+        key = pending[result['path']]
+        if key is not None:
+            cache.put(key, result['findings'])
+        result['cached'] = False
+        results.append(result)
+    return sorted(results, key=lambda r: r['path'])
+
+
+def build_report(results, jobs, elapsed, cache=None):
+    """合并各文件的结果"""
+    summary = {level: 0 for level in LEVELS}
+    for result in results:
+        for item in result['findings']:
+            summary[item['level']] = summary.get(item['level'], 0) + 1
+    report = {
+        'files': results,
+        'summary': summary,
+        'file_count': len(results),
+        'jobs': jobs,
+        'elapsed': elapsed,
+        'cpu_seconds': sum(r['seconds'] for r in results),
+    }
+    if cache is not None:
+        report['cache'] = cache.summary()
+    return report
+
+
+def format_text(report, show_timing=False):
+    lines = []
+    for result in report['files']:
+        timing = ''
+        if show_timing:
+            timing = f' ({result["seconds"] * 1000:.1f} ms{", 缓存" if result.get("cached") else ""})'
+        if result['findings'] or show_timing:
+            lines.append(f'{result["path"]}: {len(result["findings"])} 个问题{timing}')
+        for item in result['findings']:
+            where = f'{item["line"]}:{item.get("col", 1)}' if 'line' in item else '-'
+            lines.append(f'  [{item["level"]}] {where} {item["check"]}: {item["message"]}')
+    summary = report['summary']
+    lines.append('')
+    lines.append(f'检查了 {report["file_count"]} 个文件: '
+                 f'{summary["error"]} 个错误, {summary["warning"]} 个警告, {summary["info"]} 个提示')
+    lines.append(f'进程数 {report["jobs"]}, 耗时 {report["elapsed"]:.3f} 秒 '
+                 f'(各文件合计 {report["cpu_seconds"]:.3f} 秒)')
+    if 'cache' in report:
+        lines.append(format_summary(report['cache']))
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='全站HTML结构检查')
+    parser.add_argument('paths', nargs='*', help='要检查的文件，默认检查仓库中所有HTML页面')
+    parser.add_argument('--root', default='.', help='查找HTML文件的根目录')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行进程数，默认等于CPU核数')
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help='输出格式')
+    parser.add_argument('--timing', action='store_true', help='显示每个文件的耗时')
+    parser.add_argument('--no-cache', action='store_true', help='不使用结果缓存')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='缓存目录')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.paths or discover_html(args.root)
+    if not args.paths and args.root != '.':
+        paths = [os.path.join(args.root, p) for p in paths]
+    jobs = args.jobs or os.cpu_count() or 1
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+
+    started = time.perf_counter()
+    results = lint_files(paths, jobs, cache)
+    report = build_report(results, jobs, time.perf_counter() - started, cache)
+
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_text(report, args.timing))
+    return 1 if report['summary']['error'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# 合成数据生成
+# 为 001_initial_tables.sql 中的 users、user_sessions、user_membership、user_download_history、
+# user_installed_apps 生成大量数据，用来观察表结构在生产规模下的表现。
+#
+# 每个用户的数据只由 (种子, 表, 用户序号) 决定，逐表逐用户流式生成，内存占用与行数无关；
+# 负载测试可以随时重新算出任意用户的用户名、邮箱、会话令牌等，不需要把数据读回来。
+# 每个用户的会话数和下载记录数服从指数分布（少数用户下载很多），时间都在固定基准时间（2025-01-01）之前，
+# 同样的参数每次生成完全相同的数据。
+#
+# 输出格式:
+#     csv   每个表一个CSV文件（带表头，空值为空字段）
+#     copy  PostgreSQL COPY 文本格式的 psql 脚本，可直接 psql -f 导入
+#     sqlite 执行迁移后直接导入本地 sqlite 数据库（供 db_loadtest.py 使用）
+#
+# 用法:
+#     python synthetic_data.py --users 1000000 --format copy --out seed.sql
+#     python synthetic_data.py --users 200000 --format csv --out data/synthetic
+#     python synthetic_data.py --users 100000 --format sqlite --out loadtest.sqlite3
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# 导入顺序即外键依赖顺序
+TABLES = {
+    'users': ['id', 'username', 'email', 'password', 'full_name', 'role', 'status', 'level',
+              'last_login', 'created_at', 'updated_at'],
+    'user_membership': ['user_id', 'level', 'points', 'join_date', 'expire_date', 'membership_status', 'updated_at'],
+    'user_sessions': ['id', 'user_id', 'session_token', 'expires_at', 'created_at'],
+    'user_installed_apps': ['id', 'user_id', 'app_id', 'installed_at'],
+    'user_download_history': ['id', 'user_id', 'resource_id', 'resource_title', 'download_date'],
+}
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+GIVEN_NAMES = ['伟', '芳', '娜', '敏', '静', '丽', '强', '磊', '军', '洋', '勇', '艳', '杰', '娟', '涛', '明', '超', '秀英']
+LEVELS = [('basic', 70), ('silver', 20), ('gold', 8), ('diamond', 2)]
+APPS = 30
+RESOURCES = 500
+MAX_POINTS = 10 ** 7
+PASSWORD_HASH = '$2a$10$' + 'x' * 53
+BATCH_ROWS = 5000
+
+
+def timestamp(value):
+    """所有时间统一为 UTC 的 ISO 格式，sqlite 中按字符串比较也能得到正确顺序"""
+    return value.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+class SyntheticData:
+    def __init__(self, users, seed=42, sessions=2.0, downloads=20.0, now=NOW):
+        self.users = users
+        self.seed = seed
+        self.sessions = sessions
+        self.downloads = downloads
+        self.now = now
+        self._weights = [weight for _, weight in LEVELS]
+
+    def _uuid(self, *key):
+        digest = hashlib.blake2b(repr((self.seed,) + key).encode('ascii'), digest_size=16).digest()
+        return str(uuid.UUID(bytes=digest, version=4))
+
+    def _rng(self, table, i):
+        return random.Random(f'{self.seed}:{table}:{i}')
+
+    def user_id(self, i):
+        return self._uuid('users', i)
+
+    def username(self, i):
+        return f'user{i:07d}'
+
+    def email(self, i):
+        return f'user{i:07d}@example.com'
+
+    def _ago(self, rng, days):
+        return self.now - timedelta(seconds=rng.randrange(int(days * 86400)))
+
+    def table_rows(self, table, i):
+        """第 i 个用户在 table 中的所有行"""
+        rng = self._rng(table, i)
+        user_id = self.user_id(i)
+        if table == 'users':
+            created = self._ago(rng, 720)
+            last_login = self._ago(rng, 30) if rng.random() < 0.8 else None
+            name = rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES)
+            return [(user_id, self.username(i), self.email(i), PASSWORD_HASH, name,
+                     'admin' if i == 0 else 'user', 'active' if rng.random() < 0.97 else 'disabled',
+                     '会员level1', timestamp(last_login) if last_login else None,
+                     timestamp(created), timestamp(created))]
+        if table == 'user_membership':
+            level = rng.choices([name for name, _ in LEVELS], self._weights)[0]
+            joined = self._ago(rng, 720)
+            expire = joined + timedelta(days=365) if level != 'basic' else None
+            points = min(int(rng.paretovariate(1.5) * 100) - 100, MAX_POINTS)
+            return [(user_id, level, points, timestamp(joined),
+                     timestamp(expire) if expire else None, 'active', timestamp(joined))]
+        if table == 'user_sessions':
+            rows = []
+            for j in range(int(rng.expovariate(1 / self.sessions)) if self.sessions else 0):
+                created = self._ago(rng, 60)
+                rows.append((self._uuid(table, i, j), user_id, self.session_token(i, j),
+                             timestamp(created + timedelta(days=30)), timestamp(created)))
+            return rows
+        if table == 'user_installed_apps':
+            return [(self._uuid(table, i, app), user_id, f'app-{app}', timestamp(self._ago(rng, 365)))
+                    for app in rng.sample(range(APPS), rng.randint(0, 5))]
+        if table == 'user_download_history':
+            rows = []
+            for j in range(int(rng.expovariate(1 / self.downloads)) if self.downloads else 0):
+                resource = int(rng.paretovariate(1.2)) % RESOURCES
+                rows.append((self._uuid(table, i, j), user_id, f'resource-{resource}', f'资源 {resource}',
+                             timestamp(self._ago(rng, 365))))
+            return rows
+        raise KeyError(table)
+
+    def session_token(self, i, j):
+        return hashlib.blake2b(f'{self.seed}:token:{i}:{j}'.encode('ascii'), digest_size=24).hexdigest()
+
+    def session_tokens(self, i):
+        return [row[2] for row in self.table_rows('user_sessions', i)]
+
+    def rows(self, table):
+        for i in range(self.users):
+            yield from self.table_rows(table, i)
+
+
+def _batched(rows, size=BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def write_copy(data, out, tables=TABLES):
+    """PostgreSQL COPY 文本格式，返回 {表: 行数}"""
+    counts = {}
+    out.write('-- 合成数据，由 synthetic_data.py 生成\nBEGIN;\n')
+    for table in tables:
+        out.write(f'COPY {table} ({", ".join(TABLES[table])}) FROM stdin;\n')
+        count = 0
+        for batch in _batched(data.rows(table)):
+            out.write(''.join('\t'.join(_copy_value(v) for v in row) + '\n' for row in batch))
+            count += len(batch)
+        out.write('\\.\n\n')
+        counts[table] = count
+    out.write('COMMIT;\n')
+    return counts
+
+
+def write_csv(data, directory, tables=TABLES):
+    counts = {}
+    os.makedirs(directory, exist_ok=True)
+    for table in tables:
+        count = 0
+        with open(os.path.join(directory, f'{table}.csv'), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TABLES[table])
+            for batch in _batched(data.rows(table)):
+                writer.writerows(batch)
+                count += len(batch)
+        counts[table] = count
+    return counts
+
+
+def load_sqlite(data, conn, tables=TABLES):
+    """分批插入到已建好表的 sqlite 连接"""
+    counts = {}
+    for table in tables:
+        columns = TABLES[table]
+        sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        count = 0
+        conn.execute('BEGIN')
+        for batch in _batched(data.rows(table)):
+            conn.executemany(sql, batch)
+            count += len(batch)
+        conn.execute('COMMIT')
+        counts[table] = count
+    conn.execute('ANALYZE')
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='为用户相关的表生成合成数据')
+    parser.add_argument('--users', type=int, default=100000, help='用户数')
+    parser.add_argument('--sessions', type=float, default=2.0, help='平均每个用户的会话数')
+    parser.add_argument('--downloads', type=float, default=20.0, help='平均每个用户的下载记录数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--format', choices=('copy', 'csv', 'sqlite'), default='copy', help='输出格式')
+    parser.add_argument('--out', default='-', help='输出文件（csv 为目录，- 为标准输出）')
+    parser.add_argument('--tables', nargs='*', choices=list(TABLES), default=list(TABLES), help='只生成这些表')
+    args = parser.parse_args(argv)
+
+    data = SyntheticData(args.users, args.seed, args.sessions, args.downloads)
+    started = time.perf_counter()
+    if args.format == 'copy':
+        if args.out == '-':
+            counts = write_copy(data, sys.stdout, args.tables)
+        else:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                counts = write_copy(data, f, args.tables)
+    elif args.format == 'csv':
+        if args.out == '-':
+            parser.error('csv 格式需要用 --out 指定目录')
+        counts = write_csv(data, args.out, args.tables)
+    else:
+        from db_migrate import SqliteBackend, migrate
+
+        if args.out == '-':
+            parser.error('sqlite 格式需要用 --out 指定数据库文件')
+        created = not os.path.exists(args.out)
+        backend = SqliteBackend(args.out)
+        try:
+            migrate(backend)
+            backend.conn.execute('PRAGMA journal_mode = WAL')
+            counts = load_sqlite(data, backend.conn, args.tables)
+        except BaseException:
+            backend.close()
+            # 不留下只建了一半的数据库文件
+            if created:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(args.out + suffix):
+                        os.remove(args.out + suffix)
+            raise
+        backend.close()
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(', '.join(f'{table} {count} 行' for table, count in counts.items())
+          + f'，共 {total} 行，{elapsed:.1f} 秒（{total / max(elapsed, 1e-9):.0f} 行/秒）', file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# 前端性能数据收集服务
+# 接收 CoreFramework.startPerformanceMonitoring 上报的性能数据（每次页面访问一条，
+# 包含 navigation 计时和 resource 计时），在内存中按页面、按资源汇总成流式分位数草图，
+# 定期合并写入 telemetry/ 下按小时划分的汇总文件，report 子命令读取汇总文件输出
+# 各页面加载时间的 p50/p95 和最慢的资源。
+#
+# 上报格式（POST /beacon，请求体为JSON，可以是一条或一个数组）:
+#     {"v": 1, "page": "/", "nav": {"ttfb": 120.5, "domContentLoaded": 800, "load": 1500, "size": 4200},
+#      "resources": [{"name": "https://cdn.jsdelivr.net/...", "type": "script", "duration": 230.1, "size": 51234}]}
+#
+# 用法:
+#     python telemetry_collector.py serve --port 8090 --flush 60
+#     python telemetry_collector.py report --hours 24 --top 15
+#     python telemetry_collector.py report --json
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+PORT = 8090
+OUT_DIR = 'telemetry'
+ROLLUP_FORMAT = 'rollup-%Y%m%d-%H.json'
+ACCURACY = 0.01             # 草图的相对误差
+MIN_VALUE = 0.1             # 小于 0.1ms 的值都记到零桶
+MAX_VALUE = 10 * 60 * 1000  # 超过 10 分钟的计时视为无效
+MAX_BODY = 256 * 1024       # 单个请求体上限
+MAX_RESOURCES = 2000        # 每个汇总最多跟踪的不同资源数，超过的归入 OTHER
+OTHER = '(other)'
+PAGE_METRICS = ('ttfb', 'domContentLoaded', 'load')
+
+
+class QuantileSketch:
+    """对数分桶的流式分位数草图
+
+    值 v 落入编号 ceil(log_gamma(v)) 的桶，桶宽与值成比例，因此任意分位数的相对误差
+    不超过 accuracy；占用只和数值范围有关（1ms~10分钟约 700 个桶），两个草图可以直接合并。
+    """
+
+    def __init__(self, accuracy=ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, n=1):
+        value = max(float(value), 0.0)
+        if value < MIN_VALUE:
+            self.zeros += n
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.count += n
+        self.total += value * n
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError('只能合并相同精度的草图')
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """q 分位数（0~1），没有数据时返回 None"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return self.min
+        seen = self.zeros
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        keys = sorted(self.buckets)
+        return {
+            'a': self.accuracy,
+            'n': self.count,
+            'sum': round(self.total, 3),
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'z': self.zeros,
+            'k': keys,
+            'c': [self.buckets[k] for k in keys],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['a'])
+        sketch.buckets = dict(zip(data['k'], data['c']))
+        sketch.zeros = data['z']
+        sketch.count = data['n']
+        sketch.total = data['sum']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def _timing(value):
+    """上报中的计时值：缺失、负数或超出范围的返回 None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not 0 <= value <= MAX_VALUE or math.isnan(value):
+        return None
+    return float(value)
+
+
+def _size(value):
+    """上报中的字节数：缺失、负数或不是有限数值的返回 None；不受计时上限限制"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not 0 <= value < math.inf:
+        return None
+    return value
+
+
+def normalize_page(page):
+    path = urlsplit(page).path or '/'
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    return path
+
+
+def normalize_resource(name):
+    """去掉查询串和片段，同一资源的不同版本号、缓存参数合并统计"""
+    parts = urlsplit(name)
+    if parts.scheme not in ('http', 'https'):
+        return None
+    return f'{parts.scheme}://{parts.netloc}{parts.path}'
+
+
+class TelemetryStore:
+    """按页面和资源汇总的性能数据，线程安全"""
+
+    def __init__(self, accuracy=ACCURACY, max_resources=MAX_RESOURCES):
+        self.accuracy = accuracy
+        self.max_resources = max_resources
+        self.lock = threading.Lock()
+        self.beacons = 0
+        self.pages = {}
+        self.resources = {}
+
+    def _page(self, page):
+        entry = self.pages.get(page)
+        if entry is None:
+            entry = self.pages[page] = {'views': 0, 'bytes': 0}
+            for metric in PAGE_METRICS:
+                entry[metric] = QuantileSketch(self.accuracy)
+        return entry
+
+    def _resource(self, name, kind):
+        entry = self.resources.get(name)
+        if entry is None:
+            if len(self.resources) >= self.max_resources and name != OTHER:
+                return self._resource(OTHER, 'other')
+            entry = self.resources[name] = {'type': kind, 'bytes': 0,
+                                            'duration': QuantileSketch(self.accuracy)}
+        return entry
+
+    def add_beacon(self, beacon):
+        """记录一条上报，格式不对时抛出 ValueError"""
+        if not isinstance(beacon, dict) or not isinstance(beacon.get('page'), str):
+            raise ValueError('上报缺少 page')
+        nav = beacon.get('nav') or {}
+        resources = beacon.get('resources') or []
+        if not isinstance(nav, dict) or not isinstance(resources, list):
+            raise ValueError('nav 或 resources 格式不正确')
+        with self.lock:
+            self.beacons += 1
+            page = self._page(normalize_page(beacon['page']))
+            page['views'] += 1
+            page['bytes'] += int(_size(nav.get('size')) or 0)
+            for metric in PAGE_METRICS:
+                value = _timing(nav.get(metric))
+                if value is not None:
+                    page[metric].add(value)
+            for resource in resources:
+                if not isinstance(resource, dict) or not isinstance(resource.get('name'), str):
+                    continue
+                name = normalize_resource(resource['name'])
+                duration = _timing(resource.get('duration'))
+                if name is None or duration is None:
+                    continue
+                entry = self._resource(name, str(resource.get('type') or 'other'))
+                entry['duration'].add(duration)
+                entry['bytes'] += int(_size(resource.get('size')) or 0)
+
+    def merge(self, other):
+        with self.lock:
+            self.beacons += other.beacons
+            for name, src in other.pages.items():
+                page = self._page(name)
+                page['views'] += src['views']
+                page['bytes'] += src['bytes']
+                for metric in PAGE_METRICS:
+                    page[metric].merge(src[metric])
+            for name, src in other.resources.items():
+                entry = self._resource(name, src['type'])
+                entry['duration'].merge(src['duration'])
+                entry['bytes'] += src['bytes']
+        return self
+
+    def drain(self):
+        """取出当前数据并清空，返回新的 TelemetryStore"""
+        drained = TelemetryStore(self.accuracy, self.max_resources)
+        with self.lock:
+            drained.beacons, self.beacons = self.beacons, 0
+            drained.pages, self.pages = self.pages, {}
+            drained.resources, self.resources = self.resources, {}
+        return drained
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'version': 1,
+                'beacons': self.beacons,
+                'pages': {name: {'views': p['views'], 'bytes': p['bytes'],
+                                 **{m: p[m].to_dict() for m in PAGE_METRICS}}
+                          for name, p in self.pages.items()},
+                'resources': {name: {'type': r['type'], 'bytes': r['bytes'],
+                                     'duration': r['duration'].to_dict()}
+                              for name, r in self.resources.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data, max_resources=MAX_RESOURCES):
+        store = cls(max_resources=max_resources)
+        store.beacons = data['beacons']
+        for name, p in data['pages'].items():
+            store.pages[name] = {'views': p['views'], 'bytes': p['bytes'],
+                                 **{m: QuantileSketch.from_dict(p[m]) for m in PAGE_METRICS}}
+        for name, r in data['resources'].items():
+            store.resources[name] = {'type': r['type'], 'bytes': r['bytes'],
+                                     'duration': QuantileSketch.from_dict(r['duration'])}
+        return store
+
+
+def rollup_path(out_dir, when=None):
+    when = when or datetime.now(timezone.utc)
+    return os.path.join(out_dir, when.strftime(ROLLUP_FORMAT))
+
+
+def flush(store, out_dir=OUT_DIR, when=None):
+    """把内存中的数据合并进当前小时的汇总文件，返回写入的文件（没有新数据时返回 None）"""
+    drained = store.drain()
+    if not drained.beacons:
+        return None
+    path = rollup_path(out_dir, when)
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            drained = TelemetryStore.from_dict(json.load(f)).merge(drained)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(drained.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+    return path
+
+
+def load_rollups(out_dir=OUT_DIR, hours=None, now=None):
+    """合并 out_dir 中最近 hours 小时（None 为全部）的汇总文件"""
+    now = now or datetime.now(timezone.utc)
+    since = now - timedelta(hours=hours) if hours else None
+    store = TelemetryStore(max_resources=math.inf)
+    if not os.path.isdir(out_dir):
+        return store, 0
+    files = 0
+    for name in sorted(os.listdir(out_dir)):
+        try:
+            window = datetime.strptime(name, ROLLUP_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        if since and window + timedelta(hours=1) <= since:
+            continue
+        with open(os.path.join(out_dir, name), encoding='utf-8') as f:
+            store.merge(TelemetryStore.from_dict(json.load(f), max_resources=math.inf))
+        files += 1
+    return store, files
+
+
+def summarize(store, top=10):
+    def stats(sketch):
+        return {'count': sketch.count, 'p50': sketch.quantile(0.5), 'p95': sketch.quantile(0.95),
+                'mean': sketch.mean}
+
+    pages = {name: {'views': p['views'], **{m: stats(p[m]) for m in PAGE_METRICS}}
+             for name, p in sorted(store.pages.items(), key=lambda item: -item[1]['views'])}
+    resources = sorted(store.resources.items(), key=lambda item: -(item[1]['duration'].quantile(0.95) or 0))
+    slowest = [{'name': name, 'type': r['type'], 'avg_bytes': r['bytes'] // max(r['duration'].count, 1),
+                **stats(r['duration'])} for name, r in resources[:top]]
+    return {'beacons': store.beacons, 'pages': pages, 'slowest_resources': slowest}
+
+
+class BeaconHandler(BaseHTTPRequestHandler):
+    """接收上报，store 由 make_server 设置
+
+    navigator.sendBeacon 发送字符串时 Content-Type 为 text/plain，不会触发 CORS 预检，
+    因此这里不检查 Content-Type，直接按JSON解析。
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'TelemetryCollector/1.0'
+    store = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        if body:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self._reply(HTTPStatus.NO_CONTENT)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != '/stats':
+            self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        self._reply(HTTPStatus.OK, summarize(self.store))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/beacon':
+            self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'body too large'})
+            return
+        try:
+            beacons = json.loads(self.rfile.read(length))
+            for beacon in beacons if isinstance(beacons, list) else [beacons]:
+                self.store.add_beacon(beacon)
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            return
+        self._reply(HTTPStatus.NO_CONTENT)
+
+
+def make_server(store, host='', port=PORT, quiet=False):
+    handler = type('BoundBeaconHandler', (BeaconHandler,), {'store': store, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(store, host='127.0.0.1', port=0, quiet=True):
+    """在后台线程中启动服务，返回 (server, base_url)"""
+    server = make_server(store, host, port, quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f'http://{bound_host}:{bound_port}/'
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:.0f}'
+
+
+def print_report(summary, files):
+    print(f'{files} 个汇总文件，{summary["beacons"]} 次页面访问')
+    print(f'{"页面":<28}{"访问":>7}{"TTFB p50":>10}{"p95":>8}{"DCL p50":>9}{"p95":>8}{"加载 p50":>10}{"p95":>8}')
+    for name, page in summary['pages'].items():
+        ttfb, dcl, load = page['ttfb'], page['domContentLoaded'], page['load']
+        print(f'{name:<30}{page["views"]:>7}{_fmt(ttfb["p50"]):>10}{_fmt(ttfb["p95"]):>8}'
+              f'{_fmt(dcl["p50"]):>9}{_fmt(dcl["p95"]):>8}{_fmt(load["p50"]):>10}{_fmt(load["p95"]):>8}')
+    if summary['slowest_resources']:
+        print('\n最慢的资源（按 p95，毫秒）:')
+        for r in summary['slowest_resources']:
+            print(f'  {_fmt(r["p95"]):>7}  p50 {_fmt(r["p50"]):>6}  {r["count"]:>6}次  '
+                  f'{r["avg_bytes"] / 1024:>7.1f} KB  {r["type"]:<10} {r["name"]}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='前端性能数据收集与汇总')
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help='启动收集服务')
+    serve.add_argument('--host', default='', help='监听地址')
+    serve.add_argument('--port', type=int, default=PORT, help='端口')
+    serve.add_argument('--out', default=OUT_DIR, help='汇总文件目录')
+    serve.add_argument('--flush', type=float, default=60, help='写入汇总文件的间隔（秒）')
+    serve.add_argument('--quiet', action='store_true', help='不输出访问日志')
+    report = sub.add_parser('report', help='输出页面加载时间和最慢的资源')
+    report.add_argument('--out', default=OUT_DIR, help='汇总文件目录')
+    report.add_argument('--hours', type=float, help='只统计最近几小时')
+    report.add_argument('--top', type=int, default=10, help='显示最慢的资源数')
+    report.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args(argv)
+
+    if args.command == 'report':
+        store, files = load_rollups(args.out, args.hours)
+        summary = summarize(store, args.top)
+        if args.json:
+            print(json.dumps(summary, ensure_ascii=False, indent=2))
+        else:
+            print_report(summary, files)
+        return 0
+
+    store = TelemetryStore()
+    server = make_server(store, args.host, args.port, args.quiet)
+    stop = threading.Event()
+
+    def flusher():
+        while not stop.wait(args.flush):
+            flush(store, args.out)
+
+    thread = threading.Thread(target=flusher, daemon=True)
+    thread.start()
+    print(f'收集服务已启动: http://localhost:{server.server_address[1]}/beacon，'
+          f'每 {args.flush:g} 秒写入 {args.out}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n服务已停止。')
+    finally:
+        stop.set()
+        server.server_close()
+        flush(store, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""analytics_pipeline 的测试：指标计算、增量追加和收入预测"""
+
+import json
+
+import pytest
+
+from analytics_pipeline import AnalyticsState, build_dashboard, forecast, write_sample
+
+
+def _dashboard(state_dir, out):
+    data = build_dashboard(AnalyticsState(str(state_dir)), str(out))
+    data.pop('generatedAt')
+    data.pop('seconds')
+    return data
+
+
+def test_metrics_from_small_exports(tmp_path):
+    events = tmp_path / 'events.jsonl'
+    events.write_text('\n'.join(json.dumps(e) for e in [
+        {'userId': 'a', 'action': 'view', 'timestamp': '2024-01-01T08:00:00Z', 'duration': 60},
+        {'userId': 'a', 'action': 'view', 'timestamp': '2024-01-02T08:00:00Z', 'duration': 120},
+        {'userId': 'a', 'action': 'click', 'timestamp': '2024-01-02T08:01:00Z', 'duration': 60},
+        {'userId': 'b', 'action': 'view', 'timestamp': '2024-01-02T09:00:00Z', 'duration': 180},
+        {'userId': 'c', 'action': 'view', 'timestamp': 1704067200},
+    ]) + '\n', encoding='utf-8')
+    (tmp_path / 'tx.csv').write_text(
+        'transactionId,customerId,amount,date,type\n'
+        't1,c1,100,2024-01-01,sale\nt2,c2,50.5,2024-01-02,sale\nt3,,30,2024-01-02,expense\nbad,c1,x,2024-01-02,sale\n',
+        encoding='utf-8')
+    (tmp_path / 'crm.csv').write_text('customerId,signupDate,npsScore\nc1,2023-12-31,10\nc2,2024-01-02,3\nc3,2024-01-02,9\n',
+                                      encoding='utf-8')
+    state = AnalyticsState(str(tmp_path / 'state'))
+    report = state.ingest([str(events), str(tmp_path / 'tx.csv'), str(tmp_path / 'crm.csv')])
+    assert (report['events'], report['transactions'], report['customers'], report['rejected']) == (4, 3, 3, 2)
+
+    dashboard = build_dashboard(state, str(tmp_path / 'analytics.json'))
+    assert dashboard['lastDay'] == '2024-01-02' and dashboard['nps'] == {'score': 33, 'responses': 3}
+    week = dashboard['periods']['last7']
+    assert week['metrics'] == {'totalUsers': 2, 'activeUsers': 2, 'newUsers': 2, 'returningUsers': 0,
+                               'avgSessionDuration': 2.3, 'bounceRate': 66.7,
+                               'engagementGrowth': None, 'revenueGrowth': None}
+    sales = week['sales']
+    assert sales['financial'] == {'income': 150.5, 'expenses': 30.0, 'netIncome': 120.5}
+    assert sales['customer']['totalCustomers'] == 3
+    assert sales['kpis']['customerLifetimeValue'] == pytest.approx(150.5 / 3, abs=0.01)
+    assert json.loads((tmp_path / 'analytics.json').read_text(encoding='utf-8'))['periods']['last7'] == week
+
+
+def test_daily_appends_match_single_batch(tmp_path):
+    paths = write_sample(str(tmp_path / 'exports'), 20000, days=45)
+    daily = sorted(p for p in paths if 'crm' not in p)
+    crm = [p for p in paths if 'crm' in p]
+
+    once = AnalyticsState(str(tmp_path / 'once'))
+    once.ingest(paths)
+    appended = AnalyticsState(str(tmp_path / 'appended'))
+    appended.ingest(crm + daily[:30])
+    report = AnalyticsState(str(tmp_path / 'appended')).ingest(crm + daily)
+    assert len(report['skipped']) == 31 and len(report['files']) == len(daily) - 30
+
+    expected = _dashboard(tmp_path / 'once', tmp_path / 'a.json')
+    assert _dashboard(tmp_path / 'appended', tmp_path / 'b.json') == expected
+    assert list(expected['months']) == ['2024-01'] and len(expected['forecast']) == 12
+    assert expected['periods']['last30']['metrics']['activeUsers'] <= 200
+
+
+def test_forecast_follows_exponential_trend():
+    monthly = [(f'2024-{m:02d}', 1000 * 1.1 ** m) for m in range(1, 7)]
+    result = forecast(monthly, months=3)
+    expected = [1000 * 1.1 ** m for m in (7, 8, 9)]
+    assert [item['predictedRevenue'] for item in result] == pytest.approx(expected, abs=0.01)
+    assert [item['confidence'] for item in result] == [85, 83, 81]
+    assert forecast([('2024-01', -5.0), ('2024-02', 5.0)], months=1)[0]['predictedRevenue'] == 15.0
+
+
+def test_reissued_transactions_are_counted_once(tmp_path):
+    header = 'transactionId,customerId,amount,date\n'
+    (tmp_path / 'a.csv').write_text(header + 't1,c1,100,2024-01-01\nt2,c2,50,2024-01-01\nt2,c2,50,2024-01-01\n',
+                                    encoding='utf-8')
+    (tmp_path / 'b.csv').write_text(header + 't2,c2,50,2024-01-01\nt3,c2,20,2024-01-01\n,c9,5,2024-01-01\n',
+                                    encoding='utf-8')
+    state = AnalyticsState(str(tmp_path / 'state'))
+    report = state.ingest([str(tmp_path / 'a.csv')])
+    assert (report['transactions'], report['duplicates']) == (2, 1)
+    report = AnalyticsState(str(tmp_path / 'state')).ingest([str(tmp_path / 'b.csv')])
+    assert (report['transactions'], report['duplicates'], report['rejected']) == (1, 1, 1)
+    day = AnalyticsState(str(tmp_path / 'state')).day('2024-01-01')
+    assert (day.transactions, day.income, day.buyers) == (3, 170.0, {'c1': 100.0, 'c2': 70.0})
+
+
+def test_interrupted_ingest_is_completed_not_repeated(tmp_path, monkeypatch):
+    events = tmp_path / 'events.csv'
+    events.write_text('userId,timestamp\na,2024-01-01\nb,2024-01-02\n', encoding='utf-8')
+    state = AnalyticsState(str(tmp_path / 'state'))
+    # state.json 写完、分区替换之前中断
+    monkeypatch.setattr(AnalyticsState, '_replace_pending', lambda self, keys: None)
+    state.ingest([str(events)])
+    monkeypatch.undo()
+    assert AnalyticsState(str(tmp_path / 'state')).ingest([str(events)])['skipped'] == [str(events)]
+    recovered = AnalyticsState(str(tmp_path / 'state'))
+    assert recovered.day_keys() == ['2024-01-01', '2024-01-02']
+    assert recovered.day('2024-01-01').users == {'a': 1}
+    assert not list((tmp_path / 'state' / 'days').glob('*.pending'))
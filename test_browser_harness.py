@@ -0,0 +1,122 @@
+"""browser_harness 的测试，使用 LocalSession 替身，不需要安装 Chrome"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import browser_harness
+import devserver
+from browser_harness import BrowserPool, LocalSession, run_page, run_pages
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'main.css').write_text('body { color: red; }', encoding='utf-8')
+    (tmp_path / 'app.js').write_text('window.ready = true;', encoding='utf-8')
+    (tmp_path / 'good.html').write_text(
+        '<html><head><link rel="stylesheet" href="css/main.css"></head>'
+        '<body><div id="app"><button>重新加载</button></div>'
+        '<script src="app.js"></script></body></html>', encoding='utf-8')
+    (tmp_path / 'broken.html').write_text(
+        '<html><body><script src="missing.js" defer></script></body></html>', encoding='utf-8')
+    server, base_url = devserver.start_in_thread(str(tmp_path))
+    yield str(tmp_path), base_url
+    server.shutdown()
+
+
+class CountingSession:
+    """记录同时在用的会话数"""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    created = 0
+
+    def __init__(self):
+        with CountingSession.lock:
+            CountingSession.created += 1
+
+    def open(self, url, timeout):
+        with CountingSession.lock:
+            CountingSession.active += 1
+            CountingSession.peak = max(CountingSession.peak, CountingSession.active)
+        time.sleep(0.02)
+        with CountingSession.lock:
+            CountingSession.active -= 1
+        if 'fail' in url:
+            raise RuntimeError('浏览器崩溃')
+
+    def wait_ready(self, timeout, selector=None):
+        return True
+
+    def timing(self):
+        return {'navigation': None, 'resources': []}
+
+    def console(self):
+        return []
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_local_session_collects_timing_and_resources(site):
+    root, base_url = site
+    result = run_page(LocalSession(root), base_url + 'good.html', selector='#app')
+    assert result['ok'] and result['ready']
+    assert [os.path.basename(r['name']) for r in result['resources']] == ['main.css', 'app.js']
+    nav = result['navigation']
+    assert 0 < nav['ttfb'] <= nav['dom_content_loaded'] <= nav['load']
+
+
+def test_failed_resource_is_console_error(site):
+    root, base_url = site
+    result = run_page(LocalSession(root), base_url + 'broken.html')
+    assert not result['ok']
+    assert result['errors'] == 1
+    assert 'missing.js' in result['console'][0]['message']
+
+
+def test_ready_selector(site):
+    root, base_url = site
+    session = LocalSession(root)
+    session.open(base_url + 'good.html', 5)
+    assert session.wait_ready(5, '#app')
+    assert not session.wait_ready(5, '#nothing')
+    assert session.click('重新加载')
+
+
+def test_pool_reuses_sessions_and_bounds_concurrency():
+    CountingSession.active = CountingSession.peak = CountingSession.created = 0
+    pages = [f'page{i}.html' for i in range(12)]
+    with BrowserPool(CountingSession, size=3) as pool:
+        pool.warm()
+        results = run_pages(pages, pool, 'http://example.invalid/')
+    assert [r['page'] for r in results] == pages
+    assert all(r['ok'] for r in results)
+    assert CountingSession.created == 3
+    assert CountingSession.peak <= 3
+
+
+def test_pool_replaces_broken_session():
+    CountingSession.created = 0
+    with BrowserPool(CountingSession, size=1) as pool:
+        results = run_pages(['fail.html', 'ok.html'], pool, 'http://example.invalid/')
+    assert not results[0]['ok'] and 'RuntimeError' in results[0]['error']
+    assert results[1]['ok']
+    assert CountingSession.created == 2
+
+
+def test_report(site):
+    root, base_url = site
+    with BrowserPool(lambda: LocalSession(root), size=2) as pool:
+        results = run_pages(['good.html', 'broken.html'], pool, base_url)
+    report = browser_harness.build_report(results, 2, 0.1, 'local')
+    assert report['passed'] == 1 and report['failed'] == 1
+    assert report['console_errors'] == 1
+    assert '失败' in browser_harness.format_text(report)
@@ -0,0 +1,45 @@
+"""catalog_shards 的测试：列表位置、分片清单、模块副本和工具卡片预渲染"""
+
+import json
+
+from catalog_shards import CATALOG_DIR, stage
+from js_catalog import CATALOGUES, catalog_span, load_catalogues, parse_literal
+
+
+def test_catalog_span_matches_extracted_lists():
+    catalogues = load_catalogues()
+    for name, (path, anchor, key) in CATALOGUES.items():
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        start, end = catalog_span(source, anchor, key)
+        assert source[start] == '[' and source[end - 1] == ']'
+        assert parse_literal(source[start:end]) == catalogues[name]
+
+
+def test_stage_writes_shards_stripped_modules_and_prerender(tmp_path):
+    out = tmp_path / 'stage'
+    (out / 'stale.txt').parent.mkdir(parents=True)
+    (out / 'stale.txt').write_text('old', encoding='utf-8')
+    report = stage(['index.html'], '.', str(out), parse_runs=3)
+    catalogues = load_catalogues()
+
+    manifest = json.loads((out / CATALOG_DIR / 'manifest.json').read_text(encoding='utf-8'))
+    for name, items in catalogues.items():
+        entry = manifest['catalogues'][name]
+        assert entry['count'] == len(items)
+        assert sum(shard['count'] for shard in entry['shards'].values()) == len(items)
+        for category, shard in entry['shards'].items():
+            data = json.loads((out / CATALOG_DIR / shard['file']).read_text(encoding='utf-8'))
+            assert data == [item for item in items if item['category'] == category]
+        assert json.loads((out / CATALOG_DIR / entry['all']['file']).read_text(encoding='utf-8')) == items
+    assert not (out / 'stale.txt').exists()
+
+    tools = (out / 'js' / 'modules' / 'ToolManager.js').read_text(encoding='utf-8')
+    assert 'initTools() {\n        return [];' in tools and "'多语言支持'" not in tools
+    assert report['total']['after']['minified'] < report['total']['before']['minified']
+
+    page = (out / 'index.html').read_text(encoding='utf-8')
+    ordered = sorted(catalogues['tools'], key=lambda tool: -tool['usageCount'])
+    positions = [page.index(f'data-tool-id="{tool["id"]}"') for tool in ordered]
+    assert positions == sorted(positions) and report['prerendered'] == {'index.html': len(ordered)}
+    assert '<span class="category-badge">格式转换</span>' in page
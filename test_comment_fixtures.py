@@ -0,0 +1,148 @@
+"""CommentSystem 分页存储和增量汇总的测试（通过 node 运行，没有 node 时跳过）"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from comment_fixtures import SOURCE, generate_fixture, run_bench
+
+pytestmark = pytest.mark.skipif(not shutil.which('node'), reason='需要 node')
+
+STORE_JS = r"""
+const fs = require('fs');
+const source = fs.readFileSync(process.argv[1], 'utf8').split('// 创建全局实例')[0];
+const map = new Map(Object.entries(JSON.parse(process.argv[2])));
+const storage = { getItem: k => map.has(k) ? map.get(k) : null, setItem: (k, v) => map.set(k, String(v)),
+                  removeItem: k => map.delete(k) };
+global.document = { readyState: 'complete', addEventListener() {}, querySelector() { return null; } };
+global.window = { userManagement: { getCurrentUser: () => ({ id: 'u1', role: '普通用户' }) } };
+const CommentSystem = new Function('localStorage', source + '\nreturn CommentSystem;')(storage);
+
+const system = new CommentSystem();
+system.currentUser = { id: 'u1', role: '普通用户' };
+const store = system.store;
+store.pageSize = 2;
+for (let i = 0; i < 5; i++) {
+    store.addComment('r1', { id: `c${i}`, userId: 'u1', userName: 'u1', content: `${i}`, likes: 0, likedBy: [] });
+}
+system.setRating('r1', 4);
+system.setRating('r1', 2);
+system.currentUser = { id: 'u2' };
+system.setRating('r1', 5);
+system.currentUser = { id: 'u1', role: '普通用户' };
+system.deleteComment('r1', 'c3');
+system.toggleLikeComment('r1', 'c0');
+
+const reloaded = new CommentSystem();
+const firstPage = reloaded.getComments('r1').map(c => c.id);
+const pagesAfterFirst = reloaded.store.pages.size;
+reloaded.loadMoreComments('r1');
+reloaded.loadMoreComments('r1');
+console.log(JSON.stringify({
+    stats: reloaded.store.getStats('r1'), average: reloaded.getAverageRating('r1'),
+    count: reloaded.getCommentCount('r1'), firstPage, pagesAfterFirst,
+    all: reloaded.getComments('r1').map(c => c.id), more: reloaded.hasMoreComments('r1'),
+    liked: reloaded.store.findComment('r1', 'c0').comment.likes,
+    legacy: new CommentSystem().getCommentCount('old'), oldest: new CommentSystem().getComments('old')[0].id,
+    keys: [...map.keys()].sort()
+}));
+"""
+
+
+def test_aggregates_and_pages_survive_reload():
+    legacy = {'resourceComments': json.dumps({'old': [{'id': 'new'}, {'id': 'older'}]}),
+              'resourceRatings': json.dumps({'old': [{'userId': 'x', 'rating': 3}]})}
+    result = subprocess.run(['node', '-e', STORE_JS, SOURCE, json.dumps(legacy)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    data = json.loads(result.stdout)
+    assert data['stats'] == {'pages': 3, 'comments': 4, 'ratingSum': 7, 'ratingCount': 2}
+    assert data['average'] == 3.5 and data['count'] == 4
+    assert data['firstPage'] == ['c4'] and data['pagesAfterFirst'] == 1
+    assert data['all'] == ['c4', 'c2', 'c1', 'c0'] and not data['more']
+    assert data['liked'] == 1
+    assert data['legacy'] == 2 and data['oldest'] == 'new'
+    assert 'resourceComments' not in data['keys'] and 'resourceRatings:old' in data['keys']
+
+
+PRELUDE_JS = r"""
+const fs = require('fs');
+const source = fs.readFileSync(process.argv[1], 'utf8').split('// 创建全局实例')[0];
+const map = new Map(Object.entries(JSON.parse(process.argv[2])));
+const quota = Number(process.argv[3]) || Infinity;
+const used = () => [...map.values()].reduce((n, v) => n + v.length, 0);
+const storage = {
+    getItem: k => map.has(k) ? map.get(k) : null,
+    setItem: (k, v) => {
+        const previous = map.has(k) ? map.get(k).length : 0;
+        if (used() - previous + String(v).length > quota) throw new Error('QuotaExceededError');
+        map.set(k, String(v));
+    },
+    removeItem: k => map.delete(k)
+};
+const container = { innerHTML: '', querySelectorAll: () => [] };
+global.document = { readyState: 'complete', addEventListener() {},
+                    querySelector: selector => selector.startsWith('.comments-list') ? container : null };
+global.window = { userManagement: { getCurrentUser: () => ({ id: 'u1', role: '普通用户' }) } };
+const CommentSystem = new Function('localStorage', source + '\nreturn CommentSystem;')(storage);
+"""
+
+
+def _node(body, storage, quota=0):
+    result = subprocess.run(['node', '-e', PRELUDE_JS + body, SOURCE, json.dumps(storage), str(quota)],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def _legacy(resources, comments):
+    return {'resourceComments': json.dumps({f'r{r}': [{'id': f'r{r}-{c}', 'userId': 'u1', 'content': 'x' * 50,
+                                                        'likes': 0, 'likedBy': []} for c in range(comments)]
+                                            for r in range(resources)}),
+            'resourceRatings': json.dumps({'r0': [{'userId': 'x', 'rating': 4}]})}
+
+
+def test_failed_migration_keeps_legacy_data():
+    legacy = _legacy(5, 30)
+    body = r"""
+const system = new CommentSystem();
+const keysAfterFailure = [...map.keys()].sort();
+const inMemory = [system.getCommentCount('r4'), system.getComments('r4').length, system.getAverageRating('r0')];
+map.delete('filler');
+const retried = new CommentSystem();
+console.log(JSON.stringify({ keysAfterFailure, inMemory, persistent: system.store.persistent,
+    retried: [retried.getCommentCount('r4'), retried.store.persistent],
+    keysAfterRetry: [...map.keys()].filter(k => !k.startsWith('resourceComments:')).sort() }));
+"""
+    storage = dict(legacy, filler='f' * 20000)
+    quota = sum(len(v) for v in storage.values()) + 8000
+    data = _node(body, storage, quota)
+    assert data['keysAfterFailure'] == ['filler', 'resourceComments', 'resourceRatings']
+    assert data['inMemory'] == [30, 10, 4] and not data['persistent']
+    assert data['retried'] == [30, True]
+    assert data['keysAfterRetry'] == ['resourceCommentIndex', 'resourceRatings:r0']
+
+
+def test_deleting_newest_comment_drops_empty_page():
+    body = r"""
+const system = new CommentSystem();
+system.currentUser = { id: 'u1', role: '普通用户' };
+system.deleteComment('r0', 'r0-0');
+const reloaded = new CommentSystem();
+reloaded.displayComments('r0');
+console.log(JSON.stringify({ stats: reloaded.store.getStats('r0'), shown: reloaded.getComments('r0').length,
+    more: reloaded.hasMoreComments('r0'), empty: container.innerHTML.includes('暂无评论'),
+    pageKeys: [...map.keys()].filter(k => k.startsWith('resourceComments:')).sort() }));
+"""
+    data = _node(body, _legacy(1, 21))
+    assert data['stats']['pages'] == 1 and data['stats']['comments'] == 20
+    assert data['shown'] == 20 and not data['more'] and not data['empty']
+    assert data['pageKeys'] == ['resourceComments:r0:0']
+
+
+def test_list_render_reads_no_comment_pages():
+    result = run_bench(generate_fixture(20, 30), runs=3)
+    assert result['consistent']
+    assert result['paged']['pagesLoaded'] == 0
+    assert result['paged']['writeBytes'] < result['legacy']['writeBytes']
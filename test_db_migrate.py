@@ -0,0 +1,42 @@
+"""db_migrate 的测试：sqlite 替身与 PostgreSQL 迁移的索引一致、校验和只包含实际执行的脚本"""
+
+import re
+import shutil
+
+from db_migrate import MIGRATIONS_DIR, SqliteBackend, discover_migrations, migrate, migration_status
+
+INDEX_STATEMENT = re.compile(r'\b(CREATE|DROP)\s+INDEX\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?(\w+)', re.I)
+
+
+def test_sqlite_stand_in_has_the_postgres_index_set():
+    expected = set()
+    for _, _, path in discover_migrations(MIGRATIONS_DIR):
+        with open(path, encoding='utf-8') as f:
+            sql = re.sub(r'--[^\n]*', '', f.read())
+        for action, name in INDEX_STATEMENT.findall(sql):
+            if action.upper() == 'CREATE':
+                expected.add(name)
+            else:
+                expected.discard(name)
+
+    backend = SqliteBackend()
+    migrate(backend)
+    actual = {row[0] for row in backend.query("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    assert actual == expected
+
+
+def test_checksum_covers_only_the_script_the_backend_runs(tmp_path):
+    directory = tmp_path / 'migrations'
+    shutil.copytree(MIGRATIONS_DIR, directory)
+    backend = SqliteBackend()
+    migrate(backend, str(directory))
+    states = lambda: {m['version']: m['state'] for m in migration_status(backend, str(directory))}
+    assert set(states().values()) == {'applied'}
+
+    # sqlite 执行的是 .sqlite.sql 替换脚本，只改 PostgreSQL 脚本不影响它
+    pg_script = directory / '002_session_expiry_and_history_partitions.sql'
+    pg_script.write_text(pg_script.read_text(encoding='utf-8') + '\n-- 注释\n', encoding='utf-8')
+    assert states()['002'] == 'applied'
+    override = directory / '002_session_expiry_and_history_partitions.sqlite.sql'
+    override.write_text(override.read_text(encoding='utf-8') + '\n-- 注释\n', encoding='utf-8')
+    assert states()['002'] == 'changed'
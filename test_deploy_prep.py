@@ -0,0 +1,80 @@
+"""deploy_prep 的测试：增量构建、依赖传递、SRI 重算、srcset 改写和过期输出清理"""
+
+import os
+
+import pytest
+
+from deploy_prep import build, sri_hash
+
+CSS = 'body { background: url(../img/bg.png); }\n' + '.card { margin: 0 auto; padding: 1em; }\n' * 40
+JS = 'window.app = {};\n' + 'app.render = function () { return document.body; };\n' * 40
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / 'site'
+    for name in ('css', 'js', 'img'):
+        (root / name).mkdir(parents=True)
+    (root / 'css' / 'main.css').write_text(CSS, encoding='utf-8')
+    (root / 'js' / 'app.js').write_text(JS, encoding='utf-8')
+    for name in ('bg', 'a', 'b'):
+        (root / 'img' / f'{name}.png').write_bytes(name.encode('ascii') * 100)
+    (root / 'index.html').write_text(
+        '<html><head>'
+        '<link rel="stylesheet" href="css/main.css" integrity="sha384-old" crossorigin="anonymous">'
+        '</head><body><img src="img/a.png" srcset="img/a.png 1x, img/b.png 2x">'
+        '<script src="js/app.js?v=1"></script></body></html>', encoding='utf-8')
+    return root
+
+
+def _build(site, out):
+    return build([str(site / 'index.html')], str(site), str(out), copy_patterns=[], jobs=1)
+
+
+def _touch(path, data):
+    path.write_bytes(data)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def test_rerun_without_changes_reads_nothing(site, tmp_path):
+    out = tmp_path / 'dist'
+    first = _build(site, out)
+    assert set(first['status'].values()) == {'new'} and first['rehashed'] == 6
+    page = (out / 'index.html').read_text(encoding='utf-8')
+    css = first['files']['css/main.css']['output']
+    assert f'href="{css}"' in page and f'integrity="{sri_hash((out / css).read_bytes())}"' in page
+    a, b = first['files']['img/a.png']['output'], first['files']['img/b.png']['output']
+    assert f'src="{a}" srcset="{a} 1x, {b} 2x"' in page
+    assert f'src="{first["files"]["js/app.js"]["output"]}?v=1"' in page
+    assert (out / (css + '.gz')).exists()
+
+    second = _build(site, out)
+    assert second['rehashed'] == 0 and second['compressed'] == 0 and second['removed'] == []
+    assert set(second['status'].values()) == {'unchanged'}
+    assert (out / 'index.html').read_text(encoding='utf-8') == page
+
+
+def test_css_image_change_propagates_and_stale_outputs_are_removed(site, tmp_path):
+    out = tmp_path / 'dist'
+    first = _build(site, out)
+    old_css = first['files']['css/main.css']['output']
+    old_bg = first['files']['img/bg.png']['output']
+
+    _touch(site / 'img' / 'bg.png', b'new background')
+    second = _build(site, out)
+    new_css = second['files']['css/main.css']['output']
+    assert new_css != old_css and second['files']['img/bg.png']['output'] != old_bg
+    assert second['status']['css/main.css'] == 'changed' and second['status']['index.html'] == 'changed'
+    assert second['status']['js/app.js'] == 'unchanged' and second['status']['img/a.png'] == 'unchanged'
+    # 只重新读取了图片、引用它的CSS和页面
+    assert second['rehashed'] == 3
+
+    css_text = (out / new_css).read_text(encoding='utf-8')
+    assert second['files']['img/bg.png']['output'].split('/')[-1] in css_text
+    page = (out / 'index.html').read_text(encoding='utf-8')
+    assert f'href="{new_css}"' in page and f'integrity="{sri_hash((out / new_css).read_bytes())}"' in page
+
+    assert set(second['removed']) - {old_css + '.br'} == {old_css, old_css + '.gz', old_bg}
+    assert not (out / old_css).exists() and not (out / (old_css + '.gz')).exists() and not (out / old_bg).exists()
+    assert (out / (new_css + '.gz')).exists()
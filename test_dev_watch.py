@@ -0,0 +1,79 @@
+"""dev_watch 的测试：快照索引、按变化运行的检查和 SSE 事件"""
+
+import http.client
+import os
+import shutil
+import threading
+import time
+
+from dev_watch import DevChecks, ReloadHub, SnapshotIndex, make_server, reload_event, watch
+
+
+def test_snapshot_index_reports_changes(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'a.css').write_text('a{}', encoding='utf-8')
+    (tmp_path / '.git').mkdir()
+    index = SnapshotIndex(str(tmp_path))
+    assert set(index.files) == {'css/a.css'} and index.poll() == set()
+
+    (tmp_path / 'css' / 'a.css').write_text('a{color:red}', encoding='utf-8')
+    (tmp_path / 'css' / 'new').mkdir()
+    (tmp_path / 'css' / 'new' / 'b.css').write_text('b{}', encoding='utf-8')
+    (tmp_path / '.git' / 'HEAD').write_text('x', encoding='utf-8')
+    assert index.poll() == {'css/a.css', 'css/new/b.css'}
+    shutil.rmtree(tmp_path / 'css' / 'new')
+    assert index.poll() == {'css/new/b.css'} and 'css/new' not in index.dirs
+
+    assert reload_event({'css/a.css', 'notes.md'}) == ('css', ['/css/a.css'])
+    assert reload_event({'css/a.css', 'js/app.js'}) == ('reload', ['css/a.css', 'js/app.js'])
+    assert reload_event({'site/partials/x.html', 'tool.py'}) is None
+
+
+def test_checks_follow_changed_files(tmp_path):
+    for name in ('index.html', 'js', 'site'):
+        copy = shutil.copytree if os.path.isdir(name) else shutil.copy
+        copy(name, tmp_path / name)
+    checks = DevChecks(str(tmp_path), ['index.html'])
+    assert 'js/modules/PointSystem.js' in checks.page_scripts['index.html']
+
+    result = checks.run({'js/modules/PointSystem.js'})
+    assert [item['page'] for item in result['deps']] == ['index.html'] and result['lint'] == []
+    assert checks.run({'css/main.css'})['deps'] == []
+
+    assert checks.builder.build()['written'] == []
+    nav = tmp_path / 'site' / 'partials' / 'index' / 'nav-navbar.html'
+    nav.write_text(nav.read_text(encoding='utf-8').replace('navbar', 'navbar top', 1), encoding='utf-8')
+    result = checks.run({'site/partials/index/nav-navbar.html'})
+    assert result['outputs'] == ['index.html']
+    assert [os.path.basename(item['path']) for item in result['lint']] == ['index.html']
+
+
+def test_live_reload_events(tmp_path):
+    (tmp_path / 'index.html').write_text('<html><body><p>hi</p></body></html>', encoding='utf-8')
+    (tmp_path / 'main.css').write_text('p{}', encoding='utf-8')
+    hub = ReloadHub()
+    server = make_server(str(tmp_path), '127.0.0.1', 0, hub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch, args=(str(tmp_path), hub, False, 0.02, 0.02, stop), daemon=True)
+    watcher.start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        conn.request('GET', '/index.html')
+        page = conn.getresponse().read()
+        assert page.endswith(b'<script src="/__livereload.js"></script></body></html>')
+
+        events = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        events.request('GET', '/__livereload')
+        stream = events.getresponse()
+        assert stream.getheader('Content-Type') == 'text/event-stream'
+        assert stream.readline() == b'retry: 1000\n'
+        time.sleep(0.1)
+        (tmp_path / 'main.css').write_text('p{color:red}', encoding='utf-8')
+        lines = [stream.readline() for _ in range(3)]
+        assert lines[1:] == [b'event: css\n', b'data: ["/main.css"]\n']
+    finally:
+        stop.set()
+        hub.close()
+        server.shutdown()
+        server.server_close()
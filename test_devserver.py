@@ -0,0 +1,95 @@
+"""devserver 的测试：Range、条件请求、预压缩文件和按需gzip缓存"""
+
+import gzip
+import http.client
+import os
+
+import pytest
+
+import devserver
+
+TEXT = ('console.log("资源中心");\n' * 200).encode('utf-8')
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / 'app.js').write_bytes(TEXT)
+    (tmp_path / 'lib.js').write_bytes(TEXT)
+    (tmp_path / 'lib.js.br').write_bytes(b'brotli-bytes')
+    (tmp_path / 'lib.js.gz').write_bytes(gzip.compress(TEXT))
+    (tmp_path / 'old.js').write_bytes(TEXT)
+    (tmp_path / 'old.js.gz').write_bytes(b'stale')
+    # 比原文件旧的预压缩文件不使用
+    os.utime(tmp_path / 'old.js.gz', (1, 1))
+    (tmp_path / 'small.txt').write_bytes(b'tiny')
+    srv, _ = devserver.start_in_thread(str(tmp_path))
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(server, path, **headers):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    try:
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, response.read()
+    finally:
+        conn.close()
+
+
+def test_byte_ranges(server):
+    status, headers, body = _get(server, '/app.js', Range='bytes=0-9')
+    assert status == 206 and body == TEXT[:10]
+    assert headers['content-range'] == f'bytes 0-9/{len(TEXT)}' and 'content-encoding' not in headers
+    status, headers, body = _get(server, '/app.js', Range='bytes=-5', **{'Accept-Encoding': 'gzip'})
+    assert status == 206 and body == TEXT[-5:]
+    status, headers, body = _get(server, '/app.js', Range=f'bytes={len(TEXT)}-')
+    assert status == 416 and headers['content-range'] == f'bytes */{len(TEXT)}' and body == b''
+
+
+def test_conditional_requests_per_representation(server):
+    status, plain, body = _get(server, '/app.js')
+    assert status == 200 and body == TEXT and plain['cache-control'] == 'no-cache'
+    status, gz, body = _get(server, '/app.js', **{'Accept-Encoding': 'gzip'})
+    assert status == 200 and gz['content-encoding'] == 'gzip' and gzip.decompress(body) == TEXT
+    assert gz['etag'] != plain['etag'] and gz['etag'].endswith('-gz"') and gz['vary'] == 'Accept-Encoding'
+
+    assert _get(server, '/app.js', **{'If-None-Match': plain['etag']})[0] == 304
+    status, headers, body = _get(server, '/app.js', **{'If-None-Match': gz['etag'], 'Accept-Encoding': 'gzip'})
+    assert status == 304 and headers['etag'] == gz['etag'] and body == b''
+    # 缓存里是 gzip 版本的 ETag 时，不接受 gzip 的请求要拿到完整的原始内容
+    status, headers, body = _get(server, '/app.js', **{'If-None-Match': gz['etag']})
+    assert status == 200 and body == TEXT and headers['etag'] == plain['etag']
+    assert _get(server, '/app.js', **{'If-Modified-Since': plain['last-modified']})[0] == 304
+
+
+def test_precompressed_siblings(server):
+    status, headers, body = _get(server, '/lib.js', **{'Accept-Encoding': 'gzip, br'})
+    assert headers['content-encoding'] == 'br' and body == b'brotli-bytes' and headers['etag'].endswith('-br"')
+    status, headers, body = _get(server, '/lib.js', **{'Accept-Encoding': 'gzip, br;q=0'})
+    assert headers['content-encoding'] == 'gzip' and gzip.decompress(body) == TEXT
+    status, headers, body = _get(server, '/old.js', **{'Accept-Encoding': 'gzip'})
+    assert headers['content-encoding'] == 'gzip' and gzip.decompress(body) == TEXT
+
+
+def test_on_the_fly_gzip_is_cached(server):
+    cache = server.RequestHandlerClass.cache
+    _get(server, '/app.js', **{'Accept-Encoding': 'gzip'})
+    hits = cache.hits
+    status, headers, body = _get(server, '/app.js', **{'Accept-Encoding': 'gzip'})
+    assert cache.hits == hits + 1 and gzip.decompress(body) == TEXT
+    assert any(key[2] == 'gzip' for key in cache.items)
+    status, headers, body = _get(server, '/small.txt', **{'Accept-Encoding': 'gzip'})
+    assert body == b'tiny' and 'content-encoding' not in headers
+
+
+def test_lru_evicts_by_bytes():
+    cache = devserver.LRUCache(max_bytes=10)
+    cache.put('a', b'12345')
+    cache.put('b', b'12345')
+    cache.get('a')
+    cache.put('c', b'123')
+    assert list(cache.items) == ['a', 'c'] and cache.size == 8
+    cache.put('huge', b'x' * 11)
+    assert 'huge' not in cache.items
@@ -0,0 +1,111 @@
+"""html_tokenizer 和 html_checks 的测试：分块读取不影响结果、原始文本、注释、属性和各个检查"""
+
+import io
+
+import pytest
+
+from html_checks import (
+    Check, DocumentCheck, JsStringCheck, LastScriptsCheck, MainToBodyCheck, ScriptTagCheck, TagBalanceCheck,
+    TextContentCheck, all_findings, run_checks
+)
+from html_tokenizer import COMMENT, DOCTYPE, ENDTAG, SCRIPT, STARTTAG, STYLE, TEXT, attr, tokenize, tokenize_string
+
+DOCUMENT = '''<!DOCTYPE html>
+<html lang="zh">
+<head>
+    <meta charset=utf-8>
+    <title>资源中心</title>
+    <style>a > b { color: red } /* </p> */</style>
+</head>
+<body class=home data-x='a > b'>
+    <!-- 注释里的 <div> 不是标签 -->
+    <main id="app"><p>你好 <br/>世界</p></main>
+    <img src=logo.png alt="">
+    <script>if (a < b && "</div>") { console.log('<b>'); }</script>
+    <script src="app.js" defer></script>
+</body>
+</html>
+'''
+
+
+def _tokens(chunk_size):
+    return list(tokenize(io.BytesIO(DOCUMENT.encode('utf-8')), chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_chunk_size_does_not_change_tokens(chunk_size):
+    assert _tokens(chunk_size) == _tokens(1 << 16)
+
+
+def test_raw_text_comments_and_attributes():
+    tokens = list(tokenize_string(DOCUMENT))
+    kinds = [t.kind for t in tokens]
+    assert kinds[0] == DOCTYPE
+
+    style = next(t for t in tokens if t.kind == STYLE)
+    assert style.data == 'a > b { color: red } /* </p> */'
+    scripts = [t for t in tokens if t.kind == SCRIPT]
+    assert [t.data for t in scripts] == ['if (a < b && "</div>") { console.log(\'<b>\'); }']
+    assert not any(t.kind == STARTTAG and t.name in ('div', 'b') for t in tokens)
+    assert sum(1 for t in tokens if t.kind == ENDTAG and t.name == 'script') == 2
+
+    comment = next(t for t in tokens if t.kind == COMMENT)
+    assert comment.data == ' 注释里的 <div> 不是标签 ' and comment.line == 9 and comment.col == 5
+
+    starts = {t.name: t for t in tokens if t.kind == STARTTAG}
+    assert attr(starts['meta'], 'charset') == 'utf-8'
+    assert attr(starts['body'], 'class') == 'home' and attr(starts['body'], 'data-x') == 'a > b'
+    assert attr(starts['img'], 'src') == 'logo.png' and attr(starts['img'], 'alt') == ''
+    assert attr(starts['script'], 'defer', 'missing') is None
+    assert starts['br'].selfclosing and not starts['p'].selfclosing
+
+    title = tokens[kinds.index(TEXT, tokens.index(starts['title']))]
+    assert title.data == '资源中心'
+    # 偏移是字节偏移，列按字符计
+    assert DOCUMENT.encode('utf-8')[title.offset:title.end].decode('utf-8') == '资源中心'
+    assert (title.line, title.col) == (5, 12)
+
+
+def _run(tmp_path, content, checks):
+    path = tmp_path / 'page.html'
+    path.write_text(content, encoding='utf-8')
+    return run_checks(str(path), checks)
+
+
+def test_checks_on_a_well_formed_page(tmp_path):
+    checks = [DocumentCheck(), TagBalanceCheck(), ScriptTagCheck(), JsStringCheck(), MainToBodyCheck(),
+              TextContentCheck(), LastScriptsCheck(count=1)]
+    results = _run(tmp_path, DOCUMENT, checks)
+    assert all_findings(results) == []
+    assert results['document']['main_count'] == 1 and results['document']['script_count'] == 2
+    assert results['document']['body_children'] == ['main', 'img', 'script', 'script']
+    assert results['tag-balance']['unclosed'] == []
+    assert (results['script-tags']['start_count'], results['script-tags']['end_count']) == (2, 2)
+    assert results['main-to-body']['found'] and results['main-to-body']['script_starts'] == 2
+    assert results['text-content']['head'].startswith('资源中心')
+    assert results['last-scripts']['total'] == 2 and results['last-scripts']['blocks'][0]['source'].startswith('<script src')
+
+
+def test_checks_report_broken_markup(tmp_path):
+    page = ('<html><body><main><div><span></div></main>text after main\n'
+            "<script>var s = 'oops;</script><script>if (x) {\n</body>")
+    results = _run(tmp_path, page, [DocumentCheck(), TagBalanceCheck(), ScriptTagCheck(), JsStringCheck(),
+                                    MainToBodyCheck(), TextContentCheck()])
+    assert 'head' in ' '.join(item['message'] for item in results['document']['findings'])
+    assert any(item['level'] == 'error' and '</div>' in item['message'] for item in results['tag-balance']['findings'])
+    assert results['script-tags']['start_count'] == 2 and results['script-tags']['end_count'] == 1
+    assert any('单引号' in item['message'] for item in results['js-strings']['findings'])
+    assert results['main-to-body']['text'] == ''  # 第二个script未闭合，</body> 在脚本内容里
+
+    # 脚本被当成页面文本输出时，文本末尾会出现JavaScript关键字
+    leaked = _run(tmp_path, '<html><body><p>欢迎</p>function init() { return 1; }</body></html>',
+                  [TextContentCheck()])['text-content']
+    assert leaked['keywords'] == ['function', 'return'] and leaked['findings']
+
+
+def test_base_check_ignores_events(tmp_path):
+    class Counter(Check):
+        name = 'counter'
+        kinds = (STARTTAG,)
+
+    assert _run(tmp_path, '<p>x</p>', [Counter()]) == {'counter': {'findings': []}}
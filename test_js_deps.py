@@ -0,0 +1,23 @@
+"""js_deps 的测试：重复定义的全局变量和生效的定义"""
+
+from js_deps import analyze, changed_winners
+
+
+def test_duplicate_globals_report_the_effective_definition(tmp_path):
+    (tmp_path / 'js').mkdir()
+    (tmp_path / 'js' / 'a.js').write_text('window.openPanel = function () {};\nwindow.onlyA = 1;\n', encoding='utf-8')
+    page = tmp_path / 'index.html'
+    page.write_text('<html><body>\n<script src="js/a.js" defer></script>\n'
+                    '<script>window.openPanel = function () {};</script>\n'
+                    '<button onclick="openPanel()">x</button>\n</body></html>\n', encoding='utf-8')
+
+    _, report = analyze(str(page), str(tmp_path))
+    duplicates = report['before']['duplicates']
+    assert [item['name'] for item in duplicates] == ['openPanel']
+    # 内联脚本在解析时执行，defer 的 a.js 之后执行，所以 a.js 的定义生效
+    assert duplicates[0]['scripts'] == ['<内联脚本 第3行>', 'js/a.js']
+    assert duplicates[0]['winner'] == 'js/a.js'
+    assert changed_winners(report) == []
+
+    report['after']['duplicates'][0]['winner'] = '<内联脚本 第3行>'
+    assert changed_winners(report) == [{'name': 'openPanel', 'before': 'js/a.js', 'after': '<内联脚本 第3行>'}]
@@ -0,0 +1,65 @@
+"""js_minify 和 bundle_assets 的测试：正则与除号、模板字符串、依赖换行的语句、source map 和页面中的 bundle 路径"""
+
+import json
+import shutil
+import subprocess
+
+from bundle_assets import bundle_page
+from js_minify import encode_mappings, minify, tokenize
+
+
+def test_regex_and_division():
+    assert [(kind, text) for kind, text, _ in tokenize('a = b / c; r = /x/g') if kind != 'space'] == [
+        ('word', 'a'), ('punct', '='), ('word', 'b'), ('punct', '/'), ('word', 'c'), ('punct', ';'),
+        ('word', 'r'), ('punct', '='), ('regex', '/x/g')]
+    assert minify('var a = b / c / d;\nvar r = x.replace(/\\/+$/g, "");')[0] == \
+        'var a=b/c/d;\nvar r=x.replace(/\\/+$/g,"");'
+    assert minify('return /ab+c/i.test(s)')[0] == 'return/ab+c/i.test(s)'
+    assert minify('a = b\n/ c')[0] == 'a=b\n/c'
+
+
+def test_template_literals_keep_their_content():
+    code, _ = minify('const s = `a  ${ `b ${c}` } // not comment`;  // real\nx')
+    assert code == 'const s=`a  ${`b ${c}`} // not comment`;\nx'
+    code, lines = minify('html = `<div>\n    ${name}\n</div>`;\ny()')
+    assert code == 'html=`<div>\n    ${name}\n</div>`;\ny()'
+    assert lines == [(0, 0), (1, 0), (2, 0), (3, 0)]
+
+
+def test_newlines_that_asi_depends_on_are_kept():
+    assert minify('function f() {\n  return\n  a + b;\n}')[0] == 'function f(){\nreturn\na+b;\n}'
+    assert minify('a\n++b')[0] == 'a\n++b'
+    assert minify('x = a++ + +b - -c')[0] == 'x=a++ + +b- -c'
+    assert minify('a = 1 // c\n/* block */ b = 2')[0] == 'a=1\nb=2'
+
+
+def test_source_map_mappings():
+    code, lines = minify('// 头部注释\nfunction f() {\n    return 1;\n}\n')
+    assert code == 'function f(){\nreturn 1;\n}'
+    assert lines == [(1, 0), (2, 4), (3, 0)]
+    assert encode_mappings([(0, line, col) for line, col in lines]) == 'AACA;AACI;AACJ'
+    assert encode_mappings([(0, 0, 0), (0, 1, 2), None, (1, 0, 0)]) == 'AAAA;AACE;;ACDF'
+
+
+def test_bundle_src_is_relative_to_the_page(tmp_path):
+    site = tmp_path / 'site'
+    (site / 'js').mkdir(parents=True)
+    (site / 'docs').mkdir()
+    (site / 'js' / 'a.js').write_text('var total = 1;\n', encoding='utf-8')
+    (site / 'js' / 'b.js').write_text('total = total / 2\n', encoding='utf-8')
+    (site / 'docs' / 'page.html').write_text(
+        '<html><body>\n<script src="../js/a.js"></script>\n<script src="/js/b.js"></script>\n</body></html>',
+        encoding='utf-8')
+    out = tmp_path / 'dist'
+    report = bundle_page(str(site / 'docs' / 'page.html'), str(out), str(site))
+    (bundle,) = report['bundles']
+    assert bundle['src'].startswith('../js/bundle1.') and bundle['sources'] == ['js/a.js', 'js/b.js']
+    page = (out / 'docs' / 'page.html').read_text(encoding='utf-8')
+    assert f'<script src="{bundle["src"]}"></script>' in page
+    assert (out / 'docs' / bundle['src']).resolve().is_file()
+    source_map = json.loads((out / 'js' / (bundle['src'][6:] + '.map')).read_text(encoding='utf-8'))
+    assert source_map['sources'] == ['a.js', 'b.js']
+    if shutil.which('node'):
+        result = subprocess.run(['node', '-e', open(bundle['path'], encoding='utf-8').read() + ';console.log(total)'],
+                                capture_output=True, text=True)
+        assert result.stdout.strip() == '0.5'
@@ -0,0 +1,163 @@
+"""migrate_users 的测试，使用本地 HTTP 服务模拟 PostgREST 的 users 接口"""
+
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import migrate_users
+from migrate_users import RestClient, iter_json_records, migrate
+
+
+class FakePostgrest:
+    """users 表的替身：用户名冲突时忽略，邮箱冲突时返回 409；可以让前几次请求返回 503"""
+
+    def __init__(self, fail_first=0):
+        self.rows = {}
+        self.emails = set()
+        self.requests = 0
+        self.fail_first = fail_first
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status, payload = fake.handle(self.path, self.headers, json.loads(body))
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, path, headers, rows):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            fail = self.requests <= self.fail_first
+        try:
+            if headers['apikey'] != 'secret' or path != '/rest/v1/users?on_conflict=username':
+                return 401, {'message': 'bad request'}
+            if fail:
+                return 503, {'message': 'unavailable'}
+            with self.lock:
+                new = [row for row in rows if row['username'] not in self.rows]
+                if any(row['email'] in self.emails for row in new):
+                    return 409, {'message': 'duplicate key value violates unique constraint "users_email_key"'}
+                for row in new:
+                    self.rows[row['username']] = row
+                    self.emails.add(row['email'])
+            return 201, None
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(migrate_users.time, 'sleep', lambda seconds: None)
+
+
+def write_users(path, users):
+    path.write_text(json.dumps(users, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def sample_users(n):
+    return [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'pw'} for i in range(n)]
+
+
+def test_stream_reader_handles_arrays_and_json_lines():
+    users = sample_users(50)
+    text = json.dumps(users, indent=2)
+    assert list(iter_json_records(io.StringIO(text), chunk_size=64)) == users
+    lines = '\n'.join(json.dumps(u) for u in users)
+    assert list(iter_json_records(io.StringIO(lines), chunk_size=64)) == users
+    assert list(iter_json_records(io.StringIO('[]'))) == []
+
+
+def test_bulk_upsert_uses_few_requests(tmp_path):
+    users = sample_users(2000)
+    users += [{'username': 'USER5', 'email': 'other@example.com'},      # 用户名重复（大小写不同）
+              {'username': 'fresh', 'email': 'User7@Example.com'},      # 邮箱重复
+              {'username': '', 'email': 'nobody@example.com'}]          # 无效
+    path = write_users(tmp_path / 'users.json', users)
+    server = FakePostgrest()
+    try:
+        stats = migrate(path, RestClient(server.url, 'secret'), batch_size=500, concurrency=3,
+                        checkpoint_path=str(tmp_path / 'ckpt.json'))
+    finally:
+        server.close()
+    assert stats['written'] == 2000 and stats['failed'] == 0
+    assert stats['duplicates'] == 2 and stats['invalid'] == 1
+    assert server.requests == 4
+    assert server.peak <= 3
+    assert server.rows['user3']['password'] == migrate_users.UNUSABLE_PASSWORD
+
+
+def test_retries_transient_errors(tmp_path, no_sleep):
+    path = write_users(tmp_path / 'users.json', sample_users(100))
+    server = FakePostgrest(fail_first=2)
+    try:
+        stats = migrate(path, RestClient(server.url, 'secret'), batch_size=100, concurrency=1)
+    finally:
+        server.close()
+    assert stats['written'] == 100
+    assert stats['retries'] == 2 and server.requests == 3
+
+
+def test_conflicting_row_is_isolated(tmp_path):
+    path = write_users(tmp_path / 'users.json', sample_users(64))
+    server = FakePostgrest()
+    server.emails.add('user17@example.com')        # 已被其他用户名占用的邮箱
+    try:
+        stats = migrate(path, RestClient(server.url, 'secret'), batch_size=64, concurrency=1)
+    finally:
+        server.close()
+    assert stats['written'] == 63 and stats['failed'] == 1
+    assert stats['errors'][0]['username'] == 'user17'
+    assert len(server.rows) == 63
+
+
+def test_resume_from_checkpoint(tmp_path):
+    path = write_users(tmp_path / 'users.json', sample_users(1000))
+    checkpoint = str(tmp_path / 'ckpt.json')
+    server = FakePostgrest()
+    original = server.handle
+
+    def rejecting(path, headers, rows):
+        # 第一次运行时包含 user250 的批次一直被拒绝
+        if any(row['username'] == 'user250' for row in rows):
+            return 400, {'message': 'rejected'}
+        return original(path, headers, rows)
+
+    try:
+        client = RestClient(server.url, 'secret')
+        server.handle = rejecting
+        first = migrate(path, client, batch_size=100, concurrency=2, checkpoint_path=checkpoint)
+        assert first['failed'] == 1 and len(server.rows) == 999
+        server.handle = original
+        server.requests = 0
+        second = migrate(path, client, batch_size=100, concurrency=2, checkpoint_path=checkpoint)
+    finally:
+        server.close()
+    assert second['skipped_batches'] == 9
+    assert server.requests == 1
+    assert second['failed'] == 0 and len(server.rows) == 1000
@@ -0,0 +1,68 @@
+"""optimize_media 的测试：图片尺寸读取、<img> 改写、字符收集和 deploy_prep --media"""
+
+import struct
+import zlib
+
+import deploy_prep
+import optimize_media
+from optimize_media import image_size, optimize, used_characters
+
+
+def png(width, height):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + b'\x80\x40\x20' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+def test_image_size_from_headers(tmp_path):
+    samples = {
+        'a.png': png(37, 21),
+        'b.gif': b'GIF89a' + struct.pack('<HH', 640, 480) + b'\x00' * 20,
+        'c.jpg': (b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+                  + b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 300, 1200) + b'\x00' * 12),
+        'd.webp': b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x00' * 8 + (799).to_bytes(3, 'little')
+                  + (599).to_bytes(3, 'little'),
+    }
+    for name, data in samples.items():
+        (tmp_path / name).write_bytes(data)
+    assert image_size(tmp_path / 'a.png') == (37, 21)
+    assert image_size(tmp_path / 'b.gif') == (640, 480)
+    assert image_size(tmp_path / 'c.jpg') == (1200, 300)
+    assert image_size(tmp_path / 'd.webp') == (800, 600)
+
+
+def test_pages_get_dimensions_lazy_loading_and_deploy(tmp_path, monkeypatch):
+    site = tmp_path / 'site'
+    (site / 'img').mkdir(parents=True)
+    for name in ('hero', 'logo', 'card', 'footer'):
+        (site / 'img' / f'{name}.png').write_bytes(png(64, 32))
+    (site / 'app.js').write_text("const title = '积分商城'; const hint = \"\\u6392\\u884c\";", encoding='utf-8')
+    (site / 'index.html').write_text(
+        '<html><body><h1>资源中心</h1>'
+        '<img src="img/hero.png" alt="首页横幅">'
+        '<img src="img/logo.png" width="10" height="5">'
+        '<img src="img/card.png" alt="卡片">'
+        '<img src="img/footer.png" loading="eager" />'
+        '<script src="app.js"></script></body></html>', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+
+    report = optimize([str(site / 'index.html')], str(site), jobs=1)
+    staged = (tmp_path / optimize_media.STAGE_DIR / 'index.html').read_text(encoding='utf-8')
+    assert report['pages']['index.html'] == {
+        'dimensions': 3, 'lazy': 1, 'pictures': len(report['formats']) and 3}
+    assert 'src="img/hero.png" alt="首页横幅" width="64" height="32">' in staged or '<picture>' in staged
+    assert 'width="10" height="5">' in staged
+    assert 'alt="卡片" width="64" height="32" loading="lazy" decoding="async">' in staged
+    assert 'loading="eager" width="64" height="32" />' in staged
+
+    chars = used_characters([str(site / 'index.html')], str(site))
+    assert set('资源中心首页横幅积分商城排行') <= set(chars)
+
+    result = deploy_prep.build([str(site / 'index.html')], str(site), str(tmp_path / 'dist'), [], jobs=1,
+                               media=True)
+    deployed = (tmp_path / 'dist' / 'index.html').read_text(encoding='utf-8')
+    assert 'loading="lazy"' in deployed
+    assert result['files']['img/card.png']['output'].startswith('img/card.')
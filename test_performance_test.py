@@ -0,0 +1,21 @@
+"""performance_test 的测试：网络错误按URL记为失败，不中断基准测试"""
+
+import devserver
+from performance_test import failed, fetch, load_page_once
+
+
+def test_refused_and_missing_urls_are_recorded(tmp_path):
+    (tmp_path / 'index.html').write_text('<html><body>ok</body></html>', encoding='utf-8')
+    server, base_url = devserver.start_in_thread(str(tmp_path))
+    try:
+        refused = 'http://127.0.0.1:1/app.js'
+        run = load_page_once(base_url + 'index.html', [refused, base_url + 'missing.js'], concurrency=2)
+    finally:
+        server.shutdown()
+        server.server_close()
+    page, refused_result, missing = run['resources']
+    assert not failed(page) and page['raw_bytes'] == len('<html><body>ok</body></html>')
+    assert refused_result['status'] == 0 and 'ConnectionRefused' in refused_result['error']
+    assert missing['status'] == 404 and missing['error'] is None and failed(missing)
+    assert run['errors'] == 2 and run['requests'] == 3
+    assert failed(fetch('http://127.0.0.1:1/'))
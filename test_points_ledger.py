@@ -0,0 +1,149 @@
+"""points_ledger 的测试：幂等写入、上限校验、物化余额和汇总、HTTP接口"""
+
+import json
+import os
+import shutil
+import subprocess
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from points_ledger import LEDGER_TZ, MAX_BACKDATE, bench, open_ledger, start_in_thread
+
+DAY1 = datetime(2024, 3, 31, 23, 0, tzinfo=LEDGER_TZ)
+DAY2 = datetime(2024, 4, 1, 9, 0, tzinfo=LEDGER_TZ)
+
+
+def _entry(key, kind, amount, user='u1', at=None):
+    entry = {'key': key, 'userId': user, 'type': kind, 'subType': kind, 'amount': amount}
+    if at is not None:
+        entry['timestamp'] = int(at.timestamp() * 1000)
+    return entry
+
+
+def test_batches_are_idempotent_and_checked_in_order():
+    ledger = open_ledger()
+    results = ledger.apply([_entry('a', 'earn', 150), _entry('b', 'spend', 200), _entry('c', 'earn', 60),
+                            _entry('d', 'spend', 100), _entry('a', 'earn', 150), _entry('e', 'earn', 5, 'u2')],
+                           DAY1)
+    assert [r['status'] for r in results] == ['applied', 'insufficient', 'limit', 'applied', 'duplicate', 'applied']
+    assert results[4]['id'] == results[0]['id'] and results[3]['balance'] == 50
+
+    # 重试整批：已记账的返回第一次的结果，被拒绝的可以重新尝试；第二天的上限重新计算
+    retry = ledger.apply([_entry('a', 'earn', 150), _entry('c', 'earn', 60), _entry('f', 'earn', 200)], DAY2)
+    assert [r['status'] for r in retry] == ['duplicate', 'applied', 'limit']
+    assert retry[0]['balance'] == 150 and retry[1]['balance'] == 110
+
+    summary = ledger.summary('u1', DAY2)
+    assert (summary['balance'], summary['earnedTotal'], summary['spentTotal']) == (110, 210, 100)
+    assert summary['today'] == {'earned': 60, 'spent': 0}
+    assert summary['month'] == {'earned': 60, 'spent': 0}
+    assert ledger.summary('u1', DAY1)['today'] == {'earned': 150, 'spent': 100}
+    assert ledger.summary('nobody', DAY2)['balance'] == 0
+
+    page = ledger.history('u1', limit=2)
+    assert [e['key'] for e in page] == ['c', 'd']
+    assert [e['key'] for e in ledger.history('u1', before=page[-1]['id'])] == ['a']
+
+
+def test_offline_entries_count_toward_the_day_they_happened():
+    ledger = open_ledger()
+    # 23:00 记录、零点之后才提交：计入前一天（也是前一个月）的上限和汇总
+    results = ledger.apply([_entry('late', 'earn', 150, at=DAY1), _entry('late2', 'earn', 100, at=DAY1),
+                            _entry('now', 'earn', 100, at=DAY2)], DAY2)
+    assert [r['status'] for r in results] == ['applied', 'limit', 'applied']
+    assert ledger.summary('u1', DAY1)['today'] == {'earned': 150, 'spent': 0}
+    assert ledger.summary('u1', DAY1)['month'] == {'earned': 150, 'spent': 0}
+    summary = ledger.summary('u1', DAY2)
+    assert summary['today'] == {'earned': 100, 'spent': 0} and summary['balance'] == 250
+    assert summary['periods'] == {'today': '2024-04-01', 'month': '2024-04'} and summary['utcOffsetMinutes'] == 480
+    assert [e['createdAt'] for e in ledger.history('u1')][1] == DAY1.isoformat()
+
+    # 未来的时间按提交时间计，过早的时间按 MAX_BACKDATE 计
+    ledger.apply([_entry('future', 'earn', 10, at=DAY2 + timedelta(days=3)),
+                  _entry('ancient', 'earn', 10, at=DAY2 - timedelta(days=400)),
+                  dict(_entry('overflow', 'earn', 10, user='u2'), timestamp=1e20)], DAY2)
+    created = {e['key']: e['createdAt'] for e in ledger.history('u1')}
+    assert created['future'] == DAY2.isoformat()
+    assert created['ancient'] == (DAY2 - MAX_BACKDATE).isoformat()
+    assert ledger.history('u2')[0]['createdAt'] == DAY2.isoformat()
+    assert ledger.summary('u1', DAY2 - MAX_BACKDATE)['today']['earned'] == 10
+
+
+POINTS_JS = r"""
+const fs = require('fs');
+const source = fs.readFileSync(process.argv[1], 'utf8').split('// 创建全局实例')[0];
+const storage = { getItem: () => null, setItem() {}, removeItem() {} };
+global.document = { addEventListener() {}, getElementById: () => null, querySelector: () => null,
+                    querySelectorAll: () => [] };
+global.window = { appConfig: { api: { pointsLedgerUrl: 'http://ledger/points' } },
+                  userManagement: { getCurrentUser: () => ({ id: 'u1' }) } };
+const PointSystem = new Function('localStorage', source + '\nreturn PointSystem;')(storage);
+const system = new PointSystem();
+const [summary, now, pending] = JSON.parse(process.argv[2]);
+Date.now = () => now;
+system.ledger.pending = pending;
+system.applyLedgerSummary(summary);
+console.log(JSON.stringify({ today: system.getTodayEarnedPoints(), month: system.getMonthlyEarnedPoints(),
+    keys: [system.getPeriodKey(now, 'today'), system.getPeriodKey(now, 'month')] }));
+"""
+
+
+@pytest.mark.skipif(not shutil.which('node'), reason='需要 node')
+def test_point_system_uses_the_ledger_day_boundary():
+    ledger = open_ledger()
+    # 东八区 4 月 1 日 07:00，即 UTC 3 月 31 日 23:00：无论浏览器在哪个时区都已经是新的一天、新的一月
+    now = datetime(2024, 3, 31, 23, 0, tzinfo=timezone.utc)
+    ledger.apply([_entry('a', 'earn', 30, at=now - timedelta(hours=8)), _entry('b', 'earn', 20, at=now)], now)
+    pending = [_entry('c', 'earn', 5, at=now - timedelta(hours=8)), _entry('d', 'earn', 7, at=now)]
+    args = json.dumps([ledger.summary('u1', now), int(now.timestamp() * 1000), pending])
+    source = os.path.join('js', 'modules', 'PointSystem.js')
+    result = subprocess.run(['node', '-e', POINTS_JS, source, args], capture_output=True, text=True,
+                            env=dict(os.environ, TZ='America/Los_Angeles'))
+    assert result.returncode == 0, result.stderr
+    data = json.loads(result.stdout)
+    assert data['keys'] == ['2024-04-01', '2024-04']
+    assert data['today'] == 27 and data['month'] == 27
+
+
+def test_materialized_balances_match_ledger():
+    ledger = open_ledger()
+    report = bench(ledger, users=30, per_user=40, batch=64, queries=20)
+    assert report['consistent'] and report['entries'] + report['rejected'] == 30 * 40
+    assert report['replay']['duplicates'] == report['replay']['entries']
+
+    cur = ledger.conn.cursor()
+    cur.execute("SELECT user_id, SUM(CASE kind WHEN 'earn' THEN amount ELSE -amount END), "
+                "SUM(CASE kind WHEN 'earn' THEN amount ELSE 0 END) FROM points_ledger GROUP BY user_id")
+    from_ledger = {user: (balance, earned) for user, balance, earned in cur.fetchall()}
+    cur.execute('SELECT user_id, balance, earned_total FROM points_balances')
+    assert {user: (balance, earned) for user, balance, earned in cur.fetchall()} == from_ledger
+    cur.execute("SELECT user_id, SUM(earned) FROM points_rollups WHERE length(period) = 10 GROUP BY user_id")
+    assert {user: earned for user, earned in cur.fetchall()} == {user: v[1] for user, v in from_ledger.items()}
+
+
+def test_http_batch_and_queries():
+    server, base = start_in_thread(open_ledger())
+    try:
+        body = json.dumps({'entries': [_entry('k1', 'earn', 20), _entry('k2', 'spend', 5)]}).encode()
+        request = urllib.request.Request(base + 'points/batch', body, {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            data = json.load(response)
+        assert [r['status'] for r in data['results']] == ['applied', 'applied']
+        assert data['balances']['u1']['balance'] == 15
+
+        with urllib.request.urlopen(base + 'points/u1') as response:
+            assert json.load(response)['today'] == {'earned': 20, 'spent': 5}
+        with urllib.request.urlopen(base + 'points/u1/history?limit=1') as response:
+            assert [e['key'] for e in json.load(response)['entries']] == ['k2']
+
+        bad = urllib.request.Request(base + 'points/batch', b'{"entries": [{"key": "x"}]}')
+        try:
+            urllib.request.urlopen(bad)
+            raise AssertionError('应返回 400')
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,47 @@
+"""prerender_routes 的测试：路由发现、路由页面和首屏时间测量"""
+
+from catalog_shards import prerender_tools
+from prerender_routes import discover_routes, measure, render_route, stage
+
+NAVIGATION = "registerDefaultRoutes() {\n    const commonRoutes = ['upload', 'browser'];\n}"
+
+PAGE = b'''<html><body class="home">
+<nav class="nav-container"><ul>
+<li><a href="#tools" class="link">Tools</a></li>
+<li><a href="#browser">Browser</a><br></li>
+<li><a href="about.html">About</a></li>
+</ul></nav>
+<a href="#outside">not in nav</a>
+<div id="toolsGrid"></div>
+</body></html>'''
+
+
+def test_routes_follow_navigation_system_order():
+    assert discover_routes(PAGE, NAVIGATION) == ['tools', 'browser', 'upload']
+
+    page = render_route(PAGE, 'tools')
+    assert b'<body class="home" data-route="tools">' in page
+    assert b'<a href="#tools" class="link active">' in page
+    assert b'<a href="#browser">' in page
+
+    tools = [{'id': 'a', 'name': 'A', 'category': 'x', 'usageCount': 1, 'features': []},
+             {'id': 'b', 'name': 'B', 'category': 'x', 'usageCount': 5, 'features': []}]
+    once = prerender_tools(PAGE, tools, {'x': 'X'})
+    assert once.count(b'data-prerendered') == 1
+    assert prerender_tools(once, tools, {'x': 'X'}) == once
+    assert once.index(b'data-tool-id="b"') < once.index(b'data-tool-id="a"')
+
+
+def test_stage_writes_route_pages_and_measures(tmp_path):
+    out = tmp_path / 'stage'
+    report = stage(['index.html'], '.', str(out))
+    entry = report['pages']['index.html']
+    assert entry['tools'] > 0 and entry['routes']['browser'] == 'browser.html'
+    assert report['files'] == sorted(entry['routes'].values())
+    browser = (out / 'browser.html').read_bytes()
+    assert b'data-route="browser"' in browser and b'data-prerendered' in browser
+    assert b'data-route=' not in (out / 'index.html').read_bytes()
+
+    result = measure(['index.html'], '.', str(out), runs=1)['index.html']
+    assert not result['before']['prerendered'] and result['after']['prerendered']
+    assert result['after']['requests'] < result['before']['requests']
@@ -0,0 +1,52 @@
+"""site_build 的测试：拆分后原样重建、增量构建、冲突检测和循环引用"""
+
+import shutil
+
+import pytest
+
+from site_build import BuildError, SiteBuild, split
+
+
+def test_split_roundtrip_and_incremental(tmp_path):
+    shutil.copy('index.html', tmp_path / 'index.html')
+    original = (tmp_path / 'index.html').read_bytes()
+    src = tmp_path / 'site'
+    state = str(tmp_path / 'state.json')
+
+    split(str(tmp_path / 'index.html'), str(src), state)
+    template = (src / 'pages' / 'index.html').read_text(encoding='utf-8')
+    assert '<!-- @include partials/index/nav-navbar.html -->' in template
+    assert '<!-- @scripts partials/index/scripts-1.json -->' in template
+
+    builder = SiteBuild(str(src), str(tmp_path), state)
+    report = builder.build()
+    assert report['written'] == [] and report['conflicts'] == []
+    assert (tmp_path / 'index.html').read_bytes() == original
+    assert builder.build()['unchanged'] == ['pages/index.html']
+
+    nav = src / 'partials' / 'index' / 'nav-navbar.html'
+    nav.write_text(nav.read_text(encoding='utf-8').replace('navbar', 'navbar top'), encoding='utf-8')
+    report = builder.build()
+    assert report['rendered'] == ['pages/index.html'] and report['ms'] < 100
+    assert b'navbar top' in (tmp_path / 'index.html').read_bytes()
+
+    # 输出被直接修改后不覆盖，--force 才覆盖
+    (tmp_path / 'index.html').write_bytes(original)
+    nav.write_text(nav.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+    assert builder.build()['conflicts'] == [str(tmp_path / 'index.html')]
+    assert (tmp_path / 'index.html').read_bytes() == original
+    assert builder.build(force=True)['written'] == [str(tmp_path / 'index.html')]
+    assert (tmp_path / 'index.html').read_bytes() != original
+
+
+def test_include_cycle_is_an_error(tmp_path):
+    (tmp_path / 'pages').mkdir()
+    (tmp_path / 'partials').mkdir()
+    (tmp_path / 'pages' / 'a.html').write_text('<p><!-- @include partials/b.html --></p>', encoding='utf-8')
+    (tmp_path / 'partials' / 'b.html').write_text('<!-- @include partials/c.html -->', encoding='utf-8')
+    (tmp_path / 'partials' / 'c.html').write_text('<!-- @include partials/b.html -->', encoding='utf-8')
+    builder = SiteBuild(str(tmp_path), str(tmp_path / 'out'), str(tmp_path / 'state.json'))
+    report = builder.build()
+    assert len(report['errors']) == 1 and 'partials/b.html -> partials/c.html -> partials/b.html' in report['errors'][0]
+    with pytest.raises(BuildError):
+        builder.render('pages/missing.html', {})
@@ -0,0 +1,30 @@
+"""synthetic_data 和 db_loadtest 的测试：在任意目录生成 sqlite 数据库、统计合成用户数"""
+
+import sqlite3
+
+import pytest
+
+import synthetic_data
+from db_loadtest import count_users
+
+
+def test_sqlite_output_from_another_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert synthetic_data.main(['--users', '37', '--format', 'sqlite', '--out', 'load.sqlite3',
+                                '--sessions', '1', '--downloads', '1']) == 0
+    conn = sqlite3.connect(str(tmp_path / 'load.sqlite3'))
+    assert count_users(conn) == 37
+    conn.execute('DELETE FROM users WHERE username LIKE ?', ('user%',))
+    assert count_users(conn) == 0
+
+
+def test_failed_load_leaves_no_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def fail(*args):
+        raise RuntimeError('磁盘已满')
+
+    monkeypatch.setattr(synthetic_data, 'load_sqlite', fail)
+    with pytest.raises(RuntimeError):
+        synthetic_data.main(['--users', '5', '--format', 'sqlite', '--out', 'load.sqlite3'])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,83 @@
+"""telemetry_collector 的测试：草图精度、上报接口和汇总文件"""
+
+import json
+import random
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+import pytest
+
+from performance_test import percentile
+from telemetry_collector import (QuantileSketch, TelemetryStore, flush, load_rollups, start_in_thread,
+                                 summarize)
+
+
+def beacon(page='/', load=1500.0, resources=()):
+    return {'v': 1, 'page': page,
+            'nav': {'ttfb': 100.0, 'domContentLoaded': load / 2, 'load': load, 'size': 4000},
+            'resources': [{'name': name, 'type': 'script', 'duration': duration, 'size': 1000}
+                          for name, duration in resources]}
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(6, 1) for _ in range(20000)]
+    a, b = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        (a if i % 2 else b).add(value)
+    merged = QuantileSketch.from_dict(json.loads(json.dumps(a.merge(b).to_dict())))
+    assert merged.count == len(values)
+    for pct in (50, 95, 99):
+        exact = percentile(values, pct)
+        assert merged.quantile(pct / 100) == pytest.approx(exact, rel=0.03)
+    assert len(merged.buckets) < 1000
+
+
+def test_beacons_are_aggregated_and_flushed(tmp_path):
+    store = TelemetryStore()
+    server, base = start_in_thread(store)
+    try:
+        batch = [beacon('/index.html', 1000 + i, [('https://cdn.example.com/lib.js?v=%d' % i, 300 + i)])
+                 for i in range(50)]
+        request = urllib.request.Request(base + 'beacon', data=json.dumps(batch).encode('utf-8'),
+                                         headers={'Content-Type': 'text/plain'})
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 204
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(urllib.request.Request(base + 'beacon', data=b'{"nav": {}}'))
+        assert e.value.code == 400
+        with urllib.request.urlopen(base + 'stats') as response:
+            stats = json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert stats['beacons'] == 50
+    assert stats['pages']['/']['views'] == 50
+    assert stats['slowest_resources'][0]['name'] == 'https://cdn.example.com/lib.js'
+    assert stats['slowest_resources'][0]['count'] == 50
+
+    when = datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc)
+    path = flush(store, tmp_path, when)
+    store.add_beacon(beacon('/', 5000, [('https://example.com/app.js', 900)]))
+    assert flush(store, tmp_path, when) == path
+    assert flush(store, tmp_path, when) is None
+
+    merged, files = load_rollups(tmp_path, hours=2, now=when)
+    summary = summarize(merged, top=1)
+    assert files == 1
+    assert summary['beacons'] == 51
+    assert summary['pages']['/']['load']['p95'] == pytest.approx(1048, rel=0.02)
+    assert summary['slowest_resources'][0]['name'] == 'https://example.com/app.js'
+    assert load_rollups(tmp_path, hours=1, now=datetime(2025, 1, 1, 12, tzinfo=timezone.utc))[1] == 0
+
+
+def test_sizes_are_not_capped_like_timings():
+    store = TelemetryStore()
+    store.add_beacon({'page': '/', 'nav': {'load': 900, 'size': 900000},
+                      'resources': [{'name': 'https://example.com/big.js', 'duration': 50, 'size': 700000},
+                                    {'name': 'https://example.com/bad.js', 'duration': 50, 'size': -1}]})
+    assert store.pages['/']['bytes'] == 900000
+    assert store.resources['https://example.com/big.js']['bytes'] == 700000
+    assert store.resources['https://example.com/bad.js']['bytes'] == 0
@@ -0,0 +1,113 @@
+"""vendor_deps 的测试，用内存中的假CDN代替网络"""
+
+import pytest
+
+import deploy_prep
+from deploy_prep import sri_hash
+from vendor_deps import LOCK_FILE, Fetcher, VendorError, vendor
+
+FA = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css'
+SUPABASE = 'https://cdn.jsdelivr.net/npm/@supabase/supabase-js@2.45.1/dist/umd/supabase.min.js'
+FONTS = 'https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap'
+UNPINNED = 'https://cdn.jsdelivr.net/npm/marked/marked.min.js'
+
+CDN = {
+    FA: ('/*! Font Awesome Free 6.0.0 */'
+         '.fa,.fas{font-family:"Font Awesome 6 Free";font-weight:900}'
+         '.fab{font-family:"Font Awesome 6 Brands";font-weight:400}'
+         '.fa-spin{animation:fa-spin 2s infinite linear}'
+         '.fa-tools:before{content:"\\f7d9"}.fa-bars:before{content:"\\f0c9"}'
+         '.fa-github:before{content:"\\f09b"}.fa-zzz:before,.fa-sleep:before{content:"\\f880"}'
+         '@font-face{font-family:"Font Awesome 6 Brands";font-weight:400;'
+         'src:url(../webfonts/fa-brands-400.woff2) format("woff2"),url(../webfonts/fa-brands-400.ttf) format("truetype")}'
+         '@font-face{font-family:"Font Awesome 6 Free";font-weight:900;'
+         'src:url(../webfonts/fa-solid-900.woff2) format("woff2"),url(../webfonts/fa-solid-900.ttf) format("truetype")}'
+         ).encode('utf-8'),
+    'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/fa-solid-900.woff2': b'solid' * 1000,
+    'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/fa-brands-400.woff2': b'brands' * 1000,
+    SUPABASE: b'window.supabase = {};',
+    FONTS: ("/* cyrillic */\n@font-face{font-family:'Inter';src:url(https://fonts.gstatic.com/s/inter/v13/cyr.woff2) "
+            "format('woff2');unicode-range:U+0400-045F}\n/* latin */\n@font-face{font-family:'Inter';"
+            "src:url(https://fonts.gstatic.com/s/inter/v13/latin.woff2) format('woff2');"
+            "unicode-range:U+0000-00FF, U+2000-206F}\n").encode('utf-8'),
+    'https://fonts.gstatic.com/s/inter/v13/latin.woff2': b'latin' * 500,
+}
+
+
+def test_vendor_rewrites_trims_and_works_offline(tmp_path):
+    site = tmp_path / 'site'
+    (site / 'js').mkdir(parents=True)
+    (site / 'js' / 'app.js').write_text("menu.innerHTML = '<i class=\"fas fa-bars\"></i>';", encoding='utf-8')
+    (site / 'index.html').write_text(
+        '<html><head>\n'
+        '    <link rel="preconnect" href="https://fonts.gstatic.com">\n'
+        f'    <link rel="stylesheet" href="{FA}">\n'
+        f'    <link href="{FONTS.replace("&", "&amp;")}" rel="stylesheet">\n'
+        '</head><body><i class="fas fa-tools"></i>\n'
+        f'<script src="{SUPABASE}" defer></script>\n'
+        f'<script src="{UNPINNED}"></script>\n'
+        '<script src="js/app.js"></script></body></html>', encoding='utf-8')
+    requested = []
+
+    def fetch(url):
+        requested.append(url)
+        return CDN[url]
+
+    report = vendor([str(site / 'index.html')], str(site), fetch=fetch)
+    page = (site / 'index.html').read_text(encoding='utf-8')
+    css = (site / 'vendor' / 'font-awesome@6.0.0' / 'css' / 'all.min.css').read_text(encoding='utf-8')
+
+    assert 'https://cdnjs' not in page and 'fonts.googleapis' not in page and 'preconnect' not in page
+    assert f'src="vendor/npm/@supabase/supabase-js@2.45.1/dist/umd/supabase.min.js" defer ' \
+           f'integrity="{sri_hash(CDN[SUPABASE])}"' in page
+    assert f'integrity="{sri_hash(css.encode("utf-8"))}"' in page
+    assert UNPINNED in page and report['unpinned'] == [UNPINNED]
+    assert '.fa-tools:before' in css and '.fa-bars:before' in css and '.fa-spin' in css
+    assert 'fa-github' not in css and 'fa-zzz' not in css and 'fa-brands-400' not in css
+    assert 'Font Awesome Free 6.0.0' in css and '.ttf' not in css
+    assert (site / 'vendor' / 'font-awesome@6.0.0' / 'webfonts' / 'fa-solid-900.woff2').exists()
+    assert not (site / 'vendor' / 'font-awesome@6.0.0' / 'webfonts' / 'fa-brands-400.woff2').exists()
+    fonts_css = next((site / 'vendor' / 'google-fonts').glob('inter-*.css')).read_text(encoding='utf-8')
+    assert 'url(inter/v13/latin.woff2)' in fonts_css and 'cyr.woff2' not in fonts_css
+    assert report['origins_after'] == ['https://cdn.jsdelivr.net']
+    assert len(report['origins_before']) == 4
+    assert report['bytes_before'] > report['bytes_after']
+    assert not any(url.endswith('.ttf') for url in requested)
+
+    # 第二次运行完全使用缓存；缓存被删除后离线模式报错
+    report = vendor([str(site / 'index.html')], str(site), offline=True, fetch=None)
+    assert report['downloads'] == 0 and report['cache_hits'] == len(requested)
+    assert (site / 'index.html').read_text(encoding='utf-8') == page
+    for path in (site / 'vendor' / '.cache').iterdir():
+        path.unlink()
+    with pytest.raises(VendorError):
+        vendor([str(site / 'index.html')], str(site), offline=True)
+
+    # deploy_prep 改写CSS中的字体路径后重新计算 integrity
+    out = tmp_path / 'dist'
+    result = deploy_prep.build([str(site / 'index.html')], str(site), str(out), [], jobs=1)
+    deployed = (out / 'index.html').read_text(encoding='utf-8')
+    css_out = result['files']['vendor/font-awesome@6.0.0/css/all.min.css']['output']
+    assert f'integrity="{sri_hash((out / css_out).read_bytes())}"' in deployed
+
+
+def test_lock_pins_refetched_content(tmp_path):
+    cdn = {SUPABASE: b'window.supabase = {};'}
+    fetcher = Fetcher(str(tmp_path), fetch=lambda url: cdn[url])
+    assert fetcher.get(SUPABASE) == cdn[SUPABASE]
+    fetcher.save()
+    pinned = (tmp_path / LOCK_FILE).read_bytes()
+
+    # 缓存丢失后重新下载：内容未变时使用，上游被改过时报错且不改写 lock.json
+    for path in (tmp_path / '.cache').iterdir():
+        path.unlink()
+    assert Fetcher(str(tmp_path), fetch=lambda url: cdn[url]).get(SUPABASE) == cdn[SUPABASE]
+    for path in (tmp_path / '.cache').iterdir():
+        path.unlink()
+    cdn[SUPABASE] = b'window.supabase = evil;'
+    fetcher = Fetcher(str(tmp_path), fetch=lambda url: cdn[url])
+    with pytest.raises(VendorError):
+        fetcher.get(SUPABASE)
+    fetcher.save()
+    assert (tmp_path / LOCK_FILE).read_bytes() == pinned
+    assert not list((tmp_path / '.cache').iterdir())
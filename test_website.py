@@ -1,29 +1,29 @@
 #!/usr/bin/env python3
 # 测试网站是否能正常运行的脚本
 
-import http.server
-import socketserver
+import argparse
 import webbrowser
 import os
-import time
+
+import devserver
 
 PORT = 8000
 
-def start_server():
-    print(f"启动本地HTTP服务器在端口 {PORT}...")
+def start_server(port=PORT):
+    print(f"启动本地HTTP服务器在端口 {port}...")
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    Handler = http.server.SimpleHTTPRequestHandler
-    
+    # 多线程、keep-alive、压缩、ETag/304 和 Range 由 devserver 处理，
+    # 一个标签页占着连接时不会阻塞其他请求
     try:
-        with socketserver.TCPServer(("", PORT), Handler) as httpd:
-            print(f"服务器已启动: http://localhost:{PORT}")
+        with devserver.make_server('.', '', port) as httpd:
+            print(f"服务器已启动: http://localhost:{port}")
             print("\n请在浏览器中访问以上URL来测试网站。")
             print("按 Ctrl+C 停止服务器。")
             
             # 尝试自动打开浏览器
             try:
-                webbrowser.open(f"http://localhost:{PORT}")
+                webbrowser.open(f"http://localhost:{port}")
                 print("\n浏览器已自动打开。")
             except Exception as e:
                 print(f"\n无法自动打开浏览器: {e}")
@@ -33,9 +33,25 @@ def start_server():
         print("\n服务器已停止。")
     except OSError as e:
         print(f"\n错误: 无法启动服务器 - {e}")
-        print("可能是端口 {PORT} 已被占用。请尝试关闭占用该端口的程序，或修改脚本中的PORT变量。")
+        print(f"可能是端口 {port} 已被占用。请尝试关闭占用该端口的程序，或修改脚本中的PORT变量。")
 
 def main():
+    parser = argparse.ArgumentParser(description='网站测试工具')
+    parser.add_argument('--port', type=int, default=PORT, help='端口')
+    parser.add_argument('--bench', action='store_true', help='压测本地服务器并输出每秒请求数后退出')
+    parser.add_argument('--watch', action='store_true', help='监视文件变化，运行相关检查并自动刷新页面')
+    args = parser.parse_args()
+
+    if args.bench:
+        devserver.print_bench(devserver.bench())
+        return
+
+    if args.watch:
+        import dev_watch
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        dev_watch.main(['--port', str(args.port)])
+        return
+
     print("=" * 60)
     print("网站测试工具")
     print("=" * 60)
@@ -48,7 +64,7 @@ def main():
     print("\n" + "=" * 60)
     
     print("自动开始测试...")
-    start_server()
+    start_server(args.port)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
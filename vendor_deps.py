@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# 第三方CDN依赖本地化
+# 把页面从CDN引用的样式和脚本（Font Awesome、Google Fonts、jsdelivr/unpkg 上的 npm 包）
+# 下载到 vendor/，页面改为引用本地副本并加上 integrity（SRI）哈希：
+#   - 只接受写死版本号的URL（如 supabase-js@2.45.1），没有固定版本的引用保持不变并给出警告；
+#   - 下载内容缓存在 vendor/.cache/，vendor/lock.json 记录每个URL的 sha384，
+#     之后再运行完全使用缓存，--offline 时缓存缺失直接报错而不访问网络；
+#     缓存缺失或损坏时重新下载的内容必须与 lock.json 中的哈希一致，否则报错
+#     （确实要升级时删掉 lock.json 中对应的条目）；
+#   - Font Awesome 只保留站点用到的图标类（在页面、本地脚本和样式中查找 fa-xxx），
+#     没有用到 fab/far 时去掉 Brands/Regular 字体，字体只保留 woff2；
+#     安装了 fontTools 和 brotli 时字体再按保留的图标做子集；
+#   - Google Fonts 只保留 unicode-range 与站点用到的字符有交集的 @font-face。
+# 最后报告页面加载时去掉的第三方域名数和字节数。
+#
+# 用法:
+#     python vendor_deps.py                      # 处理 index.html
+#     python vendor_deps.py index.html debug_tools.html --offline
+#     python vendor_deps.py --check              # 只报告，不改写页面
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import sys
+import urllib.request
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+
+import optimize_media
+from deploy_prep import _resolve, _splice, _write_if_changed, css_references, page_references, sri_hash
+from html_tokenizer import STARTTAG, attr, tokenize_string
+from optimize_media import _add_attrs, used_characters
+
+VENDOR_DIR = 'vendor'
+CACHE_SUBDIR = '.cache'
+LOCK_FILE = 'lock.json'
+# 本地副本 -> 原CDN URL，页面改写后再次运行（如用到了新图标）时据此重新生成
+SOURCES_FILE = 'sources.json'
+# Google Fonts 按 User-Agent 返回不同格式，用现代浏览器的UA取得 woff2
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+TIMEOUT = 30
+
+# CDN URL -> 包名、版本和包内路径；version 必须是完整的版本号
+PACKAGES = [
+    ('font-awesome', re.compile(
+        r'^https://cdnjs\.cloudflare\.com/ajax/libs/font-awesome/(?P<version>\d+\.\d+\.\d+[\w.-]*)/(?P<path>css/[\w.-]+\.css)$')),
+    ('npm', re.compile(
+        r'^https://cdn\.jsdelivr\.net/npm/(?P<name>(?:@[\w.-]+/)?[\w.-]+)@(?P<version>\d+\.\d+\.\d+[\w.-]*)/(?P<path>[^?#]+)$')),
+    ('npm', re.compile(
+        r'^https://unpkg\.com/(?P<name>(?:@[\w.-]+/)?[\w.-]+)@(?P<version>\d+\.\d+\.\d+[\w.-]*)/(?P<path>[^?#]+)$')),
+    ('google-fonts', re.compile(r'^https://fonts\.googleapis\.com/css2?\?(?P<query>[^#]+)$')),
+]
+CDN_HOSTS = {'cdnjs.cloudflare.com', 'cdn.jsdelivr.net', 'unpkg.com', 'fonts.googleapis.com'}
+
+_ICON_CLASS = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*\b')
+_ICON_SELECTOR = re.compile(r'^\.(fa-[\w-]+)(?::{1,2}(?:before|after))?$')
+_ICON_DECLARATION = re.compile(r'^\s*(?:content|--fa(?:-[\w-]+)?)\s*:')
+_CSS_STRING_ESCAPE = re.compile(r'\\([0-9a-fA-F]{1,6})\s?')
+_FONT_STYLES = {'brands': ('fab', 'fa-brands'), 'regular': ('far', 'fa-regular')}
+
+
+class VendorError(Exception):
+    pass
+
+
+def origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+class Fetcher:
+    """带本地缓存的下载：缓存命中且 sha384 与 lock.json 一致时不访问网络"""
+
+    def __init__(self, vendor_dir=VENDOR_DIR, offline=False, fetch=None):
+        self.vendor_dir = vendor_dir
+        self.offline = offline
+        self.fetch = fetch or self._download
+        self.lock_path = os.path.join(vendor_dir, LOCK_FILE)
+        try:
+            with open(self.lock_path, 'r', encoding='utf-8') as f:
+                self.lock = json.load(f)
+        except (OSError, ValueError):
+            self.lock = {}
+        self.hits = 0
+        self.downloads = 0
+
+    @staticmethod
+    def _download(url):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            return response.read()
+
+    def get(self, url):
+        entry = self.lock.get(url)
+        if entry:
+            try:
+                with open(os.path.join(self.vendor_dir, *entry['file'].split('/')), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is not None and sri_hash(data) == entry['integrity']:
+                self.hits += 1
+                return data
+        if self.offline:
+            raise VendorError(f'离线模式下缓存中没有 {url}')
+        try:
+            data = self.fetch(url)
+        except OSError as e:
+            raise VendorError(f'下载失败 {url}: {e}') from e
+        if entry and sri_hash(data) != entry['integrity']:
+            raise VendorError(f'{url} 的内容与 {LOCK_FILE} 中记录的 {entry["integrity"]} 不一致'
+                              f'（确实要更新时删掉 {LOCK_FILE} 中的这一项）')
+        ext = posixpath.splitext(urlsplit(url).path)[1] or '.css'
+        name = f'{CACHE_SUBDIR}/{hashlib.sha256(url.encode("utf-8")).hexdigest()[:20]}{ext}'
+        _write_if_changed(os.path.join(self.vendor_dir, *name.split('/')), data)
+        self.downloads += 1
+        if entry:
+            return data
+        self.lock[url] = {'file': name, 'integrity': sri_hash(data), 'bytes': len(data),
+                          'fetched': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        return data
+
+    def save(self):
+        data = json.dumps(dict(sorted(self.lock.items())), ensure_ascii=False, indent=1).encode('utf-8')
+        _write_if_changed(self.lock_path, data + b'\n')
+
+
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def split_rules(css):
+    """把CSS拆成顶层规则 [(前导部分, 块内容)]
+
+    @charset/@import 这类语句的块内容为 None；规则前面的注释留在前导部分。
+    """
+    rules = []
+    start = i = depth = block_start = 0
+    n = len(css)
+    while i < n:
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif css[i] in '"\'':
+            i = _skip_string(css, i)
+        elif css[i] == '{':
+            if depth == 0:
+                block_start = i
+            depth += 1
+            i += 1
+        elif css[i] == '}':
+            depth -= 1
+            i += 1
+            if depth == 0:
+                rules.append((css[start:block_start], css[block_start + 1:i - 1]))
+                start = i
+        elif css[i] == ';' and depth == 0:
+            i += 1
+            rules.append((css[start:i], None))
+            start = i
+        else:
+            i += 1
+    if start < n:
+        rules.append((css[start:], None))
+    return rules
+
+
+def join_rules(rules):
+    return ''.join(prelude if block is None else f'{prelude}{{{block}}}' for prelude, block in rules)
+
+
+def _comments(prelude):
+    """规则被删除时保留它前面的注释（许可证声明一般在文件开头）"""
+    return ''.join(re.findall(r'/\*[\s\S]*?\*/', prelude))
+
+
+def _strip_comments(text):
+    return re.sub(r'/\*[\s\S]*?\*/', '', text)
+
+
+def _codepoints(block):
+    """content/--fa 中字符串的码位"""
+    points = set()
+    for m in re.finditer(r'"((?:[^"\\]|\\.)*)"', block):
+        text = _CSS_STRING_ESCAPE.sub(lambda e: chr(int(e.group(1), 16)), m.group(1))
+        points.update(ord(c) for c in text)
+    return points
+
+
+def _woff2_only(block):
+    """@font-face 的 src 只保留 woff2（所有支持 SRI 的浏览器都支持 woff2）"""
+    def keep(m):
+        sources = [part for part in re.split(r',(?![^(]*\))', m.group(1)) if 'woff2' in part]
+        return 'src:' + ','.join(sources) if sources else m.group(0)
+    return re.sub(r'src:([^;}]+)', keep, block)
+
+
+def fontawesome_usage(texts):
+    """站点用到的 fa-xxx 类和需要的字体样式（solid/brands/regular/v4compatibility）"""
+    icons = set()
+    styles = set()
+    for text in texts:
+        icons.update(_ICON_CLASS.findall(text))
+        for style, classes in _FONT_STYLES.items():
+            if re.search(r'(?<![\w-])(?:' + '|'.join(classes) + r')(?![\w-])', text):
+                styles.add(style)
+        if 'FontAwesome' in text:
+            styles.add('v4compatibility')
+    if icons:
+        styles.add('solid')
+    return icons, styles
+
+
+def trim_fontawesome(css, icons, styles):
+    """删除没用到的图标规则和字体，返回 (CSS, 保留的图标数, 删除的图标数, 保留图标的码位)"""
+    out = []
+    kept = removed = 0
+    points = set()
+    for prelude, block in split_rules(css):
+        head = _strip_comments(prelude).strip()
+        if block is None:
+            out.append((prelude, None))
+            continue
+        if head.startswith('@font-face'):
+            m = re.search(r'fa-([a-z0-9]+)-\d+\.', block)
+            if m and m.group(1) not in styles:
+                out.append((_comments(prelude), None))
+            else:
+                out.append((prelude, _woff2_only(block)))
+            continue
+        selectors = [part.strip() for part in head.split(',')]
+        matches = [_ICON_SELECTOR.match(part) for part in selectors]
+        declarations = [d for d in block.split(';') if d.strip()]
+        if not (head and all(matches) and declarations and all(_ICON_DECLARATION.match(d) for d in declarations)):
+            out.append((prelude, block))
+            continue
+        used = [part for part, m in zip(selectors, matches) if m.group(1) in icons]
+        if used:
+            kept += 1
+            points.update(_codepoints(block))
+            out.append((_comments(prelude) + ','.join(used), block))
+        else:
+            removed += 1
+            out.append((_comments(prelude), None))
+    return join_rules(out), kept, removed, points
+
+
+def _unicode_ranges(block):
+    m = re.search(r'unicode-range:([^;}]+)', block)
+    if not m:
+        return None
+    ranges = []
+    for part in m.group(1).split(','):
+        part = part.strip().upper().replace('U+', '')
+        if '?' in part:
+            lo, hi = int(part.replace('?', '0'), 16), int(part.replace('?', 'F'), 16)
+        elif '-' in part:
+            lo, hi = (int(x, 16) for x in part.split('-'))
+        else:
+            lo = hi = int(part, 16)
+        ranges.append((lo, hi))
+    return ranges
+
+
+def trim_google_fonts(css, characters):
+    """只保留 unicode-range 覆盖到站点字符的 @font-face，返回 (CSS, 保留数, 删除数)"""
+    points = {ord(c) for c in characters}
+    out = []
+    kept = removed = 0
+    for prelude, block in split_rules(css):
+        if block is not None and _strip_comments(prelude).strip() == '@font-face':
+            ranges = _unicode_ranges(block)
+            if ranges and not any(lo <= p <= hi for p in points for lo, hi in ranges):
+                removed += 1
+                continue
+            kept += 1
+        out.append((prelude, block))
+    return join_rules(out), kept, removed
+
+
+class Vendorer:
+    """下载并改写一组CDN引用，vendored 记录 URL -> 站点内路径"""
+
+    def __init__(self, fetcher, site_root='.', vendor_dir=VENDOR_DIR):
+        self.fetcher = fetcher
+        self.site_root = site_root
+        self.vendor_dir = vendor_dir
+        self.vendored = {}
+        self.results = []
+
+    def _write(self, rel, data):
+        """写入 vendor/ 下的文件，返回站点根目录下的相对路径"""
+        _write_if_changed(os.path.join(self.vendor_dir, *rel.split('/')), data)
+        return posixpath.join(os.path.relpath(self.vendor_dir, self.site_root).replace(os.sep, '/'), rel)
+
+    def _subresources(self, css, css_url, base_rel):
+        """下载CSS引用的字体（保持包内相对位置），返回 [(URL, vendor/ 下的路径, 数据)]"""
+        files = []
+        for _, ref in css_references(css):
+            url = urljoin(css_url, ref)
+            rel = posixpath.normpath(posixpath.join(posixpath.dirname(base_rel), ref))
+            files.append((url, rel, self.fetcher.get(url)))
+        return files
+
+    def npm(self, url, m):
+        data = self.fetcher.get(url)
+        rel = f'npm/{m.group("name")}@{m.group("version")}/{m.group("path")}'
+        local = self._write(rel, data)
+        return {'local': local, 'data': data, 'before': len(data), 'after': len(data), 'origins': {origin(url)}}
+
+    def font_awesome(self, url, m, icons, styles):
+        original = self.fetcher.get(url).decode('utf-8')
+        css, kept, removed, points = trim_fontawesome(original, icons, styles)
+        rel = f'font-awesome@{m.group("version")}/{m.group("path")}'
+        before = len(original.encode('utf-8'))
+        after = len(css.encode('utf-8'))
+        origins = {origin(url)}
+        for font_url, font_rel, font in self._subresources(css, url, rel):
+            before += len(font)
+            origins.add(origin(font_url))
+            font = self._subset_icons(font_url, font, points)
+            after += len(font)
+            self._write(font_rel, font)
+        data = css.encode('utf-8')
+        local = self._write(rel, data)
+        return {'local': local, 'data': data, 'before': before, 'after': after, 'origins': origins,
+                'note': f'保留 {kept} 个图标规则，删除 {removed} 个'}
+
+    def _subset_icons(self, url, font, points):
+        """安装了 fontTools 和 brotli 时把图标字体子集化到保留的码位"""
+        if optimize_media.font_subset is None or optimize_media.brotli is None or not url.endswith('.woff2'):
+            return font
+        entry = self.fetcher.lock[url]
+        source = os.path.join(self.vendor_dir, *entry['file'].split('/'))
+        result = optimize_media.subset_font(source, hashlib.sha256(font).hexdigest(),
+                                            ''.join(chr(p) for p in sorted(points)), optimize_media.BLOB_DIR)
+        with open(os.path.join(result['dir'], result['file']), 'rb') as f:
+            return f.read()
+
+    def google_fonts(self, url, m, characters):
+        original = self.fetcher.get(url).decode('utf-8')
+        css, kept, removed = trim_google_fonts(original, characters)
+        family = re.search(r'family=([^:&]+)', m.group('query'))
+        slug = re.sub(r'\W+', '-', (family.group(1) if family else 'fonts').replace('+', ' ')).strip('-').lower()
+        rel = f'google-fonts/{slug}-{hashlib.sha256(url.encode("utf-8")).hexdigest()[:8]}.css'
+        before = len(original.encode('utf-8'))
+        origins = {origin(url)}
+        replacements = []
+        after = 0
+        for span, ref in css_references(css):
+            font_url = urljoin(url, ref)
+            font = self.fetcher.get(font_url)
+            path = urlsplit(font_url).path
+            font_rel = 'google-fonts/' + (path.split('/s/', 1)[1] if '/s/' in path else path.lstrip('/'))
+            self._write(font_rel, font)
+            origins.add(origin(font_url))
+            before += len(font)
+            after += len(font)
+            replacements.append((span, posixpath.relpath(font_rel, posixpath.dirname(rel))))
+        data = _splice(css, replacements).encode('utf-8')
+        after += len(data)
+        local = self._write(rel, data)
+        return {'local': local, 'data': data, 'before': before, 'after': after, 'origins': origins,
+                'note': f'保留 {kept} 个 @font-face，删除 {removed} 个'}
+
+    def vendor(self, url, icons, styles, characters):
+        if url in self.vendored:
+            return self.vendored[url]
+        for kind, pattern in PACKAGES:
+            m = pattern.match(url)
+            if not m:
+                continue
+            if kind == 'font-awesome':
+                result = self.font_awesome(url, m, icons, styles)
+            elif kind == 'google-fonts':
+                result = self.google_fonts(url, m, characters)
+            else:
+                result = self.npm(url, m)
+            result.update(url=url, integrity=sri_hash(result.pop('data')))
+            self.results.append(result)
+            self.vendored[url] = result
+            return result
+        return None
+
+
+def _dependency_refs(data, rel, sources):
+    """页面中的外部样式、脚本、preconnect/dns-prefetch，以及已经换成本地副本的引用
+
+    返回 [(标签, URL属性名, URL)]，本地副本给出原来的CDN URL。
+    """
+    base = posixpath.dirname(rel)
+    refs = []
+    for token in tokenize_string(data):
+        if token.kind != STARTTAG or token.name not in ('link', 'script'):
+            continue
+        name = 'href' if token.name == 'link' else 'src'
+        url = html.unescape(attr(token, name) or '')
+        if url.startswith('//'):
+            url = 'https:' + url
+        if url.startswith(('http://', 'https://')):
+            refs.append((token, name, url))
+        elif url and _resolve(base, url) in sources:
+            refs.append((token, name, sources[_resolve(base, url)]))
+    return refs
+
+
+def rewrite_page(data, rel, vendored, removed_origins, sources):
+    """引用改成本地副本并写上 integrity，去掉指向已不再使用的域名的 preconnect/dns-prefetch"""
+    base = posixpath.dirname(rel)
+    replacements = []
+    for token, name, url in _dependency_refs(data, rel, sources):
+        rels = set((attr(token, 'rel') or '').lower().split())
+        if rels & {'preconnect', 'dns-prefetch'}:
+            if origin(url) in removed_origins:
+                end = token.end
+                while data[end:end + 1] in (b' ', b'\t'):
+                    end += 1
+                if data[end:end + 1] == b'\n':
+                    end += 1
+                replacements.append(((token.offset, end), b''))
+            continue
+        result = vendored.get(url)
+        if not result:
+            continue
+        tag = data[token.offset:token.end].decode('utf-8')
+        local = posixpath.relpath(result['local'], base or '.')
+        new_tag = re.sub(r'(\s' + name + r'\s*=\s*)(?:"[^"]*"|\'[^\']*\'|[^\s>]+)',
+                         lambda m: f'{m.group(1)}"{local}"', tag, count=1, flags=re.I)
+        if attr(token, 'integrity') is None:
+            new_tag = _add_attrs(new_tag, [('integrity', result['integrity'])])
+        else:
+            new_tag = re.sub(r'(\sintegrity\s*=\s*)(?:"[^"]*"|\'[^\']*\'|[^\s>]+)',
+                             lambda m: f'{m.group(1)}"{result["integrity"]}"', new_tag, count=1, flags=re.I)
+        replacements.append(((token.offset, token.end), new_tag.encode('utf-8')))
+    return _splice(data, replacements)
+
+
+def _site_texts(pages, site_root, sources):
+    """页面和它们引用的本地脚本、样式（不含本地副本）的文本，用来查找用到的图标类"""
+    texts = []
+    seen = set()
+    for page in pages:
+        with open(page, 'rb') as f:
+            data = f.read()
+        texts.append(data.decode('utf-8', errors='replace'))
+        base = posixpath.dirname(os.path.relpath(page, site_root).replace(os.sep, '/'))
+        for _, name, value, _ in page_references(data):
+            target = _resolve(base, value) if name in ('src', 'href') else None
+            if not target or target in seen or target in sources or not target.endswith(('.js', '.css')):
+                continue
+            path = os.path.join(site_root, *target.split('/'))
+            if not os.path.exists(path):
+                continue
+            seen.add(target)
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                texts.append(f.read())
+    return texts
+
+
+def vendor(pages, site_root='.', vendor_dir=None, offline=False, check=False, fetch=None):
+    """处理页面中的CDN引用，返回报告；vendor_dir 默认为站点根目录下的 vendor/"""
+    vendor_dir = vendor_dir or os.path.join(site_root, VENDOR_DIR)
+    fetcher = Fetcher(vendor_dir, offline, fetch)
+    sources_path = os.path.join(vendor_dir, SOURCES_FILE)
+    try:
+        with open(sources_path, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+    except (OSError, ValueError):
+        sources = {}
+    vendorer = Vendorer(fetcher, site_root, vendor_dir)
+    icons, styles = fontawesome_usage(_site_texts(pages, site_root, sources))
+    characters = used_characters(pages, site_root)
+    report = {'pages': {}, 'dependencies': vendorer.results, 'unpinned': [], 'remaining': []}
+    page_data = {}
+    origins_before, origins_after = set(), set()
+
+    for page in pages:
+        rel = os.path.relpath(page, site_root).replace(os.sep, '/')
+        with open(page, 'rb') as f:
+            page_data[rel] = f.read()
+        for token, _, url in _dependency_refs(page_data[rel], rel, sources):
+            rels = set((attr(token, 'rel') or '').lower().split())
+            if token.name == 'link' and not rels & {'stylesheet', 'preload', 'modulepreload'}:
+                continue
+            result = vendorer.vendor(url, icons, styles, characters)
+            if result:
+                origins_before.update(result['origins'])
+                continue
+            origins_before.add(origin(url))
+            origins_after.add(origin(url))
+            if urlsplit(url).hostname in CDN_HOSTS:
+                report['unpinned'].append(url)
+            else:
+                report['remaining'].append(url)
+    fetcher.save()
+    sources.update({result['local']: url for url, result in vendorer.vendored.items()})
+    _write_if_changed(sources_path, json.dumps(dict(sorted(sources.items())), indent=1).encode('utf-8') + b'\n')
+
+    removed = origins_before - origins_after
+    for rel, data in page_data.items():
+        new_data = rewrite_page(data, rel, vendorer.vendored, removed, sources)
+        report['pages'][rel] = new_data != data
+        if new_data != data and not check:
+            _write_if_changed(os.path.join(site_root, *rel.split('/')), new_data)
+
+    report.update(
+        origins_before=sorted(origins_before),
+        origins_after=sorted(origins_after),
+        bytes_before=sum(r['before'] for r in vendorer.results),
+        bytes_after=sum(r['after'] for r in vendorer.results),
+        cache_hits=fetcher.hits,
+        downloads=fetcher.downloads,
+        icons=len(icons),
+        checked=check,
+    )
+    return report
+
+
+def print_report(report):
+    for r in report['dependencies']:
+        line = f'{r["url"]}\n    -> {r["local"]}  {r["before"] / 1024:.1f} KB -> {r["after"] / 1024:.1f} KB'
+        if r.get('note'):
+            line += f'（{r["note"]}）'
+        print(line)
+    for url in report['unpinned']:
+        print(f'警告: 没有固定版本或无法识别的CDN引用，未处理: {url}')
+    for url in report['remaining']:
+        print(f'保留第三方引用: {url}')
+    before, after = report['origins_before'], report['origins_after']
+    print(f'\n页面加载涉及的第三方域名: {len(before)} -> {len(after)}'
+          + (f'（去掉 {", ".join(sorted(set(before) - set(after)))}）' if set(before) - set(after) else ''))
+    print(f'第三方字节: {report["bytes_before"] / 1024:.1f} KB 移出关键路径，'
+          f'自托管副本 {report["bytes_after"] / 1024:.1f} KB')
+    print(f'缓存命中 {report["cache_hits"]} 个，下载 {report["downloads"]} 个；站点用到 {report["icons"]} 个 fa- 类')
+    changed = [rel for rel, changed in report['pages'].items() if changed]
+    if changed:
+        print(('需要改写的页面: ' if report['checked'] else '已改写页面: ') + ', '.join(changed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把CDN依赖下载到 vendor/ 并改为引用本地副本')
+    parser.add_argument('pages', nargs='*', default=['index.html'], help='要处理的页面')
+    parser.add_argument('--root', default='.', help='站点根目录')
+    parser.add_argument('--vendor', help='本地副本和缓存目录（默认为站点根目录下的 vendor/）')
+    parser.add_argument('--offline', action='store_true', help='只使用缓存，不访问网络')
+    parser.add_argument('--check', action='store_true', help='只报告，不改写页面')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args(argv)
+
+    try:
+        report = vendor(args.pages, args.root, args.vendor, args.offline, args.check)
+    except VendorError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['unpinned'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())